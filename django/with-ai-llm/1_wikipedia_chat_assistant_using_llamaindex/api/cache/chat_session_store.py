@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Set
+
+from django.conf import settings
+from llama_index.core import VectorStoreIndex
+
+if TYPE_CHECKING:
+    from api.services.react_agent_service import ReActAgentService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChatSession:
+    """
+    Per-conversation state kept between turns: the index built from the pages of the conversation and the agent
+    holding the chat memory
+    """
+
+    index: VectorStoreIndex
+    agent_service: "ReActAgentService"
+    titles: List[str] = field(default_factory=list)
+    # Titles already looked up for this conversation (casefolded), so follow-ups only fetch pages of new topics
+    requested_titles: Set[str] = field(default_factory=set)
+    size_bytes: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+    # Turns of the same conversation share the agent memory, so they are answered one at a time
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @asynccontextmanager
+    async def alock(self, poll_seconds: float = 0.005) -> AsyncIterator[None]:
+        """
+        Hold the session lock in a coroutine, polling for it while a concurrent turn holds it (the streamed turns hold
+        the lock from a thread, so it cannot be an asyncio lock). A cancelled wait never owns the lock.
+
+        Args:
+            poll_seconds (float): Seconds to sleep between two attempts to take the lock
+
+        Returns:
+            AsyncIterator[None]: Context holding the lock
+        """
+        while not self.lock.acquire(blocking=False):
+            await asyncio.sleep(poll_seconds)
+
+        try:
+            yield
+        finally:
+            self.lock.release()
+
+
+class ChatSessionStore:
+    """
+    In-memory LRU store of chat sessions, bounded by number of sessions and estimated memory, with an idle timeout.
+
+    Sessions hold live LlamaIndex objects, so they stay in the worker process that created them: a load balancer
+    should keep a conversation on the same worker (e.g. by hashing the session id).
+    """
+
+    _instance: Optional["ChatSessionStore"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_sessions: int = 100,
+        max_bytes: int = 256 * 1024 * 1024,
+        idle_timeout_seconds: int = 1800,
+    ) -> None:
+        """
+        Initialize the chat session store
+
+        Args:
+            max_sessions (int): Maximum number of sessions kept before evicting the least recently used ones
+            max_bytes (int): Maximum estimated memory of the sessions before evicting the least recently used ones
+            idle_timeout_seconds (int): Number of seconds after which an unused session is dropped
+        """
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._bytes = 0
+
+    @classmethod
+    def get_instance(cls) -> Optional["ChatSessionStore"]:
+        """
+        Get the process-wide chat session store configured in the Django settings
+
+        Returns:
+            Optional[ChatSessionStore]: Shared store instance, or None if sessions are disabled
+        """
+        config = settings.CHAT_SESSIONS
+        if not config["ENABLED"]:
+            return None
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    max_sessions=config["MAX_SESSIONS"],
+                    max_bytes=config["MAX_BYTES"],
+                    idle_timeout_seconds=config["IDLE_TIMEOUT_SECONDS"],
+                )
+
+        return cls._instance
+
+    @staticmethod
+    def estimate_bytes(index: VectorStoreIndex) -> int:
+        """
+        Estimate the memory held by a per-conversation index: node texts plus the embedding matrix
+
+        Args:
+            index (VectorStoreIndex): Index of the session
+
+        Returns:
+            int: Estimated size in bytes
+        """
+        size = sum(len(node.get_content().encode("utf-8")) for node in index.docstore.docs.values())
+        return size + getattr(index.vector_store, "nbytes", 0)
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """
+        Get the session of the given conversation, marking it as recently used
+
+        Args:
+            session_id (str): Conversation identifier
+
+        Returns:
+            Optional[ChatSession]: Session, or None if it is unknown or was evicted
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+
+            session = self._sessions.get(session_id)
+            if session is None:
+                self.misses += 1
+                return None
+
+            self._sessions.move_to_end(session_id)
+            session.last_used = now
+            self.hits += 1
+            return session
+
+    def put(self, session_id: str, session: ChatSession) -> None:
+        """
+        Store the session of the given conversation, evicting idle and least recently used sessions if needed
+
+        Args:
+            session_id (str): Conversation identifier
+            session (ChatSession): Session to store
+        """
+        with self._lock:
+            previous = self._sessions.pop(session_id, None)
+            if previous is not None:
+                self._bytes -= previous.size_bytes
+
+            session.last_used = time.monotonic()
+            self._sessions[session_id] = session
+            self._bytes += session.size_bytes
+
+            self._evict_idle(session.last_used)
+            self._evict_over_budget()
+
+    def resize(self, session_id: str, size_bytes: int) -> None:
+        """
+        Update the estimated memory of a session whose index grew, evicting least recently used sessions if needed
+
+        Args:
+            session_id (str): Conversation identifier
+            size_bytes (int): New estimated size of the session in bytes
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+
+            self._bytes += size_bytes - session.size_bytes
+            session.size_bytes = size_bytes
+            self._sessions.move_to_end(session_id)
+            self._evict_over_budget()
+
+    def delete(self, session_id: str) -> None:
+        """
+        Remove the session of the given conversation
+
+        Args:
+            session_id (str): Conversation identifier
+        """
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._bytes -= session.size_bytes
+
+    def clear(self) -> None:
+        """
+        Remove every session and reset the counters
+        """
+        with self._lock:
+            self._sessions.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the session store counters
+
+        Returns:
+            Dict[str, int]: Number of resumed and new conversations, evictions, live sessions and their estimated bytes
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+            }
+
+    def _evict_idle(self, now: float) -> None:
+        """
+        Drop the sessions unused for longer than the idle timeout (the caller must hold the lock)
+
+        Args:
+            now (float): Current monotonic time
+        """
+        # Sessions are ordered by last use, so the idle ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self.idle_timeout_seconds:
+                break
+
+            self._sessions.popitem(last=False)
+            self._drop(session_id, session, "idle")
+
+    def _evict_over_budget(self) -> None:
+        """
+        Drop the least recently used sessions while over the session count or memory budget (the caller must hold the
+        lock)
+        """
+        # The most recently used session is kept even if it alone is over the memory budget
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes
+        ):
+            evicted_id, evicted = self._sessions.popitem(last=False)
+            self._drop(evicted_id, evicted, "least recently used")
+
+    def _drop(self, session_id: str, session: ChatSession, reason: str) -> None:
+        """
+        Account for an evicted session (the caller must hold the lock)
+
+        Args:
+            session_id (str): Conversation identifier
+            session (ChatSession): Evicted session
+            reason (str): Why the session was evicted
+        """
+        self._bytes -= session.size_bytes
+        self.evictions += 1
+        logger.info(f"Evicted {reason} chat session {session_id}.")
@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Disk-backed, content-addressed cache of embeddings keyed by (embedding model, text hash)
+    """
+
+    _instance: Optional["EmbeddingCache"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, path: Path) -> None:
+        """
+        Initialize the embedding cache
+
+        Args:
+            path (Path): Path of the SQLite file backing the cache
+        """
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        # Embedding calls saved: every text served from the cache, counting the duplicates of a lookup
+        self.saved_calls = 0
+
+        # The connection is opened lazily and shared between threads behind a lock
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def get_instance(cls) -> Optional["EmbeddingCache"]:
+        """
+        Get the process-wide embedding cache configured in the Django settings
+
+        Returns:
+            Optional[EmbeddingCache]: Shared cache instance, or None if the cache is disabled
+        """
+        config = settings.EMBEDDING_CACHE
+        if not config["ENABLED"]:
+            return None
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(path=config["PATH"])
+
+        return cls._instance
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Get the cached embeddings of the given texts
+
+        Args:
+            model (str): Name of the embedding model
+            texts (List[str]): Texts to look up
+
+        Returns:
+            Dict[str, List[float]]: Cached embeddings keyed by text (texts not in the cache are left out)
+        """
+        embeddings: Dict[str, List[float]] = {}
+        if not texts:
+            return embeddings
+
+        with self._lock:
+            connection = self._connect()
+            for text in dict.fromkeys(texts):
+                row = connection.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND text_hash = ?",
+                    (model, self._hash(text)),
+                ).fetchone()
+
+                if row is None:
+                    self.misses += 1
+                    continue
+
+                embeddings[text] = np.frombuffer(row[0], dtype=np.float32).tolist()
+                self.hits += 1
+
+            self.saved_calls += sum(1 for text in texts if text in embeddings)
+
+        return embeddings
+
+    def set_many(self, model: str, embeddings: Dict[str, List[float]]) -> None:
+        """
+        Store the given embeddings
+
+        Args:
+            model (str): Name of the embedding model
+            embeddings (Dict[str, List[float]]): Embeddings keyed by text
+        """
+        if not embeddings:
+            return
+
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [
+                    (model, self._hash(text), np.asarray(vector, dtype=np.float32).tobytes())
+                    for text, vector in embeddings.items()
+                ],
+            )
+            connection.commit()
+
+    def clear(self) -> None:
+        """
+        Remove every cached embedding and reset the counters
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM embeddings")
+            connection.commit()
+            self.hits = 0
+            self.misses = 0
+            self.saved_calls = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache hit/miss counters and the embedding calls saved by the hits
+
+        Returns:
+            Dict[str, int]: Number of hits, misses, cached embeddings and embedding calls saved
+        """
+        with self._lock:
+            size = self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "size": size, "saved_calls": self.saved_calls}
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        """
+        Hash the given text to build its cache key
+
+        Args:
+            text (str): Text to hash
+
+        Returns:
+            str: SHA-256 hex digest of the text
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open the SQLite connection and create the schema on first use (the caller must hold the lock)
+
+        Returns:
+            sqlite3.Connection: Open connection to the cache file
+        """
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (model, text_hash)
+                )
+                """
+            )
+            logger.info(f"Embedding cache opened at {self.path}.")
+
+        return self._connection
@@ -0,0 +1,248 @@
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+@dataclass
+class CachedAnswer:
+    """
+    Answer stored in the semantic answer cache
+    """
+
+    query: str
+    answer: str
+    titles: List[str] = field(default_factory=list)
+    latency_seconds: float = 0.0
+    similarity: float = 1.0
+
+
+class SemanticAnswerCache:
+    """
+    In-memory LRU/TTL cache of answers looked up by the cosine similarity of the query embeddings.
+
+    Query embeddings are L2-normalized into one NumPy matrix, so a lookup is a single matrix-vector product.
+    The cache lives in the worker process: entries are small, and answers expire quickly anyway.
+
+    Queries about different entities can embed very closely ("capital of Austria" and "capital of Australia"), so a
+    similar query only reuses an answer if it names the same entities (capitalized words and numbers).
+    """
+
+    _instance: Optional["SemanticAnswerCache"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 1000,
+        ttl_seconds: int = 3600,
+    ) -> None:
+        """
+        Initialize the semantic answer cache
+
+        Args:
+            threshold (float): Minimum cosine similarity between two queries for one to reuse the other's answer
+            max_entries (int): Maximum number of answers kept before evicting the least recently used ones
+            ttl_seconds (int): Number of seconds a cached answer stays valid
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None
+        self._entries: List[Optional[CachedAnswer]] = [None] * max_entries
+        self._expires_at = np.zeros(max_entries)
+        self._accessed_at = np.zeros(max_entries)
+
+    @classmethod
+    def get_instance(cls) -> Optional["SemanticAnswerCache"]:
+        """
+        Get the process-wide semantic answer cache configured in the Django settings
+
+        Returns:
+            Optional[SemanticAnswerCache]: Shared cache instance, or None if the cache is disabled
+        """
+        config = settings.SEMANTIC_ANSWER_CACHE
+        if not config["ENABLED"]:
+            return None
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    threshold=config["THRESHOLD"],
+                    max_entries=config["MAX_ENTRIES"],
+                    ttl_seconds=config["TTL_SECONDS"],
+                )
+
+        return cls._instance
+
+    def get(self, embedding: List[float], query: Optional[str] = None) -> Optional[CachedAnswer]:
+        """
+        Get the cached answer of the most similar query, if it is similar enough and names the same entities
+
+        Args:
+            embedding (List[float]): Embedding of the incoming query
+            query (Optional[str]): Incoming query, compared with the cached queries (None to only compare embeddings)
+
+        Returns:
+            Optional[CachedAnswer]: Cached answer with the similarity of its query, or None on a miss
+        """
+        vector = self._normalize(embedding)
+        now = time.time()
+
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != len(vector):
+                self.misses += 1
+                return None
+
+            scores = self._matrix @ vector
+            scores[self._expires_at < now] = -np.inf
+            candidates = np.flatnonzero(scores >= self.threshold)
+            # Most similar query naming the same entities
+            row = next(
+                (
+                    int(row)
+                    for row in candidates[np.argsort(-scores[candidates])]
+                    if query is None or self.same_entities(query, self._entries[row].query)
+                ),
+                None,
+            )
+            if row is None:
+                self.misses += 1
+                return None
+
+            entry = self._entries[row]
+            self._accessed_at[row] = now
+            self.hits += 1
+            self.saved_seconds += entry.latency_seconds
+
+        logger.info(
+            f"Semantic answer cache hit for '{entry.query}' (similarity {scores[row]:.3f}), "
+            f"saved {entry.latency_seconds:.1f}s."
+        )
+        return CachedAnswer(
+            query=entry.query,
+            answer=entry.answer,
+            titles=entry.titles,
+            latency_seconds=entry.latency_seconds,
+            similarity=float(scores[row]),
+        )
+
+    def set(self, embedding: List[float], answer: CachedAnswer) -> None:
+        """
+        Store the answer of the given query, evicting the least recently used (or an expired) answer if needed
+
+        Args:
+            embedding (List[float]): Embedding of the query
+            answer (CachedAnswer): Answer, source titles and latency of the query
+        """
+        vector = self._normalize(embedding)
+        now = time.time()
+
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != len(vector):
+                # A new embedding model invalidates every cached answer
+                self._matrix = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+                self._entries = [None] * self.max_entries
+                self._expires_at[:] = 0
+                self._accessed_at[:] = 0
+
+            # Free and expired rows have the oldest access times once their expiry is taken into account
+            row = int(np.argmin(np.where(self._expires_at < now, -np.inf, self._accessed_at)))
+            self._matrix[row] = vector
+            self._entries[row] = answer
+            self._expires_at[row] = now + self.ttl_seconds
+            self._accessed_at[row] = now
+
+    def clear(self) -> None:
+        """
+        Remove every cached answer and reset the counters
+        """
+        with self._lock:
+            self._matrix = None
+            self._entries = [None] * self.max_entries
+            self._expires_at[:] = 0
+            self._accessed_at[:] = 0
+            self.hits = 0
+            self.misses = 0
+            self.saved_seconds = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get the cache hit/miss counters and the latency saved by the hits
+
+        Returns:
+            Dict[str, float]: Number of hits, misses and cached answers, hit ratio and saved seconds
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": int(np.count_nonzero(self._expires_at >= time.time())),
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
+
+    @staticmethod
+    def entities(query: str) -> FrozenSet[str]:
+        """
+        Get the entities named in a query: its capitalized words (but the first one) and its numbers
+
+        Args:
+            query (str): User query
+
+        Returns:
+            FrozenSet[str]: Casefolded entity words
+        """
+        words = _WORD_RE.findall(query)
+        return frozenset(
+            word.casefold()
+            for position, word in enumerate(words)
+            if (position > 0 and word[0].isupper()) or any(c.isdigit() for c in word)
+        )
+
+    @classmethod
+    def same_entities(cls, query: str, other_query: str) -> bool:
+        """
+        Check whether two queries name the same entities: every entity of each query is a word of the other one (so
+        "France capital?" names the same entity as "What is the capital of France?")
+
+        Args:
+            query (str): User query
+            other_query (str): Other user query
+
+        Returns:
+            bool: True if neither query names an entity missing from the other
+        """
+        words = {word.casefold() for word in _WORD_RE.findall(query)}
+        other_words = {word.casefold() for word in _WORD_RE.findall(other_query)}
+        return cls.entities(query) <= other_words and cls.entities(other_query) <= words
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        """
+        L2-normalize the given embedding
+
+        Args:
+            embedding (List[float]): Query embedding
+
+        Returns:
+            np.ndarray: Normalized float32 vector
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# Sentence punctuation ending the query, symbols within it are kept (e.g. "C++" and "C#" are not "C")
+_TRAILING_PUNCTUATION_RE = re.compile(r"[\s.,;:!?]+$")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class TitleCache:
+    """
+    LRU/TTL cache of the Wikipedia titles extracted from a query, keyed by the normalized query.
+
+    Lookups hit an in-process dictionary first. When a Django cache alias is given, entries are also written to
+    that cache so every worker can reuse the titles extracted by the others.
+    """
+
+    _instance: Optional["TitleCache"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: int = 86400,
+        django_cache: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the title cache
+
+        Args:
+            max_entries (int): Maximum number of queries kept in process before evicting the least recently used ones
+            ttl_seconds (int): Number of seconds the titles of a query stay valid
+            django_cache (Optional[str]): Alias of the Django cache shared between workers (None to stay in process)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.django_cache = django_cache
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+
+    @classmethod
+    def get_instance(cls) -> Optional["TitleCache"]:
+        """
+        Get the process-wide title cache configured in the Django settings
+
+        Returns:
+            Optional[TitleCache]: Shared cache instance, or None if the cache is disabled
+        """
+        config = settings.TITLE_CACHE
+        if not config["ENABLED"]:
+            return None
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    max_entries=config["MAX_ENTRIES"],
+                    ttl_seconds=config["TTL_SECONDS"],
+                    django_cache=config["DJANGO_CACHE"],
+                )
+
+        return cls._instance
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """
+        Normalize the query so that case, whitespace and final punctuation variants share their titles
+
+        Args:
+            query (str): User query
+
+        Returns:
+            str: Normalized query
+        """
+        query = unicodedata.normalize("NFKC", query).casefold()
+        query = _TRAILING_PUNCTUATION_RE.sub("", query)
+        return _WHITESPACE_RE.sub(" ", query).strip()
+
+    def get(self, query: str) -> Optional[List[str]]:
+        """
+        Get the cached titles of the given query
+
+        Args:
+            query (str): User query
+
+        Returns:
+            Optional[List[str]]: Cached titles, or None if they are missing or expired
+        """
+        key = self.normalize(query)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+
+        # Fall back on the titles extracted by the other workers
+        titles = self._shared_get(key)
+        with self._lock:
+            if titles is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._store(key, titles, now)
+            return list(titles)
+
+    def set(self, query: str, titles: List[str]) -> None:
+        """
+        Store the titles extracted from the given query
+
+        Args:
+            query (str): User query
+            titles (List[str]): Extracted Wikipedia titles
+        """
+        key = self.normalize(query)
+        with self._lock:
+            self._store(key, list(titles), time.time())
+
+        self._shared_set(key, list(titles))
+
+    def clear(self) -> None:
+        """
+        Remove every title cached in process and reset the hit/miss counters
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache hit/miss counters
+
+        Returns:
+            Dict[str, int]: Number of hits, misses and queries cached in process
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _store(self, key: str, titles: List[str], now: float) -> None:
+        """
+        Store the titles in process, evicting the least recently used queries if needed (the caller must hold the lock)
+
+        Args:
+            key (str): Normalized query
+            titles (List[str]): Extracted Wikipedia titles
+            now (float): Current time
+        """
+        self._entries[key] = (now + self.ttl_seconds, titles)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _shared_get(self, key: str) -> Optional[List[str]]:
+        """
+        Get the titles of the normalized query from the shared Django cache
+
+        Args:
+            key (str): Normalized query
+
+        Returns:
+            Optional[List[str]]: Cached titles, or None if there is no shared cache or the titles are missing
+        """
+        if not self.django_cache:
+            return None
+
+        try:
+            return caches[self.django_cache].get(self._shared_key(key))
+        except Exception as e:
+            logger.warning(f"Error reading the shared title cache: {e}")
+            return None
+
+    def _shared_set(self, key: str, titles: List[str]) -> None:
+        """
+        Store the titles of the normalized query in the shared Django cache
+
+        Args:
+            key (str): Normalized query
+            titles (List[str]): Extracted Wikipedia titles
+        """
+        if not self.django_cache:
+            return
+
+        try:
+            caches[self.django_cache].set(self._shared_key(key), titles, timeout=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Error writing the shared title cache: {e}")
+
+    @staticmethod
+    def _shared_key(key: str) -> str:
+        """
+        Build the Django cache key of the normalized query (hashed to fit the key constraints of every backend)
+
+        Args:
+            key (str): Normalized query
+
+        Returns:
+            str: Django cache key
+        """
+        return "wikipedia-titles:" + hashlib.sha256(key.encode("utf-8")).hexdigest()
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from django.conf import settings
+from llama_index.core.schema import BaseNode, TextNode
+
+logger = logging.getLogger(__name__)
+
+# File marking the shards of a title as pinned (never evicted), e.g. for pages ingested from a dump
+_PINNED_MARKER = ".pinned"
+
+
+class VectorShardStore:
+    """
+    On-disk store of per-page vector shards (chunked nodes plus their embeddings) keyed by title and revision. The
+    sections kept by the section filter are stored under their own title, e.g. "France#2".
+
+    Only the last saved revision of a title is kept, and the least recently used unpinned shards are evicted once the
+    store holds more than max_entries of them (the file modification time records the last use).
+    """
+
+    _instance: Optional["VectorShardStore"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, directory: Path, max_entries: int = 10000) -> None:
+        """
+        Initialize the vector shard store
+
+        Args:
+            directory (Path): Directory holding the shard files
+            max_entries (int): Maximum number of unpinned shards kept before evicting the least recently used ones
+        """
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # Upper bound of the unpinned shards on disk, counted on first save and recounted when it exceeds max_entries
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @classmethod
+    def get_instance(cls) -> Optional["VectorShardStore"]:
+        """
+        Get the process-wide vector shard store configured in the Django settings
+
+        Returns:
+            Optional[VectorShardStore]: Shared store instance, or None if shards are disabled
+        """
+        config = settings.VECTOR_SHARDS
+        if not config["ENABLED"]:
+            return None
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(directory=config["DIR"], max_entries=config["MAX_ENTRIES"])
+
+        return cls._instance
+
+    @staticmethod
+    def revision(text: str) -> str:
+        """
+        Compute the revision of a page from its content
+
+        Args:
+            text (str): Page content
+
+        Returns:
+            str: Content hash used as the page revision
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+    def load(self, title: str, revision: str, namespace: str) -> Optional[List[BaseNode]]:
+        """
+        Load the shard of the given page revision
+
+        Args:
+            title (str): Wikipedia page title
+            revision (str): Page revision
+            namespace (str): Chunking/embedding configuration the shard was built with
+
+        Returns:
+            Optional[List[BaseNode]]: Nodes (with their embeddings if the shard has them), or None if the shard does not exist
+        """
+        path = self._path(title, revision, namespace)
+        if not path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            with np.load(path) as shard:
+                nodes_data = json.loads(str(shard["nodes"]))
+                embeddings = shard["embeddings"]
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable vector shard {path}: {e}")
+            self.misses += 1
+            return None
+
+        nodes = [TextNode.from_dict(node_data) for node_data in nodes_data]
+
+        # Mark the shard as recently used for the LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        # Shards written before embedding (e.g. by the dump ingestion) have no embedding matrix
+        if len(embeddings) == len(nodes):
+            for node, embedding in zip(nodes, embeddings):
+                node.embedding = embedding.tolist()
+
+        self.hits += 1
+        return nodes
+
+    def save(
+        self, title: str, revision: str, namespace: str, nodes: List[BaseNode], pinned: bool = False
+    ) -> None:
+        """
+        Save the shard of the given page revision, removing the shards of its older revisions
+
+        Args:
+            title (str): Wikipedia page title
+            revision (str): Page revision
+            namespace (str): Chunking/embedding configuration the shard was built with
+            nodes (List[BaseNode]): Nodes, with or without their embeddings
+            pinned (bool): Keep the shards of the title forever (no LRU eviction), e.g. for pages ingested from a dump
+        """
+        path = self._path(title, revision, namespace)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if pinned:
+            (path.parent / _PINNED_MARKER).touch()
+        is_new = not path.exists()
+
+        nodes_data = []
+        for node in nodes:
+            node_data = node.to_dict()
+            node_data.pop("embedding", None)
+            nodes_data.append(node_data)
+        if all(n.embedding is not None for n in nodes):
+            embeddings = np.asarray([n.embedding for n in nodes], dtype=np.float32)
+        else:
+            embeddings = np.empty((0, 0), dtype=np.float32)
+
+        # Write to a temporary file first so concurrent readers never see a partial shard
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, nodes=np.array(json.dumps(nodes_data)), embeddings=embeddings)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+        removed = 0
+        for old_path in path.parent.glob("*.npz"):
+            if old_path != path:
+                old_path.unlink(missing_ok=True)
+                removed += 1
+
+        if not self._is_pinned(path):
+            self._evict(added=int(is_new) - removed)
+
+    def _evict(self, added: int) -> None:
+        """
+        Remove the least recently used unpinned shards once the store holds more than max_entries of them
+
+        Args:
+            added (int): Change in the number of unpinned shards made by the last save
+        """
+        with self._lock:
+            if self._size is None:
+                self._size = len(self._unpinned_shards())
+            else:
+                self._size += added
+            if self._size <= self.max_entries:
+                return
+
+            shards = []
+            for shard in self._unpinned_shards():
+                try:
+                    shards.append((shard.stat().st_mtime, shard))
+                except FileNotFoundError:
+                    continue
+            shards.sort()
+
+            excess = max(len(shards) - self.max_entries, 0)
+            for _, shard in shards[:excess]:
+                shard.unlink(missing_ok=True)
+            self._size = len(shards) - excess
+
+        if excess:
+            logger.info(f"Evicted {excess} least recently used vector shards.")
+
+    def _unpinned_shards(self) -> List[Path]:
+        """
+        List the shard files of the titles that are not pinned
+
+        Returns:
+            List[Path]: Paths of the unpinned shard files
+        """
+        return [path for path in self.directory.glob("*/*/*.npz") if not self._is_pinned(path)]
+
+    @staticmethod
+    def _is_pinned(path: Path) -> bool:
+        """
+        Check whether the given shard file belongs to a pinned title
+
+        Args:
+            path (Path): Path of the shard file
+
+        Returns:
+            bool: True if the shards of the title are never evicted
+        """
+        return (path.parent / _PINNED_MARKER).exists()
+
+    def _path(self, title: str, revision: str, namespace: str) -> Path:
+        """
+        Build the path of the shard file for the given page revision
+
+        Args:
+            title (str): Wikipedia page title
+            revision (str): Page revision
+            namespace (str): Chunking/embedding configuration the shard was built with
+
+        Returns:
+            Path: Path of the shard file
+        """
+        title_hash = hashlib.sha256(title.encode("utf-8")).hexdigest()[:16]
+        return self.directory / namespace / title_hash / f"{revision}.npz"
@@ -0,0 +1,308 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from llama_index.core.schema import Document
+
+logger = logging.getLogger(__name__)
+
+
+class WikipediaPageCache:
+    """
+    Disk-backed LRU/TTL cache of Wikipedia pages keyed by resolved title
+    """
+
+    _instance: Optional["WikipediaPageCache"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 1000,
+        ttl_seconds: int = 86400,
+        flush_seconds: float = 60.0,
+    ) -> None:
+        """
+        Initialize the Wikipedia page cache
+
+        Args:
+            path (Path): Path of the SQLite file backing the cache
+            max_entries (int): Maximum number of unpinned pages kept before evicting the least recently used ones
+            ttl_seconds (int): Number of seconds a cached page stays valid
+            flush_seconds (float): Longest time the access times of the read pages are kept in memory before being
+                written, along with the removal of the expired pages (writes also flush them)
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.flush_seconds = flush_seconds
+        self.hits = 0
+        self.misses = 0
+
+        # Reads only record the access time of the pages, written in batches so cache hits stay read-only
+        self._accessed_at: Dict[str, float] = {}
+        self._flushed_at = time.time()
+
+        # The connection is opened lazily and shared between threads behind a lock
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def get_instance(cls) -> Optional["WikipediaPageCache"]:
+        """
+        Get the process-wide Wikipedia page cache configured in the Django settings
+
+        Returns:
+            Optional[WikipediaPageCache]: Shared cache instance, or None if the cache is disabled
+        """
+        config = settings.WIKIPEDIA_PAGE_CACHE
+        if not config["ENABLED"]:
+            return None
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    path=config["PATH"],
+                    max_entries=config["MAX_ENTRIES"],
+                    ttl_seconds=config["TTL_SECONDS"],
+                )
+
+        return cls._instance
+
+    def get(self, title: str) -> Optional[Document]:
+        """
+        Get the cached page for the given resolved title
+
+        Args:
+            title (str): Resolved Wikipedia page title
+
+        Returns:
+            Optional[Document]: Cached page, or None if it is missing or expired
+        """
+        return self.get_many([title]).get(title)
+
+    def get_many(self, titles: List[str]) -> Dict[str, Document]:
+        """
+        Get the cached pages for the given resolved titles
+
+        Args:
+            titles (List[str]): Resolved Wikipedia page titles
+
+        Returns:
+            Dict[str, Document]: Cached pages keyed by title (missing or expired titles are left out)
+        """
+        documents: Dict[str, Document] = {}
+        if not titles:
+            return documents
+
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            for title in titles:
+                row = connection.execute(
+                    "SELECT doc_id, text, metadata, expires_at FROM pages WHERE title = ?",
+                    (title,),
+                ).fetchone()
+
+                if row is None or row[3] < now:
+                    self.misses += 1
+                    continue
+
+                doc_id, text, metadata, _ = row
+                documents[title] = Document(
+                    id_=doc_id, text=text, metadata=json.loads(metadata)
+                )
+                self._accessed_at[title] = now
+                self.hits += 1
+
+            if now - self._flushed_at >= self.flush_seconds:
+                self._flush(connection, now)
+                connection.commit()
+
+        return documents
+
+    def resolve(self, alias: str) -> Optional[str]:
+        """
+        Get the resolved title a raw title (e.g. "paris" or "Paris, France") was resolved to before
+
+        Args:
+            alias (str): Raw Wikipedia page title
+
+        Returns:
+            Optional[str]: Resolved title, or None if the raw title was not resolved before or the mapping expired
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT title FROM aliases WHERE alias = ? AND expires_at >= ?", (alias, time.time())
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def set_alias(self, alias: str, title: str) -> None:
+        """
+        Remember the resolved title of a raw title, so the next fetches of the raw title skip the title search
+
+        Args:
+            alias (str): Raw Wikipedia page title
+            title (str): Resolved Wikipedia page title
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO aliases (alias, title, expires_at) VALUES (?, ?, ?)",
+                (alias, title, time.time() + self.ttl_seconds),
+            )
+            connection.commit()
+
+    def set(self, title: str, document: Document, pinned: bool = False) -> None:
+        """
+        Store the page for the given resolved title, evicting the least recently used pages if needed
+
+        Args:
+            title (str): Resolved Wikipedia page title
+            document (Document): Page content to cache
+            pinned (bool): Keep the page forever (no TTL, no LRU eviction), e.g. for pages ingested from a dump
+        """
+        self.set_many({title: document}, pinned=pinned)
+
+    def set_many(self, documents: Dict[str, Document], pinned: bool = False) -> None:
+        """
+        Store the given pages in a single transaction, evicting the least recently used pages if needed
+
+        Args:
+            documents (Dict[str, Document]): Page contents keyed by resolved title
+            pinned (bool): Keep the pages forever (no TTL, no LRU eviction), e.g. for pages ingested from a dump
+        """
+        now = time.time()
+        expires_at = float("inf") if pinned else now + self.ttl_seconds
+        with self._lock:
+            connection = self._connect()
+            # The stored pages get a new access time, write the pending access times of the other pages before the
+            # eviction picks the least recently used ones
+            for title in documents:
+                self._accessed_at.pop(title, None)
+            self._flush(connection, now)
+            connection.executemany(
+                """
+                INSERT OR REPLACE INTO pages (title, doc_id, text, metadata, expires_at, accessed_at, pinned)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        title,
+                        document.doc_id,
+                        document.text,
+                        json.dumps(document.metadata),
+                        expires_at,
+                        now,
+                        int(pinned),
+                    )
+                    for title, document in documents.items()
+                ],
+            )
+            connection.execute(
+                """
+                DELETE FROM pages WHERE title IN (
+                    SELECT title FROM pages WHERE pinned = 0 ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            connection.commit()
+
+    def clear(self) -> None:
+        """
+        Remove every cached page and reset the hit/miss counters
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM pages")
+            connection.execute("DELETE FROM aliases")
+            connection.commit()
+            self._accessed_at.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache hit/miss counters
+
+        Returns:
+            Dict[str, int]: Number of hits, misses and cached pages (expired pages not removed yet left out)
+        """
+        with self._lock:
+            size = self._connect().execute(
+                "SELECT COUNT(*) FROM pages WHERE expires_at >= ?", (time.time(),)
+            ).fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def _flush(self, connection: sqlite3.Connection, now: float) -> None:
+        """
+        Write the pending access times and drop the expired pages and aliases (the caller must hold the lock and
+        commit)
+
+        Args:
+            connection (sqlite3.Connection): Open connection to the cache file
+            now (float): Current time
+        """
+        if self._accessed_at:
+            connection.executemany(
+                "UPDATE pages SET accessed_at = ? WHERE title = ?",
+                [(accessed_at, title) for title, accessed_at in self._accessed_at.items()],
+            )
+            self._accessed_at.clear()
+        connection.execute("DELETE FROM pages WHERE expires_at < ?", (now,))
+        connection.execute("DELETE FROM aliases WHERE expires_at < ?", (now,))
+        self._flushed_at = now
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open the SQLite connection and create the schema on first use (the caller must hold the lock)
+
+        Returns:
+            sqlite3.Connection: Open connection to the cache file
+        """
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    title TEXT PRIMARY KEY,
+                    doc_id TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    pinned INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+
+            # Upgrade cache files created before pinned pages existed
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(pages)")]
+            if "pinned" not in columns:
+                self._connection.execute(
+                    "ALTER TABLE pages ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0"
+                )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)"
+            )
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS aliases (
+                    alias TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+            logger.info(f"Wikipedia page cache opened at {self.path}.")
+
+        return self._connection
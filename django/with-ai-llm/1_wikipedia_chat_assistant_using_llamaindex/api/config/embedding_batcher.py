@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _EmbeddingRequest:
+    """
+    Texts of one caller waiting for their embeddings, possibly spread over several batches
+    """
+
+    def __init__(self, texts: List[str]) -> None:
+        self.texts = texts
+        self.embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        self.remaining = len(texts)
+        self.future: Future = Future()
+
+
+class EmbeddingBatcher:
+    """
+    Dispatcher gathering the embedding requests of concurrent callers into full batches.
+
+    A caller's texts are queued and a collector thread sends them with the texts of the other callers. A batch is
+    sent as soon as it is full, or when the oldest queued text has waited for the batch window. Texts queued twice in
+    the same batch (e.g. the same query from two chats) are only embedded once. Up to max_concurrent_batches batches
+    are in flight at a time, so a slow batch does not hold the next ones back.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = 100,
+        window_seconds: float = 0.005,
+        max_concurrent_batches: int = 8,
+    ) -> None:
+        """
+        Initialize the embedding batcher
+
+        Args:
+            embed (Callable[[List[str]], List[List[float]]]): Function embedding one batch of texts
+            max_batch_size (int): Maximum number of texts sent in one batch
+            window_seconds (float): Longest time a text waits for other texts to fill its batch
+            max_concurrent_batches (int): Maximum number of batches sent at the same time
+        """
+        self.embed_batch = embed
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+
+        self._condition = threading.Condition()
+        # Queued texts: request and position of the text in it, oldest first
+        self._queue: Deque[Tuple[_EmbeddingRequest, int]] = deque()
+        self._queued_at: Deque[float] = deque()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix="EmbeddingBatch")
+        self._collector: Optional[threading.Thread] = None
+        self._closed = False
+
+        self._batches = 0
+        self._texts = 0
+        self._deduplicated = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed the given texts, batched with the texts of the concurrent callers
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            List[List[float]]: Embedding of each text
+
+        Raises:
+            Exception: The error of the embedding call of one of the batches
+        """
+        return self.submit(texts).result()
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed the given texts without blocking the event loop, batched with the texts of the concurrent callers
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            List[List[float]]: Embedding of each text
+
+        Raises:
+            Exception: The error of the embedding call of one of the batches
+        """
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def submit(self, texts: List[str]) -> Future:
+        """
+        Queue the given texts
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            Future: Future of the embedding of each text
+
+        Raises:
+            RuntimeError: If the batcher is closed
+        """
+        request = _EmbeddingRequest(list(texts))
+        if not texts:
+            request.future.set_result([])
+            return request.future
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The embedding batcher is closed.")
+
+            if self._collector is None:
+                self._collector = threading.Thread(target=self._collect, name="EmbeddingBatcher", daemon=True)
+                self._collector.start()
+
+            now = time.monotonic()
+            for position in range(len(texts)):
+                self._queue.append((request, position))
+                self._queued_at.append(now)
+            self._condition.notify()
+
+        return request.future
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of batches and texts sent since the batcher was created
+
+        Returns:
+            Dict[str, int]: Batches sent, texts embedded and duplicate texts saved
+        """
+        with self._condition:
+            return {"batches": self._batches, "texts": self._texts, "deduplicated": self._deduplicated}
+
+    def close(self) -> None:
+        """
+        Send the queued texts and stop the collector thread
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            collector = self._collector
+
+        if collector is not None:
+            collector.join()
+        self._executor.shutdown(wait=True)
+
+    def _collect(self) -> None:
+        """
+        Collector loop: wait for a full batch or for the window of the oldest text to end, then send the batch
+        """
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+
+                # Wait for more texts, unless the batch is full or the oldest text has waited long enough
+                while len(self._queue) < self.max_batch_size and not self._closed:
+                    time_left = self._queued_at[0] + self.window_seconds - time.monotonic()
+                    if time_left <= 0:
+                        break
+                    self._condition.wait(time_left)
+
+                count = min(len(self._queue), self.max_batch_size)
+                batch = [self._queue.popleft() for _ in range(count)]
+                for _ in range(count):
+                    self._queued_at.popleft()
+
+            self._executor.submit(self._send, batch)
+
+    def _send(self, batch: List[Tuple[_EmbeddingRequest, int]]) -> None:
+        """
+        Embed one batch and hand the embeddings to their callers
+
+        Args:
+            batch (List[Tuple[_EmbeddingRequest, int]]): Request and position of each text of the batch
+        """
+        texts = list(dict.fromkeys(request.texts[position] for request, position in batch))
+        try:
+            embeddings = dict(zip(texts, self.embed_batch(texts)))
+        except Exception as e:
+            logger.error(f"Error embedding a batch of {len(texts)} texts: {e}")
+            with self._condition:
+                for request, _ in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+            return
+
+        # The texts of a request may be spread over batches completing in other threads, hence the lock
+        with self._condition:
+            self._batches += 1
+            self._texts += len(texts)
+            self._deduplicated += len(batch) - len(texts)
+
+            for request, position in batch:
+                request.embeddings[position] = embeddings[request.texts[position]]
+                request.remaining -= 1
+                # Skip the requests whose other batch failed
+                if request.remaining == 0 and not request.future.done():
+                    request.future.set_result(request.embeddings)
+
+        logger.debug(f"Embedded a batch of {len(texts)} texts for {len({id(r) for r, _ in batch})} callers.")
@@ -0,0 +1,205 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Event traced by httpcore when a connection pool opens a new TCP connection
+_CONNECT_EVENT = "connection.connect_tcp.complete"
+
+
+class HTTPClientPool:
+    """
+    Keep-alive HTTP connections shared by every request the process sends to one upstream (OpenAI or Wikipedia).
+
+    The pool hands out an httpx client and an httpx async client per event loop (async connections cannot outlive
+    their loop). Both keep up to max_connections connections open between requests, and negotiate HTTP/2 when the h2
+    package is installed. The requests sent and the connections opened are counted, so the metrics show how many
+    requests reused a connection.
+    """
+
+    _instances: Dict[str, "HTTPClientPool"] = {}
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        name: str,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        timeout: float = 30.0,
+    ) -> None:
+        """
+        Initialize the connection pool of an upstream
+
+        Args:
+            name (str): Name of the upstream, used as the metrics label
+            max_connections (int): Maximum number of connections open at the same time, per client
+            max_keepalive_connections (int): Maximum number of idle connections kept open, per client
+            keepalive_expiry (float): Seconds an idle connection is kept open
+            http2 (bool): Whether to negotiate HTTP/2 (only used when the h2 package is installed)
+            timeout (float): Default timeout of the requests in seconds (the OpenAI client sets its own)
+        """
+        self.name = name
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        if http2 and not self.http2:
+            logger.info(f"The h2 package is not installed, the {name} connections use HTTP/1.1.")
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._client: Optional[httpx.Client] = None
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Async client used outside of any event loop (e.g. handed to the OpenAI client at startup)
+        self._default_async_client: Optional[httpx.AsyncClient] = None
+
+        self._requests = 0
+        self._connections = 0
+
+    @classmethod
+    def get_instance(cls, name: str) -> Optional["HTTPClientPool"]:
+        """
+        Get the process-wide connection pool of an upstream
+
+        Args:
+            name (str): Name of the upstream
+
+        Returns:
+            Optional[HTTPClientPool]: Shared connection pool, or None if every caller opens its own connections
+        """
+        config = settings.HTTP_POOLS
+        if not config["ENABLED"]:
+            return None
+
+        with cls._instance_lock:
+            if name not in cls._instances:
+                cls._instances[name] = cls(
+                    name,
+                    max_connections=config["MAX_CONNECTIONS"],
+                    max_keepalive_connections=config["MAX_KEEPALIVE_CONNECTIONS"],
+                    keepalive_expiry=config["KEEPALIVE_EXPIRY"],
+                    http2=config["HTTP2"],
+                )
+
+        return cls._instances[name]
+
+    @property
+    def client(self) -> httpx.Client:
+        """
+        HTTP client of the pool, created on first use
+        """
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    limits=self.limits,
+                    http2=self.http2,
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    event_hooks={"request": [self._on_request]},
+                )
+
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """
+        Get the async HTTP client of the running event loop, created on first use
+
+        Returns:
+            httpx.AsyncClient: Async client whose connections belong to the running loop (or a client shared by the
+                callers running outside of any loop)
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        with self._lock:
+            client = self._async_clients.get(loop) if loop is not None else self._default_async_client
+            if client is None:
+                client = httpx.AsyncClient(
+                    limits=self.limits,
+                    http2=self.http2,
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    event_hooks={"request": [self._aon_request]},
+                )
+                if loop is not None:
+                    self._async_clients[loop] = client
+                else:
+                    self._default_async_client = client
+
+            return client
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of requests sent and connections opened since the pool was created
+
+        Returns:
+            Dict[str, int]: Requests sent and connections opened, the other requests reused an open connection
+        """
+        with self._lock:
+            return {"requests": self._requests, "connections": self._connections}
+
+    def close(self) -> None:
+        """
+        Close the connections of the pool (the clients are recreated on next use)
+        """
+        with self._lock:
+            client, self._client = self._client, None
+            self._async_clients = weakref.WeakKeyDictionary()
+            self._default_async_client = None
+
+        if client is not None:
+            client.close()
+
+    def _count(self, sent: int = 0, opened: int = 0) -> None:
+        """
+        Count requests sent or connections opened
+
+        Args:
+            sent (int): Requests sent
+            opened (int): Connections opened
+        """
+        with self._lock:
+            self._requests += sent
+            self._connections += opened
+
+    def _on_request(self, request: httpx.Request) -> None:
+        """
+        Count a request of the HTTP client, and trace its connection to count the connections opened for it
+
+        Args:
+            request (httpx.Request): Request being sent
+        """
+        self._count(sent=1)
+        request.extensions["trace"] = self._trace
+
+    async def _aon_request(self, request: httpx.Request) -> None:
+        """
+        Count a request of an async HTTP client, and trace its connection to count the connections opened for it
+
+        Args:
+            request (httpx.Request): Request being sent
+        """
+        self._count(sent=1)
+        request.extensions["trace"] = self._atrace
+
+    def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event == _CONNECT_EVENT:
+            self._count(opened=1)
+
+    async def _atrace(self, event: str, info: Dict[str, Any]) -> None:
+        self._trace(event, info)
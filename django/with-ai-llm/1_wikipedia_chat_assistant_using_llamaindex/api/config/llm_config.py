@@ -1,18 +1,173 @@
-from typing import Optional
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
 
+from django.conf import settings
 from llama_index.core import Settings
+from llama_index.core.bridge.pydantic import BaseModel, PrivateAttr
 from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.llms.openai import OpenAI
+from openai import AsyncOpenAI
+
+from api.config.embedding_batcher import EmbeddingBatcher
+from api.config.http_clients import HTTPClientPool
+from api.instrumentation.token_usage_counter import TokenUsageCounter
+from api.services.deadline import Deadline
+
+
+class PooledAsyncClientMixin(BaseModel):
+    """
+    Mixin of the OpenAI models sending their async requests over the pooled HTTP client of the running event loop
+    (an async client is bound to the loop it was created in, so it is looked up on every call)
+    """
+
+    _http_pool: Optional[HTTPClientPool] = PrivateAttr(default=None)
+    _aclients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = PrivateAttr(
+        default_factory=weakref.WeakKeyDictionary
+    )
+
+    def use_http_pool(self, http_pool: Optional[HTTPClientPool]) -> None:
+        """
+        Send the async requests of the model over the given connection pool
+
+        Args:
+            http_pool (Optional[HTTPClientPool]): Keep-alive connections shared by the async requests (None for the
+                OpenAI client to open its own)
+        """
+        self._http_pool = http_pool
+        self._aclients = weakref.WeakKeyDictionary()
+
+    def _get_aclient(self) -> AsyncOpenAI:
+        if self._http_pool is None:
+            return super()._get_aclient()
+
+        loop = asyncio.get_running_loop()
+        aclient = self._aclients.get(loop)
+        if aclient is None:
+            aclient = self._aclients[loop] = AsyncOpenAI(**self._get_credential_kwargs(is_async=True))
+
+        return aclient
+
+    def _get_credential_kwargs(self, is_async: bool = False) -> Dict[str, Any]:
+        credential_kwargs = super()._get_credential_kwargs(is_async=is_async)
+        if is_async and self._http_pool is not None:
+            credential_kwargs["http_client"] = self._http_pool.async_client()
+
+        return credential_kwargs
+
+
+class DeadlineAwareOpenAI(PooledAsyncClientMixin, OpenAI):
+    """
+    OpenAI LLM whose request timeout never runs past the deadline of the request being answered
+    """
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "deadline_aware_openai_llm"
+
+    def _get_credential_kwargs(self, is_async: bool = False) -> Dict[str, Any]:
+        # Retry in the LLM wrapper only, so every attempt gets a timeout recomputed from the time left
+        return {**super()._get_credential_kwargs(is_async=is_async), "max_retries": 0}
+
+    def _get_model_kwargs(self, **kwargs: Any) -> Dict[str, Any]:
+        model_kwargs = super()._get_model_kwargs(**kwargs)
+
+        # Raises DeadlineExceeded instead of sending a request once the budget is spent
+        deadline = Deadline.current()
+        if deadline is not None:
+            model_kwargs["timeout"] = deadline.cap(self.timeout)
+
+        return model_kwargs
+
+
+class PooledOpenAIEmbedding(PooledAsyncClientMixin, OpenAIEmbedding):
+    """
+    OpenAI embedding model sending its async requests over the pooled HTTP client of the running event loop
+    """
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "PooledOpenAIEmbedding"
+
+
+class BatchingOpenAIEmbedding(PooledOpenAIEmbedding):
+    """
+    OpenAI embedding model sending the texts of concurrent callers together, in batches of up to embed_batch_size
+    texts gathered by an EmbeddingBatcher
+    """
+
+    _batcher: EmbeddingBatcher = PrivateAttr()
+
+    def __init__(self, batch_window_seconds: float = 0.005, max_concurrent_batches: int = 8, **kwargs: Any) -> None:
+        """
+        Initialize the batching embedding model
+
+        Args:
+            batch_window_seconds (float): Longest time a text waits for the texts of other callers to fill its batch
+            max_concurrent_batches (int): Maximum number of batches sent at the same time
+            **kwargs: Arguments of OpenAIEmbedding
+        """
+        super().__init__(**kwargs)
+        self._batcher = EmbeddingBatcher(
+            # Bypass the batcher (and the instrumentation, already done by the caller) for the batch itself
+            lambda texts: OpenAIEmbedding._get_text_embeddings(self, texts),
+            max_batch_size=self.embed_batch_size,
+            window_seconds=batch_window_seconds,
+            max_concurrent_batches=max_concurrent_batches,
+        )
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "BatchingOpenAIEmbedding"
+
+    @property
+    def batcher(self) -> EmbeddingBatcher:
+        """
+        Dispatcher gathering the texts of the concurrent callers
+        """
+        return self._batcher
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._batcher.embed(texts)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await self._batcher.aembed(texts)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._batcher.embed([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._batcher.aembed([text]))[0]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        # Queries only share the batches of the texts when both use the same model (all but the first generation)
+        if self._query_engine != self._text_engine:
+            return super()._get_query_embedding(query)
+
+        return self._batcher.embed([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        if self._query_engine != self._text_engine:
+            return await super()._aget_query_embedding(query)
+
+        return (await self._batcher.aembed([query]))[0]
 
 
 class LLMConfig:
     """
-    Configuration class for LLM
+    Configuration class for LLM.
+
+    The models are built on first use from the Django settings (unless initialize is called first), so the processes
+    that never call the LLM (e.g. manage.py commands) do not pay for it. Serving workers can build them at startup
+    (see api.config.warmup).
     """
 
     _llm: Optional[OpenAI] = None
     _embedding_instance: Optional[OpenAIEmbedding] = None
+    _embedding_model: Optional[OpenAIEmbedding] = None
     _is_llm_initialized: bool = False
+    _lock = threading.RLock()
 
     @classmethod
     def initialize(
@@ -23,6 +178,9 @@ class LLMConfig:
         timeout: int = 60,
         embedding_model: str = "text-embedding-3-small",
         embed_batch_size: int = 100,
+        api_base: Optional[str] = None,
+        embedding_batch_window_ms: float = 0.0,
+        http_pool: Optional[HTTPClientPool] = None,
     ) -> None:
         """
         Initialize the LLM configuration
@@ -34,6 +192,11 @@ class LLMConfig:
             timeout (int): Timeout for OpenAI
             embedding_model (str): Model to use for embeddings
             embed_batch_size (int): Batch size for embedding
+            api_base (Optional[str]): Base URL of the OpenAI API (e.g. a local stand-in server, None for OpenAI)
+            embedding_batch_window_ms (float): Longest time an embedding request waits for the requests of concurrent
+                chats to fill its batch (0 for every caller to send its own batches)
+            http_pool (Optional[HTTPClientPool]): Keep-alive connections shared by the LLM and embedding requests
+                (None for the OpenAI clients to open their own)
         """
         cls.model = model
         cls.temperature = temperature
@@ -41,25 +204,51 @@ class LLMConfig:
         cls.timeout = timeout
         cls.embedding_model = embedding_model
         cls.embed_batch_size = embed_batch_size
+        cls.api_base = api_base
+
+        # Send the LLM and embedding requests over the same pooled connections (the async client of the running
+        # event loop is looked up on every call)
+        http_clients = {"http_client": http_pool.client} if http_pool is not None else {}
 
-        # Initialize the OpenAI LLM
-        cls._llm = OpenAI(
+        # Initialize the OpenAI LLM (capping its timeout to the latency budget of the request)
+        cls._llm = DeadlineAwareOpenAI(
             model=cls.model,
             temperature=cls.temperature,
             max_tokens=cls.max_tokens,
             timeout=cls.timeout,
+            api_base=cls.api_base,
+            # Have streamed completions report their token usage in a last chunk (dropped for other calls)
+            additional_kwargs={"stream_options": {"include_usage": True}},
+            **http_clients,
         )
 
-        # Initialize the OpenAI embedding model
-        cls._embedding_model = OpenAIEmbedding(
-            model=cls.embedding_model,
-            embed_batch_size=cls.embed_batch_size,
-        )
+        # Initialize the OpenAI embedding model, sharing its batches between the concurrent chats when batching is on
+        if embedding_batch_window_ms > 0:
+            cls._embedding_model = BatchingOpenAIEmbedding(
+                batch_window_seconds=embedding_batch_window_ms / 1000,
+                model=cls.embedding_model,
+                embed_batch_size=cls.embed_batch_size,
+                api_base=cls.api_base,
+                **http_clients,
+            )
+        else:
+            cls._embedding_model = PooledOpenAIEmbedding(
+                model=cls.embedding_model,
+                embed_batch_size=cls.embed_batch_size,
+                api_base=cls.api_base,
+                **http_clients,
+            )
+
+        cls._llm.use_http_pool(http_pool)
+        cls._embedding_model.use_http_pool(http_pool)
 
         # Set global settings
         Settings.llm = cls._llm
         Settings.embed_model = cls._embedding_model
 
+        # Account for the tokens of every LLM and embedding call
+        TokenUsageCounter.get_instance()
+
         # Set initialization flag
         cls._is_llm_initialized = True
 
@@ -71,9 +260,7 @@ class LLMConfig:
         Returns:
             OpenAI: OpenAI LLM instance
         """
-        if not cls._is_llm_initialized:
-            cls.initialize()
-
+        cls.ensure_initialized()
         return cls._llm
 
     @classmethod
@@ -84,7 +271,30 @@ class LLMConfig:
         Returns:
             OpenAIEmbedding: OpenAI embedding model instance
         """
-        if not cls._is_llm_initialized:
-            cls.initialize()
-
+        cls.ensure_initialized()
         return cls._embedding_model
+
+    @classmethod
+    def ensure_initialized(cls) -> None:
+        """
+        Initialize the LLM configuration from the Django settings, once, if it was not initialized yet (for the callers
+        relying on the global llama-index models)
+        """
+        if cls._is_llm_initialized:
+            return
+
+        with cls._lock:
+            if cls._is_llm_initialized:
+                return
+
+            # Scripts running without Django settings get the default models
+            if not settings.configured:
+                cls.initialize()
+                return
+
+            batcher = settings.EMBEDDING_BATCHER
+            cls.initialize(
+                api_base=settings.OPENAI_API_BASE,
+                embedding_batch_window_ms=batcher["WINDOW_MS"] if batcher["ENABLED"] else 0,
+                http_pool=HTTPClientPool.get_instance("openai"),
+            )
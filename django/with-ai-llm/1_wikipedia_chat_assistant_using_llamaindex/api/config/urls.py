@@ -1,7 +1,9 @@
 from django.urls import path
 
 from api.views.chat.index import ChatView
+from api.views.metrics.index import MetricsView
 
 urlpatterns = [
     path("chat/", ChatView.as_view(), name="chat"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
 ]
@@ -0,0 +1,28 @@
+import logging
+import time
+
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up() -> None:
+    """
+    Do the work a serving worker would otherwise do on its first request: import the URLconf and the services the
+    views import on first use (and with them llama-index), build the LLM and embedding models, and load the tokenizer
+    """
+    start = time.perf_counter()
+
+    get_resolver().url_patterns
+
+    # Imported here so that importing this module stays cheap when the warm-up is off
+    from llama_index.core.utils import get_tokenizer
+
+    import api.instrumentation.prometheus_exporter  # noqa: F401
+    import api.services.wikipedia_rag_service  # noqa: F401
+    from api.config.llm_config import LLMConfig
+
+    LLMConfig.ensure_initialized()
+    get_tokenizer()
+
+    logger.info(f"Warmed up in {time.perf_counter() - start:.2f}s.")
@@ -0,0 +1,140 @@
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional, Set
+
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events import BaseEvent
+from llama_index.core.instrumentation.events.llm import LLMChatStartEvent, LLMCompletionStartEvent
+
+from api.instrumentation.span_parents import SpanParentHandler, get_span_parents
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMCallTally:
+    """
+    LLM calls made while answering one query, and the path the query took
+    """
+
+    path: str
+    calls: int = 0
+    llm_spans: Set[str] = field(default_factory=set, repr=False)
+
+
+# Tally of the query being answered in the current thread or task (None outside a tracked query)
+_current_tally: ContextVar[Optional[LLMCallTally]] = ContextVar("llm_call_tally", default=None)
+
+
+class _LLMCallEventHandler(BaseEventHandler):
+    """
+    Instrumentation handler counting the chat and completion calls made to the LLM
+    """
+
+    span_parents: SpanParentHandler
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LLMCallEventHandler"
+
+    def handle(self, event: BaseEvent, **kwargs: Any) -> None:
+        tally = _current_tally.get()
+        if tally is None or not isinstance(event, (LLMChatStartEvent, LLMCompletionStartEvent)):
+            return
+
+        # Some LLMs implement chat on top of complete (or the reverse), only count the outermost call
+        if self.span_parents.has_ancestor_in(event.span_id, tally.llm_spans):
+            return
+
+        tally.llm_spans.add(event.span_id)
+        tally.calls += 1
+
+
+class LLMCallCounter:
+    """
+    Per-path count of the LLM calls made to answer queries (title extraction, agent reasoning and answer synthesis)
+    """
+
+    _instance: Optional["LLMCallCounter"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._paths: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def get_instance(cls) -> "LLMCallCounter":
+        """
+        Get the process-wide LLM call counter, registering its handler with the LlamaIndex instrumentation on first use
+
+        Returns:
+            LLMCallCounter: Shared counter instance
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                get_dispatcher().add_event_handler(_LLMCallEventHandler(span_parents=get_span_parents()))
+                cls._instance = cls()
+
+        return cls._instance
+
+    @contextmanager
+    def track(self, path: str) -> Iterator[LLMCallTally]:
+        """
+        Count the LLM calls made within the block and record them under the path of the query
+
+        Args:
+            path (str): Path the query takes (can be changed through the tally before the block ends)
+
+        Returns:
+            Iterator[LLMCallTally]: Tally of the query
+        """
+        tally = LLMCallTally(path=path)
+        previous = _current_tally.get()
+        _current_tally.set(tally)
+        try:
+            yield tally
+        finally:
+            # Restore with set() rather than a reset token, streamed queries may end in another context
+            _current_tally.set(previous)
+            self._record(tally)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the number of queries and LLM calls of each path
+
+        Returns:
+            Dict[str, Dict[str, float]]: Queries, LLM calls and LLM calls per query, keyed by path
+        """
+        with self._lock:
+            return {
+                path: {
+                    "queries": counts["queries"],
+                    "llm_calls": counts["llm_calls"],
+                    "llm_calls_per_query": counts["llm_calls"] / counts["queries"],
+                }
+                for path, counts in self._paths.items()
+            }
+
+    def clear(self) -> None:
+        """
+        Reset the counts of every path
+        """
+        with self._lock:
+            self._paths.clear()
+
+    def _record(self, tally: LLMCallTally) -> None:
+        """
+        Add the LLM calls of a query to the counts of its path
+
+        Args:
+            tally (LLMCallTally): Tally of the query
+        """
+        logger.info(f"Answered a {tally.path} query with {tally.calls} LLM calls.")
+        with self._lock:
+            counts = self._paths.setdefault(tally.path, {"queries": 0, "llm_calls": 0})
+            counts["queries"] += 1
+            counts["llm_calls"] += tally.calls
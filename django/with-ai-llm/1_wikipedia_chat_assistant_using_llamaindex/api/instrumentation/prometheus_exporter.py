@@ -0,0 +1,172 @@
+import math
+from typing import Dict, List, Optional
+
+from api.cache.chat_session_store import ChatSessionStore
+from api.cache.embedding_cache import EmbeddingCache
+from api.cache.semantic_answer_cache import SemanticAnswerCache
+from api.cache.title_cache import TitleCache
+from api.cache.wikipedia_page_cache import WikipediaPageCache
+from api.config.http_clients import HTTPClientPool
+from api.config.llm_config import BatchingOpenAIEmbedding, LLMConfig
+from api.instrumentation.llm_call_counter import LLMCallCounter
+from api.instrumentation.stage_timer import DurationHistogram, StageTimer
+from api.instrumentation.token_usage_counter import TokenUsageCounter
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+METRIC_PREFIX = "wikipedia_rag"
+
+
+def render_metrics() -> str:
+    """
+    Render the pipeline metrics in the Prometheus text exposition format: stage and request duration histograms,
+    queries and LLM calls per path, LLM calls and tokens per stage, the embedding batches, the requests and connections
+    of the HTTP pools and the counters of the enabled caches
+    (including the embedding calls saved by the embedding cache)
+
+    Returns:
+        str: Metrics page
+    """
+    lines: List[str] = []
+    timer = StageTimer.get_instance()
+    stages, requests = timer.histograms()
+
+    _header(lines, "stage_duration_seconds", "histogram", "Duration of each run of a RAG pipeline stage")
+    for stage, histogram in sorted(stages.items()):
+        _histogram(lines, "stage_duration_seconds", histogram, {"stage": stage})
+
+    _header(lines, "request_duration_seconds", "histogram", "Duration of the chat requests")
+    _histogram(lines, "request_duration_seconds", requests, {})
+
+    llm_calls = LLMCallCounter.get_instance().stats()
+    _header(lines, "queries_total", "counter", "Queries answered, by path")
+    for path, counts in sorted(llm_calls.items()):
+        _sample(lines, "queries_total", counts["queries"], {"path": path})
+    _header(lines, "llm_calls_total", "counter", "LLM calls made to answer the queries, by path")
+    for path, counts in sorted(llm_calls.items()):
+        _sample(lines, "llm_calls_total", counts["llm_calls"], {"path": path})
+
+    token_usage = TokenUsageCounter.get_instance().stats()
+    _header(lines, "stage_llm_calls_total", "counter", "LLM calls made by each stage")
+    for stage, usage in sorted(token_usage.items()):
+        _sample(lines, "stage_llm_calls_total", usage["llm_calls"], {"stage": stage})
+    _header(lines, "tokens_total", "counter", "Prompt, completion and embedding tokens used by each stage")
+    for stage, usage in sorted(token_usage.items()):
+        for kind in ("prompt", "completion", "embedding"):
+            _sample(lines, "tokens_total", usage[f"{kind}_tokens"], {"stage": stage, "kind": kind})
+
+    embed_model = LLMConfig.get_embedding_model()
+    if isinstance(embed_model, BatchingOpenAIEmbedding):
+        batcher_stats = embed_model.batcher.stats()
+        _header(lines, "embedding_batches_total", "counter", "Embedding batches sent for the concurrent chats")
+        _sample(lines, "embedding_batches_total", batcher_stats["batches"], None)
+        _header(lines, "embedding_batch_texts_total", "counter", "Texts sent in the embedding batches")
+        _sample(lines, "embedding_batch_texts_total", batcher_stats["texts"], None)
+        _header(lines, "embedding_deduplicated_texts_total", "counter", "Texts shared by concurrent embedding requests")
+        _sample(lines, "embedding_deduplicated_texts_total", batcher_stats["deduplicated"], None)
+
+    http_pools = {name: HTTPClientPool.get_instance(name) for name in ("openai", "wikipedia")}
+    http_stats = {name: pool.stats() for name, pool in http_pools.items() if pool is not None}
+    _header(lines, "http_requests_total", "counter", "Requests sent over the pooled connections, by upstream")
+    for name, stats in http_stats.items():
+        _sample(lines, "http_requests_total", stats["requests"], {"upstream": name})
+    _header(lines, "http_connections_total", "counter", "Connections opened by the pools (the other requests reused one)")
+    for name, stats in http_stats.items():
+        _sample(lines, "http_connections_total", stats["connections"], {"upstream": name})
+
+    caches = {
+        "title": TitleCache.get_instance(),
+        "page": WikipediaPageCache.get_instance(),
+        "embedding": EmbeddingCache.get_instance(),
+        "answer": SemanticAnswerCache.get_instance(),
+        "session": ChatSessionStore.get_instance(),
+    }
+    cache_stats = {name: cache.stats() for name, cache in caches.items() if cache is not None}
+    _header(lines, "cache_hits_total", "counter", "Cache lookups served from the cache")
+    for name, stats in cache_stats.items():
+        _sample(lines, "cache_hits_total", stats["hits"], {"cache": name})
+    _header(lines, "cache_misses_total", "counter", "Cache lookups missing from the cache")
+    for name, stats in cache_stats.items():
+        _sample(lines, "cache_misses_total", stats["misses"], {"cache": name})
+    _header(lines, "cache_entries", "gauge", "Entries held by the cache")
+    for name, stats in cache_stats.items():
+        _sample(lines, "cache_entries", stats.get("size", stats.get("sessions", 0)), {"cache": name})
+
+    if "embedding" in cache_stats:
+        _header(lines, "embedding_cache_saved_calls_total", "counter", "Chunk embeddings served from the cache")
+        _sample(lines, "embedding_cache_saved_calls_total", cache_stats["embedding"]["saved_calls"], None)
+
+    return "\n".join(lines) + "\n"
+
+
+def _header(lines: List[str], name: str, metric_type: str, help_text: str) -> None:
+    """
+    Add the HELP and TYPE lines of a metric
+
+    Args:
+        lines (List[str]): Lines of the metrics page
+        name (str): Metric name, without the prefix
+        metric_type (str): Prometheus metric type
+        help_text (str): Description of the metric
+    """
+    lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {METRIC_PREFIX}_{name} {metric_type}")
+
+
+def _histogram(lines: List[str], name: str, histogram: DurationHistogram, labels: Dict[str, str]) -> None:
+    """
+    Add the bucket, sum and count samples of a histogram
+
+    Args:
+        lines (List[str]): Lines of the metrics page
+        name (str): Metric name, without the prefix
+        histogram (DurationHistogram): Histogram to export
+        labels (Dict[str, str]): Labels of the samples
+    """
+    for bound, count in histogram.cumulative_counts():
+        _sample(lines, f"{name}_bucket", count, {**labels, "le": _format_bound(bound)})
+    _sample(lines, f"{name}_sum", histogram.sum, labels)
+    _sample(lines, f"{name}_count", histogram.count, labels)
+
+
+def _sample(lines: List[str], name: str, value: float, labels: Optional[Dict[str, str]]) -> None:
+    """
+    Add a sample
+
+    Args:
+        lines (List[str]): Lines of the metrics page
+        name (str): Metric name, without the prefix
+        value (float): Sample value
+        labels (Optional[Dict[str, str]]): Labels of the sample
+    """
+    label_text = ""
+    if labels:
+        label_text = "{" + ",".join(f'{key}="{_escape(str(v))}"' for key, v in labels.items()) + "}"
+    lines.append(f"{METRIC_PREFIX}_{name}{label_text} {value}")
+
+
+def _format_bound(bound: float) -> str:
+    """
+    Format a bucket bound as Prometheus expects it
+
+    Args:
+        bound (float): Upper bound of the bucket
+
+    Returns:
+        str: "+Inf" for the unbounded bucket, else the bound
+    """
+    return "+Inf" if math.isinf(bound) else repr(bound)
+
+
+def _escape(value: str) -> str:
+    """
+    Escape a label value
+
+    Args:
+        value (str): Label value
+
+    Returns:
+        str: Value with backslashes, quotes and newlines escaped
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
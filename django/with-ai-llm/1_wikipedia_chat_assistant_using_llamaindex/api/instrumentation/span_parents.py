@@ -0,0 +1,75 @@
+import threading
+from typing import Any, Container, Dict, Optional
+
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.span import BaseSpan
+from llama_index.core.instrumentation.span_handlers import BaseSpanHandler
+from pydantic import Field
+
+
+class SpanParentHandler(BaseSpanHandler[BaseSpan]):
+    """
+    Instrumentation handler keeping the parent of every open span
+    """
+
+    parents: Dict[str, Optional[str]] = Field(default_factory=dict)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "SpanParentHandler"
+
+    def new_span(
+        self,
+        id_: str,
+        bound_args: Any,
+        instance: Any = None,
+        parent_span_id: Optional[str] = None,
+        tags: Any = None,
+        **kwargs: Any,
+    ) -> None:
+        self.parents[id_] = parent_span_id
+
+    def prepare_to_exit_span(self, id_: str, bound_args: Any, instance: Any = None, result: Any = None, **kwargs: Any) -> None:
+        self.parents.pop(id_, None)
+
+    def prepare_to_drop_span(self, id_: str, bound_args: Any, instance: Any = None, err: Any = None, **kwargs: Any) -> None:
+        self.parents.pop(id_, None)
+
+    def has_ancestor_in(self, span_id: Optional[str], span_ids: Container[str]) -> bool:
+        """
+        Check whether one of the open ancestors of a span is among the given spans
+
+        Args:
+            span_id (Optional[str]): Span to check
+            span_ids (Container[str]): Candidate ancestors
+
+        Returns:
+            bool: True if the span runs within one of the given spans
+        """
+        parent_id = self.parents.get(span_id)
+        while parent_id:
+            if parent_id in span_ids:
+                return True
+            parent_id = self.parents.get(parent_id)
+
+        return False
+
+
+_span_parents: Optional[SpanParentHandler] = None
+_span_parents_lock = threading.Lock()
+
+
+def get_span_parents() -> SpanParentHandler:
+    """
+    Get the process-wide span parent handler, registering it with the LlamaIndex instrumentation on first use
+
+    Returns:
+        SpanParentHandler: Shared handler
+    """
+    global _span_parents
+    with _span_parents_lock:
+        if _span_parents is None:
+            _span_parents = SpanParentHandler()
+            get_dispatcher().add_span_handler(_span_parents)
+
+    return _span_parents
@@ -0,0 +1,333 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events import BaseEvent
+from llama_index.core.instrumentation.events.exception import ExceptionEvent
+from llama_index.core.instrumentation.events.llm import (
+    LLMChatEndEvent,
+    LLMChatStartEvent,
+    LLMCompletionEndEvent,
+    LLMCompletionStartEvent,
+)
+from llama_index.core.instrumentation.events.span import SpanDropEvent
+from pydantic import Field
+
+from api.instrumentation.span_parents import SpanParentHandler, get_span_parents
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets in seconds, from cache lookups to agent loops of a minute
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Stage of the chat and completion calls to the LLM, timed from the LlamaIndex instrumentation events
+LLM_STAGE = "llm"
+
+# Stage reported for the work done outside any timed stage
+NO_STAGE = "other"
+
+
+class DurationHistogram:
+    """
+    Histogram of durations over fixed buckets (the caller guards it with a lock)
+    """
+
+    def __init__(self, buckets: Sequence[float] = DURATION_BUCKETS) -> None:
+        """
+        Initialize the histogram
+
+        Args:
+            buckets (Sequence[float]): Sorted upper bounds of the buckets in seconds (an unbounded bucket is added)
+        """
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Add a duration to the histogram
+
+        Args:
+            seconds (float): Duration in seconds
+        """
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """
+        Get the number of durations up to each bucket bound, as exported by Prometheus
+
+        Returns:
+            List[Tuple[float, int]]: Upper bound (inf for the last bucket) and number of durations below it
+        """
+        bounds = list(self.buckets) + [float("inf")]
+        counts = []
+        total = 0
+        for bound, bucket_count in zip(bounds, self.bucket_counts):
+            total += bucket_count
+            counts.append((bound, total))
+
+        return counts
+
+
+@dataclass
+class StageTimings:
+    """
+    Time spent in each stage while answering one request
+    """
+
+    started_at: float = field(default_factory=time.perf_counter)
+    durations: Dict[str, float] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, stage: str, seconds: float) -> None:
+        """
+        Add the duration of one run of a stage
+
+        Args:
+            stage (str): Stage name
+            seconds (float): Duration in seconds
+        """
+        # Concurrent LLM calls of an async request report from several threads
+        with self._lock:
+            self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def server_timing(self) -> str:
+        """
+        Format the timings as a Server-Timing header value, in milliseconds
+
+        Returns:
+            str: One metric per stage (with the number of runs when it ran more than once), then the total
+        """
+        with self._lock:
+            metrics = []
+            for stage, seconds in self.durations.items():
+                metric = f"{stage};dur={seconds * 1000:.1f}"
+                if self.counts[stage] > 1:
+                    metric += f';desc="{self.counts[stage]} runs"'
+                metrics.append(metric)
+
+        metrics.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+# Timings of the request being answered in the current thread or task (None outside a tracked request)
+_current_timings: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+# Innermost stage running in the current thread or task
+_current_stage: ContextVar[str] = ContextVar("stage", default=NO_STAGE)
+
+
+def current_stage() -> str:
+    """
+    Get the innermost stage running in the current thread or task
+
+    Returns:
+        str: Stage name, or NO_STAGE outside any timed stage
+    """
+    return _current_stage.get()
+
+
+class _LLMTimingEventHandler(BaseEventHandler):
+    """
+    Instrumentation handler timing the chat and completion calls made to the LLM, from their start event to their end
+    event (the end of the stream for streamed calls)
+    """
+
+    span_parents: SpanParentHandler
+    # Called with the duration of each call and the timings of its request
+    on_call: Callable[..., None]
+    # Start time and request timings of the LLM calls in progress, keyed by span
+    started: Dict[str, Tuple[float, Any]] = Field(default_factory=dict)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LLMTimingEventHandler"
+
+    def handle(self, event: BaseEvent, **kwargs: Any) -> None:
+        if isinstance(event, (LLMChatStartEvent, LLMCompletionStartEvent)):
+            # Some LLMs implement chat on top of complete (or the reverse), only time the outermost call
+            if not self.span_parents.has_ancestor_in(event.span_id, self.started):
+                self.started[event.span_id] = (time.perf_counter(), _current_timings.get())
+        elif isinstance(event, (LLMChatEndEvent, LLMCompletionEndEvent)):
+            call = self.started.pop(event.span_id, None)
+            if call is not None:
+                started_at, timings = call
+                self.on_call(time.perf_counter() - started_at, timings)
+        elif isinstance(event, (ExceptionEvent, SpanDropEvent)):
+            # Failed calls never send their end event
+            self.started.pop(event.span_id, None)
+
+
+class StageTimer:
+    """
+    Process-wide histograms of the time spent in each stage of the RAG pipeline (title extraction, Wikipedia fetch,
+    chunking, embedding, index build, agent loop and every LLM call), and the per-request totals of the stages
+    """
+
+    _instance: Optional["StageTimer"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, buckets: Sequence[float] = DURATION_BUCKETS) -> None:
+        """
+        Initialize the stage timer
+
+        Args:
+            buckets (Sequence[float]): Sorted upper bounds of the histogram buckets in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._stages: Dict[str, DurationHistogram] = {}
+        self._requests = DurationHistogram(self.buckets)
+
+    @classmethod
+    def get_instance(cls) -> "StageTimer":
+        """
+        Get the process-wide stage timer, registering its LLM call handler with the LlamaIndex instrumentation on
+        first use
+
+        Returns:
+            StageTimer: Shared timer instance
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                timer = cls()
+                get_dispatcher().add_event_handler(
+                    _LLMTimingEventHandler(span_parents=get_span_parents(), on_call=timer._llm_call_done)
+                )
+                cls._instance = timer
+
+        return cls._instance
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time the block as one run of a stage, failed runs included
+
+        Args:
+            name (str): Stage name
+        """
+        started_at = time.perf_counter()
+        previous = _current_stage.get()
+        _current_stage.set(name)
+        try:
+            yield
+        finally:
+            # Restore with set() rather than a reset token, streamed stages may end in another context
+            _current_stage.set(previous)
+            self.observe(name, time.perf_counter() - started_at, _current_timings.get())
+
+    @contextmanager
+    def track(self) -> Iterator[StageTimings]:
+        """
+        Collect the stage timings of the request answered within the block and record its total duration
+
+        Returns:
+            Iterator[StageTimings]: Timings of the request
+        """
+        timings = StageTimings()
+        previous = _current_timings.get()
+        _current_timings.set(timings)
+        try:
+            yield timings
+        finally:
+            # Restore with set() rather than a reset token, like LLMCallCounter.track
+            _current_timings.set(previous)
+            with self._lock:
+                self._requests.observe(time.perf_counter() - timings.started_at)
+
+    def observe(self, stage: str, seconds: float, timings: Optional[StageTimings] = None) -> None:
+        """
+        Record one run of a stage
+
+        Args:
+            stage (str): Stage name
+            seconds (float): Duration in seconds
+            timings (Optional[StageTimings]): Timings of the request the run belongs to, if it is tracked
+        """
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = DurationHistogram(self.buckets)
+            histogram.observe(seconds)
+
+        if timings is not None:
+            timings.add(stage, seconds)
+
+    def histograms(self) -> Tuple[Dict[str, DurationHistogram], DurationHistogram]:
+        """
+        Get a copy of the histograms
+
+        Returns:
+            Tuple[Dict[str, DurationHistogram], DurationHistogram]: Stage histograms keyed by stage name, and the
+                histogram of the tracked request durations
+        """
+        with self._lock:
+            return (
+                {stage: self._copy(histogram) for stage, histogram in self._stages.items()},
+                self._copy(self._requests),
+            )
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the number of runs and the total and mean duration of each stage
+
+        Returns:
+            Dict[str, Dict[str, float]]: Runs, total seconds and mean seconds, keyed by stage name
+        """
+        with self._lock:
+            return {
+                stage: {
+                    "count": histogram.count,
+                    "sum_seconds": histogram.sum,
+                    "mean_seconds": histogram.sum / histogram.count,
+                }
+                for stage, histogram in self._stages.items()
+            }
+
+    def clear(self) -> None:
+        """
+        Reset every histogram
+        """
+        with self._lock:
+            self._stages.clear()
+            self._requests = DurationHistogram(self.buckets)
+
+    def _llm_call_done(self, seconds: float, timings: Optional[StageTimings]) -> None:
+        """
+        Record a finished LLM call
+
+        Args:
+            seconds (float): Duration of the call in seconds
+            timings (Optional[StageTimings]): Timings of the request the call was made for, if it is tracked
+        """
+        logger.debug(f"LLM call took {seconds:.3f}s.")
+        self.observe(LLM_STAGE, seconds, timings)
+
+    @staticmethod
+    def _copy(histogram: DurationHistogram) -> DurationHistogram:
+        """
+        Copy a histogram (the caller must hold the lock)
+
+        Args:
+            histogram (DurationHistogram): Histogram to copy
+
+        Returns:
+            DurationHistogram: Independent copy
+        """
+        copy = DurationHistogram(histogram.buckets)
+        copy.bucket_counts = list(histogram.bucket_counts)
+        copy.count = histogram.count
+        copy.sum = histogram.sum
+        return copy
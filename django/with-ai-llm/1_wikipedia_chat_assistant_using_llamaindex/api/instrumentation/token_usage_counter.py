@@ -0,0 +1,256 @@
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from llama_index.core.callbacks.token_counting import get_tokens_from_response
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events import BaseEvent
+from llama_index.core.instrumentation.events.embedding import EmbeddingEndEvent
+from llama_index.core.instrumentation.events.exception import ExceptionEvent
+from llama_index.core.instrumentation.events.llm import (
+    LLMChatEndEvent,
+    LLMChatStartEvent,
+    LLMCompletionEndEvent,
+    LLMCompletionStartEvent,
+)
+from llama_index.core.instrumentation.events.span import SpanDropEvent
+from llama_index.core.utilities.token_counting import TokenCounter
+from pydantic import Field
+
+from api.instrumentation.span_parents import SpanParentHandler, get_span_parents
+from api.instrumentation.stage_timer import current_stage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageUsage:
+    """
+    LLM calls and tokens used by one stage
+    """
+
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    embedding_tokens: int = 0
+
+    def add(self, other: "StageUsage") -> None:
+        """
+        Add the usage of another run of the stage
+
+        Args:
+            other (StageUsage): Usage to add
+        """
+        self.llm_calls += other.llm_calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.embedding_tokens += other.embedding_tokens
+
+
+@dataclass
+class TokenUsage:
+    """
+    LLM calls and tokens used while answering one request, by stage
+    """
+
+    stages: Dict[str, StageUsage] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, stage: str, usage: StageUsage) -> None:
+        """
+        Add the usage of a call made during a stage
+
+        Args:
+            stage (str): Stage name
+            usage (StageUsage): Usage of the call
+        """
+        # Concurrent calls of an async request report from several threads
+        with self._lock:
+            self.stages.setdefault(stage, StageUsage()).add(usage)
+
+    def total(self) -> StageUsage:
+        """
+        Get the usage of the whole request
+
+        Returns:
+            StageUsage: Sum of the usage of every stage
+        """
+        total = StageUsage()
+        with self._lock:
+            for usage in self.stages.values():
+                total.add(usage)
+
+        return total
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the usage for a response
+
+        Returns:
+            Dict[str, Any]: Totals of the request, and the usage of each stage under "stages"
+        """
+        total = self.total()
+        with self._lock:
+            stages = {stage: asdict(usage) for stage, usage in self.stages.items()}
+
+        return {**asdict(total), "stages": stages}
+
+
+# Usage of the request being answered in the current thread or task (None outside a tracked request)
+_current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("token_usage", default=None)
+
+
+class _TokenUsageEventHandler(BaseEventHandler):
+    """
+    Instrumentation handler counting the LLM calls and the prompt, completion and embedding tokens, attributed to the
+    stage that made the call
+    """
+
+    span_parents: SpanParentHandler
+    # Number of tokens of a text, for the calls whose response does not report its usage
+    count_tokens: Callable[[str], int]
+    # Called with the stage, the request usage and the usage of each finished call
+    on_usage: Callable[..., None]
+    # Stage and request usage of the LLM calls in progress, keyed by span
+    started: Dict[str, Tuple[str, Any]] = Field(default_factory=dict)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "TokenUsageEventHandler"
+
+    def handle(self, event: BaseEvent, **kwargs: Any) -> None:
+        if isinstance(event, (LLMChatStartEvent, LLMCompletionStartEvent)):
+            # Some LLMs implement chat on top of complete (or the reverse), only count the outermost call
+            if not self.span_parents.has_ancestor_in(event.span_id, self.started):
+                # Streamed calls end in the context consuming the stream, so the stage is taken at the start
+                self.started[event.span_id] = (current_stage(), _current_usage.get())
+        elif isinstance(event, LLMChatEndEvent):
+            self._call_done(event.span_id, "\n".join(str(m) for m in event.messages), event.response)
+        elif isinstance(event, LLMCompletionEndEvent):
+            self._call_done(event.span_id, event.prompt, event.response)
+        elif isinstance(event, (ExceptionEvent, SpanDropEvent)):
+            # Failed calls never send their end event
+            self.started.pop(event.span_id, None)
+        elif isinstance(event, EmbeddingEndEvent):
+            usage = StageUsage(embedding_tokens=sum(self.count_tokens(chunk) for chunk in event.chunks))
+            self.on_usage(current_stage(), _current_usage.get(), usage)
+
+    def _call_done(self, span_id: Optional[str], prompt: str, response: Any) -> None:
+        """
+        Count a finished LLM call, from the usage reported by the API or else from the prompt and completion texts
+
+        Args:
+            span_id (Optional[str]): Span of the call
+            prompt (str): Prompt text (messages joined for chat calls)
+            response (Any): Chat or completion response (the last chunk for streamed calls)
+        """
+        call = self.started.pop(span_id, None)
+        if call is None:
+            return
+
+        stage, request_usage = call
+        prompt_tokens, completion_tokens = get_tokens_from_response(response) if response else (0, 0)
+        usage = StageUsage(
+            llm_calls=1,
+            prompt_tokens=prompt_tokens or self.count_tokens(prompt),
+            completion_tokens=completion_tokens or self.count_tokens(str(response or "")),
+        )
+        self.on_usage(stage, request_usage, usage)
+
+
+class TokenUsageCounter:
+    """
+    Per-stage count of the LLM calls and of the prompt, completion and embedding tokens, for each request and for the
+    whole process.
+
+    Token counts come from the usage reported by the OpenAI API when there is one (chat and completion calls, streamed
+    ones included), and are estimated with the tokenizer otherwise (embeddings).
+    """
+
+    _instance: Optional["TokenUsageCounter"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageUsage] = {}
+
+    @classmethod
+    def get_instance(cls) -> "TokenUsageCounter":
+        """
+        Get the process-wide token usage counter, registering its handler with the LlamaIndex instrumentation on
+        first use
+
+        Returns:
+            TokenUsageCounter: Shared counter instance
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                counter = cls()
+                get_dispatcher().add_event_handler(
+                    _TokenUsageEventHandler(
+                        span_parents=get_span_parents(),
+                        count_tokens=TokenCounter().get_string_tokens,
+                        on_usage=counter._record,
+                    )
+                )
+                cls._instance = counter
+
+        return cls._instance
+
+    @contextmanager
+    def track(self) -> Iterator[TokenUsage]:
+        """
+        Collect the usage of the request answered within the block
+
+        Returns:
+            Iterator[TokenUsage]: Usage of the request
+        """
+        usage = TokenUsage()
+        previous = _current_usage.get()
+        _current_usage.set(usage)
+        try:
+            yield usage
+        finally:
+            # Restore with set() rather than a reset token, streamed queries may end in another context
+            _current_usage.set(previous)
+            total = usage.total()
+            logger.info(
+                f"Answered a request with {total.llm_calls} LLM calls, {total.prompt_tokens} prompt, "
+                f"{total.completion_tokens} completion and {total.embedding_tokens} embedding tokens."
+            )
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get the LLM calls and tokens used by each stage since the process started
+
+        Returns:
+            Dict[str, Dict[str, int]]: LLM calls and prompt, completion and embedding tokens, keyed by stage
+        """
+        with self._lock:
+            return {stage: asdict(usage) for stage, usage in self._stages.items()}
+
+    def clear(self) -> None:
+        """
+        Reset the usage of every stage
+        """
+        with self._lock:
+            self._stages.clear()
+
+    def _record(self, stage: str, request_usage: Optional[TokenUsage], usage: StageUsage) -> None:
+        """
+        Add the usage of a call to the process totals and to the request it was made for
+
+        Args:
+            stage (str): Stage that made the call
+            request_usage (Optional[TokenUsage]): Usage of the request, if it is tracked
+            usage (StageUsage): Usage of the call
+        """
+        with self._lock:
+            self._stages.setdefault(stage, StageUsage()).add(usage)
+
+        if request_usage is not None:
+            request_usage.add(stage, usage)
@@ -0,0 +1,348 @@
+import bz2
+import html
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import time
+from pathlib import Path
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from django.core.management.base import BaseCommand, CommandError
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import BaseNode, Document
+
+from api.cache.embedding_cache import EmbeddingCache
+from api.cache.vector_shard_store import VectorShardStore
+from api.cache.wikipedia_page_cache import WikipediaPageCache
+from api.services.vector_indexing_service import VectorIndexingService
+
+# Raw page record streamed from the dump: (page id, title, text, whether the text is wikitext markup)
+PageRecord = Tuple[str, str, str, bool]
+
+# Splitter of the current worker process, built once by the pool initializer
+_splitter: Optional[SentenceSplitter] = None
+
+
+class Command(BaseCommand):
+    help = (
+        "Ingest a local Wikipedia dump (XML or JSONL, optionally bz2-compressed) into the page cache "
+        "and the vector shard store, so the pages are served without calling Wikipedia."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("path", type=Path, help="Path of the dump file")
+        parser.add_argument(
+            "--format",
+            choices=["auto", "xml", "jsonl"],
+            default="auto",
+            help="Dump format (guessed from the file extension by default)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of processes parsing and chunking pages (1 to work in-process)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of pages processed and written per batch (bounds the memory used)",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=Path,
+            default=None,
+            help="Path of the checkpoint file used to resume an interrupted ingestion (defaults to <path>.checkpoint)",
+        )
+        parser.add_argument("--limit", type=int, default=None, help="Maximum number of pages to ingest")
+        parser.add_argument(
+            "--embed",
+            action="store_true",
+            help="Also embed the chunks (otherwise they are embedded the first time a request uses them)",
+        )
+
+    def handle(self, *args, **options) -> None:
+        path: Path = options["path"]
+        if not path.exists():
+            raise CommandError(f"Dump file {path} does not exist.")
+
+        dump_format = options["format"]
+        if dump_format == "auto":
+            dump_format = self._guess_format(path)
+
+        page_cache = WikipediaPageCache.get_instance()
+        if page_cache is None:
+            raise CommandError("The Wikipedia page cache is disabled, there is nowhere to ingest the dump to.")
+
+        shard_store = VectorShardStore.get_instance()
+        vector_indexer = VectorIndexingService(
+            embedding_cache=EmbeddingCache.get_instance(),
+            shard_store=shard_store,
+        )
+        namespace = vector_indexer.shard_namespace() if shard_store else None
+        if shard_store is None:
+            self.stderr.write("Vector shards are disabled, only the pages will be ingested.")
+
+        # Resume after the last batch written by a previous run
+        checkpoint_path: Path = options["checkpoint"] or path.with_name(path.name + ".checkpoint")
+        done = self._read_checkpoint(checkpoint_path)
+        if done:
+            self.stdout.write(f"Resuming after {done} pages.")
+
+        records: Iterable[PageRecord] = itertools.islice(self._read_records(path, dump_format), done, None)
+        if options["limit"] is not None:
+            records = itertools.islice(records, max(options["limit"] - done, 0))
+
+        workers = max(options["workers"], 1)
+        initargs = (vector_indexer.chunk_size, vector_indexer.chunk_overlap)
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=initargs) if workers > 1 else None
+        if pool is None:
+            _init_worker(*initargs)
+
+        started_at = time.perf_counter()
+        ingested = 0
+        try:
+            # Work in bounded batches: Pool.imap reads its whole input eagerly, which would defeat the streaming
+            for batch in _batches(records, options["batch_size"]):
+                if pool:
+                    pages = pool.imap(_process_page, batch, chunksize=max(len(batch) // (workers * 4), 1))
+                else:
+                    pages = map(_process_page, batch)
+                pages = [page for page in pages if page is not None]
+
+                if options["embed"] and pages:
+                    vector_indexer.embed_nodes([n for _, nodes in pages for n in nodes])
+
+                page_cache.set_many({d.metadata["title"]: d for d, _ in pages}, pinned=True)
+                if shard_store:
+                    for document, nodes in pages:
+                        title = document.metadata["title"]
+                        shard_store.save(title, shard_store.revision(document.text), namespace, nodes, pinned=True)
+
+                done += len(batch)
+                ingested += len(pages)
+                self._write_checkpoint(checkpoint_path, done)
+
+                elapsed = time.perf_counter() - started_at
+                self.stdout.write(
+                    f"{done} pages read, {ingested} ingested ({ingested / elapsed:.1f} pages/s)."
+                )
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        self.stdout.write(self.style.SUCCESS(f"Ingested {ingested} pages from {path}."))
+
+    @staticmethod
+    def _guess_format(path: Path) -> str:
+        """
+        Guess the dump format from the file extension
+
+        Args:
+            path (Path): Path of the dump file
+
+        Returns:
+            str: Dump format ("xml" or "jsonl")
+        """
+        suffixes = [s for s in path.suffixes if s != ".bz2"]
+        if suffixes and suffixes[-1] == ".xml":
+            return "xml"
+        if suffixes and suffixes[-1] in (".jsonl", ".ndjson", ".json"):
+            return "jsonl"
+
+        raise CommandError(f"Cannot guess the format of {path}, use --format.")
+
+    @staticmethod
+    def _read_checkpoint(path: Path) -> int:
+        """
+        Read the number of pages already ingested from the checkpoint file
+
+        Args:
+            path (Path): Path of the checkpoint file
+
+        Returns:
+            int: Number of dump records already processed (0 without a checkpoint)
+        """
+        if not path.exists():
+            return 0
+
+        return json.loads(path.read_text())["records"]
+
+    @staticmethod
+    def _write_checkpoint(path: Path, records: int) -> None:
+        """
+        Atomically write the number of dump records processed to the checkpoint file
+
+        Args:
+            path (Path): Path of the checkpoint file
+            records (int): Number of dump records processed
+        """
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps({"records": records}))
+        os.replace(tmp_path, path)
+
+    def _read_records(self, path: Path, dump_format: str) -> Iterator[PageRecord]:
+        """
+        Stream the article records of the dump
+
+        Args:
+            path (Path): Path of the dump file
+            dump_format (str): Dump format ("xml" or "jsonl")
+
+        Returns:
+            Iterator[PageRecord]: Raw page records, in dump order
+        """
+        opener = bz2.open if path.suffix == ".bz2" else open
+        with opener(path, "rb") as f:
+            if dump_format == "xml":
+                yield from _read_xml_records(f)
+            else:
+                yield from _read_jsonl_records(f)
+
+
+def _read_xml_records(f: IO[bytes]) -> Iterator[PageRecord]:
+    """
+    Stream the articles of a MediaWiki XML export, skipping redirects and non-article namespaces
+
+    Args:
+        f (IO[bytes]): Open dump file
+
+    Returns:
+        Iterator[PageRecord]: Raw page records
+    """
+    root = None
+    for event, elem in ElementTree.iterparse(f, events=("start", "end")):
+        if root is None:
+            root = elem
+        if event != "end" or _local_name(elem.tag) != "page":
+            continue
+
+        fields = {_local_name(child.tag): child for child in elem}
+        revision = {_local_name(child.tag): child for child in fields.get("revision", [])}
+        namespace = fields.get("ns")
+        text = revision.get("text")
+        if (
+            "redirect" not in fields
+            and (namespace is None or namespace.text == "0")
+            and text is not None
+            and text.text
+        ):
+            yield fields["id"].text, fields["title"].text, text.text, True
+
+        # Release the parsed pages to keep the memory constant
+        elem.clear()
+        root.clear()
+
+
+def _read_jsonl_records(f: IO[bytes]) -> Iterator[PageRecord]:
+    """
+    Stream the articles of a JSONL dump holding one {"id", "title", "text"} object per line
+
+    Args:
+        f (IO[bytes]): Open dump file
+
+    Returns:
+        Iterator[PageRecord]: Raw page records
+    """
+    for line in f:
+        if not line.strip():
+            continue
+
+        page = json.loads(line)
+        if page.get("text"):
+            yield str(page.get("id", page["title"])), page["title"], page["text"], False
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _batches(records: Iterable[PageRecord], size: int) -> Iterator[List[PageRecord]]:
+    iterator = iter(records)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int) -> None:
+    """
+    Build the sentence splitter of the worker process, with the settings of the vector indexing service
+
+    Args:
+        chunk_size (int): Size of chunks to split the pages into
+        chunk_overlap (int): Overlap between chunks
+    """
+    global _splitter
+    _splitter = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _process_page(record: PageRecord) -> Optional[Tuple[Document, List[BaseNode]]]:
+    """
+    Clean and chunk a page in a worker process
+
+    Args:
+        record (PageRecord): Raw page record
+
+    Returns:
+        Optional[Tuple[Document, List[BaseNode]]]: Page and its chunks, or None if the page has no text left
+    """
+    page_id, title, text, is_wikitext = record
+    if is_wikitext:
+        text = clean_wikitext(text)
+    if not text:
+        return None
+
+    document = Document(id_=page_id, text=text, metadata={"title": title})
+    return document, _splitter.get_nodes_from_documents([document])
+
+
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_REF_RE = re.compile(r"<ref[^>]*/>|<ref[^>]*>.*?</ref>", re.DOTALL | re.IGNORECASE)
+_TEMPLATE_RE = re.compile(r"\{\{[^{}]*\}\}")
+_TABLE_RE = re.compile(r"\{\|.*?\|\}", re.DOTALL)
+_LINK_RE = re.compile(r"\[\[([^\[\]]*)\]\]")
+_EXTERNAL_LINK_RE = re.compile(r"\[https?://[^\s\]]+\s*([^\]]*)\]")
+_TAG_RE = re.compile(r"<[^>]+>")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def clean_wikitext(text: str) -> str:
+    """
+    Turn wikitext into plain text close to what the Wikipedia API returns (section headings are kept)
+
+    Args:
+        text (str): Wikitext of the page
+
+    Returns:
+        str: Plain text of the page
+    """
+    text = _COMMENT_RE.sub("", text)
+    text = _REF_RE.sub("", text)
+
+    # Templates and links nest, strip them from the innermost out
+    while True:
+        text, count = _TEMPLATE_RE.subn("", text)
+        if not count:
+            break
+    text = _TABLE_RE.sub("", text)
+    while True:
+        text, count = _LINK_RE.subn(_replace_link, text)
+        if not count:
+            break
+
+    text = _EXTERNAL_LINK_RE.sub(r"\1", text)
+    text = text.replace("'''", "").replace("''", "")
+    text = html.unescape(_TAG_RE.sub("", text))
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def _replace_link(match: re.Match) -> str:
+    target, _, label = match.group(1).partition("|")
+    if target.split(":", 1)[0].strip().lower() in ("file", "image", "category"):
+        return ""
+
+    return label.rsplit("|", 1)[-1] if label else target
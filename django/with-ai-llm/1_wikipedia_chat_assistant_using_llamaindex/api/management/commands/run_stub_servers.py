@@ -0,0 +1,130 @@
+import threading
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.stubs.fault_profile import LATENCY_DISTRIBUTIONS, FaultProfile
+from api.stubs.openai_stub_server import OpenAIStubServer
+from api.stubs.wikipedia_stub_server import DEFAULT_CORPUS, WikipediaStubServer, load_corpus
+
+
+class Command(BaseCommand):
+    help = (
+        "Run local stand-in OpenAI and Wikipedia servers with deterministic outputs and injected latency and errors, "
+        "so the pipeline can be run and profiled offline."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+        parser.add_argument("--openai-port", type=int, default=8001, help="Port of the OpenAI stand-in")
+        parser.add_argument("--wikipedia-port", type=int, default=8002, help="Port of the Wikipedia stand-in")
+        parser.add_argument(
+            "--corpus",
+            type=Path,
+            default=DEFAULT_CORPUS,
+            help="JSONL file of the pages served, with id, title and text fields (defaults to a small fixture corpus)",
+        )
+        parser.add_argument(
+            "--latency-distribution",
+            choices=LATENCY_DISTRIBUTIONS,
+            default="constant",
+            help="Distribution of the injected delays",
+        )
+        parser.add_argument("--openai-latency-ms", type=float, default=0.0, help="Mean delay of the OpenAI responses")
+        parser.add_argument("--openai-jitter-ms", type=float, default=0.0, help="Spread of the OpenAI delays")
+        parser.add_argument(
+            "--openai-token-latency-ms", type=float, default=0.0, help="Delay between two streamed completion chunks"
+        )
+        parser.add_argument(
+            "--openai-error-rate", type=float, default=0.0, help="Fraction of the OpenAI requests failing"
+        )
+        parser.add_argument(
+            "--wikipedia-latency-ms", type=float, default=0.0, help="Mean delay of the Wikipedia responses"
+        )
+        parser.add_argument("--wikipedia-jitter-ms", type=float, default=0.0, help="Spread of the Wikipedia delays")
+        parser.add_argument(
+            "--wikipedia-error-rate", type=float, default=0.0, help="Fraction of the Wikipedia requests failing"
+        )
+        parser.add_argument(
+            "--error-statuses",
+            type=int,
+            nargs="+",
+            default=[500],
+            help="HTTP statuses of the injected errors, drawn uniformly (e.g. 429 500 503)",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the latency and error draws")
+
+    def handle(self, *args, **options) -> None:
+        corpus: Path = options["corpus"]
+        if not corpus.exists():
+            raise CommandError(f"Corpus file {corpus} does not exist.")
+
+        try:
+            openai_faults = self._fault_profile(options, "openai", seed=options["seed"])
+            wikipedia_faults = self._fault_profile(options, "wikipedia", seed=options["seed"] + 1)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        wikipedia_server = WikipediaStubServer(
+            pages=load_corpus(corpus),
+            host=options["host"],
+            port=options["wikipedia_port"],
+            fault_profile=wikipedia_faults,
+        )
+        openai_server = OpenAIStubServer(
+            titles=wikipedia_server.titles,
+            host=options["host"],
+            port=options["openai_port"],
+            fault_profile=openai_faults,
+            token_latency_ms=options["openai_token_latency_ms"],
+        )
+
+        wikipedia_server.start()
+        openai_server.start()
+        try:
+            self.stdout.write(f"Serving {len(wikipedia_server.titles)} pages from {corpus}.")
+            self.stdout.write("Point the application to the stand-in servers with:")
+            self.stdout.write(self.style.SUCCESS(f"OPENAI_API_BASE={openai_server.api_base}"))
+            self.stdout.write(self.style.SUCCESS(f"WIKIPEDIA_API_URL={wikipedia_server.api_url}"))
+            self.stdout.write("Press Ctrl+C to stop.")
+            self._wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            openai_server.stop()
+            wikipedia_server.stop()
+
+        self.stdout.write(f"OpenAI requests: {openai_server.request_counts()}")
+        self.stdout.write(f"Wikipedia requests: {wikipedia_server.request_counts()}")
+
+    @staticmethod
+    def _fault_profile(options, prefix: str, seed: int) -> FaultProfile:
+        """
+        Build the fault profile of a server from its command options
+
+        Args:
+            options: Command options
+            prefix (str): Option prefix of the server ("openai" or "wikipedia")
+            seed (int): Seed of the draws
+
+        Returns:
+            FaultProfile: Latency and error distribution of the server
+
+        Raises:
+            ValueError: If the options are invalid
+        """
+        return FaultProfile(
+            latency_ms=options[f"{prefix}_latency_ms"],
+            jitter_ms=options[f"{prefix}_jitter_ms"],
+            distribution=options["latency_distribution"],
+            error_rate=options[f"{prefix}_error_rate"],
+            error_statuses=options["error_statuses"],
+            seed=seed,
+        )
+
+    @staticmethod
+    def _wait() -> None:
+        """
+        Block until interrupted
+        """
+        threading.Event().wait()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -10,3 +12,22 @@ class ChatRequest(BaseModel):
         description="The query to be processed by the chat service.",
         min_length=1,
     )
+    stream: bool = Field(
+        default=False,
+        description="Stream progress events and the answer tokens as Server-Sent Events.",
+    )
+    budget_seconds: Optional[float] = Field(
+        default=None,
+        description="Latency budget of the request in seconds (the server default is used when omitted).",
+        gt=0,
+    )
+    session_id: Optional[str] = Field(
+        default=None,
+        description="Conversation identifier: follow-up turns with the same id reuse the pages, index and chat memory.",
+        min_length=1,
+        max_length=128,
+    )
+    include_usage: bool = Field(
+        default=False,
+        description="Report the LLM calls and the prompt, completion and embedding tokens of each stage.",
+    )
@@ -0,0 +1,157 @@
+import logging
+import threading
+import weakref
+from itertools import islice
+from typing import Dict, List, Tuple
+
+from llama_index.core import VectorStoreIndex
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import MetadataMode, NodeWithScore, QueryBundle
+
+from api.retrieval.bm25 import BM25Index
+
+logger = logging.getLogger(__name__)
+
+# Rank constant of the reciprocal-rank fusion, the value of the original paper
+DEFAULT_RRF_K = 60
+
+
+class NodeBM25Index:
+    """
+    BM25 index over the nodes of a vector index, kept in sync with it.
+
+    The nodes inserted into the vector index after the BM25 index was built (chat session growth, shared corpus) are
+    indexed on the next lookup, so one BM25 index serves every retriever of a vector index.
+    """
+
+    def __init__(self, index: VectorStoreIndex) -> None:
+        """
+        Initialize the BM25 index of a vector index
+
+        Args:
+            index (VectorStoreIndex): Vector index whose docstore holds the nodes to index
+        """
+        self.docstore = index.docstore
+        self.bm25 = BM25Index()
+        self._node_ids: List[str] = []
+        self._lock = threading.Lock()
+
+    def top_k(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Get the nodes best matching the query terms
+
+        Args:
+            query (str): Query text
+            k (int): Maximum number of nodes to return
+
+        Returns:
+            List[Tuple[str, float]]: Node id and BM25 score of the best nodes, best first
+        """
+        self._sync()
+        return [(self._node_ids[position], score) for position, score in self.bm25.top_k(query, k)]
+
+    def _sync(self) -> None:
+        """
+        Index the nodes added to the docstore since the last lookup
+        """
+        with self._lock:
+            # The docstore keeps its nodes in insertion order, so the new ones come after the indexed ones
+            new_nodes = list(islice(self.docstore.docs.items(), len(self._node_ids), None))
+            if not new_nodes:
+                return
+
+            self.bm25.add(node.get_content(metadata_mode=MetadataMode.EMBED) for _, node in new_nodes)
+            self._node_ids.extend(node_id for node_id, _ in new_nodes)
+            logger.debug(f"Indexed {len(new_nodes)} new nodes for BM25, {len(self._node_ids)} in total.")
+
+
+_node_indexes: "weakref.WeakKeyDictionary[VectorStoreIndex, NodeBM25Index]" = weakref.WeakKeyDictionary()
+_node_indexes_lock = threading.Lock()
+
+
+def get_node_bm25_index(index: VectorStoreIndex) -> NodeBM25Index:
+    """
+    Get the BM25 index of a vector index, building it on first use (it lives as long as the vector index)
+
+    Args:
+        index (VectorStoreIndex): Vector index
+
+    Returns:
+        NodeBM25Index: BM25 index over the nodes of the vector index
+    """
+    with _node_indexes_lock:
+        node_index = _node_indexes.get(index)
+        if node_index is None:
+            node_index = _node_indexes[index] = NodeBM25Index(index)
+
+    return node_index
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing the dense similarity results of a vector index with the BM25 results over the same nodes, by
+    reciprocal-rank fusion.
+
+    The lexical lookup costs no network call, and finds the exact names and dates the embeddings may rank low.
+    """
+
+    def __init__(
+        self,
+        vector_retriever: BaseRetriever,
+        index: VectorStoreIndex,
+        similarity_top_k: int = 5,
+        lexical_top_k: int = 5,
+        rrf_k: int = DEFAULT_RRF_K,
+        **kwargs,
+    ) -> None:
+        """
+        Initialize the hybrid retriever
+
+        Args:
+            vector_retriever (BaseRetriever): Dense retriever of the vector index
+            index (VectorStoreIndex): Vector index, whose nodes are also searched with BM25
+            similarity_top_k (int): Number of fused nodes returned
+            lexical_top_k (int): Number of BM25 results fused with the dense ones
+            rrf_k (int): Rank constant of the reciprocal-rank fusion (larger values flatten the rank weights)
+        """
+        super().__init__(**kwargs)
+        self.vector_retriever = vector_retriever
+        self.index = index
+        self.similarity_top_k = similarity_top_k
+        self.lexical_top_k = lexical_top_k
+        self.rrf_k = rrf_k
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        return self._fuse(self.vector_retriever.retrieve(query_bundle), query_bundle)
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        return self._fuse(await self.vector_retriever.aretrieve(query_bundle), query_bundle)
+
+    def _fuse(self, vector_results: List[NodeWithScore], query_bundle: QueryBundle) -> List[NodeWithScore]:
+        """
+        Fuse the dense results with the BM25 results of the query
+
+        Args:
+            vector_results (List[NodeWithScore]): Dense results, best first
+            query_bundle (QueryBundle): Query
+
+        Returns:
+            List[NodeWithScore]: Best fused nodes, scored by the sum of their reciprocal ranks
+        """
+        lexical_results = get_node_bm25_index(self.index).top_k(query_bundle.query_str, self.lexical_top_k)
+
+        scores: Dict[str, float] = {}
+        nodes = {}
+        for rank, result in enumerate(vector_results):
+            scores[result.node.node_id] = scores.get(result.node.node_id, 0.0) + 1 / (self.rrf_k + rank + 1)
+            nodes[result.node.node_id] = result.node
+        for rank, (node_id, _) in enumerate(lexical_results):
+            scores[node_id] = scores.get(node_id, 0.0) + 1 / (self.rrf_k + rank + 1)
+            if node_id not in nodes:
+                nodes[node_id] = self.index.docstore.get_node(node_id)
+
+        best = sorted(scores, key=scores.get, reverse=True)[: self.similarity_top_k]
+        logger.info(
+            f"Fused {len(vector_results)} dense and {len(lexical_results)} BM25 results into {len(best)} nodes."
+        )
+        return [NodeWithScore(node=nodes[node_id], score=scores[node_id]) for node_id in best]
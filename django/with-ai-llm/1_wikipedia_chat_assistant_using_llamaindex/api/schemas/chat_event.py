@@ -0,0 +1,26 @@
+import json
+from typing import Any, Dict
+
+from pydantic import BaseModel, Field
+
+
+class ChatEvent(BaseModel):
+    """
+    Schema for a progress or answer event streamed to the client
+    """
+    event: str = Field(
+        description="Event type: cache, titles, pages, index, tool_call, token, done or error"
+    )
+    data: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Event payload"
+    )
+
+    def to_sse(self) -> str:
+        """
+        Format the event as a Server-Sent Events message
+
+        Returns:
+            str: SSE message
+        """
+        return f"event: {self.event}\ndata: {json.dumps(self.data, default=str)}\n\n"
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import threading
+from typing import List, Optional, Set
+
+from django.conf import settings
+from llama_index.core import Document, StorageContext, VectorStoreIndex
+from llama_index.core.schema import BaseNode
+
+from api.config.llm_config import LLMConfig
+from api.instrumentation.stage_timer import StageTimer
+from api.services.vector_indexing_service import VectorIndexingService
+from api.vector_stores.ivf_vector_store import IVFVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusIndexService:
+    """
+    Service to maintain a process-wide approximate nearest-neighbour index over every Wikipedia page seen so far
+    """
+
+    _instance: Optional["CorpusIndexService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        vector_indexer: VectorIndexingService,
+        nprobe: int = 8,
+        min_train_size: int = 4096,
+    ) -> None:
+        """
+        Initialize the corpus index service
+
+        Args:
+            vector_indexer (VectorIndexingService): Service used to chunk and embed the new pages
+            nprobe (int): Number of IVF clusters scored per query
+            min_train_size (int): Number of nodes needed before the IVF clusters are trained
+        """
+        self.vector_indexer = vector_indexer
+        self.stage_timer = StageTimer.get_instance()
+        self.vector_store = IVFVectorStore(nprobe=nprobe, min_train_size=min_train_size)
+        # The index embeds its queries with the global embedding model, set up on first use
+        LLMConfig.ensure_initialized()
+        self.index = VectorStoreIndex(
+            nodes=[],
+            storage_context=StorageContext.from_defaults(vector_store=self.vector_store),
+        )
+        # Ids of the documents already indexed: a page, or one section of a page when the section filter is on
+        self.document_ids: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, vector_indexer: VectorIndexingService) -> Optional["CorpusIndexService"]:
+        """
+        Get the process-wide corpus index configured in the Django settings
+
+        Args:
+            vector_indexer (VectorIndexingService): Service used to chunk and embed the new pages
+
+        Returns:
+            Optional[CorpusIndexService]: Shared corpus index, or None if it is disabled
+        """
+        config = settings.SHARED_CORPUS_INDEX
+        if not config["ENABLED"]:
+            return None
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(
+                    vector_indexer=vector_indexer,
+                    nprobe=config["NPROBE"],
+                    min_train_size=config["MIN_TRAIN_SIZE"],
+                )
+
+        return cls._instance
+
+    def add_documents(self, documents: List[Document]) -> Optional[VectorStoreIndex]:
+        """
+        Insert the pages not yet in the corpus and return the corpus index
+
+        Args:
+            documents (List[Document]): Pages needed by the current request
+
+        Returns:
+            Optional[VectorStoreIndex]: Corpus index, or None if the new pages could not be indexed
+        """
+        try:
+            # The lock is not held while embedding, so concurrent requests may embed the same document: only the first
+            # one to finish inserts it
+            new_documents = self._new_documents(documents)
+            if new_documents:
+                self._insert(new_documents, self.vector_indexer.get_document_nodes(new_documents))
+
+            return self.index
+        except Exception as e:
+            logger.error(f"Error adding pages to the corpus index: {e}")
+            return None
+
+    async def aadd_documents(self, documents: List[Document]) -> Optional[VectorStoreIndex]:
+        """
+        Insert the pages not yet in the corpus and return the corpus index, embedding them with the async API
+
+        Args:
+            documents (List[Document]): Pages needed by the current request
+
+        Returns:
+            Optional[VectorStoreIndex]: Corpus index, or None if the new pages could not be indexed
+        """
+        try:
+            # The lock is taken in a worker thread, as a sync request may hold it while inserting its nodes
+            new_documents = await asyncio.to_thread(self._new_documents, documents)
+            if new_documents:
+                document_nodes = await self.vector_indexer.aget_document_nodes(new_documents)
+                await asyncio.to_thread(self._insert, new_documents, document_nodes)
+
+            return self.index
+        except Exception as e:
+            logger.error(f"Error adding pages to the corpus index: {e}")
+            return None
+
+    def _new_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Get the documents not yet in the corpus
+
+        Args:
+            documents (List[Document]): Pages needed by the current request
+
+        Returns:
+            List[Document]: Documents to embed and insert
+        """
+        with self._lock:
+            return [d for d in documents if d.doc_id not in self.document_ids]
+
+    def _insert(self, documents: List[Document], document_nodes: List[List[BaseNode]]) -> None:
+        """
+        Insert the embedded nodes of the given documents, skipping the documents inserted meanwhile by a concurrent
+        request and the documents without nodes
+
+        Args:
+            documents (List[Document]): Documents to insert
+            document_nodes (List[List[BaseNode]]): Embedded nodes of each document
+        """
+        with self._lock, self.stage_timer.stage("index_build"):
+            inserted = [
+                (document, nodes)
+                for document, nodes in zip(documents, document_nodes)
+                if nodes and document.doc_id not in self.document_ids
+            ]
+            if inserted:
+                self.index.insert_nodes([n for _, nodes in inserted for n in nodes])
+                self.document_ids.update(document.doc_id for document, _ in inserted)
+
+            logger.info(
+                f"Added {len(inserted)} documents to the corpus index "
+                f"({len(self.document_ids)} documents, {self.vector_store.size} nodes)."
+            )
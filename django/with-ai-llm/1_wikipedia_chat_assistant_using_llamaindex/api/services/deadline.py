@@ -0,0 +1,106 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(RuntimeError):
+    """
+    Raised when the latency budget of a request is spent before a pipeline stage could start
+    """
+
+
+# Deadline of the request being answered in the current thread or task (None outside a budgeted request)
+_current_deadline: ContextVar[Optional["Deadline"]] = ContextVar("deadline", default=None)
+
+
+class Deadline:
+    """
+    Latency budget of a chat request, shared by every stage of the pipeline.
+
+    Stages check it before starting, the LLM caps its request timeout to the time left (see LLMConfig), and the
+    agent loop stops early and answers with what it has found so far, flagging the answer as truncated.
+    """
+
+    def __init__(self, budget_seconds: float) -> None:
+        """
+        Start the latency budget of a request
+
+        Args:
+            budget_seconds (float): Time the request may take, in seconds
+        """
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+        self.truncated = False
+
+    @staticmethod
+    def current() -> Optional["Deadline"]:
+        """
+        Get the deadline of the request being answered in the current thread or task
+
+        Returns:
+            Optional[Deadline]: Active deadline, or None outside a budgeted request
+        """
+        return _current_deadline.get()
+
+    @contextmanager
+    def activate(self) -> Iterator["Deadline"]:
+        """
+        Make the deadline visible to the LLM calls made within the block
+
+        Returns:
+            Iterator[Deadline]: This deadline
+        """
+        previous = _current_deadline.get()
+        _current_deadline.set(self)
+        try:
+            yield self
+        finally:
+            # Restore with set() rather than a reset token, streamed answers may end in another context
+            _current_deadline.set(previous)
+
+    def remaining(self) -> float:
+        """
+        Get the time left in the budget
+
+        Returns:
+            float: Seconds left (0 once the deadline has passed)
+        """
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """
+        Whether the budget has been spent
+        """
+        return self.remaining() <= 0
+
+    def check(self, stage: str) -> None:
+        """
+        Make sure there is time left to start the given stage
+
+        Args:
+            stage (str): Name of the pipeline stage about to start
+
+        Raises:
+            DeadlineExceeded: If the budget has been spent
+        """
+        if self.expired:
+            raise DeadlineExceeded(f"Latency budget of {self.budget_seconds:g}s spent before {stage}.")
+
+    def cap(self, timeout: float, operation: str = "the LLM call") -> float:
+        """
+        Cap a timeout to the time left in the budget
+
+        Args:
+            timeout (float): Timeout of the operation, in seconds
+            operation (str): Name of the operation, reported if the budget has been spent
+
+        Returns:
+            float: Timeout that ends no later than the deadline
+
+        Raises:
+            DeadlineExceeded: If the budget has been spent
+        """
+        self.check(operation)
+        return min(timeout, self.remaining())
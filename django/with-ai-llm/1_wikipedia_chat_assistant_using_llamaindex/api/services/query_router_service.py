@@ -0,0 +1,86 @@
+import logging
+import re
+import threading
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SINGLE_HOP_ROUTE = "single_hop"
+AGENT_ROUTE = "agent"
+
+# Wording of questions that need several lookups or a reasoning step over the retrieved facts
+_MULTI_HOP_RE = re.compile(
+    r"\b("
+    r"compare[sd]?|comparison|comparing|differen(?:ce|ces|t from)|differ|versus|vs\.?|similarit(?:y|ies)|"
+    r"both|each of|relationship between|related to|in common|"
+    r"which (?:came|was|is|happened) (?:first|earlier|later|older|bigger|larger)|"
+    r"older|younger|earlier than|later than|before or after|"
+    r"(?:more|less|fewer|bigger|larger|smaller|higher|lower) than|"
+    r"how (?:long|many years) (?:between|after|before)|"
+    r"step by step|and then|after that|as a result|"
+    r"why did|why does|why do|why is|why was|how did .+ lead to"
+    r")\b",
+    re.IGNORECASE,
+)
+
+
+class QueryRouterService:
+    """
+    Service routing single-hop questions straight to the query engine and multi-step questions to the ReAct agent.
+
+    The routing is a cheap lexical check made before any LLM call: a single-hop question only needs one retrieval
+    and one synthesis call, whereas the agent spends extra LLM calls on thoughts and actions.
+    """
+
+    _instance: Optional["QueryRouterService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_single_hop_words: int = 25) -> None:
+        """
+        Initialize the query router
+
+        Args:
+            max_single_hop_words (int): Number of words above which a question is sent to the agent
+        """
+        self.max_single_hop_words = max_single_hop_words
+
+    @classmethod
+    def get_instance(cls) -> Optional["QueryRouterService"]:
+        """
+        Get the process-wide query router configured in the Django settings
+
+        Returns:
+            Optional[QueryRouterService]: Shared router, or None if every question goes to the agent
+        """
+        config = settings.QUERY_ROUTER
+        if not config["ENABLED"]:
+            return None
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(max_single_hop_words=config["MAX_SINGLE_HOP_WORDS"])
+
+        return cls._instance
+
+    def route(self, user_query: str) -> str:
+        """
+        Choose how the given user query is answered
+
+        Args:
+            user_query (str): User query
+
+        Returns:
+            str: SINGLE_HOP_ROUTE to query the index directly, AGENT_ROUTE to run the ReAct agent
+        """
+        route = SINGLE_HOP_ROUTE
+        if _MULTI_HOP_RE.search(user_query):
+            route = AGENT_ROUTE
+        elif user_query.count("?") > 1:
+            route = AGENT_ROUTE
+        elif len(user_query.split()) > self.max_single_hop_words:
+            route = AGENT_ROUTE
+
+        logger.info(f"Routing the query to the {route} path.")
+        return route
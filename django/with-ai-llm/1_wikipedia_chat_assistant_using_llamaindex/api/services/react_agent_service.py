@@ -1,11 +1,19 @@
 import logging
-from typing import Optional, List
+from typing import Callable, Iterator, Optional, List
 
 from llama_index.core import VectorStoreIndex
 from llama_index.core.agent import ReActAgent
+from llama_index.core.agent.types import Task, TaskStepOutput
+from llama_index.core.chat_engine.types import StreamingAgentChatResponse
+from llama_index.core.indices.vector_store.retrievers import VectorIndexRetriever
+from llama_index.core.llms import ChatMessage, MessageRole
+from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.core.tools import QueryEngineTool, ToolMetadata
 
 from api.config.llm_config import LLMConfig
+from api.retrieval.hybrid_retriever import DEFAULT_RRF_K, HybridRetriever
+from api.schemas.chat_event import ChatEvent
+from api.services.deadline import Deadline, DeadlineExceeded
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +39,9 @@ class ReActAgentService:
         self.agent: Optional[ReActAgent] = None
         self.tools: List[QueryEngineTool] = []
 
+        # Index the Wikipedia tool answers from, kept with the agent for chat sessions
+        self.index: Optional[VectorStoreIndex] = None
+
     def initialize_agent(self, tools: List[QueryEngineTool]) -> None:
         """
         Initialize the ReAct agent with the given tools
@@ -60,12 +71,13 @@ class ReActAgentService:
             logger.error(f"Error initializing ReAct agent: {e}")
             raise RuntimeError(f"Error initializing ReAct agent: {e}")
 
-    def query(self, user_query: str) -> str:
+    def query(self, user_query: str, deadline: Optional[Deadline] = None) -> str:
         """
         Query the ReAct agent with the given user query
 
         Args:
             user_query (str): User query to query the agent with
+            deadline (Optional[Deadline]): Latency budget of the request (the loop stops early when it is spent)
 
         Returns:
             str: Response from the agent
@@ -80,20 +92,308 @@ class ReActAgentService:
         try:
             logger.info("Querying ReAct agent.")
 
-            # Query the agent
-            response = self.agent.chat(user_query)
+            # Query the agent, one reasoning step at a time when the request has a latency budget
+            if deadline is None:
+                response = self.agent.chat(user_query)
+            else:
+                response = self._run_steps(user_query, deadline)
 
             logger.info("ReAct agent queried successfully.")
             return str(response)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error querying ReAct agent: {e}")
             raise RuntimeError(f"Error querying ReAct agent: {e}")
 
+    def stream_query(self, user_query: str, deadline: Optional[Deadline] = None) -> Iterator[ChatEvent]:
+        """
+        Query the ReAct agent step by step, reporting its tool calls and then streaming the answer tokens
+
+        Args:
+            user_query (str): User query to query the agent with
+            deadline (Optional[Deadline]): Latency budget of the request (the loop stops early when it is spent)
+
+        Returns:
+            Iterator[ChatEvent]: Tool call events followed by the answer token events
+        """
+        if not self.agent:
+            raise RuntimeError("ReAct agent is not initialized.")
+
+        user_query = user_query.strip()
+        if not user_query:
+            yield ChatEvent(event="token", data={"text": "I need a question to help you. Please ask me something."})
+            return
+
+        try:
+            logger.info("Streaming ReAct agent.")
+
+            # Run the reasoning steps one at a time to report each tool call as soon as it is made
+            task = self.agent.create_task(user_query)
+            try:
+                reported_sources = 0
+                while True:
+                    step_output = self._step(task, deadline, self.agent.stream_step)
+
+                    sources = task.extra_state.get("sources", [])
+                    for source in sources[reported_sources:]:
+                        yield ChatEvent(event="tool_call", data={"tool": source.tool_name, "input": source.raw_input})
+                    reported_sources = len(sources)
+
+                    if step_output is None:
+                        # Out of time: answer with what the tools have found so far
+                        yield ChatEvent(event="token", data={"text": self._partial_answer(task, deadline)})
+                        return
+                    if step_output.is_last:
+                        break
+
+                response = self.agent.finalize_response(task.task_id, step_output)
+                if isinstance(response, StreamingAgentChatResponse):
+                    for token in response.response_gen:
+                        yield ChatEvent(event="token", data={"text": token})
+                else:
+                    # The answer was not streamed by the LLM (e.g. it came straight from a tool), send it at once
+                    yield ChatEvent(event="token", data={"text": str(response)})
+            finally:
+                self._delete_task(task)
+
+            logger.info("ReAct agent streamed successfully.")
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming ReAct agent: {e}")
+            raise RuntimeError(f"Error streaming ReAct agent: {e}")
+
+    async def aquery(self, user_query: str, deadline: Optional[Deadline] = None) -> str:
+        """
+        Query the ReAct agent with the given user query, using the async LLM and query engine APIs
+
+        Args:
+            user_query (str): User query to query the agent with
+            deadline (Optional[Deadline]): Latency budget of the request (the loop stops early when it is spent)
+
+        Returns:
+            str: Response from the agent
+        """
+        if not self.agent:
+            raise RuntimeError("ReAct agent is not initialized.")
+
+        user_query = user_query.strip()
+        if not user_query:
+            return "I need a question to help you. Please ask me something."
+
+        try:
+            logger.info("Querying ReAct agent.")
+
+            # Query the agent, one reasoning step at a time when the request has a latency budget
+            if deadline is None:
+                response = await self.agent.achat(user_query)
+            else:
+                response = await self._arun_steps(user_query, deadline)
+
+            logger.info("ReAct agent queried successfully.")
+            return str(response)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error querying ReAct agent: {e}")
+            raise RuntimeError(f"Error querying ReAct agent: {e}")
+
+    def direct_query(self, user_query: str) -> str:
+        """
+        Answer the user query straight from the Wikipedia tool's query engine, skipping the agent reasoning loop
+
+        Args:
+            user_query (str): Single-hop user query
+
+        Returns:
+            str: Response from the query engine
+        """
+        if not self.tools:
+            raise RuntimeError("ReAct agent is not initialized.")
+
+        user_query = user_query.strip()
+        if not user_query:
+            return "I need a question to help you. Please ask me something."
+
+        try:
+            logger.info("Querying Wikipedia query engine directly.")
+
+            response = self.tools[0].query_engine.query(user_query)
+
+            logger.info("Wikipedia query engine queried successfully.")
+            return str(response)
+        except Exception as e:
+            logger.error(f"Error querying Wikipedia query engine: {e}")
+            raise RuntimeError(f"Error querying Wikipedia query engine: {e}")
+
+    def stream_direct_query(self, user_query: str) -> Iterator[ChatEvent]:
+        """
+        Answer the user query straight from the Wikipedia tool's query engine, reporting the tool call first
+
+        Args:
+            user_query (str): Single-hop user query
+
+        Returns:
+            Iterator[ChatEvent]: Tool call event followed by the answer token event
+        """
+        if self.tools and user_query.strip():
+            yield ChatEvent(
+                event="tool_call",
+                data={"tool": self.tools[0].metadata.name, "input": {"input": user_query.strip()}},
+            )
+
+        yield ChatEvent(event="token", data={"text": self.direct_query(user_query)})
+
+    async def adirect_query(self, user_query: str) -> str:
+        """
+        Answer the user query straight from the Wikipedia tool's query engine, using the async query engine API
+
+        Args:
+            user_query (str): Single-hop user query
+
+        Returns:
+            str: Response from the query engine
+        """
+        if not self.tools:
+            raise RuntimeError("ReAct agent is not initialized.")
+
+        user_query = user_query.strip()
+        if not user_query:
+            return "I need a question to help you. Please ask me something."
+
+        try:
+            logger.info("Querying Wikipedia query engine directly.")
+
+            response = await self.tools[0].query_engine.aquery(user_query)
+
+            logger.info("Wikipedia query engine queried successfully.")
+            return str(response)
+        except Exception as e:
+            logger.error(f"Error querying Wikipedia query engine: {e}")
+            raise RuntimeError(f"Error querying Wikipedia query engine: {e}")
+
+    def _run_steps(self, user_query: str, deadline: Deadline) -> str:
+        """
+        Run the agent one reasoning step at a time, stopping early when the latency budget is spent
+
+        Args:
+            user_query (str): User query to query the agent with
+            deadline (Deadline): Latency budget of the request
+
+        Returns:
+            str: Final response, or the partial answer found so far when the budget ran out
+        """
+        task = self.agent.create_task(user_query)
+        try:
+            while True:
+                step_output = self._step(task, deadline, self.agent.run_step)
+                if step_output is None:
+                    return self._partial_answer(task, deadline)
+                if step_output.is_last:
+                    return str(self.agent.finalize_response(task.task_id, step_output))
+        finally:
+            self._delete_task(task)
+
+    async def _arun_steps(self, user_query: str, deadline: Deadline) -> str:
+        """
+        Run the agent one reasoning step at a time with the async APIs, stopping early when the latency budget is spent
+
+        Args:
+            user_query (str): User query to query the agent with
+            deadline (Deadline): Latency budget of the request
+
+        Returns:
+            str: Final response, or the partial answer found so far when the budget ran out
+        """
+        task = self.agent.create_task(user_query)
+        try:
+            while True:
+                if deadline.expired:
+                    return self._partial_answer(task, deadline)
+
+                try:
+                    step_output = await self.agent.arun_step(task.task_id)
+                except Exception:
+                    # A request cut by its capped timeout is a budget overrun, not an agent failure
+                    if not deadline.expired:
+                        raise
+                    return self._partial_answer(task, deadline)
+
+                if step_output.is_last:
+                    return str(self.agent.finalize_response(task.task_id, step_output))
+        finally:
+            # Also runs when the request is cancelled between two steps
+            self._delete_task(task)
+
+    @staticmethod
+    def _step(
+        task: Task, deadline: Optional[Deadline], run_step: Callable[[str], TaskStepOutput]
+    ) -> Optional[TaskStepOutput]:
+        """
+        Run the next reasoning step of the task unless the latency budget is spent
+
+        Args:
+            task (Task): Agent task
+            deadline (Optional[Deadline]): Latency budget of the request
+            run_step (Callable[[str], TaskStepOutput]): Agent method running a step (run_step or stream_step)
+
+        Returns:
+            Optional[TaskStepOutput]: Step output, or None if the budget ran out before or during the step
+        """
+        if deadline is not None and deadline.expired:
+            return None
+
+        try:
+            return run_step(task.task_id)
+        except Exception:
+            # A request cut by its capped timeout is a budget overrun, not an agent failure
+            if deadline is None or not deadline.expired:
+                raise
+            return None
+
+    def _partial_answer(self, task: Task, deadline: Deadline) -> str:
+        """
+        Build the best answer available when the latency budget runs out: the last Wikipedia tool output. The turn
+        is kept in the chat memory with that answer, as finalize_response does for complete turns.
+
+        Args:
+            task (Task): Agent task cut short
+            deadline (Deadline): Latency budget of the request, flagged as truncated
+
+        Returns:
+            str: Last tool output
+
+        Raises:
+            DeadlineExceeded: If the agent had not retrieved anything yet
+        """
+        deadline.truncated = True
+        sources = task.extra_state.get("sources", [])
+        logger.warning(f"Latency budget spent, stopping the ReAct agent after {len(sources)} tool calls.")
+        if not sources:
+            raise DeadlineExceeded("Latency budget spent before the agent retrieved anything.")
+
+        answer = str(sources[-1].content)
+        task.extra_state["new_memory"].put(ChatMessage(content=answer, role=MessageRole.ASSISTANT))
+        self.agent.agent_worker.finalize_task(task)
+        return answer
+
+    def _delete_task(self, task: Task) -> None:
+        """
+        Remove a finished, truncated or failed task from the agent state, which keeps every task it creates
+
+        Args:
+            task (Task): Agent task
+        """
+        self.agent.state.task_dict.pop(task.task_id, None)
+
     @staticmethod
     def create_wikipedia_tool(
         index: VectorStoreIndex,
         similarity_top_k: int = 5,
         response_mode: str = "compact",
+        hybrid: bool = False,
+        rrf_k: int = DEFAULT_RRF_K,
     ) -> QueryEngineTool:
         """
         Create the Wikipedia query engine tool from the given index
@@ -102,6 +402,8 @@ class ReActAgentService:
             index (VectorStoreIndex): Vector store index containing Wikipedia content
             similarity_top_k (int): Number of similar Wikipedia pages to retrieve
             response_mode (str): Response mode for Wikipedia tool
+            hybrid (bool): Fuse the dense results with BM25 results over the same nodes (reciprocal-rank fusion)
+            rrf_k (int): Rank constant of the reciprocal-rank fusion of the hybrid retrieval
 
         Returns:
             QueryEngineTool: Wikipedia tool
@@ -109,12 +411,29 @@ class ReActAgentService:
         try:
             logger.info("Creating Wikipedia query engine tool.")
 
-            # Create the Wikipedia query engine tool
-            query_engine = index.as_query_engine(
-                response_mode=response_mode,
+            # Retrieve from the whole index rather than a snapshot of its node ids (as index.as_query_engine does),
+            # so the tool also finds the nodes inserted into the index after it was created
+            retriever = VectorIndexRetriever(
+                index,
                 similarity_top_k=similarity_top_k,
+                callback_manager=index._callback_manager,
+                object_map=index._object_map,
                 verbose=True,
             )
+            if hybrid:
+                retriever = HybridRetriever(
+                    retriever,
+                    index,
+                    similarity_top_k=similarity_top_k,
+                    lexical_top_k=similarity_top_k,
+                    rrf_k=rrf_k,
+                    callback_manager=index._callback_manager,
+                )
+            query_engine = RetrieverQueryEngine.from_args(
+                retriever,
+                llm=LLMConfig.get_llm(),
+                response_mode=response_mode,
+            )
 
             # Create tool metadata
             tool_metadata = ToolMetadata(
@@ -0,0 +1,166 @@
+import logging
+import re
+import threading
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from llama_index.core import Document
+
+from api.retrieval.bm25 import BM25Index
+
+logger = logging.getLogger(__name__)
+
+# Headings of the MediaWiki plain text extracts, e.g. "== History ==" or "=== Early life ==="
+_HEADING_RE = re.compile(r"^(={2,6})\s*(.+?)\s*\1\s*$", re.MULTILINE)
+
+# Sections listing sources and links rather than facts, dropped with their subsections
+BOILERPLATE_SECTIONS = frozenset(
+    [
+        "references",
+        "notes",
+        "footnotes",
+        "citations",
+        "sources",
+        "bibliography",
+        "see also",
+        "external links",
+        "further reading",
+        "notes and references",
+    ]
+)
+
+
+class SectionFilterService:
+    """
+    Service keeping only the sections of the fetched pages that are relevant to the user query, before they are
+    chunked and embedded.
+
+    Each page is split on its headings, and the sections of all pages are scored against the query with an in-memory
+    BM25 index. The lead section of every page is always kept, as it defines the topic of the page. Each kept section
+    becomes its own document, with its position in the page under "section_index", so its chunks (and their shards and
+    cached embeddings) are the same whichever other sections a query keeps.
+    """
+
+    _instance: Optional["SectionFilterService"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, top_sections: int = 10) -> None:
+        """
+        Initialize the section filter
+
+        Args:
+            top_sections (int): Number of best scoring sections kept across the pages of a request, besides the leads
+        """
+        self.top_sections = top_sections
+
+    @classmethod
+    def get_instance(cls) -> Optional["SectionFilterService"]:
+        """
+        Get the process-wide section filter configured in the Django settings
+
+        Returns:
+            Optional[SectionFilterService]: Shared section filter, or None if whole pages are indexed
+        """
+        config = settings.SECTION_FILTER
+        if not config["ENABLED"]:
+            return None
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(top_sections=config["TOP_SECTIONS"])
+
+        return cls._instance
+
+    def filter_documents(self, user_query: str, documents: List[Document]) -> List[Document]:
+        """
+        Keep the lead and the sections relevant to the user query of the given pages
+
+        Args:
+            user_query (str): User query the pages were fetched for
+            documents (List[Document]): Fetched pages
+
+        Returns:
+            List[Document]: One document per kept section, in page order (the pages if they could not be split)
+        """
+        try:
+            sections = [
+                (document, position, heading, text)
+                for document in documents
+                for position, (heading, text) in enumerate(self.split_sections(document.text))
+            ]
+            if not sections:
+                return documents
+
+            index = BM25Index(f"{heading}\n{text}" for _, _, heading, text in sections)
+            kept = {i for i, (_, position, _, _) in enumerate(sections) if position == 0}
+            kept.update(i for i, _ in index.top_k(user_query, self.top_sections))
+
+            filtered = [self._section_document(*sections[i]) for i in sorted(kept)]
+            kept_chars = sum(len(d.text) for d in filtered)
+            total_chars = sum(len(d.text) for d in documents)
+            logger.info(
+                f"Kept {len(filtered)} of {len(sections)} sections of {len(documents)} pages "
+                f"({kept_chars} of {total_chars} characters)."
+            )
+            return filtered
+        except Exception as e:
+            logger.error(f"Error filtering the sections of the Wikipedia pages: {e}")
+            return documents
+
+    @staticmethod
+    def split_sections(text: str) -> List[Tuple[str, str]]:
+        """
+        Split a page on its headings, dropping the empty sections and the reference and link sections
+
+        Args:
+            text (str): Plain text of the page
+
+        Returns:
+            List[Tuple[str, str]]: Heading (empty for the lead) and text of each section, in page order
+        """
+        sections = []
+        heading, start = "", 0
+        # Level of the boilerplate heading being skipped, its subsections are skipped with it
+        skip_level = None
+        for match in list(_HEADING_RE.finditer(text)) + [None]:
+            section_text = text[start:match.start() if match else len(text)].strip()
+            if section_text and skip_level is None:
+                sections.append((heading, section_text))
+            if match is None:
+                break
+
+            level, heading, start = len(match.group(1)), match.group(2), match.end()
+            if skip_level is not None and level <= skip_level:
+                skip_level = None
+            if skip_level is None and heading.casefold() in BOILERPLATE_SECTIONS:
+                skip_level = level
+
+        return sections
+
+    @staticmethod
+    def _section_document(document: Document, position: int, heading: str, text: str) -> Document:
+        """
+        Build the document of a kept section
+
+        Args:
+            document (Document): Page the section belongs to
+            position (int): Position of the section in the page
+            heading (str): Section heading (empty for the lead)
+            text (str): Section text
+
+        Returns:
+            Document: Section with the metadata of its page, its heading under "section" and its position under
+                "section_index" (left out of the embedded and LLM texts)
+        """
+        metadata = dict(document.metadata)
+        if heading:
+            metadata["section"] = heading
+        metadata["section_index"] = position
+
+        return Document(
+            id_=f"{document.doc_id}#{position}",
+            text=text,
+            metadata=metadata,
+            excluded_embed_metadata_keys=[*document.excluded_embed_metadata_keys, "section_index"],
+            excluded_llm_metadata_keys=[*document.excluded_llm_metadata_keys, "section_index"],
+        )
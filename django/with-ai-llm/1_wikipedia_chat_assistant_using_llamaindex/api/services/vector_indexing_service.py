@@ -1,8 +1,19 @@
+import asyncio
 import logging
-from typing import List, Optional
+import math
+from typing import Dict, List, Optional, Tuple
 
-from llama_index.core import Document, VectorStoreIndex
+from llama_index.core import Document, StorageContext, VectorStoreIndex
+from llama_index.core.base.embeddings.base import BaseEmbedding
 from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.utils import get_tokenizer
+
+from api.cache.embedding_cache import EmbeddingCache
+from api.cache.vector_shard_store import VectorShardStore
+from api.config.llm_config import LLMConfig
+from api.instrumentation.stage_timer import StageTimer
+from api.vector_stores.numpy_vector_store import NumpyVectorStore
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +27,10 @@ class VectorIndexingService:
         self,
         chunk_size: int = 150,
         chunk_overlap: int = 40,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        shard_store: Optional[VectorShardStore] = None,
+        embedding_budget: int = 0,
+        max_chunk_size: int = 1024,
     ) -> None:
         """
         Initialize the vector indexing service
@@ -23,14 +38,26 @@ class VectorIndexingService:
         Args:
             chunk_size (int): Size of chunks to split the document into
             chunk_overlap (int): Overlap between chunks
+            embedding_cache (Optional[EmbeddingCache]): Cache of chunk embeddings reused across requests
+            shard_store (Optional[VectorShardStore]): Store of prebuilt per-page shards reused across requests
+            embedding_budget (int): Approximate number of chunks to embed per request, split evenly between its pages,
+                which get larger chunks when they are too long for their share (0 to always use chunk_size)
+            max_chunk_size (int): Largest chunk size used to keep a page within its share of the budget
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.embedding_cache = embedding_cache
+        self.shard_store = shard_store
+        self.embedding_budget = embedding_budget
+        self.max_chunk_size = max(max_chunk_size, chunk_size)
+        self.stage_timer = StageTimer.get_instance()
 
         # Configure the sentence splitter
         self.splitter = SentenceSplitter(
             chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
         )
+        # Splitters of the larger chunk sizes used by the embedding budget, keyed by chunk size
+        self._splitters: Dict[int, SentenceSplitter] = {self.chunk_size: self.splitter}
 
     def create_index_from_documents(
         self, documents: List[Document]
@@ -51,14 +78,470 @@ class VectorIndexingService:
         try:
             logger.info(f"Creating vector index with {len(documents)} nodes.")
 
-            # Split the documents into smaller nodes/chunks
-            nodes = self.splitter.get_nodes_from_documents(documents)
+            nodes = self.get_nodes(documents)
+
+            # Create the vector index, backed by a contiguous NumPy matrix for fast top-k retrieval
+            with self.stage_timer.stage("index_build"):
+                storage_context = StorageContext.from_defaults(vector_store=NumpyVectorStore())
+                # The index embeds its queries with the global embedding model, set up on first use
+                LLMConfig.ensure_initialized()
+                index = VectorStoreIndex(nodes, storage_context=storage_context)
+
+            logger.info("Vector index created successfully.")
+            return index
+        except Exception as e:
+            logger.error(f"Error creating vector index: {e}")
+            return None
+
+    async def acreate_index_from_documents(
+        self, documents: List[Document]
+    ) -> Optional[VectorStoreIndex]:
+        """
+        Create a vector index from the given documents, embedding the chunks with the async embedding API
+
+        Args:
+            documents (List[Document]): List of documents to create the index from
+
+        Returns:
+            VectorStoreIndex: The created vector index
+        """
+        if not documents:
+            logger.warning("No documents provided for creating vector index.")
+            return None
+
+        try:
+            logger.info(f"Creating vector index with {len(documents)} nodes.")
+
+            # Every node is embedded here, so building the index does not call the embedding model again
+            nodes = await self.aget_nodes(documents)
 
-            # Create the vector index
-            index = VectorStoreIndex(nodes)
+            with self.stage_timer.stage("index_build"):
+                storage_context = StorageContext.from_defaults(vector_store=NumpyVectorStore())
+                # The index embeds its queries with the global embedding model, set up on first use
+                LLMConfig.ensure_initialized()
+                index = VectorStoreIndex(nodes, storage_context=storage_context)
 
             logger.info("Vector index created successfully.")
             return index
         except Exception as e:
             logger.error(f"Error creating vector index: {e}")
             return None
+
+    def insert_documents(self, index: VectorStoreIndex, documents: List[Document]) -> int:
+        """
+        Insert the given documents into an existing vector index, only embedding their own chunks
+
+        Args:
+            index (VectorStoreIndex): Index to grow (query engines built over it see the new nodes)
+            documents (List[Document]): List of documents to add to the index
+
+        Returns:
+            int: Number of nodes inserted (0 if there was nothing to insert or the insertion failed)
+        """
+        if not documents:
+            return 0
+
+        try:
+            nodes = self.get_nodes(documents)
+            with self.stage_timer.stage("index_build"):
+                index.insert_nodes(nodes)
+
+            logger.info(f"Inserted {len(nodes)} nodes from {len(documents)} documents into the vector index.")
+            return len(nodes)
+        except Exception as e:
+            logger.error(f"Error inserting documents into the vector index: {e}")
+            return 0
+
+    async def ainsert_documents(self, index: VectorStoreIndex, documents: List[Document]) -> int:
+        """
+        Insert the given documents into an existing vector index, embedding their chunks with the async embedding API
+
+        Args:
+            index (VectorStoreIndex): Index to grow (query engines built over it see the new nodes)
+            documents (List[Document]): List of documents to add to the index
+
+        Returns:
+            int: Number of nodes inserted (0 if there was nothing to insert or the insertion failed)
+        """
+        if not documents:
+            return 0
+
+        try:
+            # Every node is embedded here, so the insertion does not call the embedding model again
+            nodes = await self.aget_nodes(documents)
+            with self.stage_timer.stage("index_build"):
+                index.insert_nodes(nodes)
+
+            logger.info(f"Inserted {len(nodes)} nodes from {len(documents)} documents into the vector index.")
+            return len(nodes)
+        except Exception as e:
+            logger.error(f"Error inserting documents into the vector index: {e}")
+            return 0
+
+    def get_nodes(self, documents: List[Document]) -> List[BaseNode]:
+        """
+        Split the given documents into nodes, reusing the prebuilt shards and cached embeddings when available
+
+        Args:
+            documents (List[Document]): List of documents to split
+
+        Returns:
+            List[BaseNode]: Nodes of the documents
+        """
+        if self.shard_store:
+            # Compose the nodes from the prebuilt page shards
+            return self.get_nodes_from_shards(documents)
+
+        # Split the documents into smaller nodes/chunks
+        with self.stage_timer.stage("chunking"):
+            nodes = self.split_documents(documents)
+
+        # Reuse the cached embeddings (the index only embeds the nodes without one)
+        if self.embedding_cache:
+            self.embed_nodes(nodes)
+
+        return nodes
+
+    async def aget_nodes(self, documents: List[Document]) -> List[BaseNode]:
+        """
+        Split the given documents into embedded nodes, reusing the prebuilt shards and cached embeddings when available
+
+        Args:
+            documents (List[Document]): List of documents to split
+
+        Returns:
+            List[BaseNode]: Nodes of the documents, with their embeddings set
+        """
+        document_nodes = await self.aget_document_nodes(documents)
+        return [n for nodes in document_nodes for n in nodes]
+
+    def get_nodes_from_shards(self, documents: List[Document]) -> List[BaseNode]:
+        """
+        Get the embedded nodes of the given documents, building and saving the shards of pages seen for the first time
+
+        Args:
+            documents (List[Document]): List of documents to get the nodes for
+
+        Returns:
+            List[BaseNode]: Nodes of all documents, with their embeddings set
+        """
+        return [n for shard_nodes in self.get_document_nodes(documents) for n in shard_nodes]
+
+    def get_document_nodes(self, documents: List[Document]) -> List[List[BaseNode]]:
+        """
+        Split each of the given documents into embedded nodes, reusing the prebuilt shards and cached embeddings when
+        available
+
+        Args:
+            documents (List[Document]): List of documents to split
+
+        Returns:
+            List[List[BaseNode]]: Nodes of each document, with their embeddings set
+        """
+        if self.shard_store:
+            shards, new_shards = self._load_shards(documents)
+            # Embed the nodes of all new pages together to keep the embedding batches full
+            if new_shards:
+                self.embed_nodes([n for _, _, _, shard_nodes in new_shards for n in shard_nodes])
+                self._save_shards(new_shards)
+            return shards
+
+        with self.stage_timer.stage("chunking"):
+            document_nodes = [self.split_documents([document]) for document in documents]
+        self.embed_nodes([n for nodes in document_nodes for n in nodes])
+        return document_nodes
+
+    async def aget_document_nodes(self, documents: List[Document]) -> List[List[BaseNode]]:
+        """
+        Split each of the given documents into embedded nodes with the async embedding API, reusing the prebuilt shards
+        and cached embeddings when available
+
+        Args:
+            documents (List[Document]): List of documents to split
+
+        Returns:
+            List[List[BaseNode]]: Nodes of each document, with their embeddings set
+        """
+        if not self.shard_store:
+            with self.stage_timer.stage("chunking"):
+                document_nodes = [self.split_documents([document]) for document in documents]
+            await self.aembed_nodes([n for nodes in document_nodes for n in nodes])
+            return document_nodes
+
+        # Shard files are read and written in a worker thread to keep the event loop free
+        shards, new_shards = await asyncio.to_thread(self._load_shards, documents)
+        if new_shards:
+            await self.aembed_nodes([n for _, _, _, shard_nodes in new_shards for n in shard_nodes])
+            await asyncio.to_thread(self._save_shards, new_shards)
+
+        return shards
+
+    def embed_nodes(self, nodes: List[BaseNode]) -> int:
+        """
+        Set the embedding of the given nodes, only sending the chunks missing from the cache to the embedding model
+
+        Args:
+            nodes (List[BaseNode]): Nodes to embed
+
+        Returns:
+            int: Number of chunk embeddings served from the cache instead of the embedding model
+        """
+        nodes = [n for n in nodes if n.embedding is None]
+        if not nodes:
+            return 0
+
+        with self.stage_timer.stage("embedding"):
+            embed_model, texts, embeddings, missing_texts = self._lookup_embeddings(nodes)
+            new_embeddings = embed_model.get_text_embedding_batch(missing_texts) if missing_texts else []
+            return self._apply_embeddings(
+                embed_model, nodes, texts, embeddings, dict(zip(missing_texts, new_embeddings))
+            )
+
+    async def aembed_nodes(self, nodes: List[BaseNode]) -> int:
+        """
+        Set the embedding of the given nodes with the async embedding API, only sending the chunks missing from the cache
+
+        Args:
+            nodes (List[BaseNode]): Nodes to embed
+
+        Returns:
+            int: Number of chunk embeddings served from the cache instead of the embedding model
+        """
+        nodes = [n for n in nodes if n.embedding is None]
+        if not nodes:
+            return 0
+
+        with self.stage_timer.stage("embedding"):
+            # The embedding cache is read and written in a worker thread to keep the event loop free
+            embed_model, texts, embeddings, missing_texts = await asyncio.to_thread(self._lookup_embeddings, nodes)
+            new_embeddings = await embed_model.aget_text_embedding_batch(missing_texts) if missing_texts else []
+            return await asyncio.to_thread(
+                self._apply_embeddings, embed_model, nodes, texts, embeddings, dict(zip(missing_texts, new_embeddings))
+            )
+
+    def split_documents(self, documents: List[Document]) -> List[BaseNode]:
+        """
+        Split the given documents into nodes, with larger chunks for the pages too long for their share of the
+        embedding budget
+
+        Args:
+            documents (List[Document]): List of documents to split
+
+        Returns:
+            List[BaseNode]: Nodes of the documents
+        """
+        if not self.embedding_budget:
+            return self.splitter.get_nodes_from_documents(documents)
+
+        chunk_sizes = self.chunk_sizes(documents)
+        nodes = []
+        for document, chunk_size in zip(documents, chunk_sizes):
+            nodes.extend(self._get_splitter(chunk_size).get_nodes_from_documents([document]))
+
+        return nodes
+
+    def chunk_sizes(self, documents: List[Document]) -> List[int]:
+        """
+        Pick the chunk size of each document: the configured one, doubled until the estimated number of chunks of the
+        document fits its share of the embedding budget (up to max_chunk_size)
+
+        The overlap stays the same number of tokens, so the larger chunks overlap relatively less.
+
+        Args:
+            documents (List[Document]): Documents of one request
+
+        Returns:
+            List[int]: Chunk size of each document
+        """
+        if not self.embedding_budget or not documents:
+            return [self.chunk_size] * len(documents)
+
+        page_budget = max(1, self.embedding_budget // len(documents))
+        tokenizer = get_tokenizer()
+
+        chunk_sizes = []
+        for document in documents:
+            tokens = len(tokenizer(document.text))
+            chunk_size = self.chunk_size
+            while chunk_size < self.max_chunk_size and self._estimate_chunks(tokens, chunk_size) > page_budget:
+                chunk_size = min(chunk_size * 2, self.max_chunk_size)
+            chunk_sizes.append(chunk_size)
+
+        return chunk_sizes
+
+    def _estimate_chunks(self, tokens: int, chunk_size: int) -> int:
+        """
+        Estimate the number of chunks a text is split into
+
+        Args:
+            tokens (int): Number of tokens of the text
+            chunk_size (int): Chunk size in tokens
+
+        Returns:
+            int: Estimated number of chunks
+        """
+        stride = max(1, chunk_size - self.chunk_overlap)
+        return max(1, math.ceil((tokens - self.chunk_overlap) / stride))
+
+    def _get_splitter(self, chunk_size: int) -> SentenceSplitter:
+        """
+        Get the splitter of a chunk size, keeping the configured overlap
+
+        Args:
+            chunk_size (int): Chunk size in tokens
+
+        Returns:
+            SentenceSplitter: Splitter of that size
+        """
+        splitter = self._splitters.get(chunk_size)
+        if splitter is None:
+            splitter = self._splitters[chunk_size] = SentenceSplitter(
+                chunk_size=chunk_size, chunk_overlap=self.chunk_overlap
+            )
+
+        return splitter
+
+    def _load_shards(
+        self, documents: List[Document]
+    ) -> Tuple[List[List[BaseNode]], List[Tuple[str, str, str, List[BaseNode]]]]:
+        """
+        Load the shards of the given documents, splitting the pages that have none yet
+
+        Args:
+            documents (List[Document]): List of documents to get the nodes for
+
+        Returns:
+            Tuple[List[List[BaseNode]], List[Tuple[str, str, str, List[BaseNode]]]]: Nodes of every document, and the
+                title, revision, namespace and nodes of the shards still to embed and save
+        """
+        shards: List[List[BaseNode]] = []
+        new_shards = []
+
+        # Loading the shards of known pages stands in for their chunking
+        with self.stage_timer.stage("chunking"):
+            chunk_sizes = self.chunk_sizes(documents)
+            for document, chunk_size in zip(documents, chunk_sizes):
+                title = self.shard_key(document)
+                revision = self.shard_store.revision(document.text)
+                namespace = self.shard_namespace(chunk_size)
+
+                document_nodes = self.shard_store.load(title, revision, namespace)
+                if document_nodes is None and chunk_size != self.chunk_size:
+                    # An embedded shard of the configured size costs no embedding, so it is kept over the budget
+                    base_nodes = self.shard_store.load(title, revision, self.shard_namespace())
+                    if base_nodes is not None and all(n.embedding is not None for n in base_nodes):
+                        document_nodes = base_nodes
+
+                if document_nodes is None:
+                    document_nodes = self._get_splitter(chunk_size).get_nodes_from_documents([document])
+                    new_shards.append((title, revision, namespace, document_nodes))
+                elif any(n.embedding is None for n in document_nodes):
+                    # Pre-chunked shard (e.g. from a dump ingestion) that still needs its embeddings
+                    new_shards.append((title, revision, namespace, document_nodes))
+
+                shards.append(document_nodes)
+
+        logger.info(
+            f"Loaded {len(documents) - len(new_shards)} vector shards, building {len(new_shards)} new ones."
+        )
+        return shards, new_shards
+
+    def _save_shards(self, new_shards: List[Tuple[str, str, str, List[BaseNode]]]) -> None:
+        """
+        Save the given embedded shards
+
+        Args:
+            new_shards (List[Tuple[str, str, str, List[BaseNode]]]): Title, revision, namespace and nodes of each shard
+        """
+        for title, revision, namespace, shard_nodes in new_shards:
+            self.shard_store.save(title, revision, namespace, shard_nodes)
+
+    def _lookup_embeddings(
+        self, nodes: List[BaseNode]
+    ) -> Tuple[BaseEmbedding, List[str], Dict[str, List[float]], List[str]]:
+        """
+        Get the texts to embed for the given nodes and the embeddings already in the cache
+
+        Args:
+            nodes (List[BaseNode]): Nodes without an embedding
+
+        Returns:
+            Tuple[BaseEmbedding, List[str], Dict[str, List[float]], List[str]]: Embedding model, text of each node,
+                cached embeddings keyed by text, and the distinct texts missing from the cache
+        """
+        embed_model = LLMConfig.get_embedding_model()
+
+        # Embed the same text as the index would (content plus embeddable metadata)
+        texts = [n.get_content(metadata_mode=MetadataMode.EMBED) for n in nodes]
+
+        embeddings = (
+            self.embedding_cache.get_many(embed_model.model_name, texts)
+            if self.embedding_cache
+            else {}
+        )
+        missing_texts = list(dict.fromkeys(t for t in texts if t not in embeddings))
+        return embed_model, texts, embeddings, missing_texts
+
+    def _apply_embeddings(
+        self,
+        embed_model: BaseEmbedding,
+        nodes: List[BaseNode],
+        texts: List[str],
+        embeddings: Dict[str, List[float]],
+        new_embeddings: Dict[str, List[float]],
+    ) -> int:
+        """
+        Cache the new embeddings and set the embedding of every node
+
+        Args:
+            embed_model (BaseEmbedding): Embedding model the embeddings come from
+            nodes (List[BaseNode]): Nodes without an embedding
+            texts (List[str]): Text of each node
+            embeddings (Dict[str, List[float]]): Cached embeddings keyed by text
+            new_embeddings (Dict[str, List[float]]): Embeddings just computed by the model, keyed by text
+
+        Returns:
+            int: Number of chunk embeddings served from the cache instead of the embedding model
+        """
+        saved_calls = sum(1 for t in texts if t in embeddings)
+
+        if new_embeddings and self.embedding_cache:
+            self.embedding_cache.set_many(embed_model.model_name, new_embeddings)
+        embeddings = {**embeddings, **new_embeddings}
+
+        for node, text in zip(nodes, texts):
+            node.embedding = embeddings[text]
+
+        logger.info(
+            f"Embedded {len(nodes)} nodes, {saved_calls} served from the embedding cache "
+            f"and {len(new_embeddings)} sent to the embedding model."
+        )
+        return saved_calls
+
+    @staticmethod
+    def shard_key(document: Document) -> str:
+        """
+        Build the key of the shard of a document, so each section kept by the section filter has its own shard
+
+        Args:
+            document (Document): Page or section of a page
+
+        Returns:
+            str: Page title, followed by "#" and the position of the section for a section of the page
+        """
+        title = document.metadata.get("title", document.doc_id)
+        section_index = document.metadata.get("section_index")
+        return title if section_index is None else f"{title}#{section_index}"
+
+    def shard_namespace(self, chunk_size: Optional[int] = None) -> str:
+        """
+        Build the shard namespace from the chunking and embedding configuration, so a settings change rebuilds shards
+
+        Args:
+            chunk_size (Optional[int]): Chunk size of the shards (None for the configured one)
+
+        Returns:
+            str: Shard namespace
+        """
+        model_name = LLMConfig.get_embedding_model().model_name.replace("/", "_")
+        return f"{model_name}-{chunk_size or self.chunk_size}-{self.chunk_overlap}"
@@ -1,30 +1,63 @@
+import asyncio
+import contextvars
+import functools
 import logging
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
 
+import httpx
 import wikipedia
+from django.conf import settings
 from llama_index.core.schema import Document
-from llama_index.readers.wikipedia import WikipediaReader
+
+from api.cache.wikipedia_page_cache import WikipediaPageCache
+from api.config.http_clients import HTTPClientPool
+from api.services.deadline import Deadline
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class WikipediaContentService:
     """
-    Service to fetch and process Wikipedia content from titles using the WikipediaReader.
+    Service to fetch and process Wikipedia content from titles, calling the MediaWiki API of the WIKIPEDIA_API_URL
+    setting (the one of the `wikipedia` library by default).
     """
 
-    def __init__(self) -> None:
-        self.reader = WikipediaReader()
+    def __init__(
+        self,
+        page_cache: Optional[WikipediaPageCache] = None,
+        max_workers: int = 5,
+        http_pool: Optional[HTTPClientPool] = None,
+    ) -> None:
+        """
+        Initialize the Wikipedia content service
+
+        Args:
+            page_cache (Optional[WikipediaPageCache]): Cache consulted before fetching pages from Wikipedia
+            max_workers (int): Maximum number of titles resolved and downloaded in parallel
+            http_pool (Optional[HTTPClientPool]): Keep-alive connections shared by the fetches (None for every fetch to
+                open its own)
+        """
+        self.page_cache = page_cache
+        self.max_workers = max_workers
+        self.http_pool = http_pool
 
     def fetch_content(self, titles: List[str]) -> List[Document]:
         """
         Fetch content from Wikipedia for the given titles.
 
+        Each title is resolved and downloaded in its own worker thread, so the fetch takes about as long as the
+        slowest page. The threads share the HTTP client of the connection pool (httpx clients are thread-safe),
+        otherwise one is opened for this fetch. Titles that cannot be resolved or downloaded are skipped.
+
         Args:
             titles (List[str]): List of Wikipedia page titles to fetch content for.
 
         Returns:
-            List[Document]: List of Document objects containing the fetched content.
+            List[Document]: List of Document objects containing the fetched content, in the order of the titles.
         """
         if not titles:
             logger.warning("No titles provided for fetching content from Wikipedia.")
@@ -33,16 +66,65 @@ class WikipediaContentService:
         try:
             logger.info(f"Fetching content from Wikipedia for {len(titles)} pages.")
 
-            # Fetch the content from Wikipedia (disable auto-suggestion to avoid errors -- OpenAI already returns the best match)
-            titles = self.validate_titles(titles)
-            documents = self.reader.load_data(pages=titles, auto_suggest=False)
-            return documents
+            with self._client() as client:
+                pages = self._map(functools.partial(self._fetch_page, client), titles)
+
+            # Several titles may resolve to the same page, keep the first occurrence only
+            documents = {}
+            for page in pages:
+                if page is not None:
+                    documents.setdefault(page[0], page[1])
+
+            logger.info(f"Fetched {len(documents)} of {len(titles)} pages from Wikipedia.")
+            return list(documents.values())
         except Exception as e:
             logger.error(f"Error fetching content from Wikipedia: {e}")
             return []
 
-    @staticmethod
-    def validate_titles(titles: List[str]) -> List[str]:
+    async def afetch_content(self, titles: List[str]) -> List[Document]:
+        """
+        Fetch content from Wikipedia for the given titles without blocking the event loop.
+
+        Up to max_workers titles are resolved and downloaded concurrently over a single HTTP client, calling the same
+        MediaWiki API as the sync fetch. The client of the connection pool is kept open between fetches, otherwise
+        one is opened for this fetch. Titles that cannot be resolved or downloaded are skipped.
+
+        Args:
+            titles (List[str]): List of Wikipedia page titles to fetch content for.
+
+        Returns:
+            List[Document]: List of Document objects containing the fetched content, in the order of the titles.
+        """
+        if not titles:
+            logger.warning("No titles provided for fetching content from Wikipedia.")
+            return []
+
+        try:
+            logger.info(f"Fetching content from Wikipedia for {len(titles)} pages.")
+
+            # Same bound on the titles fetched at the same time as the thread pool of the sync fetch
+            semaphore = asyncio.Semaphore(max(self.max_workers, 1))
+
+            async def fetch_page(client: httpx.AsyncClient, title: str) -> Optional[Tuple[str, Document]]:
+                async with semaphore:
+                    return await self._afetch_page(client, title)
+
+            async with self._aclient() as client:
+                pages = await asyncio.gather(*(fetch_page(client, t) for t in titles))
+
+            # Several titles may resolve to the same page, keep the first occurrence only
+            documents = {}
+            for page in pages:
+                if page is not None:
+                    documents.setdefault(page[0], page[1])
+
+            logger.info(f"Fetched {len(documents)} of {len(titles)} pages from Wikipedia.")
+            return list(documents.values())
+        except Exception as e:
+            logger.error(f"Error fetching content from Wikipedia: {e}")
+            return []
+
+    def validate_titles(self, titles: List[str]) -> List[str]:
         """
         Validate the given Wikipedia page titles to ensure they are valid.
 
@@ -50,14 +132,373 @@ class WikipediaContentService:
             titles (List[str]): List of Wikipedia page titles to correct.
 
         Returns:
-            List[str]: List of corrected Wikipedia page titles.
+            List[str]: List of corrected Wikipedia page titles (titles without a match are left out).
         """
         try:
             logger.info(f"Correcting Wikipedia page titles for {len(titles)} pages.")
 
             # Correct Wikipedia page titles using the Wikipedia API
-            corrected_titles = [wikipedia.search(t, results=1) for t in titles]
-            return corrected_titles
+            with self._client() as client:
+                corrected_titles = self._map(functools.partial(self._resolve_title, client), titles)
+            return [t for t in corrected_titles if t]
         except Exception as e:
             logger.error(f"Error correcting Wikipedia page titles: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def _fetch_page(self, client: httpx.Client, title: str) -> Optional[Tuple[str, Document]]:
+        """
+        Resolve the given title and load its page, from the cache when possible
+
+        Args:
+            client (httpx.Client): HTTP client used for the Wikipedia API requests
+            title (str): Wikipedia page title to fetch
+
+        Returns:
+            Optional[Tuple[str, Document]]: Resolved title and page content, or None if the page could not be fetched
+        """
+        # Exact titles (e.g. pages ingested from a dump) and titles resolved before are served without any request
+        page = self._get_remembered_page(title)
+        if page:
+            return page
+
+        resolved_title = self._resolve_title(client, title)
+        if not resolved_title:
+            return None
+
+        if resolved_title != title:
+            self._remember_title(title, resolved_title)
+            page = self._get_cached_page(resolved_title)
+            if page:
+                return page
+
+        try:
+            results = self._wiki_get(client, self._page_params(resolved_title))
+        except Exception as e:
+            logger.warning(f"Error fetching Wikipedia page '{resolved_title}': {e}")
+            return None
+
+        document = self._parse_page(results)
+        return self._cache_page(resolved_title, document) if document is not None else None
+
+    async def _afetch_page(self, client: httpx.AsyncClient, title: str) -> Optional[Tuple[str, Document]]:
+        """
+        Resolve the given title and load its page asynchronously, from the cache when possible
+
+        Args:
+            client (httpx.AsyncClient): HTTP client used for the Wikipedia API requests
+            title (str): Wikipedia page title to fetch
+
+        Returns:
+            Optional[Tuple[str, Document]]: Resolved title and page content, or None if the page could not be fetched
+        """
+        # The page cache is read and written in a worker thread to keep the event loop free
+        page = await asyncio.to_thread(self._get_remembered_page, title)
+        if page:
+            return page
+
+        try:
+            results = await self._wiki_request(client, self._search_params(title))
+        except Exception as e:
+            logger.warning(f"Error resolving Wikipedia page title '{title}': {e}")
+            return None
+
+        resolved_title = self._parse_search(results)
+        if not resolved_title:
+            return None
+
+        if resolved_title != title:
+            await asyncio.to_thread(self._remember_title, title, resolved_title)
+            page = await asyncio.to_thread(self._get_cached_page, resolved_title)
+            if page:
+                return page
+
+        try:
+            results = await self._wiki_request(client, self._page_params(resolved_title))
+        except Exception as e:
+            logger.warning(f"Error fetching Wikipedia page '{resolved_title}': {e}")
+            return None
+
+        document = self._parse_page(results)
+        if document is None:
+            return None
+
+        return await asyncio.to_thread(self._cache_page, resolved_title, document)
+
+    def _get_cached_page(self, title: str) -> Optional[Tuple[str, Document]]:
+        """
+        Get the cached page of the given title
+
+        Args:
+            title (str): Wikipedia page title
+
+        Returns:
+            Optional[Tuple[str, Document]]: Title and page content, or None if the page is not cached
+        """
+        if not self.page_cache:
+            return None
+
+        document = self.page_cache.get(title)
+        return (title, document) if document is not None else None
+
+    def _get_remembered_page(self, title: str) -> Optional[Tuple[str, Document]]:
+        """
+        Get the cached page of the given title, or of the title it was resolved to by a previous fetch
+
+        Args:
+            title (str): Wikipedia page title, as extracted from the query
+
+        Returns:
+            Optional[Tuple[str, Document]]: Resolved title and page content, or None if the page is not cached
+        """
+        page = self._get_cached_page(title)
+        if page or not self.page_cache:
+            return page
+
+        resolved_title = self.page_cache.resolve(title)
+        return self._get_cached_page(resolved_title) if resolved_title else None
+
+    def _remember_title(self, title: str, resolved_title: str) -> None:
+        """
+        Remember the resolved title of the given title, so the next fetches of the title skip the title search
+
+        Args:
+            title (str): Wikipedia page title, as extracted from the query
+            resolved_title (str): Best matching page title
+        """
+        if self.page_cache:
+            self.page_cache.set_alias(title, resolved_title)
+
+    def _cache_page(self, resolved_title: str, document: Document) -> Tuple[str, Document]:
+        """
+        Tag the fetched page with its title and store it in the cache
+
+        Args:
+            resolved_title (str): Resolved Wikipedia page title
+            document (Document): Fetched page content
+
+        Returns:
+            Tuple[str, Document]: Resolved title and page content
+        """
+        document.metadata.setdefault("title", resolved_title)
+        if self.page_cache:
+            self.page_cache.set(resolved_title, document)
+
+        return resolved_title, document
+
+    @contextmanager
+    def _client(self) -> Iterator[httpx.Client]:
+        """
+        Get the HTTP client of the connection pool, or open one for a single fetch
+
+        Returns:
+            Iterator[httpx.Client]: Context holding the client
+        """
+        if self.http_pool is not None:
+            yield self.http_pool.client
+            return
+
+        with httpx.Client(timeout=30, follow_redirects=True) as client:
+            yield client
+
+    @asynccontextmanager
+    async def _aclient(self) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Get the async HTTP client of the connection pool for the running event loop, or open one for a single fetch
+
+        Returns:
+            AsyncIterator[httpx.AsyncClient]: Context holding the client
+        """
+        if self.http_pool is not None:
+            yield self.http_pool.async_client()
+            return
+
+        async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+            yield client
+
+    @staticmethod
+    def _search_params(title: str) -> Dict[str, Any]:
+        """
+        Build the query of the best matching page title, the same query as wikipedia.search(title, results=1)
+
+        Args:
+            title (str): Wikipedia page title to resolve
+
+        Returns:
+            Dict[str, Any]: Query parameters
+        """
+        return {"list": "search", "srprop": "", "srlimit": 1, "srsearch": title}
+
+    @staticmethod
+    def _page_params(title: str) -> Dict[str, Any]:
+        """
+        Build the query of the plain text of a page, the same query as wikipedia.page(auto_suggest=False).content
+
+        Args:
+            title (str): Resolved Wikipedia page title
+
+        Returns:
+            Dict[str, Any]: Query parameters
+        """
+        return {"prop": "extracts|revisions", "explaintext": "", "rvprop": "ids", "titles": title, "redirects": ""}
+
+    @staticmethod
+    def _parse_search(results: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the best matching page title from the response of a title search
+
+        Args:
+            results (Dict[str, Any]): Parsed JSON response
+
+        Returns:
+            Optional[str]: Best matching page title, or None if there is no match
+        """
+        matches = results["query"]["search"]
+        return matches[0]["title"] if matches else None
+
+    @staticmethod
+    def _parse_page(results: Dict[str, Any]) -> Optional[Document]:
+        """
+        Get the page from the response of a page query
+
+        Args:
+            results (Dict[str, Any]): Parsed JSON response
+
+        Returns:
+            Optional[Document]: Page content, or None if the page is missing or empty
+        """
+        wiki_page = next(iter(results["query"]["pages"].values()))
+        if "missing" in wiki_page or not wiki_page.get("extract"):
+            return None
+
+        return Document(id_=str(wiki_page["pageid"]), text=wiki_page["extract"])
+
+    @staticmethod
+    def _query(params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the arguments of a request to the configured Wikipedia API
+
+        Args:
+            params (Dict[str, Any]): Query parameters
+
+        Returns:
+            Dict[str, Any]: URL, parameters and headers of the request
+        """
+        return {
+            "url": settings.WIKIPEDIA_API_URL or wikipedia.wikipedia.API_URL,
+            "params": {"action": "query", "format": "json", **params},
+            "headers": {"User-Agent": wikipedia.wikipedia.USER_AGENT},
+        }
+
+    @staticmethod
+    def _timeout(client: Union[httpx.Client, httpx.AsyncClient]) -> Any:
+        """
+        Get the timeout of a Wikipedia API request, capped to the time left in the latency budget of the request
+
+        Args:
+            client (Union[httpx.Client, httpx.AsyncClient]): HTTP client used for the request
+
+        Returns:
+            Any: Timeout of the request, or the default timeout of the client outside a budgeted request
+
+        Raises:
+            DeadlineExceeded: If the budget has been spent
+        """
+        deadline = Deadline.current()
+        if deadline is None:
+            return httpx.USE_CLIENT_DEFAULT
+
+        return deadline.cap(client.timeout.read or deadline.remaining(), "the Wikipedia request")
+
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> Dict[str, Any]:
+        """
+        Parse the response of the Wikipedia API
+
+        Args:
+            response (httpx.Response): Response of the API
+
+        Returns:
+            Dict[str, Any]: Parsed JSON response
+
+        Raises:
+            RuntimeError: If the API returns an error
+        """
+        response.raise_for_status()
+
+        results = response.json()
+        if "error" in results:
+            raise RuntimeError(results["error"]["info"])
+
+        return results
+
+    def _wiki_get(self, client: httpx.Client, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a query to the configured Wikipedia API
+
+        Args:
+            client (httpx.Client): HTTP client used for the request
+            params (Dict[str, Any]): Query parameters
+
+        Returns:
+            Dict[str, Any]: Parsed JSON response
+
+        Raises:
+            RuntimeError: If the API returns an error
+        """
+        return self._parse_response(client.get(**self._query(params), timeout=self._timeout(client)))
+
+    async def _wiki_request(self, client: httpx.AsyncClient, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a query to the configured Wikipedia API without blocking the event loop
+
+        Args:
+            client (httpx.AsyncClient): HTTP client used for the request
+            params (Dict[str, Any]): Query parameters
+
+        Returns:
+            Dict[str, Any]: Parsed JSON response
+
+        Raises:
+            RuntimeError: If the API returns an error
+        """
+        return self._parse_response(await client.get(**self._query(params), timeout=self._timeout(client)))
+
+    def _resolve_title(self, client: httpx.Client, title: str) -> Optional[str]:
+        """
+        Resolve the given title to the best matching Wikipedia page title
+
+        Args:
+            client (httpx.Client): HTTP client used for the Wikipedia API request
+            title (str): Wikipedia page title to resolve
+
+        Returns:
+            Optional[str]: Best matching page title, or None if there is no match or the search failed
+        """
+        try:
+            return self._parse_search(self._wiki_get(client, self._search_params(title)))
+        except Exception as e:
+            logger.warning(f"Error resolving Wikipedia page title '{title}': {e}")
+            return None
+
+    def _map(self, func: Callable[[str], T], titles: List[str]) -> List[T]:
+        """
+        Apply the given function to every title using a bounded thread pool, keeping the input order
+
+        Each title runs in a copy of the caller's context, so the threads see its deadline and stage timings.
+
+        Args:
+            func (Callable[[str], T]): Function to apply to each title
+            titles (List[str]): Titles to process
+
+        Returns:
+            List[T]: Results in the order of the titles
+        """
+        if self.max_workers <= 1 or len(titles) <= 1:
+            return [func(t) for t in titles]
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(titles)),
+            thread_name_prefix="wikipedia-fetch",
+        ) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, func, t) for t in titles]
+            return [f.result() for f in futures]
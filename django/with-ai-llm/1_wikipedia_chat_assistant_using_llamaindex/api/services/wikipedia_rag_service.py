@@ -1,6 +1,28 @@
 import logging
+import threading
+import time
+from contextlib import nullcontext
+from typing import ContextManager, Generator, Iterator, List, Optional, Tuple
 
+from django.conf import settings
+from llama_index.core import Document, VectorStoreIndex
+
+from api.cache.chat_session_store import ChatSession, ChatSessionStore
+from api.cache.embedding_cache import EmbeddingCache
+from api.cache.semantic_answer_cache import CachedAnswer, SemanticAnswerCache
+from api.cache.title_cache import TitleCache
+from api.cache.vector_shard_store import VectorShardStore
+from api.cache.wikipedia_page_cache import WikipediaPageCache
+from api.config.http_clients import HTTPClientPool
+from api.config.llm_config import LLMConfig
+from api.instrumentation.llm_call_counter import LLMCallCounter
+from api.instrumentation.stage_timer import StageTimer
+from api.schemas.chat_event import ChatEvent
+from api.services.corpus_index_service import CorpusIndexService
+from api.services.deadline import Deadline, DeadlineExceeded
+from api.services.query_router_service import AGENT_ROUTE, SINGLE_HOP_ROUTE, QueryRouterService
 from api.services.react_agent_service import ReActAgentService
+from api.services.section_filter_service import SectionFilterService
 from api.services.vector_indexing_service import VectorIndexingService
 from api.services.wikipedia_content_service import WikipediaContentService
 from api.services.wikipedia_title_extractor_service import (
@@ -9,26 +31,607 @@ from api.services.wikipedia_title_extractor_service import (
 
 logger = logging.getLogger(__name__)
 
+NO_TITLES_ERROR = """
+    No relevant Wikipedia pages found for the given user query.
+    Please provide a more specific query.
+    """
+NO_DOCUMENTS_ERROR = """
+    Failed to fetch content from Wikipedia.
+    The pages might not exist or might be private.
+    """
+NO_INDEX_ERROR = """
+    Failed to create vector index from the fetched Wikipedia content.
+    The content might be invalid or insufficient.
+    """
+QUERY_FAILED_RESPONSE = """
+    I'm sorry, I couldn't process your query. This might be because:
+    1. There are no relevant Wikipedia pages for the given query.
+    2. The Wikipedia content is not sufficient to answer the query.
+    Please try again with a more specific query.
+    """
+UNEXPECTED_ERROR_RESPONSE = "An unexpected error occurred. Please try again later."
+DEADLINE_EXCEEDED_RESPONSE = """
+    I'm sorry, I ran out of time before I could find an answer.
+    Please try again, or ask a more specific query.
+    """
+
+# Path of the queries answered from the semantic answer cache
+CACHE_ROUTE = "cache"
+# Path of the follow-up turns of a chat session, answered by the agent kept from the first turn
+SESSION_ROUTE = "session"
+
 
 class WikipediaRagService:
     """
-    Service to handle user queries using Wikipedia RAG
+    Service to handle user queries using Wikipedia RAG.
+
+    The sub-services are stateless (or guard their caches with locks) and are shared by every request handled by
+    the process, while each query gets its own agent holding the per-request index and chat history.
     """
 
+    _instance: Optional["WikipediaRagService"] = None
+    _instance_lock = threading.Lock()
+
     def __init__(self) -> None:
-        self.title_extractor = WikipediaTitleExtractorService()
-        self.content_fetcher = WikipediaContentService()
-        self.vector_indexer = VectorIndexingService()
-        self.agent_service = ReActAgentService()
-        self._is_agent_initialized = False
+        self.title_extractor = WikipediaTitleExtractorService(title_cache=TitleCache.get_instance())
+        self.content_fetcher = WikipediaContentService(
+            page_cache=WikipediaPageCache.get_instance(),
+            max_workers=settings.WIKIPEDIA_FETCH_MAX_WORKERS,
+            http_pool=HTTPClientPool.get_instance("wikipedia"),
+        )
+        self.vector_indexer = VectorIndexingService(
+            embedding_cache=EmbeddingCache.get_instance(),
+            shard_store=VectorShardStore.get_instance(),
+            embedding_budget=settings.CHUNKING_BUDGET["EMBEDDING_BUDGET"],
+            max_chunk_size=settings.CHUNKING_BUDGET["MAX_CHUNK_SIZE"],
+        )
+        self.corpus_index = CorpusIndexService.get_instance(self.vector_indexer)
+        self.section_filter = SectionFilterService.get_instance()
+        self.answer_cache = SemanticAnswerCache.get_instance()
+        self.query_router = QueryRouterService.get_instance()
+        self.llm_calls = LLMCallCounter.get_instance()
+        self.stage_timer = StageTimer.get_instance()
+        self.session_store = ChatSessionStore.get_instance()
+        self.grow_sessions = settings.CHAT_SESSIONS["GROW_INDEX"]
 
-    def create_agent(self, user_query: str) -> None:
+    @classmethod
+    def get_instance(cls) -> "WikipediaRagService":
+        """
+        Get the process-wide Wikipedia RAG service, building it on first use
+
+        Returns:
+            WikipediaRagService: Shared service instance
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+
+        return cls._instance
+
+    def create_agent(self, user_query: str) -> ReActAgentService:
         """
         Create an agent for the given user query
 
         Args:
             user_query (str): User query to create the agent for
 
+        Returns:
+            ReActAgentService: Agent service answering from the pages relevant to the query
+
+        Raises:
+            RuntimeError: If there is an error creating the agent
+        """
+        return self._create_agent(user_query)[0]
+
+    async def acreate_agent(self, user_query: str) -> ReActAgentService:
+        """
+        Create an agent for the given user query, awaiting the LLM, Wikipedia and embedding calls
+
+        Args:
+            user_query (str): User query to create the agent for
+
+        Returns:
+            ReActAgentService: Agent service answering from the pages relevant to the query
+
+        Raises:
+            RuntimeError: If there is an error creating the agent
+        """
+        return (await self._acreate_agent(user_query))[0]
+
+    def query(self, user_query: str, deadline: Optional[Deadline] = None, session_id: Optional[str] = None) -> str:
+        """
+        Query the agent with the given user query, reusing the answer of a recent paraphrase when there is one
+
+        Args:
+            user_query (str): User query to query the agent with
+            deadline (Optional[Deadline]): Latency budget of the request, flagged as truncated when it runs out
+            session_id (Optional[str]): Conversation the query belongs to (follow-up turns reuse its index and agent)
+
+        Returns:
+            str: Response from the agent
+        """
+        try:
+            if session_id and self.session_store:
+                return self._query_session(user_query, session_id, deadline)
+
+            with self.llm_calls.track(self._route(user_query)) as tally, self._activate(deadline):
+                embedding = self._embed_query(user_query)
+                cached_answer = self._get_cached_answer(user_query, embedding)
+                if cached_answer:
+                    tally.path = CACHE_ROUTE
+                    return cached_answer.answer
+
+                started_at = time.perf_counter()
+                agent_service, titles = self._create_agent(user_query, deadline)
+                with self.stage_timer.stage("agent"):
+                    if tally.path == SINGLE_HOP_ROUTE:
+                        answer = agent_service.direct_query(user_query)
+                    else:
+                        answer = agent_service.query(user_query, deadline)
+                self._cache_answer(user_query, embedding, answer, titles, started_at, deadline)
+                return answer
+        except RuntimeError as e:
+            logger.error(f"Query processing failed: {e}")
+            return self._failed_response(deadline)
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            return UNEXPECTED_ERROR_RESPONSE
+
+    def stream_query(
+        self, user_query: str, deadline: Optional[Deadline] = None, session_id: Optional[str] = None
+    ) -> Iterator[ChatEvent]:
+        """
+        Query the agent with the given user query, streaming the progress of each step and then the answer tokens
+
+        Args:
+            user_query (str): User query to query the agent with
+            deadline (Optional[Deadline]): Latency budget of the request, flagged as truncated when it runs out
+            session_id (Optional[str]): Conversation the query belongs to (follow-up turns reuse its index and agent)
+
+        Returns:
+            Iterator[ChatEvent]: Progress and token events, ending with a done or error event
+        """
+        try:
+            if session_id and self.session_store:
+                yield from self._stream_session(user_query, session_id, deadline)
+                return
+
+            with self.llm_calls.track(self._route(user_query)) as tally, self._activate(deadline):
+                embedding = self._embed_query(user_query)
+                cached_answer = self._get_cached_answer(user_query, embedding)
+                if cached_answer:
+                    tally.path = CACHE_ROUTE
+                    yield ChatEvent(
+                        event="cache",
+                        data={"query": cached_answer.query, "similarity": cached_answer.similarity},
+                    )
+                    yield ChatEvent(event="token", data={"text": cached_answer.answer})
+                    yield ChatEvent(event="done", data={"route": tally.path, "llm_calls": tally.calls, "truncated": False})
+                    return
+
+                yield ChatEvent(event="route", data={"route": tally.path})
+                started_at = time.perf_counter()
+                agent_service, titles = yield from self._create_agent_steps(user_query, deadline)
+
+                if tally.path == SINGLE_HOP_ROUTE:
+                    events = agent_service.stream_direct_query(user_query)
+                else:
+                    events = agent_service.stream_query(user_query, deadline)
+
+                tokens = []
+                with self.stage_timer.stage("agent"):
+                    for event in events:
+                        if event.event == "token":
+                            tokens.append(event.data["text"])
+                        yield event
+
+                self._cache_answer(user_query, embedding, "".join(tokens).strip(), titles, started_at, deadline)
+                yield ChatEvent(
+                    event="done",
+                    data={"route": tally.path, "llm_calls": tally.calls, "truncated": bool(deadline and deadline.truncated)},
+                )
+        except RuntimeError as e:
+            logger.error(f"Query processing failed: {e}")
+            yield ChatEvent(event="error", data={"message": self._failed_response(deadline)})
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            yield ChatEvent(event="error", data={"message": UNEXPECTED_ERROR_RESPONSE})
+
+    async def aquery(
+        self, user_query: str, deadline: Optional[Deadline] = None, session_id: Optional[str] = None
+    ) -> str:
+        """
+        Query the agent with the given user query without blocking the event loop
+
+        Args:
+            user_query (str): User query to query the agent with
+            deadline (Optional[Deadline]): Latency budget of the request, flagged as truncated when it runs out
+            session_id (Optional[str]): Conversation the query belongs to (follow-up turns reuse its index and agent)
+
+        Returns:
+            str: Response from the agent
+        """
+        try:
+            if session_id and self.session_store:
+                return await self._aquery_session(user_query, session_id, deadline)
+
+            with self.llm_calls.track(self._route(user_query)) as tally, self._activate(deadline):
+                embedding = await self._aembed_query(user_query)
+                cached_answer = self._get_cached_answer(user_query, embedding)
+                if cached_answer:
+                    tally.path = CACHE_ROUTE
+                    return cached_answer.answer
+
+                started_at = time.perf_counter()
+                agent_service, titles = await self._acreate_agent(user_query, deadline)
+                with self.stage_timer.stage("agent"):
+                    if tally.path == SINGLE_HOP_ROUTE:
+                        answer = await agent_service.adirect_query(user_query)
+                    else:
+                        answer = await agent_service.aquery(user_query, deadline)
+                self._cache_answer(user_query, embedding, answer, titles, started_at, deadline)
+                return answer
+        except RuntimeError as e:
+            logger.error(f"Query processing failed: {e}")
+            return self._failed_response(deadline)
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            return UNEXPECTED_ERROR_RESPONSE
+
+    def _query_session(self, user_query: str, session_id: str, deadline: Optional[Deadline]) -> str:
+        """
+        Answer a turn of a chat session: the first turn builds the index and agent, follow-ups only index the pages of
+        new topics before querying the agent
+
+        Args:
+            user_query (str): User query
+            session_id (str): Conversation identifier
+            deadline (Optional[Deadline]): Latency budget of the request
+
+        Returns:
+            str: Response from the agent
+        """
+        session = self.session_store.get(session_id)
+        resumed = session is not None
+        with self.llm_calls.track(SESSION_ROUTE if resumed else AGENT_ROUTE), self._activate(deadline):
+            if session is None:
+                agent_service, titles = self._create_agent(user_query, deadline)
+                session = self._start_session(session_id, agent_service, titles)
+
+            # The agent keeps the chat memory, so the paraphrase cache and the single-hop route are not used
+            with session.lock:
+                if resumed:
+                    for _ in self._grow_session_steps(session_id, session, user_query, deadline):
+                        pass
+                with self.stage_timer.stage("agent"):
+                    return session.agent_service.query(user_query, deadline)
+
+    def _stream_session(
+        self, user_query: str, session_id: str, deadline: Optional[Deadline]
+    ) -> Iterator[ChatEvent]:
+        """
+        Answer a turn of a chat session, streaming the progress of each step and then the answer tokens
+
+        Args:
+            user_query (str): User query
+            session_id (str): Conversation identifier
+            deadline (Optional[Deadline]): Latency budget of the request
+
+        Returns:
+            Iterator[ChatEvent]: Progress and token events, ending with a done event
+        """
+        session = self.session_store.get(session_id)
+        resumed = session is not None
+        with self.llm_calls.track(SESSION_ROUTE if resumed else AGENT_ROUTE) as tally, self._activate(deadline):
+            yield ChatEvent(event="session", data={"session_id": session_id, "resumed": resumed})
+            if session is None:
+                agent_service, titles = yield from self._create_agent_steps(user_query, deadline)
+                session = self._start_session(session_id, agent_service, titles)
+
+            with session.lock:
+                if resumed:
+                    yield from self._grow_session_steps(session_id, session, user_query, deadline)
+                with self.stage_timer.stage("agent"):
+                    yield from session.agent_service.stream_query(user_query, deadline)
+
+            yield ChatEvent(
+                event="done",
+                data={"route": tally.path, "llm_calls": tally.calls, "truncated": bool(deadline and deadline.truncated)},
+            )
+
+    async def _aquery_session(self, user_query: str, session_id: str, deadline: Optional[Deadline]) -> str:
+        """
+        Answer a turn of a chat session without blocking the event loop
+
+        Args:
+            user_query (str): User query
+            session_id (str): Conversation identifier
+            deadline (Optional[Deadline]): Latency budget of the request
+
+        Returns:
+            str: Response from the agent
+        """
+        session = self.session_store.get(session_id)
+        resumed = session is not None
+        with self.llm_calls.track(SESSION_ROUTE if resumed else AGENT_ROUTE), self._activate(deadline):
+            if session is None:
+                agent_service, titles = await self._acreate_agent(user_query, deadline)
+                session = self._start_session(session_id, agent_service, titles)
+
+            # Wait for a concurrent turn of the same conversation in a thread, not on the event loop
+            async with session.alock():
+                if resumed:
+                    await self._agrow_session(session_id, session, user_query, deadline)
+                with self.stage_timer.stage("agent"):
+                    return await session.agent_service.aquery(user_query, deadline)
+
+    def _start_session(self, session_id: str, agent_service: ReActAgentService, titles: List[str]) -> ChatSession:
+        """
+        Keep the index and agent built for the first turn of a chat session
+
+        Args:
+            session_id (str): Conversation identifier
+            agent_service (ReActAgentService): Agent service built for the first turn
+            titles (List[str]): Titles of the pages the agent answers from
+
+        Returns:
+            ChatSession: Stored session
+        """
+        # The shared corpus index is not owned by the session, only count the per-conversation indexes
+        size_bytes = 0 if self.corpus_index else ChatSessionStore.estimate_bytes(agent_service.index)
+        session = ChatSession(
+            index=agent_service.index,
+            agent_service=agent_service,
+            titles=titles,
+            requested_titles={t.casefold() for t in titles},
+            size_bytes=size_bytes,
+        )
+        self.session_store.put(session_id, session)
+        return session
+
+    def _grow_session_steps(
+        self, session_id: str, session: ChatSession, user_query: str, deadline: Optional[Deadline]
+    ) -> Iterator[ChatEvent]:
+        """
+        Insert the pages of the topics a follow-up turn introduces into the session index, reporting the progress of
+        each step (the caller must hold the session lock)
+
+        Args:
+            session_id (str): Conversation identifier
+            session (ChatSession): Session of the conversation
+            user_query (str): Follow-up user query
+            deadline (Optional[Deadline]): Latency budget of the request, checked before each stage
+
+        Returns:
+            Iterator[ChatEvent]: Progress events, only sent when the follow-up needs new pages
+        """
+        if not self.grow_sessions:
+            return
+
+        try:
+            with self.stage_timer.stage("title_extraction"):
+                titles = self.title_extractor.extract_titles(user_query)
+            new_titles = self._new_session_titles(session, titles)
+            if not new_titles:
+                return
+            yield ChatEvent(event="titles", data={"titles": new_titles})
+
+            if deadline:
+                deadline.check("fetching the Wikipedia pages")
+            with self.stage_timer.stage("wikipedia_fetch"):
+                documents = self.content_fetcher.fetch_content(new_titles)
+            documents = self._new_session_documents(session, documents)
+            if not documents:
+                return
+            yield ChatEvent(event="pages", data={"titles": self._page_titles(documents)})
+            documents = self._filter_sections(user_query, documents)
+
+            if deadline:
+                deadline.check("indexing the Wikipedia pages")
+            if self.corpus_index:
+                grown = self.corpus_index.add_documents(documents) is not None
+            else:
+                grown = self.vector_indexer.insert_documents(session.index, documents) > 0
+            if grown:
+                self._session_grown(session_id, session, documents)
+                yield ChatEvent(event="index", data={"shared": self.corpus_index is not None})
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # The agent can still answer from the pages already in the session index
+            logger.warning(f"Error adding new pages to chat session {session_id}: {e}")
+
+    async def _agrow_session(
+        self, session_id: str, session: ChatSession, user_query: str, deadline: Optional[Deadline]
+    ) -> None:
+        """
+        Insert the pages of the topics a follow-up turn introduces into the session index, awaiting the LLM, Wikipedia
+        and embedding calls (the caller must hold the session lock)
+
+        Args:
+            session_id (str): Conversation identifier
+            session (ChatSession): Session of the conversation
+            user_query (str): Follow-up user query
+            deadline (Optional[Deadline]): Latency budget of the request, checked before each stage
+        """
+        if not self.grow_sessions:
+            return
+
+        try:
+            with self.stage_timer.stage("title_extraction"):
+                titles = await self.title_extractor.aextract_titles(user_query)
+            new_titles = self._new_session_titles(session, titles)
+            if not new_titles:
+                return
+
+            if deadline:
+                deadline.check("fetching the Wikipedia pages")
+            with self.stage_timer.stage("wikipedia_fetch"):
+                documents = await self.content_fetcher.afetch_content(new_titles)
+            documents = self._new_session_documents(session, documents)
+            if not documents:
+                return
+            documents = self._filter_sections(user_query, documents)
+
+            if deadline:
+                deadline.check("indexing the Wikipedia pages")
+            if self.corpus_index:
+                grown = await self.corpus_index.aadd_documents(documents) is not None
+            else:
+                grown = await self.vector_indexer.ainsert_documents(session.index, documents) > 0
+            if grown:
+                self._session_grown(session_id, session, documents)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"Error adding new pages to chat session {session_id}: {e}")
+
+    @staticmethod
+    def _new_session_titles(session: ChatSession, titles: List[str]) -> List[str]:
+        """
+        Get the titles not yet looked up for the conversation, marking them as looked up so missing pages are not
+        fetched again on the next turns
+
+        Args:
+            session (ChatSession): Session of the conversation
+            titles (List[str]): Titles extracted from the follow-up query
+
+        Returns:
+            List[str]: Titles of the new topics
+        """
+        new_titles = [t for t in dict.fromkeys(titles) if t.casefold() not in session.requested_titles]
+        session.requested_titles.update(t.casefold() for t in new_titles)
+        return new_titles
+
+    def _new_session_documents(self, session: ChatSession, documents: List[Document]) -> List[Document]:
+        """
+        Drop the fetched pages already in the session index (e.g. a new title redirecting to a known page)
+
+        Args:
+            session (ChatSession): Session of the conversation
+            documents (List[Document]): Pages fetched for the new titles
+
+        Returns:
+            List[Document]: Pages to insert into the session index
+        """
+        indexed = {t.casefold() for t in session.titles}
+        return [d for d, title in zip(documents, self._page_titles(documents)) if title.casefold() not in indexed]
+
+    def _session_grown(self, session_id: str, session: ChatSession, documents: List[Document]) -> None:
+        """
+        Record the pages inserted into the session index and account for the memory they hold
+
+        Args:
+            session_id (str): Conversation identifier
+            session (ChatSession): Session of the conversation
+            documents (List[Document]): Pages inserted into the session index
+        """
+        page_titles = self._page_titles(documents)
+        session.titles.extend(page_titles)
+        session.requested_titles.update(t.casefold() for t in page_titles)
+        logger.info(f"Added {len(documents)} pages to chat session {session_id}.")
+
+        # The shared corpus index is not owned by the session, only count the per-conversation indexes
+        if not self.corpus_index:
+            self.session_store.resize(session_id, ChatSessionStore.estimate_bytes(session.index))
+
+    def _filter_sections(self, user_query: str, documents: List[Document]) -> List[Document]:
+        """
+        Keep the sections of the fetched pages relevant to the user query, when the section filter is enabled
+
+        Args:
+            user_query (str): User query the pages were fetched for
+            documents (List[Document]): Fetched pages
+
+        Returns:
+            List[Document]: Documents to index
+        """
+        # The shared corpus index holds whole pages, indexed once for the queries of every request
+        if not self.section_filter or self.corpus_index:
+            return documents
+
+        with self.stage_timer.stage("section_filter"):
+            return self.section_filter.filter_documents(user_query, documents)
+
+    def _route(self, user_query: str) -> str:
+        """
+        Choose how the given user query is answered
+
+        Args:
+            user_query (str): User query
+
+        Returns:
+            str: SINGLE_HOP_ROUTE or AGENT_ROUTE (always the agent when the router is disabled)
+        """
+        if not self.query_router:
+            return AGENT_ROUTE
+
+        return self.query_router.route(user_query)
+
+    @staticmethod
+    def _activate(deadline: Optional[Deadline]) -> ContextManager:
+        """
+        Make the deadline of the request visible to the LLM calls, which cap their timeout to the time left
+
+        Args:
+            deadline (Optional[Deadline]): Latency budget of the request
+
+        Returns:
+            ContextManager: Context in which the deadline is active (a no-op without a deadline)
+        """
+        return deadline.activate() if deadline else nullcontext()
+
+    @staticmethod
+    def _failed_response(deadline: Optional[Deadline]) -> str:
+        """
+        Get the response of a query that could not be answered
+
+        Args:
+            deadline (Optional[Deadline]): Latency budget of the request
+
+        Returns:
+            str: Response telling the user the latency budget ran out, or that the query failed
+        """
+        if deadline is not None and deadline.expired:
+            deadline.truncated = True
+            return DEADLINE_EXCEEDED_RESPONSE
+
+        return QUERY_FAILED_RESPONSE
+
+    def _create_agent(
+        self, user_query: str, deadline: Optional[Deadline] = None
+    ) -> Tuple[ReActAgentService, List[str]]:
+        """
+        Create an agent for the given user query, ignoring the progress events
+
+        Args:
+            user_query (str): User query to create the agent for
+            deadline (Optional[Deadline]): Latency budget of the request, checked before each stage
+
+        Returns:
+            Tuple[ReActAgentService, List[str]]: Agent service and titles of the pages it answers from
+        """
+        steps = self._create_agent_steps(user_query, deadline)
+        try:
+            while True:
+                next(steps)
+        except StopIteration as done:
+            return done.value
+
+    def _create_agent_steps(
+        self, user_query: str, deadline: Optional[Deadline] = None
+    ) -> Generator[ChatEvent, None, Tuple[ReActAgentService, List[str]]]:
+        """
+        Create an agent for the given user query, reporting the progress of each step
+
+        Args:
+            user_query (str): User query to create the agent for
+            deadline (Optional[Deadline]): Latency budget of the request, checked before each stage
+
+        Returns:
+            Generator[ChatEvent, None, Tuple[ReActAgentService, List[str]]]: Progress events, then the agent service
+                and the titles of the pages it answers from as return value
+
         Raises:
             RuntimeError: If there is an error creating the agent
         """
@@ -36,66 +639,216 @@ class WikipediaRagService:
             logger.info("Creating Wikipedia RAG agent.")
 
             # Extract Wikipedia titles from the user query
-            titles = self.title_extractor.extract_titles(user_query)
+            with self.stage_timer.stage("title_extraction"):
+                titles = self.title_extractor.extract_titles(user_query)
             if not titles:
-                raise RuntimeError(
-                    """
-                    No relevant Wikipedia pages found for the given user query.
-                    Please provide a more specific query.
-                    """
-                )
+                raise RuntimeError(NO_TITLES_ERROR)
+            yield ChatEvent(event="titles", data={"titles": titles})
 
             # Fetch content from Wikipedia
-            documents = self.content_fetcher.fetch_content(titles)
+            if deadline:
+                deadline.check("fetching the Wikipedia pages")
+            with self.stage_timer.stage("wikipedia_fetch"):
+                documents = self.content_fetcher.fetch_content(titles)
             if not documents:
-                raise RuntimeError(
-                    """
-                    Failed to fetch content from Wikipedia.
-                    The pages might not exist or might be private.
-                    """
-                )
+                raise RuntimeError(NO_DOCUMENTS_ERROR)
+            page_titles = self._page_titles(documents)
+            yield ChatEvent(event="pages", data={"titles": page_titles})
+
+            # Only index the sections of the pages relevant to the query
+            documents = self._filter_sections(user_query, documents)
 
-            # Create a vector index from the Wikipedia content
-            index = self.vector_indexer.create_index_from_documents(documents)
+            # Create a vector index from the Wikipedia content (or grow the shared corpus index)
+            if deadline:
+                deadline.check("indexing the Wikipedia pages")
+            if self.corpus_index:
+                index = self.corpus_index.add_documents(documents)
+            else:
+                index = self.vector_indexer.create_index_from_documents(documents)
             if not index:
-                raise RuntimeError(
-                    """
-                    Failed to create vector index from the fetched Wikipedia content.
-                    The content might be invalid or insufficient.
-                    """
-                )
+                raise RuntimeError(NO_INDEX_ERROR)
+            yield ChatEvent(event="index", data={"shared": self.corpus_index is not None})
 
-            # Create the Wikipedia tool and initialize the agent
-            tool = self.agent_service.create_wikipedia_tool(index)
-            self.agent_service.initialize_agent([tool])
-            self._is_agent_initialized = True
+            if deadline:
+                deadline.check("querying the agent")
+            return self._create_agent_service(index), page_titles
         except Exception as e:
             logger.error(f"Error creating Wikipedia RAG agent: {e}")
             raise RuntimeError(f"Error creating Wikipedia RAG agent: {e}")
 
-    def query(self, user_query: str) -> str:
+    async def _acreate_agent(
+        self, user_query: str, deadline: Optional[Deadline] = None
+    ) -> Tuple[ReActAgentService, List[str]]:
         """
-        Query the agent with the given user query
+        Create an agent for the given user query, awaiting the LLM, Wikipedia and embedding calls
 
         Args:
-            user_query (str): User query to query the agent with
+            user_query (str): User query to create the agent for
+            deadline (Optional[Deadline]): Latency budget of the request, checked before each stage
 
         Returns:
-            str: Response from the agent
+            Tuple[ReActAgentService, List[str]]: Agent service and titles of the pages it answers from
+
+        Raises:
+            RuntimeError: If there is an error creating the agent
         """
         try:
-            if not self._is_agent_initialized:
-                self.create_agent(user_query)
+            logger.info("Creating Wikipedia RAG agent.")
 
-            return self.agent_service.query(user_query)
-        except RuntimeError as e:
-            logger.error(f"Query processing failed: {e}")
-            return """
-                I'm sorry, I couldn't process your query. This might be because:
-                1. There are no relevant Wikipedia pages for the given query.
-                2. The Wikipedia content is not sufficient to answer the query.
-                Please try again with a more specific query.
-                """
+            with self.stage_timer.stage("title_extraction"):
+                titles = await self.title_extractor.aextract_titles(user_query)
+            if not titles:
+                raise RuntimeError(NO_TITLES_ERROR)
+
+            if deadline:
+                deadline.check("fetching the Wikipedia pages")
+            with self.stage_timer.stage("wikipedia_fetch"):
+                documents = await self.content_fetcher.afetch_content(titles)
+            if not documents:
+                raise RuntimeError(NO_DOCUMENTS_ERROR)
+            documents = self._filter_sections(user_query, documents)
+
+            if deadline:
+                deadline.check("indexing the Wikipedia pages")
+            if self.corpus_index:
+                index = await self.corpus_index.aadd_documents(documents)
+            else:
+                index = await self.vector_indexer.acreate_index_from_documents(documents)
+            if not index:
+                raise RuntimeError(NO_INDEX_ERROR)
+
+            if deadline:
+                deadline.check("querying the agent")
+            return self._create_agent_service(index), self._page_titles(documents)
         except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            return "An unexpected error occurred. Please try again later."
+            logger.error(f"Error creating Wikipedia RAG agent: {e}")
+            raise RuntimeError(f"Error creating Wikipedia RAG agent: {e}")
+
+    def _embed_query(self, user_query: str) -> Optional[List[float]]:
+        """
+        Embed the user query for the semantic answer cache
+
+        Args:
+            user_query (str): User query
+
+        Returns:
+            Optional[List[float]]: Query embedding, or None if the cache is disabled or the embedding failed
+        """
+        if not self.answer_cache:
+            return None
+
+        try:
+            with self.stage_timer.stage("query_embedding"):
+                return LLMConfig.get_embedding_model().get_query_embedding(user_query)
+        except Exception as e:
+            logger.warning(f"Error embedding the query for the semantic answer cache: {e}")
+            return None
+
+    async def _aembed_query(self, user_query: str) -> Optional[List[float]]:
+        """
+        Embed the user query for the semantic answer cache with the async embedding API
+
+        Args:
+            user_query (str): User query
+
+        Returns:
+            Optional[List[float]]: Query embedding, or None if the cache is disabled or the embedding failed
+        """
+        if not self.answer_cache:
+            return None
+
+        try:
+            with self.stage_timer.stage("query_embedding"):
+                return await LLMConfig.get_embedding_model().aget_query_embedding(user_query)
+        except Exception as e:
+            logger.warning(f"Error embedding the query for the semantic answer cache: {e}")
+            return None
+
+    def _get_cached_answer(self, user_query: str, embedding: Optional[List[float]]) -> Optional[CachedAnswer]:
+        """
+        Get the cached answer of a query similar to the user query
+
+        Args:
+            user_query (str): User query
+            embedding (Optional[List[float]]): Embedding of the user query
+
+        Returns:
+            Optional[CachedAnswer]: Cached answer, or None on a miss
+        """
+        if embedding is None:
+            return None
+
+        return self.answer_cache.get(embedding, user_query)
+
+    def _cache_answer(
+        self,
+        user_query: str,
+        embedding: Optional[List[float]],
+        answer: str,
+        titles: List[str],
+        started_at: float,
+        deadline: Optional[Deadline] = None,
+    ) -> None:
+        """
+        Store the answer of the user query in the semantic answer cache
+
+        Args:
+            user_query (str): User query
+            embedding (Optional[List[float]]): Embedding of the user query
+            answer (str): Answer of the agent
+            titles (List[str]): Titles of the pages the answer comes from
+            started_at (float): perf_counter value when the query processing started
+            deadline (Optional[Deadline]): Latency budget of the request (truncated answers are not cached)
+        """
+        if embedding is None or not answer or (deadline and deadline.truncated):
+            return
+
+        self.answer_cache.set(
+            embedding,
+            CachedAnswer(
+                query=user_query,
+                answer=answer,
+                titles=titles,
+                latency_seconds=time.perf_counter() - started_at,
+            ),
+        )
+
+    @staticmethod
+    def _page_titles(documents: List[Document]) -> List[str]:
+        """
+        Get the titles of the given pages
+
+        Args:
+            documents (List[Document]): Fetched pages
+
+        Returns:
+            List[str]: Page titles
+        """
+        # The sections kept by the section filter share the title of their page
+        return list(dict.fromkeys(d.metadata.get("title", d.doc_id) for d in documents))
+
+    @staticmethod
+    def _create_agent_service(index: VectorStoreIndex) -> ReActAgentService:
+        """
+        Create the Wikipedia tool over the given index and initialize a new agent with it
+
+        Args:
+            index (VectorStoreIndex): Index holding the pages relevant to the query
+
+        Returns:
+            ReActAgentService: Initialized agent service
+        """
+        agent_service = ReActAgentService()
+        hybrid_retrieval = settings.HYBRID_RETRIEVAL
+        if hybrid_retrieval["ENABLED"]:
+            tool = agent_service.create_wikipedia_tool(
+                index,
+                similarity_top_k=hybrid_retrieval["SIMILARITY_TOP_K"],
+                hybrid=True,
+                rrf_k=hybrid_retrieval["RRF_K"],
+            )
+        else:
+            tool = agent_service.create_wikipedia_tool(index)
+        agent_service.initialize_agent([tool])
+        agent_service.index = index
+        return agent_service
@@ -1,9 +1,10 @@
 import logging
-from typing import List
+from typing import Any, List, Optional
 
 from llama_index.core.program import FunctionCallingProgram
 from llama_index.program.openai import OpenAIPydanticProgram
 
+from api.cache.title_cache import TitleCache
 from api.config.llm_config import LLMConfig
 from api.schemas.wikipedia_title_extraction import WikipediaTitleExtraction
 
@@ -15,7 +16,14 @@ class WikipediaTitleExtractorService:
     Service to extract titles from user query using OpenAI
     """
 
-    def __init__(self) -> None:
+    def __init__(self, title_cache: Optional[TitleCache] = None) -> None:
+        """
+        Initialize the title extractor service
+
+        Args:
+            title_cache (Optional[TitleCache]): Cache of the titles already extracted for a normalized query
+        """
+        self.title_cache = title_cache
         self._program = self._create_extraction_program()
 
     def extract_titles(self, query: str) -> List[str]:
@@ -28,15 +36,57 @@ class WikipediaTitleExtractorService:
         Returns:
             List[str]: List of extracted Wikipedia titles
         """
+        cached_titles = self.title_cache.get(query) if self.title_cache else None
+        if cached_titles is not None:
+            logger.info(f"Serving {len(cached_titles)} Wikipedia titles from the title cache.")
+            return cached_titles
+
         result = self._program(query=query)
+        return self._parse_titles(query, result)
+
+    async def aextract_titles(self, query: str) -> List[str]:
+        """
+        Extract Wikipedia titles from the user query with the async LLM API
+
+        Args:
+            query (str): User query to extract titles from
+
+        Returns:
+            List[str]: List of extracted Wikipedia titles
+        """
+        cached_titles = self.title_cache.get(query) if self.title_cache else None
+        if cached_titles is not None:
+            logger.info(f"Serving {len(cached_titles)} Wikipedia titles from the title cache.")
+            return cached_titles
+
+        result = await self._program.acall(query=query)
+        return self._parse_titles(query, result)
+
+    def _parse_titles(self, query: str, result: Any) -> List[str]:
+        """
+        Validate the output of the extraction program and cache the titles of the query
+
+        Args:
+            query (str): User query the titles were extracted from
+            result (Any): Output of the extraction program (the dict form of a WikipediaTitleExtraction)
+
+        Returns:
+            List[str]: List of extracted Wikipedia titles
+        """
         try:
-            if isinstance(result, dict) and 'titles' in result:
-                return WikipediaTitleExtraction(**result).titles
-            return []
+            if not (isinstance(result, dict) and 'titles' in result):
+                return []
+
+            titles = WikipediaTitleExtraction(**result).titles
         except Exception as e:
             logger.error(f"Error extracting Wikipedia titles: {e}")
             return []
 
+        # Empty results are not cached, the query may just have hit a transient LLM failure
+        if titles and self.title_cache:
+            self.title_cache.set(query, titles)
+        return titles
+
     @staticmethod
     def _create_extraction_program() -> FunctionCallingProgram:
         """
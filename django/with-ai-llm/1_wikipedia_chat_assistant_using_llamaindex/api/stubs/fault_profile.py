@@ -0,0 +1,89 @@
+import math
+import random
+import threading
+from typing import Optional, Sequence
+
+# Supported latency distributions
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+
+class FaultProfile:
+    """
+    Latency and error distribution of a stand-in server.
+
+    Draws come from a seeded generator shared by every request of the server, so a run replays the same sequence of
+    delays and errors for the same sequence of requests.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        distribution: str = "constant",
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (500,),
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the fault profile
+
+        Args:
+            latency_ms (float): Mean (median for lognormal) delay added before each response, in milliseconds
+            jitter_ms (float): Spread of the delay: half-width for uniform, standard deviation for normal and lognormal
+            distribution (str): Distribution of the delay ("constant", "uniform", "normal" or "lognormal")
+            error_rate (float): Fraction of the requests answered with an error, between 0 and 1
+            error_statuses (Sequence[int]): HTTP statuses of the errors, drawn uniformly
+            seed (Optional[int]): Seed of the generator (None for a different sequence on every run)
+
+        Raises:
+            ValueError: If the distribution is unknown or the error rate is not between 0 and 1
+        """
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{distribution}'.")
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError(f"Error rate must be between 0 and 1, got {error_rate}.")
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses) or [500]
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def latency(self) -> float:
+        """
+        Draw the delay of the next response
+
+        Returns:
+            float: Delay in seconds (never negative)
+        """
+        with self._lock:
+            if self.distribution == "uniform":
+                delay_ms = self._random.uniform(self.latency_ms - self.jitter_ms, self.latency_ms + self.jitter_ms)
+            elif self.distribution == "normal":
+                delay_ms = self._random.gauss(self.latency_ms, self.jitter_ms)
+            elif self.distribution == "lognormal" and self.latency_ms > 0:
+                # Median latency_ms, with jitter_ms as the standard deviation of the delay around it
+                sigma = math.sqrt(math.log(1 + (self.jitter_ms / self.latency_ms) ** 2))
+                delay_ms = self._random.lognormvariate(math.log(self.latency_ms), sigma)
+            else:
+                delay_ms = self.latency_ms
+
+        return max(delay_ms, 0.0) / 1000
+
+    def error(self) -> Optional[int]:
+        """
+        Draw whether the next response is an error
+
+        Returns:
+            Optional[int]: HTTP status of the error, or None for a successful response
+        """
+        if not self.error_rate:
+            return None
+
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return None
+            return self._random.choice(self.error_statuses)
@@ -0,0 +1,457 @@
+import base64
+import hashlib
+import itertools
+import json
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from api.stubs.fault_profile import FaultProfile
+from api.stubs.stub_server import StubResponse, StubServer
+
+# Embedding size of the OpenAI models, used when the request does not ask for one
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-large": 3072,
+    "text-embedding-3-small": 1536,
+    "text-embedding-ada-002": 1536,
+}
+
+_WORD_RE = re.compile(r"\w+")
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_STREAM_CHUNK_RE = re.compile(r"\S+\s*")
+_CAPITALIZED_RE = re.compile(r"\b[A-Z][\w'-]*(?:\s+[A-Z][\w'-]*)*")
+_METADATA_LINE_RE = re.compile(r"^[a-z_]+: .*$", re.MULTILINE)
+_TOOL_NAME_RE = re.compile(r"> Tool Name: (\S+)")
+_USER_QUERY_RE = re.compile(r"USER QUERY:\s*(.+)")
+_QUERY_RE = re.compile(r"Query:\s*(.+)")
+
+# Words starting a question, never part of a title
+_QUESTION_WORDS = {
+    "A", "An", "And", "Are", "Can", "Did", "Do", "Does", "How", "I", "In", "Is", "Tell", "The", "What", "When",
+    "Where", "Which", "Who", "Why",
+}
+
+
+class OpenAIStubServer(StubServer):
+    """
+    Stand-in for the OpenAI chat completions (with function calling and streaming) and embeddings endpoints, with
+    deterministic outputs.
+
+    - Function calls fill the arguments from the tool JSON schema; list arguments get the known titles mentioned in
+      the query (or its capitalized phrases), which is what the title extraction program asks for.
+    - ReAct prompts get one call of the first tool, then an answer made of its observation.
+    - Other prompts get the sentence of the context sharing most words with the query (the query engine synthesis).
+    - Embeddings hash the words of the text into a unit vector, so texts sharing words are similar.
+
+    Point the application to it with OPENAI_API_BASE (any OPENAI_API_KEY is accepted).
+    """
+
+    def __init__(
+        self,
+        titles: Optional[List[str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        fault_profile: Optional[FaultProfile] = None,
+        token_latency_ms: float = 0.0,
+    ) -> None:
+        """
+        Initialize the OpenAI stand-in server
+
+        Args:
+            titles (Optional[List[str]]): Page titles the function calls may return (e.g. those of the Wikipedia
+                stand-in corpus)
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 for a free port)
+            fault_profile (Optional[FaultProfile]): Latency (time to the first byte) and error distribution
+            token_latency_ms (float): Delay between two chunks of a streamed completion, in milliseconds
+        """
+        super().__init__(host=host, port=port, fault_profile=fault_profile)
+        self.titles = list(titles or [])
+        self.token_latency_ms = token_latency_ms
+        self._completion_ids = itertools.count(1)
+
+    @property
+    def api_base(self) -> str:
+        """
+        Base URL of the API, the value of OPENAI_API_BASE
+        """
+        return self.url + "/v1"
+
+    def handle(self, method: str, path: str, params: Dict[str, str], body: Any) -> StubResponse:
+        if method == "GET" and path.endswith("/models"):
+            models = ["gpt-4o", *EMBEDDING_DIMENSIONS]
+            return StubResponse(body={"object": "list", "data": [{"id": m, "object": "model"} for m in models]})
+
+        if method == "POST" and path.endswith("/chat/completions"):
+            return self._chat_completion(body or {})
+
+        if method == "POST" and path.endswith("/embeddings"):
+            return StubResponse(body=self._embeddings(body or {}))
+
+        return StubResponse(status=404, body=self._error(f"Unknown endpoint {method} {path}.", "invalid_request_error"))
+
+    def error_body(self, status: int) -> Any:
+        if status == 429:
+            return self._error("Injected rate limit.", "requests", code="rate_limit_exceeded")
+        return self._error(f"Injected error (HTTP {status}).", "server_error")
+
+    def _chat_completion(self, body: Dict[str, Any]) -> StubResponse:
+        """
+        Answer a chat completion request, streamed or not
+
+        Args:
+            body (Dict[str, Any]): Request body
+
+        Returns:
+            StubResponse: Chat completion, or its chunks when streaming
+        """
+        messages = body.get("messages", [])
+        model = body.get("model", "gpt-4o")
+        completion_id = f"chatcmpl-stub-{next(self._completion_ids)}"
+
+        content, tool_calls = self._reply(messages, body.get("tools"), body.get("tool_choice"))
+        usage = {
+            "prompt_tokens": sum(_count_tokens(_text(m.get("content"))) for m in messages),
+            "completion_tokens": _count_tokens(content or "")
+            + sum(_count_tokens(c["function"]["arguments"]) for c in tool_calls),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        finish_reason = "tool_calls" if tool_calls else "stop"
+
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            return StubResponse(
+                events=self._stream(completion_id, model, content, tool_calls, finish_reason, usage, include_usage)
+            )
+
+        message: Dict[str, Any] = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+
+        return StubResponse(
+            body={
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+                "usage": usage,
+            }
+        )
+
+    def _stream(
+        self,
+        completion_id: str,
+        model: str,
+        content: Optional[str],
+        tool_calls: List[Dict[str, Any]],
+        finish_reason: str,
+        usage: Dict[str, int],
+        include_usage: bool,
+    ) -> Iterator[Any]:
+        """
+        Stream a chat completion word by word, waiting token_latency_ms between two chunks
+
+        Args:
+            completion_id (str): Completion identifier
+            model (str): Model name
+            content (Optional[str]): Reply text
+            tool_calls (List[Dict[str, Any]]): Tool calls of the reply
+            finish_reason (str): Why the completion ended
+            usage (Dict[str, int]): Token usage, sent last when include_usage is set
+            include_usage (bool): Whether the client asked for the usage chunk
+
+        Returns:
+            Iterator[Any]: Chunks of the completion, then the end-of-stream marker
+        """
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> Dict[str, Any]:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish, "logprobs": None}],
+            }
+
+        yield chunk({"role": "assistant", "content": ""})
+
+        for piece in _STREAM_CHUNK_RE.findall(content or ""):
+            time.sleep(self.token_latency_ms / 1000)
+            yield chunk({"content": piece})
+
+        if tool_calls:
+            yield chunk({"tool_calls": [{"index": i, **call} for i, call in enumerate(tool_calls)]})
+
+        yield chunk({}, finish_reason)
+
+        if include_usage:
+            yield {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }
+
+        yield "[DONE]"
+
+    def _reply(
+        self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]], tool_choice: Any
+    ) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """
+        Build the deterministic reply to the conversation
+
+        Args:
+            messages (List[Dict[str, Any]]): Chat messages
+            tools (Optional[List[Dict[str, Any]]]): Functions the model may call
+            tool_choice (Any): Function the model must call, if any
+
+        Returns:
+            Tuple[Optional[str], List[Dict[str, Any]]]: Reply text (None for a function call) and tool calls
+        """
+        last_message = _text(messages[-1].get("content")) if messages else ""
+        prompt = "\n".join(_text(m.get("content")) for m in messages)
+
+        if tools and tool_choice != "none":
+            function = self._choose_function(tools, tool_choice)
+            match = _USER_QUERY_RE.search(last_message)
+            query = match.group(1).strip() if match else last_message.strip()
+            arguments = self._function_arguments(function.get("parameters") or {}, query)
+            return None, [
+                {
+                    "id": "call_" + hashlib.sha1(f"{function['name']}:{query}".encode("utf-8")).hexdigest()[:24],
+                    "type": "function",
+                    "function": {"name": function["name"], "arguments": json.dumps(arguments)},
+                }
+            ]
+
+        tool_names = _TOOL_NAME_RE.findall(prompt)
+        if tool_names:
+            return self._react_step(messages, tool_names[0]), []
+
+        if "Context information is below" in last_message:
+            return self._synthesize(last_message), []
+
+        return f"Stub response to: {last_message.strip()[:200]}", []
+
+    @staticmethod
+    def _choose_function(tools: List[Dict[str, Any]], tool_choice: Any) -> Dict[str, Any]:
+        """
+        Get the function to call: the one forced by tool_choice, or the first one
+
+        Args:
+            tools (List[Dict[str, Any]]): Functions the model may call
+            tool_choice (Any): Function the model must call, if any
+
+        Returns:
+            Dict[str, Any]: Function definition
+        """
+        functions = [t["function"] for t in tools if t.get("type") == "function"]
+        if isinstance(tool_choice, dict):
+            name = tool_choice.get("function", {}).get("name")
+            for function in functions:
+                if function["name"] == name:
+                    return function
+
+        return functions[0]
+
+    def _function_arguments(self, schema: Dict[str, Any], query: str) -> Dict[str, Any]:
+        """
+        Fill the arguments of a function call from its JSON schema
+
+        Args:
+            schema (Dict[str, Any]): JSON schema of the function parameters
+            query (str): User query the call is made for
+
+        Returns:
+            Dict[str, Any]: Arguments of the call
+        """
+        arguments: Dict[str, Any] = {}
+        for name, prop in (schema.get("properties") or {}).items():
+            prop_type = prop.get("type")
+            if prop_type == "array":
+                arguments[name] = self._extract_titles(query)
+            elif prop_type == "string":
+                arguments[name] = query
+            elif prop_type in ("integer", "number"):
+                arguments[name] = 0
+            elif prop_type == "boolean":
+                arguments[name] = False
+            else:
+                arguments[name] = {}
+
+        return arguments
+
+    def _extract_titles(self, query: str, limit: int = 5) -> List[str]:
+        """
+        Get the known titles mentioned in the query, or its capitalized phrases when none is
+
+        Args:
+            query (str): User query
+            limit (int): Maximum number of titles
+
+        Returns:
+            List[str]: Titles, in the order they appear in the query
+        """
+        folded_query = query.casefold()
+        found = []
+        for title in self.titles:
+            # "Python (programming language)" is mentioned as "Python"
+            name = title.split(" (", 1)[0].casefold()
+            match = re.search(r"\b" + re.escape(name) + r"\b", folded_query)
+            if match:
+                found.append((match.start(), title))
+
+        if found:
+            return [title for _, title in sorted(found)[:limit]]
+
+        phrases = []
+        for phrase in _CAPITALIZED_RE.findall(query):
+            words = phrase.split()
+            while words and words[0] in _QUESTION_WORDS:
+                words.pop(0)
+            if words:
+                phrases.append(" ".join(words))
+
+        return list(dict.fromkeys(phrases))[:limit]
+
+    @staticmethod
+    def _react_step(messages: List[Dict[str, Any]], tool_name: str) -> str:
+        """
+        Take the next ReAct step: call the tool with the question, then answer with the tool observation
+
+        Args:
+            messages (List[Dict[str, Any]]): Chat messages, the reasoning steps of the current question last
+            tool_name (str): Name of the tool to call
+
+        Returns:
+            str: Reasoning step in the ReAct format
+        """
+        last_message = _text(messages[-1].get("content")).strip()
+        if last_message.startswith("Observation:"):
+            observation = last_message[len("Observation:"):].strip()
+            return f"Thought: I can answer without using any more tools.\nAnswer: {observation}"
+
+        return (
+            "Thought: I need to use a tool to help me answer the question.\n"
+            f"Action: {tool_name}\n"
+            f"Action Input: {json.dumps({'input': last_message})}"
+        )
+
+    @staticmethod
+    def _synthesize(prompt: str) -> str:
+        """
+        Answer a question over a context with the context sentence sharing most words with the query
+
+        Args:
+            prompt (str): Prompt holding the context and the query
+
+        Returns:
+            str: Answer
+        """
+        context = prompt.split("---------------------")[1] if prompt.count("---------------------") >= 2 else prompt
+        context = _METADATA_LINE_RE.sub("", context)
+        match = _QUERY_RE.search(prompt)
+        query_words = {w for w in _WORD_RE.findall((match.group(1) if match else "").casefold()) if len(w) > 3}
+
+        sentences = [s.strip() for s in _SENTENCE_RE.split(context) if s.strip()]
+        if not sentences:
+            return "Empty Response"
+
+        # max() keeps the first of the sentences sharing as many words
+        return max(sentences, key=lambda s: len(query_words & set(_WORD_RE.findall(s.casefold()))))
+
+    def _embeddings(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Embed the input texts
+
+        Args:
+            body (Dict[str, Any]): Request body
+
+        Returns:
+            Dict[str, Any]: Embeddings, base64-encoded if the client asked for it (as the OpenAI client does)
+        """
+        model = body.get("model", "text-embedding-3-small")
+        dimensions = int(body.get("dimensions") or EMBEDDING_DIMENSIONS.get(model, 1536))
+
+        inputs = body.get("input", [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+
+        data = []
+        tokens = 0
+        for i, item in enumerate(inputs):
+            # Token arrays are hashed token by token, like words
+            text = item if isinstance(item, str) else " ".join(str(t) for t in item)
+            tokens += _count_tokens(text)
+
+            vector = _embed(text, dimensions)
+            if body.get("encoding_format") == "base64":
+                embedding: Any = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+        return {
+            "object": "list",
+            "data": data,
+            "model": model,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @staticmethod
+    def _error(message: str, error_type: str, code: Optional[str] = None) -> Dict[str, Any]:
+        return {"error": {"message": message, "type": error_type, "param": None, "code": code}}
+
+
+def _embed(text: str, dimensions: int) -> np.ndarray:
+    """
+    Hash the words of the text into a signed bag-of-words unit vector
+
+    Args:
+        text (str): Text to embed
+        dimensions (int): Size of the vector
+
+    Returns:
+        np.ndarray: Embedding
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in _WORD_RE.findall(text.casefold()) or [text]:
+        digest = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        vector[digest % dimensions] += 1.0 if digest >> 63 else -1.0
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _text(content: Any) -> str:
+    """
+    Get the text of a message content, given as a string or a list of parts
+
+    Args:
+        content (Any): Message content
+
+    Returns:
+        str: Text of the message
+    """
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+    return content or ""
+
+
+def _count_tokens(text: str) -> int:
+    """
+    Approximate the number of tokens of the text (words and punctuation marks)
+
+    Args:
+        text (str): Text to count
+
+    Returns:
+        int: Number of tokens
+    """
+    return len(_TOKEN_RE.findall(text))
@@ -0,0 +1,242 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from api.stubs.fault_profile import FaultProfile
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StubResponse:
+    """
+    Response of a stand-in server: a JSON body, or a stream of Server-Sent Events
+    """
+
+    status: int = 200
+    body: Any = None
+    # Each item is sent as one "data:" event, JSON-encoded unless it is already a string
+    events: Optional[Iterator[Any]] = None
+
+
+class StubServer:
+    """
+    Base class of the stand-in HTTP servers used to run the pipeline offline.
+
+    Subclasses implement `handle` (and `error_body` for the shape of their injected errors). Every request first
+    waits for the delay drawn from the fault profile, then may be answered with an injected error.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, fault_profile: Optional[FaultProfile] = None) -> None:
+        """
+        Initialize the stand-in server
+
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 for a free port, see `url` once started)
+            fault_profile (Optional[FaultProfile]): Latency and error distribution (None for no delay and no errors)
+        """
+        self.host = host
+        self.port = port
+        self.fault_profile = fault_profile or FaultProfile()
+
+        self._lock = threading.Lock()
+        self._request_counts: Counter = Counter()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base URL of the server
+        """
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "StubServer":
+        """
+        Start serving from a background thread
+
+        Returns:
+            StubServer: This server
+        """
+        self._bind()
+        # Poll often so that stop() returns quickly
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever,
+            kwargs={"poll_interval": 0.05},
+            name=type(self).__name__,
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        Serve from the calling thread until interrupted
+        """
+        self._bind()
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        """
+        Stop serving and release the port
+        """
+        if self._httpd is None:
+            return
+
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        self._httpd = None
+        self._thread = None
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def request_counts(self) -> Dict[str, int]:
+        """
+        Get the number of requests received per path, injected errors included
+
+        Returns:
+            Dict[str, int]: Number of requests keyed by path
+        """
+        with self._lock:
+            return dict(self._request_counts)
+
+    def handle(self, method: str, path: str, params: Dict[str, str], body: Any) -> StubResponse:
+        """
+        Answer a request
+
+        Args:
+            method (str): HTTP method
+            path (str): Request path, without the query string
+            params (Dict[str, str]): Query string parameters
+            body (Any): Parsed JSON body (None if there is none)
+
+        Returns:
+            StubResponse: Response to send
+        """
+        raise NotImplementedError
+
+    def error_body(self, status: int) -> Any:
+        """
+        Build the body of an injected error
+
+        Args:
+            status (int): HTTP status of the error
+
+        Returns:
+            Any: JSON body of the error response
+        """
+        return {"error": {"code": status, "message": "Injected error"}}
+
+    def _bind(self) -> None:
+        """
+        Open the listening socket, resolving the port when a free one was requested
+        """
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _StubRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+        self.port = self._httpd.server_address[1]
+
+    def _dispatch(self, method: str, path: str, params: Dict[str, str], body: Any) -> StubResponse:
+        """
+        Apply the fault profile, then answer the request
+
+        Args:
+            method (str): HTTP method
+            path (str): Request path, without the query string
+            params (Dict[str, str]): Query string parameters
+            body (Any): Parsed JSON body (None if there is none)
+
+        Returns:
+            StubResponse: Response to send
+        """
+        with self._lock:
+            self._request_counts[path] += 1
+
+        time.sleep(self.fault_profile.latency())
+
+        status = self.fault_profile.error()
+        if status is not None:
+            return StubResponse(status=status, body=self.error_body(status))
+
+        return self.handle(method, path, params, body)
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    """
+    Request handler parsing the query string and JSON body, and writing the response of the stand-in server
+    """
+
+    # Keep-alive connections, like the real APIs
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self._respond("GET")
+
+    def do_POST(self) -> None:
+        self._respond("POST")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _respond(self, method: str) -> None:
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+
+        body = None
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            raw_body = self.rfile.read(length)
+            content_type = self.headers.get("Content-Type", "")
+            if "json" in content_type:
+                body = json.loads(raw_body)
+            elif "form" in content_type:
+                params.update(parse_qsl(raw_body.decode("utf-8"), keep_blank_values=True))
+
+        try:
+            response = self.server.stub._dispatch(method, url.path, params, body)
+        except Exception as e:
+            logger.error(f"Error answering {method} {url.path}: {e}")
+            response = StubResponse(status=500, body=self.server.stub.error_body(500))
+
+        if response.events is not None:
+            self._send_events(response)
+        else:
+            self._send_json(response)
+
+    def _send_json(self, response: StubResponse) -> None:
+        payload = json.dumps(response.body).encode("utf-8")
+        self.send_response(response.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_events(self, response: StubResponse) -> None:
+        # The stream length is unknown, so the connection is closed at the end of it
+        self.send_response(response.status)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        for event in response.events:
+            data = event if isinstance(event, str) else json.dumps(event)
+            self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+            self.wfile.flush()
@@ -0,0 +1,186 @@
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from api.stubs.fault_profile import FaultProfile
+from api.stubs.stub_server import StubResponse, StubServer
+
+# Path of the MediaWiki API, as in https://en.wikipedia.org/w/api.php
+API_PATH = "/w/api.php"
+
+# Small corpus served when no other one is given
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "fixtures" / "wikipedia_corpus.jsonl"
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def load_corpus(path: Path) -> List[Dict[str, str]]:
+    """
+    Load a corpus of pages from a JSONL file holding one {"id", "title", "text"} object per line (the format read by
+    the ingest_wikipedia_dump command)
+
+    Args:
+        path (Path): Path of the corpus file
+
+    Returns:
+        List[Dict[str, str]]: Pages of the corpus
+    """
+    pages = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                pages.append(json.loads(line))
+
+    return pages
+
+
+class WikipediaStubServer(StubServer):
+    """
+    Stand-in for the MediaWiki API used by the `wikipedia` library and WikipediaContentService, serving the pages of
+    a fixture corpus.
+
+    Supports the title search (list=search) and the page info, extract and revision queries (prop=info, extracts,
+    revisions) on titles or page ids. Point the application to it with WIKIPEDIA_API_URL.
+    """
+
+    def __init__(
+        self,
+        pages: Optional[List[Dict[str, str]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        fault_profile: Optional[FaultProfile] = None,
+    ) -> None:
+        """
+        Initialize the Wikipedia stand-in server
+
+        Args:
+            pages (Optional[List[Dict[str, str]]]): Pages served, with "title", "text" and an optional "id"
+                (the bundled fixture corpus if None)
+            host (str): Interface to listen on
+            port (int): Port to listen on (0 for a free port)
+            fault_profile (Optional[FaultProfile]): Latency and error distribution
+        """
+        super().__init__(host=host, port=port, fault_profile=fault_profile)
+
+        if pages is None:
+            pages = load_corpus(DEFAULT_CORPUS)
+
+        self._pages: Dict[int, Dict[str, Any]] = {}
+        self._page_ids: Dict[str, int] = {}
+        for position, page in enumerate(pages, start=1):
+            page_id = int(page["id"]) if str(page.get("id", "")).isdigit() else position
+            self._pages[page_id] = {
+                "title": page["title"],
+                "text": page["text"],
+                "title_words": set(_words(page["title"])),
+                "text_words": set(_words(page["text"])),
+            }
+            self._page_ids[page["title"].casefold()] = page_id
+
+    @property
+    def api_url(self) -> str:
+        """
+        URL of the MediaWiki API, the value of WIKIPEDIA_API_URL
+        """
+        return self.url + API_PATH
+
+    @property
+    def titles(self) -> List[str]:
+        """
+        Titles of the pages served
+        """
+        return [page["title"] for page in self._pages.values()]
+
+    def handle(self, method: str, path: str, params: Dict[str, str], body: Any) -> StubResponse:
+        if path != API_PATH:
+            return StubResponse(status=404, body={"error": {"code": "notfound", "info": f"No API at {path}."}})
+
+        if params.get("action", "query") != "query":
+            return StubResponse(body={"error": {"code": "badvalue", "info": "Only action=query is supported."}})
+
+        if params.get("list") == "search":
+            return StubResponse(body=self._search(params))
+
+        return StubResponse(body=self._query_pages(params))
+
+    def error_body(self, status: int) -> Any:
+        return {"error": {"code": "internal_api_error", "info": f"Injected error (HTTP {status})."}}
+
+    def _search(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Rank the pages matching the search terms: exact title first, then by words shared with the title and the text
+
+        Args:
+            params (Dict[str, str]): Query parameters holding srsearch and srlimit
+
+        Returns:
+            Dict[str, Any]: MediaWiki search response
+        """
+        query = params.get("srsearch", "")
+        limit = int(params.get("srlimit") or 10)
+        words = set(_words(query))
+
+        scored = []
+        for page_id, page in self._pages.items():
+            if page["title"].casefold() == query.casefold():
+                score = float("inf")
+            else:
+                score = 10 * len(words & page["title_words"]) + len(words & page["text_words"])
+            if score > 0:
+                scored.append((-score, page["title"], page_id))
+
+        scored.sort()
+        results = [{"ns": 0, "title": title, "pageid": page_id} for _, title, page_id in scored[:limit]]
+        return {"batchcomplete": "", "query": {"searchinfo": {"totalhits": len(scored)}, "search": results}}
+
+    def _query_pages(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Get the requested properties of the pages given by title or page id
+
+        Args:
+            params (Dict[str, str]): Query parameters holding titles or pageids, and prop
+
+        Returns:
+            Dict[str, Any]: MediaWiki query response, missing pages flagged as such
+        """
+        props = set(params.get("prop", "").split("|"))
+        pages: Dict[str, Dict[str, Any]] = {}
+
+        if params.get("pageids"):
+            requested = [(None, int(p)) for p in params["pageids"].split("|") if p.isdigit()]
+        else:
+            requested = [(t, self._page_ids.get(t.casefold())) for t in params.get("titles", "").split("|") if t]
+
+        for missing_id, (title, page_id) in enumerate(requested, start=1):
+            if page_id not in self._pages:
+                pages[str(-missing_id)] = {"ns": 0, "title": title or "", "missing": ""}
+                continue
+
+            page = self._pages[page_id]
+            result: Dict[str, Any] = {"pageid": page_id, "ns": 0, "title": page["title"]}
+            if "info" in props:
+                result["fullurl"] = f"{self.url}/wiki/{page['title'].replace(' ', '_')}"
+            if "extracts" in props:
+                result["extract"] = page["text"]
+            if "revisions" in props:
+                # Stable revision id, changing with the text like a real edit would
+                revision_id = zlib.crc32(page["text"].encode("utf-8"))
+                result["revisions"] = [{"revid": revision_id, "parentid": revision_id - 1}]
+            pages[str(page_id)] = result
+
+        return {"batchcomplete": "", "query": {"pages": pages}}
+
+
+def _words(text: str) -> List[str]:
+    """
+    Split the text into lowercase words
+
+    Args:
+        text (str): Text to split
+
+    Returns:
+        List[str]: Words of the text
+    """
+    return _WORD_RE.findall(text.casefold())
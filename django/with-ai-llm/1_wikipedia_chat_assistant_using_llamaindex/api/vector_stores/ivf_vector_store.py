@@ -0,0 +1,181 @@
+import logging
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from api.vector_stores.numpy_vector_store import NumpyVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+class IVFVectorStore(NumpyVectorStore):
+    """
+    Approximate nearest-neighbour vector store using an inverted file (IVF) index.
+
+    Embeddings are clustered with spherical k-means, and a query only scores the rows of the `nprobe` clusters
+    closest to it. New nodes are assigned to their nearest cluster on insert, and the clusters are retrained
+    once the store has grown by `retrain_growth`. Until `min_train_size` nodes are stored, queries are exact.
+    """
+
+    nlist: Optional[int] = Field(default=None, description="Number of clusters (defaults to 4 * sqrt(size)).")
+    nprobe: int = Field(default=8, description="Number of clusters scored per query.")
+    min_train_size: int = Field(default=4096, description="Number of nodes needed before clustering.")
+    retrain_growth: float = Field(default=4.0, description="Growth factor that triggers a retraining.")
+    kmeans_iterations: int = Field(default=10, description="Number of k-means iterations per training.")
+
+    _centroids: Optional[np.ndarray] = PrivateAttr(default=None)
+    _assignments: np.ndarray = PrivateAttr()
+    _trained_size: int = PrivateAttr(default=0)
+    _rng: np.random.Generator = PrivateAttr()
+
+    def __init__(self, initial_capacity: int = 1024, seed: int = 0, **kwargs: Any) -> None:
+        """
+        Initialize the IVF vector store
+
+        Args:
+            initial_capacity (int): Number of rows allocated up front
+            seed (int): Seed of the k-means initialization
+        """
+        super().__init__(initial_capacity=initial_capacity, **kwargs)
+        self._assignments = np.empty(initial_capacity, dtype=np.int32)
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "IVFVectorStore"
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        """
+        Add the given nodes and assign them to their nearest cluster
+
+        Args:
+            nodes (Sequence[BaseNode]): Nodes to add, with their embedding set
+
+        Returns:
+            List[str]: Ids of the added nodes
+        """
+        with self._lock:
+            node_ids = super().add(nodes, **add_kwargs)
+
+            if self._size >= self.min_train_size and (
+                self._centroids is None or self._size >= self._trained_size * self.retrain_growth
+            ):
+                self.train()
+            elif self._centroids is not None:
+                self._assign(self._size - len(node_ids), self._size)
+
+        return node_ids
+
+    def clear(self) -> None:
+        """
+        Remove every node and the trained clusters
+        """
+        with self._lock:
+            super().clear()
+            self._centroids = None
+            self._trained_size = 0
+
+    def train(self) -> None:
+        """
+        Cluster the stored embeddings with spherical k-means and reassign every row
+        """
+        with self._lock:
+            if not self._size:
+                return
+
+            nlist = min(self.nlist or int(4 * np.sqrt(self._size)), self._size)
+
+            # Train on a sample, large enough for every cluster to get a few dozen points
+            sample_size = min(self._size, nlist * 64)
+            sample = self._matrix[self._rng.choice(self._size, size=sample_size, replace=False)]
+            centroids = sample[self._rng.choice(sample_size, size=nlist, replace=False)].copy()
+
+            for _ in range(self.kmeans_iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                order = np.argsort(labels, kind="stable")
+                clusters, starts = np.unique(labels[order], return_index=True)
+                sums = np.add.reduceat(sample[order], starts, axis=0)
+
+                # Empty clusters are reseeded on a random sample point
+                centroids = sample[self._rng.choice(sample_size, size=nlist)].copy()
+                centroids[clusters] = sums
+                centroids /= np.maximum(np.linalg.norm(centroids, axis=1), 1e-12)[:, None]
+
+            self._centroids = centroids.astype(np.float32)
+            self._trained_size = self._size
+            self._assign(0, self._size)
+
+            logger.info(f"IVF index trained with {nlist} clusters on {self._size} nodes.")
+
+    def _assign(self, start: int, end: int) -> None:
+        """
+        Assign the given rows to their nearest cluster (the caller must hold the lock)
+
+        Args:
+            start (int): First row to assign
+            end (int): Row after the last row to assign
+        """
+        # Work in blocks to bound the size of the row-by-cluster score matrix
+        for block_start in range(start, end, 8192):
+            block_end = min(block_start + 8192, end)
+            scores = self._matrix[block_start:block_end] @ self._centroids.T
+            self._assignments[block_start:block_end] = np.argmax(scores, axis=1)
+
+    def _candidate_rows(self, query: VectorStoreQuery, query_vector: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Get the rows of the clusters closest to the query (filtered queries are answered exactly)
+
+        Args:
+            query (VectorStoreQuery): Query holding the optional node ids and metadata filters
+            query_vector (np.ndarray): Normalized query embedding
+
+        Returns:
+            Optional[np.ndarray]: Rows to score, or None to score every row
+        """
+        rows = super()._candidate_rows(query, query_vector)
+        if rows is not None or self._centroids is None:
+            return rows
+
+        nprobe = min(self.nprobe, len(self._centroids))
+        probed = np.zeros(len(self._centroids), dtype=bool)
+        probed[np.argpartition(-(self._centroids @ query_vector), nprobe - 1)[:nprobe]] = True
+        return np.flatnonzero(probed[self._assignments[:self._size]])
+
+    def _reserve(self, size: int, dimension: int) -> None:
+        """
+        Make sure the matrix and the cluster assignments can hold the given number of rows
+
+        Args:
+            size (int): Number of rows needed
+            dimension (int): Embedding dimension
+        """
+        super()._reserve(size, dimension)
+
+        if len(self._assignments) < self._matrix.shape[0]:
+            assignments = np.empty(self._matrix.shape[0], dtype=np.int32)
+            assignments[:self._size] = self._assignments[:self._size]
+            self._assignments = assignments
+
+    def _delete_rows(self, rows: List[int]) -> None:
+        """
+        Delete the given rows, compacting the cluster assignments along with the matrix
+
+        Args:
+            rows (List[int]): Rows to delete
+        """
+        if not rows:
+            return
+
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+        kept = np.flatnonzero(keep)
+        self._assignments[:len(kept)] = self._assignments[kept]
+
+        super()._delete_rows(rows)
@@ -0,0 +1,303 @@
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.simple import _build_metadata_filter_fn
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+
+
+class NumpyVectorStore(BasePydanticVectorStore):
+    """
+    In-memory vector store keeping all embeddings in one contiguous float32 NumPy matrix.
+
+    Rows are L2-normalized on insert, so cosine top-k retrieval is a single matrix-vector product followed by
+    an argpartition. The matrix grows geometrically, which keeps incremental inserts into shared corpora cheap.
+    """
+
+    stores_text: bool = False
+
+    _matrix: np.ndarray = PrivateAttr()
+    _norms: np.ndarray = PrivateAttr()
+    _size: int = PrivateAttr()
+    _node_ids: List[str] = PrivateAttr()
+    _ref_doc_ids: List[str] = PrivateAttr()
+    _metadata: List[Dict[str, Any]] = PrivateAttr()
+    _rows: Dict[str, int] = PrivateAttr()
+    _lock: threading.RLock = PrivateAttr()
+
+    def __init__(self, initial_capacity: int = 1024, **kwargs: Any) -> None:
+        """
+        Initialize the NumPy vector store
+
+        Args:
+            initial_capacity (int): Number of rows allocated up front (the dimension is set by the first insert)
+        """
+        super().__init__(**kwargs)
+        self._matrix = np.empty((initial_capacity, 0), dtype=np.float32)
+        self._norms = np.empty(initial_capacity, dtype=np.float32)
+        self._size = 0
+        self._node_ids = []
+        self._ref_doc_ids = []
+        self._metadata = []
+        self._rows = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NumpyVectorStore"
+
+    @property
+    def client(self) -> None:
+        return None
+
+    @property
+    def size(self) -> int:
+        # Not __len__: llama_index tests stores for truthiness and would replace an empty store
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        # Memory held by the embedding matrix and norms, including the capacity reserved for future rows
+        return self._matrix.nbytes + self._norms.nbytes
+
+    def get(self, text_id: str) -> List[float]:
+        """
+        Get the embedding of the given node
+
+        Args:
+            text_id (str): Node id
+
+        Returns:
+            List[float]: Embedding of the node
+        """
+        with self._lock:
+            row = self._rows[text_id]
+            return (self._matrix[row] * self._norms[row]).tolist()
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        """
+        Add the given nodes, which must have their embedding set
+
+        Args:
+            nodes (Sequence[BaseNode]): Nodes to add
+
+        Returns:
+            List[str]: Ids of the added nodes
+        """
+        if not nodes:
+            return []
+
+        vectors = np.asarray([n.get_embedding() for n in nodes], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1)
+        vectors /= np.where(norms == 0, 1, norms)[:, None]
+
+        with self._lock:
+            # Nodes added again replace their previous embedding
+            self._delete_rows([self._rows[n.node_id] for n in nodes if n.node_id in self._rows])
+
+            self._reserve(self._size + len(nodes), vectors.shape[1])
+            self._matrix[self._size:self._size + len(nodes)] = vectors
+            self._norms[self._size:self._size + len(nodes)] = norms
+
+            for node in nodes:
+                metadata = node_to_metadata_dict(node, remove_text=True, flat_metadata=False)
+                metadata.pop("_node_content", None)
+
+                self._rows[node.node_id] = self._size
+                self._node_ids.append(node.node_id)
+                self._ref_doc_ids.append(node.ref_doc_id or "None")
+                self._metadata.append(metadata)
+                self._size += 1
+
+        return [n.node_id for n in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        """
+        Delete the nodes of the given document
+
+        Args:
+            ref_doc_id (str): Id of the document whose nodes are deleted
+        """
+        with self._lock:
+            self._delete_rows([i for i, r in enumerate(self._ref_doc_ids) if r == ref_doc_id])
+
+    def delete_nodes(
+        self,
+        node_ids: Optional[List[str]] = None,
+        filters: Optional[MetadataFilters] = None,
+        **delete_kwargs: Any,
+    ) -> None:
+        """
+        Delete the nodes matching the given ids and metadata filters
+
+        Args:
+            node_ids (Optional[List[str]]): Ids of the nodes to delete (all nodes if None)
+            filters (Optional[MetadataFilters]): Metadata filters the deleted nodes must match
+        """
+        with self._lock:
+            self._delete_rows(self._filter_rows(node_ids, filters).tolist())
+
+    def clear(self) -> None:
+        """
+        Remove every node from the store
+        """
+        with self._lock:
+            self._size = 0
+            self._node_ids = []
+            self._ref_doc_ids = []
+            self._metadata = []
+            self._rows = {}
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        """
+        Get the nodes most similar to the query embedding (cosine similarity)
+
+        Args:
+            query (VectorStoreQuery): Query holding the embedding, top-k and optional filters
+
+        Returns:
+            VectorStoreQueryResult: Ids and similarities of the top-k nodes, most similar first
+        """
+        if query.mode != VectorStoreQueryMode.DEFAULT:
+            raise ValueError(f"Invalid query mode: {query.mode}")
+
+        query_vector = np.asarray(query.query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query_vector)
+        if query_norm:
+            query_vector /= query_norm
+
+        with self._lock:
+            # The matrix has no dimension until the first insert
+            if not self._size:
+                return VectorStoreQueryResult(similarities=[], ids=[])
+
+            rows = self._candidate_rows(query, query_vector)
+            if rows is None:
+                scores = self._matrix[:self._size] @ query_vector
+            else:
+                scores = self._matrix[rows] @ query_vector
+
+            top_positions = self._top_k(scores, query.similarity_top_k)
+            top_rows = top_positions if rows is None else rows[top_positions]
+
+            return VectorStoreQueryResult(
+                similarities=scores[top_positions].tolist(),
+                ids=[self._node_ids[r] for r in top_rows],
+            )
+
+    def _candidate_rows(self, query: VectorStoreQuery, query_vector: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Get the rows scored for the given query (the caller must hold the lock)
+
+        Args:
+            query (VectorStoreQuery): Query holding the optional node ids and metadata filters
+            query_vector (np.ndarray): Normalized query embedding
+
+        Returns:
+            Optional[np.ndarray]: Rows to score, or None to score every row
+        """
+        if query.node_ids is None and query.filters is None:
+            return None
+
+        return self._filter_rows(query.node_ids, query.filters)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: Optional[int]) -> np.ndarray:
+        """
+        Get the positions of the k highest scores, highest first
+
+        Args:
+            scores (np.ndarray): Similarity scores
+            k (Optional[int]): Number of positions to return (all if None)
+
+        Returns:
+            np.ndarray: Positions of the top-k scores
+        """
+        if k is None or k >= len(scores):
+            return np.argsort(-scores)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def _filter_rows(
+        self,
+        node_ids: Optional[List[str]],
+        filters: Optional[MetadataFilters],
+    ) -> np.ndarray:
+        """
+        Get the rows matching the given ids and metadata filters (the caller must hold the lock)
+
+        Args:
+            node_ids (Optional[List[str]]): Ids of the nodes to keep (all nodes if None)
+            filters (Optional[MetadataFilters]): Metadata filters the nodes must match
+
+        Returns:
+            np.ndarray: Matching rows
+        """
+        if node_ids is None:
+            rows = range(self._size)
+        else:
+            rows = sorted(self._rows[i] for i in set(node_ids) if i in self._rows)
+
+        filter_fn = _build_metadata_filter_fn(lambda row: self._metadata[row], filters)
+        return np.fromiter((r for r in rows if filter_fn(r)), dtype=np.int64)
+
+    def _reserve(self, size: int, dimension: int) -> None:
+        """
+        Make sure the matrix can hold the given number of rows (the caller must hold the lock)
+
+        Args:
+            size (int): Number of rows needed
+            dimension (int): Embedding dimension
+        """
+        if self._matrix.shape[1] != dimension:
+            if self._size:
+                raise ValueError(
+                    f"Embedding dimension {dimension} does not match the store dimension {self._matrix.shape[1]}."
+                )
+            self._matrix = np.empty((self._matrix.shape[0], dimension), dtype=np.float32)
+
+        capacity = self._matrix.shape[0]
+        if size <= capacity:
+            return
+
+        new_capacity = max(size, capacity * 2)
+        matrix = np.empty((new_capacity, dimension), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        norms = np.empty(new_capacity, dtype=np.float32)
+        norms[:self._size] = self._norms[:self._size]
+        self._matrix = matrix
+        self._norms = norms
+
+    def _delete_rows(self, rows: List[int]) -> None:
+        """
+        Delete the given rows, compacting the matrix (the caller must hold the lock)
+
+        Args:
+            rows (List[int]): Rows to delete
+        """
+        if not rows:
+            return
+
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+        kept = np.flatnonzero(keep)
+
+        self._matrix[:len(kept)] = self._matrix[kept]
+        self._norms[:len(kept)] = self._norms[kept]
+        self._node_ids = [self._node_ids[r] for r in kept]
+        self._ref_doc_ids = [self._ref_doc_ids[r] for r in kept]
+        self._metadata = [self._metadata[r] for r in kept]
+        self._rows = {node_id: row for row, node_id in enumerate(self._node_ids)}
+        self._size = len(kept)
@@ -1,55 +1,246 @@
+import asyncio
+import contextvars
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Optional, TypeVar
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from pydantic_core import ValidationError
-from rest_framework.request import Request
-from rest_framework.response import Response
-from rest_framework.views import APIView
 from rest_framework import status
 
-from api.services.wikipedia_rag_service import WikipediaRagService
+from api.services.deadline import Deadline
 from api.requests.chat import ChatRequest
 
+if TYPE_CHECKING:
+    from api.services.wikipedia_rag_service import WikipediaRagService
+
+T = TypeVar("T")
+
+# Marks the end of an iterator run in a worker thread
+_END = object()
+
+# Threads running the event generators of the streamed queries, created on first use
+_stream_executor: Optional[ThreadPoolExecutor] = None
+_stream_executor_lock = threading.Lock()
 
-class ChatView(APIView):
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ChatView(View):
     """
-    Handles user requests to answer queries from Wikipedia.
+    Handles user requests to answer queries from Wikipedia without blocking a worker thread.
+
+    DRF views are synchronous, and Django runs every sync view of an ASGI server in the same thread, one request at a
+    time. This is a plain Django async view instead: served through ASGI (config/asgi.py), a single worker keeps many
+    chats in flight while they wait on OpenAI and Wikipedia.
     """
 
-    def post(self, request: Request) -> Response:
+    http_method_names = ["post"]
+
+    async def post(self, request: HttpRequest) -> HttpResponse:
         """
-        This method gets "query" from the request, validates it using ChatRequest Pydantic model,
+        This method gets "query" from the JSON body, validates it using ChatRequest Pydantic model,
         and returns a response based on the query.
 
         Args:
-            request (Request): The incoming request containing the query.
+            request (HttpRequest): The incoming request containing the query.
 
         Returns:
-            Response: A response containing the result of the query processing or validation errors.
+            HttpResponse: A response containing the result of the query processing or validation errors, or the event
+                stream of the query when the request asks for it.
         """
+        try:
+            data = json.loads(request.body or b"{}")
+            if not isinstance(data, dict):
+                raise ValueError("The request body must be a JSON object.")
+        except ValueError as e:
+            return JsonResponse(
+                {"error": "Validation error", "details": [str(e)]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Imported here so that loading the URLconf (e.g. for manage.py check or migrate) does not import llama-index
+        from api.instrumentation.stage_timer import StageTimer
+        from api.instrumentation.token_usage_counter import TokenUsageCounter
+        from api.services.wikipedia_rag_service import WikipediaRagService
+
         try:
             # Validate request data using Pydantic model
-            chat_request = ChatRequest(**request.data)
+            chat_request = ChatRequest(**data)
+
+            # Process the valid request with the service shared across requests, within its latency budget
+            rag_service = WikipediaRagService.get_instance()
+            deadline = build_deadline(chat_request)
+            if chat_request.stream:
+                return self._stream(rag_service, chat_request, deadline)
 
-            # Process the valid request
-            rag_service = WikipediaRagService()
-            response = rag_service.query(chat_request.query)
-            return Response({"response": response})
+            # Report where the time went (streamed responses send their headers before any stage runs)
+            with StageTimer.get_instance().track() as timings, TokenUsageCounter.get_instance().track() as usage:
+                response = await rag_service.aquery(chat_request.query, deadline, chat_request.session_id)
+            body = {"response": response, "truncated": bool(deadline and deadline.truncated)}
+            if chat_request.include_usage:
+                body["usage"] = usage.to_dict()
+            return JsonResponse(body, headers={"Server-Timing": timings.server_timing()})
 
         except ValidationError as e:
-            # Format Pydantic validation errors to be more user-friendly
-            errors = []
-            for error in e.errors():
-                field = ".".join(str(loc) for loc in error['loc'])
-                msg = error['msg']
-                if error['type'] == 'missing':
-                    errors.append(f"Field '{field}' is required")
-                else:
-                    errors.append(f"{field} field: {msg}")
-
-            return Response(
-                {"error": "Validation error", "details": errors},
+            return JsonResponse(
+                {"error": "Validation error", "details": format_validation_errors(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
-            return Response(
+            return JsonResponse(
                 {"error": "Unexpected error", "details": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+    @staticmethod
+    def _stream(
+        rag_service: "WikipediaRagService", chat_request: ChatRequest, deadline: Optional[Deadline]
+    ) -> StreamingHttpResponse:
+        """
+        Stream the progress events and the answer tokens of the query as Server-Sent Events
+
+        Args:
+            rag_service (WikipediaRagService): Service answering the query
+            chat_request (ChatRequest): Validated chat request
+            deadline (Optional[Deadline]): Latency budget of the request
+
+        Returns:
+            StreamingHttpResponse: Event stream sending each event as soon as it is produced
+        """
+        # An async iterator, as ASGI servers would otherwise collect the whole stream before sending it. The token
+        # usage, known once the answer is complete, is reported by the done event.
+        from api.instrumentation.token_usage_counter import TokenUsageCounter
+
+        async def events() -> AsyncIterator[str]:
+            with TokenUsageCounter.get_instance().track() as usage:
+                stream = rag_service.stream_query(chat_request.query, deadline, chat_request.session_id)
+                async for event in iterate_in_thread(stream):
+                    if event.event == "done" and chat_request.include_usage:
+                        event.data["usage"] = usage.to_dict()
+                    yield event.to_sse()
+
+        return StreamingHttpResponse(
+            events(),
+            content_type="text/event-stream",
+            # Disable caching and proxy buffering, which would hold the events back
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+def get_stream_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool running the event generators of the streamed queries
+
+    Returns:
+        ThreadPoolExecutor: Pool of CHAT_STREAM_MAX_WORKERS threads shared by the streams of the process
+    """
+    global _stream_executor
+    with _stream_executor_lock:
+        if _stream_executor is None:
+            _stream_executor = ThreadPoolExecutor(
+                max_workers=settings.CHAT_STREAM_MAX_WORKERS, thread_name_prefix="chat-stream"
+            )
+
+    return _stream_executor
+
+
+async def iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """
+    Run a blocking iterator in a worker thread, handing each item to the event loop as soon as it is produced
+
+    The iterator runs in the stream thread pool rather than the default executor, which it would hold for the whole
+    stream, and in a copy of the caller's context. Once the consumer stops (e.g. the client disconnected), the
+    iterator is closed as soon as it produces its next item, or never started if it was still waiting for a thread.
+
+    Args:
+        iterator (Iterator[T]): Blocking iterator, e.g. the event generator of a streamed query
+
+    Returns:
+        AsyncIterator[T]: Items of the iterator
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[tuple]" = asyncio.Queue()
+    stopped = threading.Event()
+
+    def put(item: object, error: Optional[BaseException] = None) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            # The event loop is closed, nobody is waiting for the items anymore
+            stopped.set()
+
+    def produce() -> None:
+        try:
+            if not stopped.is_set():
+                for item in iterator:
+                    if stopped.is_set():
+                        break
+                    put(item)
+        except BaseException as e:
+            put(_END, e)
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+        put(_END)
+
+    context = contextvars.copy_context()
+    get_stream_executor().submit(context.run, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _END:
+                if error:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+def build_deadline(chat_request: ChatRequest) -> Optional[Deadline]:
+    """
+    Start the latency budget of a chat request: the requested budget, capped by the server maximum, or the default
+
+    Args:
+        chat_request (ChatRequest): Validated chat request
+
+    Returns:
+        Optional[Deadline]: Deadline of the request, or None if the request has no budget
+    """
+    config = settings.CHAT_LATENCY_BUDGET
+    budget_seconds = chat_request.budget_seconds or config["DEFAULT_SECONDS"]
+    if config["MAX_SECONDS"]:
+        budget_seconds = min(budget_seconds, config["MAX_SECONDS"])
+    if budget_seconds <= 0:
+        return None
+
+    return Deadline(budget_seconds)
+
+
+def format_validation_errors(error: ValidationError) -> List[str]:
+    """
+    Format Pydantic validation errors to be more user-friendly
+
+    Args:
+        error (ValidationError): Validation error raised by the request model
+
+    Returns:
+        List[str]: One message per invalid field
+    """
+    errors = []
+    for e in error.errors():
+        field = ".".join(str(loc) for loc in e['loc'])
+        msg = e['msg']
+        if e['type'] == 'missing':
+            errors.append(f"Field '{field}' is required")
+        else:
+            errors.append(f"{field} field: {msg}")
+
+    return errors
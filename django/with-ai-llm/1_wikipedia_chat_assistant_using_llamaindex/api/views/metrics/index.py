@@ -0,0 +1,27 @@
+from django.http import HttpRequest, HttpResponse
+from django.views import View
+
+
+class MetricsView(View):
+    """
+    Exposes the stage timings, LLM calls and cache counters of the RAG pipeline for Prometheus to scrape.
+
+    A plain Django view, so the text exposition format is returned as is rather than negotiated by DRF renderers.
+    """
+
+    http_method_names = ["get"]
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        """
+        Render the metrics of this process
+
+        Args:
+            request (HttpRequest): The incoming scrape request.
+
+        Returns:
+            HttpResponse: Metrics in the Prometheus text exposition format.
+        """
+        # Imported here so that loading the URLconf (e.g. for manage.py check or migrate) does not import llama-index
+        from api.instrumentation.prometheus_exporter import CONTENT_TYPE, render_metrics
+
+        return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
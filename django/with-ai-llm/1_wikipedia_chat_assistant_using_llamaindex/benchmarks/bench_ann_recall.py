@@ -0,0 +1,64 @@
+"""
+Recall and latency report of the IVF approximate nearest-neighbour store against exact search.
+
+Usage (from the project root):
+    python -m benchmarks.bench_ann_recall --nodes 100000 --dimension 256 --nprobe 4 8 16
+"""
+import argparse
+import time
+
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from api.vector_stores.ivf_vector_store import IVFVectorStore
+from api.vector_stores.numpy_vector_store import NumpyVectorStore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=2000, help="Number of clusters in the synthetic corpus")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+
+    # Synthetic corpus: chunks of the same page are close to each other, like Wikipedia chunks
+    rng = np.random.default_rng(0)
+    topics = rng.normal(size=(args.topics, args.dimension)).astype(np.float32)
+    embeddings = topics[rng.integers(args.topics, size=args.nodes)]
+    embeddings += 1.5 * rng.normal(size=embeddings.shape).astype(np.float32)
+    nodes = [TextNode(id_=str(i), text="", embedding=e.tolist()) for i, e in enumerate(embeddings)]
+    queries = [
+        VectorStoreQuery(query_embedding=(e + 1.5 * rng.normal(size=args.dimension)).tolist(), similarity_top_k=args.top_k)
+        for e in embeddings[rng.choice(args.nodes, size=args.queries, replace=False)]
+    ]
+
+    exact_store = NumpyVectorStore()
+    exact_store.add(nodes)
+    start = time.perf_counter()
+    exact_results = [set(exact_store.query(q).ids) for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    ivf_store = IVFVectorStore(min_train_size=1)
+    start = time.perf_counter()
+    ivf_store.add(nodes)
+    build_s = time.perf_counter() - start
+
+    print(f"{args.nodes} nodes, {args.dimension} dimensions, IVF build {build_s:.1f}s")
+    print(f"{'search':>12} {'recall@' + str(args.top_k):>10} {'latency (ms)':>13}")
+    print(f"{'exact':>12} {1.0:>10.3f} {exact_ms:>13.2f}")
+
+    for nprobe in args.nprobe:
+        ivf_store.nprobe = nprobe
+        start = time.perf_counter()
+        ivf_results = [set(ivf_store.query(q).ids) for q in queries]
+        ivf_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(a & e) / len(e) for a, e in zip(ivf_results, exact_results)])
+        print(f"{'nprobe=' + str(nprobe):>12} {recall:>10.3f} {ivf_ms:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
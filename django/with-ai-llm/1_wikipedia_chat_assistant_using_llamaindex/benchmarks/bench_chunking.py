@@ -0,0 +1,127 @@
+"""
+Node count, index build time and retrieval hit-rate of the fixed chunking against chunk-budget-aware chunking.
+
+Each request indexes a few synthetic pages of very different lengths, embedded by the OpenAI stand-in server (hashed
+bag of words, so no request leaves the machine). A query is a handful of words of one sentence of a page, and is a
+hit when one of the top-k retrieved chunks contains that sentence.
+
+Usage (from the project root):
+    python -m benchmarks.bench_chunking --requests 20 --pages-per-request 5 --budgets 0 100 50 25
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from llama_index.core import Document  # noqa: E402
+
+from api.config.llm_config import LLMConfig  # noqa: E402
+from api.services.vector_indexing_service import VectorIndexingService  # noqa: E402
+from api.stubs.openai_stub_server import OpenAIStubServer  # noqa: E402
+
+
+def make_page(rng: random.Random, page_id: int, common_words: list, sentences: int) -> Document:
+    """
+    Build a synthetic page: sentences mixing words of its own topic with words common to all pages
+
+    Args:
+        rng (random.Random): Random generator
+        page_id (int): Page number
+        common_words (list): Words shared by every page
+        sentences (int): Number of sentences of the page
+
+    Returns:
+        Document: Page, with its sentences in metadata["sentences"] (excluded from the embeddings)
+    """
+    topic_words = [f"topic{page_id}word{i}" for i in range(60)]
+    page_sentences = []
+    for _ in range(sentences):
+        words = [
+            rng.choice(topic_words) if rng.random() < 0.4 else rng.choice(common_words)
+            for _ in range(rng.randint(10, 22))
+        ]
+        page_sentences.append(" ".join(words).capitalize() + ".")
+
+    return Document(
+        text=" ".join(page_sentences),
+        metadata={"title": f"Page {page_id}", "sentences": page_sentences},
+        excluded_embed_metadata_keys=["title", "sentences"],
+        excluded_llm_metadata_keys=["title", "sentences"],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--pages-per-request", type=int, default=5)
+    parser.add_argument("--queries-per-request", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--query-words", type=int, default=6, help="Words of the sentence kept in the query")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 100, 50, 25], help="0 is the fixed chunking")
+    parser.add_argument("--max-chunk-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    # Pages from a stub to a long article (about 20 to 5000 sentences)
+    rng = random.Random(0)
+    common_words = [f"common{i}" for i in range(300)]
+    requests = [
+        [
+            make_page(rng, r * args.pages_per_request + p, common_words, int(rng.lognormvariate(5, 1.2)) + 20)
+            for p in range(args.pages_per_request)
+        ]
+        for r in range(args.requests)
+    ]
+    queries = []
+    for documents in requests:
+        request_queries = []
+        for _ in range(args.queries_per_request):
+            sentence = rng.choice(rng.choice(documents).metadata["sentences"])
+            words = sentence.rstrip(".").split()
+            request_queries.append((" ".join(rng.sample(words, min(args.query_words, len(words)))), sentence))
+        queries.append(request_queries)
+
+    with OpenAIStubServer() as stub:
+        LLMConfig.initialize(api_base=stub.api_base)
+
+        print(
+            f"{args.requests} requests of {args.pages_per_request} pages, "
+            f"{sum(len(d.metadata['sentences']) for r in requests for d in r)} sentences in total"
+        )
+        print(
+            f"{'budget':>8} {'nodes/request':>14} {'embed calls':>12} {'build (ms)':>11} "
+            f"{'hit@' + str(args.top_k):>7}"
+        )
+
+        for budget in args.budgets:
+            indexer = VectorIndexingService(embedding_budget=budget, max_chunk_size=args.max_chunk_size)
+            node_count = 0
+            build_seconds = 0.0
+            hits = 0
+            embed_calls = stub.request_counts().get("/v1/embeddings", 0)
+
+            for documents, request_queries in zip(requests, queries):
+                start = time.perf_counter()
+                index = indexer.create_index_from_documents(documents)
+                build_seconds += time.perf_counter() - start
+                node_count += len(index.docstore.docs)
+
+                retriever = index.as_retriever(similarity_top_k=args.top_k)
+                for query, sentence in request_queries:
+                    results = retriever.retrieve(query)
+                    hits += any(sentence in r.node.get_content() for r in results)
+
+            embed_calls = stub.request_counts().get("/v1/embeddings", 0) - embed_calls
+            # Query embeddings are one call per query, only the index embeddings are reported
+            embed_calls -= args.requests * args.queries_per_request
+            label = str(budget) if budget else "fixed"
+            print(
+                f"{label:>8} {node_count / args.requests:>14.1f} {embed_calls / args.requests:>12.1f} "
+                f"{build_seconds * 1000 / args.requests:>11.1f} "
+                f"{hits / (args.requests * args.queries_per_request):>7.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Embedding calls and wall time of concurrent chats embedding their own batches vs sharing them through the batcher.
+
+Each chat embeds a query and a few dozen chunks, like a request whose other chunks are already in the embedding cache.
+The embeddings come from the OpenAI stand-in server, with a fixed latency per call standing in for the network and
+the per-call overhead of the API.
+
+Usage (from the project root):
+    python -m benchmarks.bench_embedding_batcher --chats 64 --concurrency 16 --latency-ms 100 --windows 5 20
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from llama_index.core.base.embeddings.base import BaseEmbedding  # noqa: E402
+from llama_index.embeddings.openai import OpenAIEmbedding  # noqa: E402
+
+from api.config.llm_config import BatchingOpenAIEmbedding  # noqa: E402
+from api.stubs.fault_profile import FaultProfile  # noqa: E402
+from api.stubs.openai_stub_server import OpenAIStubServer  # noqa: E402
+
+
+def run_chats(embed_model: BaseEmbedding, chats: List[List[str]], concurrency: int) -> float:
+    """
+    Embed the query and chunks of every chat, with the given number of chats in flight
+
+    Args:
+        embed_model (BaseEmbedding): Embedding model
+        chats (List[List[str]]): Query then chunks of each chat
+        concurrency (int): Number of chats embedding at the same time
+
+    Returns:
+        float: Wall time in seconds
+    """
+    def chat(texts: List[str]) -> None:
+        embed_model.get_query_embedding(texts[0])
+        embed_model.get_text_embedding_batch(texts[1:])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(chat, chats))
+
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--chunks", type=int, default=40, help="Mean number of chunks embedded per chat")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Latency of each embedding call")
+    parser.add_argument("--windows", type=float, nargs="+", default=[5.0, 20.0], help="Batch windows in ms")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    chats = [
+        [f"question {i} about topic {rng.randint(0, 9)}"]
+        + [f"chunk {i}-{j} " + " ".join(f"word{rng.randint(0, 999)}" for _ in range(60))
+           for j in range(rng.randint(1, 2 * args.chunks))]
+        for i in range(args.chats)
+    ]
+
+    with OpenAIStubServer(fault_profile=FaultProfile(latency_ms=args.latency_ms)) as stub:
+        settings = {"model": "text-embedding-3-small", "api_base": stub.api_base, "embed_batch_size": 100}
+        print(
+            f"{args.chats} chats, {args.concurrency} at a time, {sum(len(c) for c in chats)} texts, "
+            f"{args.latency_ms:.0f}ms per embedding call"
+        )
+        print(f"{'mode':>14} {'calls':>6} {'texts/call':>11} {'wall (s)':>9} {'chats/s':>8}")
+
+        modes = [("per chat", OpenAIEmbedding(**settings))] + [
+            (f"window {window:g}ms", BatchingOpenAIEmbedding(batch_window_seconds=window / 1000, **settings))
+            for window in args.windows
+        ]
+        for label, embed_model in modes:
+            calls = stub.request_counts().get("/v1/embeddings", 0)
+            seconds = run_chats(embed_model, chats, args.concurrency)
+            calls = stub.request_counts().get("/v1/embeddings", 0) - calls
+            print(
+                f"{label:>14} {calls:>6} {sum(len(c) for c in chats) / calls:>11.1f} "
+                f"{seconds:>9.2f} {args.chats / seconds:>8.1f}"
+            )
+            if isinstance(embed_model, BatchingOpenAIEmbedding):
+                embed_model.batcher.close()
+
+
+if __name__ == "__main__":
+    main()
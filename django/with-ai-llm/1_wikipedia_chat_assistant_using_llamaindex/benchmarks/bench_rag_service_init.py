@@ -0,0 +1,55 @@
+"""
+Per-request setup cost of the Wikipedia RAG service: building it on every request vs reusing the shared instance.
+
+No request is sent to OpenAI or Wikipedia, only the service objects are built.
+
+Usage (from the project root):
+    python -m benchmarks.bench_rag_service_init --requests 200
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+django.setup()
+
+from api.services.react_agent_service import ReActAgentService  # noqa: E402
+from api.services.wikipedia_rag_service import WikipediaRagService  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    # The first build also pays the LLM configuration and the tokenizer loading, once per process either way
+    start = time.perf_counter()
+    WikipediaRagService.get_instance()
+    first_build_ms = (time.perf_counter() - start) * 1000
+
+    # Before: every request built the service and its sub-services
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        WikipediaRagService()
+        ReActAgentService()
+    per_request_ms = (time.perf_counter() - start) * 1000 / args.requests
+
+    # After: every request reuses the shared service and only builds its own agent service
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        WikipediaRagService.get_instance()
+        ReActAgentService()
+    shared_ms = (time.perf_counter() - start) * 1000 / args.requests
+
+    print(f"First build: {first_build_ms:.1f} ms")
+    print(f"{'setup':>12} {'per request (ms)':>17}")
+    print(f"{'per-request':>12} {per_request_ms:>17.3f}")
+    print(f"{'shared':>12} {shared_ms:>17.3f}")
+    print(f"Saved per request: {per_request_ms - shared_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
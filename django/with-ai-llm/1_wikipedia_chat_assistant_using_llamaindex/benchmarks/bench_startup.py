@@ -0,0 +1,153 @@
+"""
+Startup time of a fresh process: Django setup with the lazy LLM configuration, against building the LLM at startup
+(as the settings module used to do) and against the full warm-up of a serving worker. Then the wall time of the
+`manage.py check` and `migrate` commands (`migrate` applies the migrations to the configured database, as the Docker
+image does at startup), next to the start of a bare interpreter.
+
+Every run is a new interpreter started with `python -X importtime`, so nothing is cached between runs but the
+operating system's file cache. The modules taking the longest to import are listed for the first scenario.
+
+Usage (from the project root):
+    python -m benchmarks.bench_startup --runs 5 --top 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+_SETUP = (
+    "import os, sys, time\n"
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')\n"
+    "start = time.perf_counter()\n"
+    "import django\n"
+    "django.setup()\n"
+)
+_REPORT = "print(time.perf_counter() - start, 'llama_index.core' in sys.modules)\n"
+
+SCENARIOS = {
+    # What every manage.py command and worker pays
+    "lazy setup": _SETUP + _REPORT,
+    # What they paid when the settings module built the LLM
+    "eager LLM": _SETUP
+    + "from api.config.llm_config import LLMConfig\nLLMConfig.ensure_initialized()\n"
+    + _REPORT,
+    # What a serving worker pays with LLM_WARMUP=1, instead of its first request
+    "warm-up": _SETUP + "from api.config.warmup import warm_up\nwarm_up()\n" + _REPORT,
+}
+
+COMMANDS = {
+    # What every process pays before running any code
+    "python": ["-c", "pass"],
+    # Both run the system checks, which load the URLconf and the views
+    "check": ["manage.py", "check"],
+    "migrate": ["manage.py", "migrate", "--noinput"],
+}
+
+
+def run(code: str) -> Tuple[float, bool, List[Tuple[int, str]]]:
+    """
+    Run the given code in a fresh interpreter with the import-time report on
+
+    Args:
+        code (str): Code printing its duration and whether llama-index was imported
+
+    Returns:
+        Tuple[float, bool, List[Tuple[int, str]]]: Duration in seconds, whether llama-index was imported, and the
+            cumulative import time in microseconds and name of every module
+    """
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    seconds, llama_index = result.stdout.split()[-2:]
+
+    # Lines of the report: "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            # Nested imports are indented by two spaces per level
+            modules.append((int(cumulative), name[1:].rstrip()))
+
+    return float(seconds), llama_index == "True", modules
+
+
+def run_command(args: List[str]) -> Tuple[float, bool]:
+    """
+    Run the given interpreter arguments in a fresh interpreter with the import-time report on
+
+    Args:
+        args (List[str]): Arguments of the interpreter, e.g. a manage.py command
+
+    Returns:
+        Tuple[float, bool]: Wall time of the process in seconds, and whether llama-index was imported
+    """
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark")}
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    seconds = time.perf_counter() - start
+
+    # Lines of the report: "import time: self [us] | cumulative | imported package" (nested imports are indented)
+    llama_index = any(
+        line.startswith("import time:") and line.split("|")[-1].strip() == "llama_index"
+        for line in result.stderr.splitlines()
+    )
+    return seconds, llama_index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports listed for the lazy setup")
+    args = parser.parse_args()
+
+    print(f"{'scenario':>12} {'median (ms)':>12} {'min (ms)':>9} {'llama-index':>12}")
+    lazy_modules: Dict[str, int] = {}
+    for label, code in SCENARIOS.items():
+        runs = [run(code) for _ in range(args.runs)]
+        seconds = [r[0] for r in runs]
+        print(
+            f"{label:>12} {statistics.median(seconds) * 1000:>12.0f} {min(seconds) * 1000:>9.0f} "
+            f"{'imported' if runs[0][1] else '-':>12}"
+        )
+        if not lazy_modules:
+            lazy_modules = {name: cumulative for cumulative, name in runs[0][2]}
+
+    print(f"\n{'command':>12} {'median (ms)':>12} {'min (ms)':>9} {'llama-index':>12}")
+    for label, command in COMMANDS.items():
+        runs = [run_command(command) for _ in range(args.runs)]
+        seconds = [r[0] for r in runs]
+        print(
+            f"{label:>12} {statistics.median(seconds) * 1000:>12.0f} {min(seconds) * 1000:>9.0f} "
+            f"{'imported' if runs[0][1] else '-':>12}"
+        )
+
+    # Top-level imports only (the cumulative time of a package already counts its submodules)
+    top_level = sorted(
+        ((us, name) for name, us in lazy_modules.items() if not name.startswith(" ")), reverse=True
+    )[: args.top]
+    print("\nSlowest imports of the lazy setup:")
+    for cumulative, name in top_level:
+        print(f"{cumulative / 1000:>9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Microbenchmark comparing top-k retrieval on llama_index's SimpleVectorStore and our NumpyVectorStore.
+
+Usage (from the project root):
+    python -m benchmarks.bench_vector_store --nodes 1000 10000 --dimension 1536
+"""
+import argparse
+import time
+from typing import List
+
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores import SimpleVectorStore
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from api.vector_stores.numpy_vector_store import NumpyVectorStore
+
+
+def build_nodes(count: int, dimension: int, rng: np.random.Generator) -> List[TextNode]:
+    """
+    Build nodes with random embeddings
+
+    Args:
+        count (int): Number of nodes
+        dimension (int): Embedding dimension
+        rng (np.random.Generator): Random generator
+
+    Returns:
+        List[TextNode]: Nodes with their embedding set
+    """
+    embeddings = rng.normal(size=(count, dimension)).astype(np.float32)
+    return [TextNode(id_=str(i), text="", embedding=e.tolist()) for i, e in enumerate(embeddings)]
+
+
+def time_queries(store, queries: List[VectorStoreQuery]) -> float:
+    """
+    Run the given queries against the store
+
+    Args:
+        store: Vector store to query
+        queries (List[VectorStoreQuery]): Queries to run
+
+    Returns:
+        float: Mean query latency in milliseconds
+    """
+    start = time.perf_counter()
+    for query in queries:
+        store.query(query)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[500, 5000, 20000])
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'nodes':>8} {'simple (ms)':>12} {'numpy (ms)':>11} {'speedup':>8}")
+
+    for count in args.nodes:
+        nodes = build_nodes(count, args.dimension, rng)
+        queries = [
+            VectorStoreQuery(query_embedding=rng.normal(size=args.dimension).tolist(), similarity_top_k=args.top_k)
+            for _ in range(args.queries)
+        ]
+
+        simple_store = SimpleVectorStore()
+        simple_store.add(nodes)
+        numpy_store = NumpyVectorStore()
+        numpy_store.add(nodes)
+
+        simple_ms = time_queries(simple_store, queries)
+        numpy_ms = time_queries(numpy_store, queries)
+        print(f"{count:>8} {simple_ms:>12.2f} {numpy_ms:>11.3f} {simple_ms / numpy_ms:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,6 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from api.config.llm_config import LLMConfig
 
 load_dotenv()
 
@@ -128,6 +127,129 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Local caches
+# Directory holding the on-disk caches used by the RAG pipeline
+
+CACHE_DIR = Path(os.getenv("CACHE_DIR", BASE_DIR / ".cache"))
+
+WIKIPEDIA_PAGE_CACHE = {
+    "ENABLED": os.getenv("WIKIPEDIA_PAGE_CACHE_ENABLED", "1") == "1",
+    "PATH": CACHE_DIR / "wikipedia_pages.sqlite3",
+    "MAX_ENTRIES": int(os.getenv("WIKIPEDIA_PAGE_CACHE_MAX_ENTRIES", "1000")),
+    "TTL_SECONDS": int(os.getenv("WIKIPEDIA_PAGE_CACHE_TTL_SECONDS", "86400")),
+}
+
+EMBEDDING_CACHE = {
+    "ENABLED": os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1",
+    "PATH": CACHE_DIR / "embeddings.sqlite3",
+}
+
+# Embedding requests of concurrent chats sent together in full batches, each text waiting at most WINDOW_MS for the
+# batch to fill. Off by default: every embedding call, even a lone one on an idle server, waits for the window.
+EMBEDDING_BATCHER = {
+    "ENABLED": os.getenv("EMBEDDING_BATCHER_ENABLED", "0") == "1",
+    "WINDOW_MS": float(os.getenv("EMBEDDING_BATCHER_WINDOW_MS", "5")),
+}
+
+VECTOR_SHARDS = {
+    "ENABLED": os.getenv("VECTOR_SHARDS_ENABLED", "1") == "1",
+    "DIR": CACHE_DIR / "shards",
+    "MAX_ENTRIES": int(os.getenv("VECTOR_SHARDS_MAX_ENTRIES", "10000")),
+}
+
+# Chunks embedded per request, split evenly between its pages (0 for no budget). Pages too long for their share are
+# split into larger chunks, doubling the chunk size up to MAX_CHUNK_SIZE tokens.
+CHUNKING_BUDGET = {
+    "EMBEDDING_BUDGET": int(os.getenv("CHUNKING_EMBEDDING_BUDGET", "0")),
+    "MAX_CHUNK_SIZE": int(os.getenv("CHUNKING_MAX_CHUNK_SIZE", "1024")),
+}
+
+# Only chunk and embed the lead and the TOP_SECTIONS sections of the fetched pages best matching the query (BM25)
+SECTION_FILTER = {
+    "ENABLED": os.getenv("SECTION_FILTER_ENABLED", "0") == "1",
+    "TOP_SECTIONS": int(os.getenv("SECTION_FILTER_TOP_SECTIONS", "10")),
+}
+
+# Retrieve with both the vector index and a BM25 index over the same nodes, fused by reciprocal-rank fusion.
+# Exact name and date matches often allow a lower SIMILARITY_TOP_K, hence a smaller synthesis prompt.
+HYBRID_RETRIEVAL = {
+    "ENABLED": os.getenv("HYBRID_RETRIEVAL_ENABLED", "0") == "1",
+    "SIMILARITY_TOP_K": int(os.getenv("HYBRID_RETRIEVAL_SIMILARITY_TOP_K", "5")),
+    "RRF_K": int(os.getenv("HYBRID_RETRIEVAL_RRF_K", "60")),
+}
+
+# Approximate nearest-neighbour index shared by all requests, grown as new pages are fetched
+SHARED_CORPUS_INDEX = {
+    "ENABLED": os.getenv("SHARED_CORPUS_INDEX_ENABLED", "0") == "1",
+    "NPROBE": int(os.getenv("SHARED_CORPUS_INDEX_NPROBE", "8")),
+    "MIN_TRAIN_SIZE": int(os.getenv("SHARED_CORPUS_INDEX_MIN_TRAIN_SIZE", "4096")),
+}
+
+# Conversations keeping their index and agent (with its chat memory) between turns, evicted when idle or over budget
+CHAT_SESSIONS = {
+    "ENABLED": os.getenv("CHAT_SESSIONS_ENABLED", "1") == "1",
+    "MAX_SESSIONS": int(os.getenv("CHAT_SESSIONS_MAX_SESSIONS", "100")),
+    "MAX_BYTES": int(os.getenv("CHAT_SESSIONS_MAX_MB", "256")) * 1024 * 1024,
+    "IDLE_TIMEOUT_SECONDS": int(os.getenv("CHAT_SESSIONS_IDLE_TIMEOUT_SECONDS", "1800")),
+    # Follow-ups introducing new topics insert the pages of the new titles into the conversation index
+    "GROW_INDEX": os.getenv("CHAT_SESSIONS_GROW_INDEX", "1") == "1",
+}
+
+# Latency budget of a chat request, enforced across the pipeline stages. Requests without a budget_seconds get
+# DEFAULT_SECONDS (0, the default, for no budget). Clients can ask for any budget up to MAX_SECONDS.
+CHAT_LATENCY_BUDGET = {
+    "DEFAULT_SECONDS": float(os.getenv("CHAT_LATENCY_BUDGET_SECONDS", "0")),
+    "MAX_SECONDS": float(os.getenv("CHAT_LATENCY_BUDGET_MAX_SECONDS", "120")),
+}
+
+# Answer single-hop questions straight from the query engine, keeping the ReAct agent for multi-step questions
+QUERY_ROUTER = {
+    "ENABLED": os.getenv("QUERY_ROUTER_ENABLED", "0") == "1",
+    "MAX_SINGLE_HOP_WORDS": int(os.getenv("QUERY_ROUTER_MAX_SINGLE_HOP_WORDS", "25")),
+}
+
+# In-memory cache answering paraphrases of recent queries (cosine similarity of the query embeddings). Off by default,
+# as it adds a query embedding to every request and its threshold should be tuned to the traffic.
+SEMANTIC_ANSWER_CACHE = {
+    "ENABLED": os.getenv("SEMANTIC_ANSWER_CACHE_ENABLED", "0") == "1",
+    "THRESHOLD": float(os.getenv("SEMANTIC_ANSWER_CACHE_THRESHOLD", "0.92")),
+    "MAX_ENTRIES": int(os.getenv("SEMANTIC_ANSWER_CACHE_MAX_ENTRIES", "1000")),
+    "TTL_SECONDS": int(os.getenv("SEMANTIC_ANSWER_CACHE_TTL_SECONDS", "3600")),
+}
+
+# Normalized query -> Wikipedia titles cache in front of the title extraction LLM call.
+# Set TITLE_CACHE_DJANGO_CACHE to the alias of a Django cache (e.g. Redis or Memcached) to share it between workers.
+TITLE_CACHE = {
+    "ENABLED": os.getenv("TITLE_CACHE_ENABLED", "1") == "1",
+    "MAX_ENTRIES": int(os.getenv("TITLE_CACHE_MAX_ENTRIES", "10000")),
+    "TTL_SECONDS": int(os.getenv("TITLE_CACHE_TTL_SECONDS", "86400")),
+    "DJANGO_CACHE": os.getenv("TITLE_CACHE_DJANGO_CACHE") or None,
+}
+
+# Number of Wikipedia pages resolved and downloaded in parallel for a request
+WIKIPEDIA_FETCH_MAX_WORKERS = int(os.getenv("WIKIPEDIA_FETCH_MAX_WORKERS", "5"))
+
+# Number of streamed queries answered at the same time by a worker process (the next ones wait for a thread)
+CHAT_STREAM_MAX_WORKERS = int(os.getenv("CHAT_STREAM_MAX_WORKERS", "32"))
+
+# Endpoints of the OpenAI and MediaWiki APIs (None for the real ones), e.g. the stand-in servers of run_stub_servers
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE") or None
+WIKIPEDIA_API_URL = os.getenv("WIKIPEDIA_API_URL") or None
+
+# The LLM and embedding models are built on first use. Serving workers can build them at startup instead, so the
+# first request does not wait for them.
+LLM_WARMUP = os.getenv("LLM_WARMUP", "0") == "1"
+
+# Keep-alive connections shared by the requests of the process, one pool per upstream (OpenAI and Wikipedia). HTTP/2
+# is negotiated when the h2 package is installed.
+HTTP_POOLS = {
+    "ENABLED": os.getenv("HTTP_POOLS_ENABLED", "1") == "1",
+    "MAX_CONNECTIONS": int(os.getenv("HTTP_POOLS_MAX_CONNECTIONS", "20")),
+    "MAX_KEEPALIVE_CONNECTIONS": int(os.getenv("HTTP_POOLS_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    "KEEPALIVE_EXPIRY": float(os.getenv("HTTP_POOLS_KEEPALIVE_EXPIRY", "30")),
+    "HTTP2": os.getenv("HTTP_POOLS_HTTP2", "1") == "1",
+}
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,  # Keep Django's default loggers
@@ -156,6 +278,3 @@ LOGGING = {
         },
     },
 }
-
-# Initialize LLM configuration on startup
-LLMConfig.initialize()
@@ -0,0 +1,180 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from llama_index.core import StorageContext, VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import TextNode
+
+from api.cache.chat_session_store import ChatSession, ChatSessionStore
+from api.vector_stores.numpy_vector_store import NumpyVectorStore
+
+
+def _session(size_bytes: int = 0) -> ChatSession:
+    return ChatSession(index=MagicMock(), agent_service=MagicMock(), titles=["Paris"], size_bytes=size_bytes)
+
+
+def test_get_returns_stored_session():
+    # Arrange
+    store = ChatSessionStore()
+    session = _session()
+    store.put("conversation-1", session)
+
+    # Act
+    result = store.get("conversation-1")
+
+    # Assert
+    assert result is session
+    assert store.get("conversation-2") is None
+    assert store.stats() == {"hits": 1, "misses": 1, "evictions": 0, "sessions": 1, "bytes": 0}
+
+
+def test_put_evicts_least_recently_used_session_over_max_sessions():
+    # Arrange
+    store = ChatSessionStore(max_sessions=2)
+    store.put("first", _session())
+    store.put("second", _session())
+    store.get("first")
+
+    # Act
+    store.put("third", _session())
+
+    # Assert
+    assert store.get("second") is None
+    assert store.get("first") is not None
+    assert store.get("third") is not None
+    assert store.stats()["evictions"] == 1
+
+
+def test_put_evicts_sessions_over_memory_budget():
+    # Arrange
+    store = ChatSessionStore(max_bytes=1000)
+    store.put("first", _session(size_bytes=600))
+
+    # Act
+    store.put("second", _session(size_bytes=600))
+
+    # Assert
+    assert store.get("first") is None
+    assert store.stats()["bytes"] == 600
+
+
+def test_put_keeps_single_session_over_memory_budget():
+    # Arrange
+    store = ChatSessionStore(max_bytes=100)
+
+    # Act
+    store.put("large", _session(size_bytes=600))
+
+    # Assert
+    assert store.get("large") is not None
+
+
+def test_resize_evicts_other_sessions_over_memory_budget():
+    # Arrange
+    store = ChatSessionStore(max_bytes=1000)
+    store.put("first", _session(size_bytes=400))
+    store.put("second", _session(size_bytes=400))
+
+    # Act
+    store.resize("second", 900)
+
+    # Assert
+    assert store.get("first") is None
+    assert store.get("second").size_bytes == 900
+    assert store.stats()["bytes"] == 900
+
+
+def test_get_drops_idle_sessions():
+    # Arrange
+    store = ChatSessionStore(idle_timeout_seconds=60)
+    with patch("api.cache.chat_session_store.time.monotonic", return_value=1000.0):
+        store.put("conversation-1", _session(size_bytes=100))
+
+    # Act
+    with patch("api.cache.chat_session_store.time.monotonic", return_value=1061.0):
+        result = store.get("conversation-1")
+
+    # Assert
+    assert result is None
+    assert store.stats()["bytes"] == 0
+    assert store.stats()["evictions"] == 1
+
+
+def test_estimate_bytes_counts_texts_and_embeddings():
+    # Arrange
+    nodes = [TextNode(text="a" * 100, embedding=[0.1] * 8), TextNode(text="b" * 50, embedding=[0.2] * 8)]
+    vector_store = NumpyVectorStore(initial_capacity=2)
+    index = VectorStoreIndex(
+        nodes,
+        storage_context=StorageContext.from_defaults(vector_store=vector_store),
+        embed_model=MockEmbedding(embed_dim=8),
+    )
+
+    # Act
+    result = ChatSessionStore.estimate_bytes(index)
+
+    # Assert
+    assert result == 150 + vector_store.nbytes
+
+
+def test_get_instance_returns_none_when_disabled(settings):
+    # Arrange
+    settings.CHAT_SESSIONS = {**settings.CHAT_SESSIONS, "ENABLED": False}
+
+    # Act
+    result = ChatSessionStore.get_instance()
+
+    # Assert
+    assert result is None
+
+
+def test_alock_cancelled_wait_does_not_take_lock():
+    # Arrange
+    session = _session()
+
+    async def cancel_waiting_turn():
+        session.lock.acquire()
+        waiting_turn = asyncio.create_task(session.alock().__aenter__())
+        await asyncio.sleep(0.02)
+        waiting_turn.cancel()
+        try:
+            await waiting_turn
+        except asyncio.CancelledError:
+            pass
+
+        # The lock is still held by the running turn only
+        held_after_cancel = session.lock.locked()
+        session.lock.release()
+
+        async with session.alock():
+            held_by_next_turn = session.lock.locked()
+        return held_after_cancel, held_by_next_turn
+
+    # Act
+    held_after_cancel, held_by_next_turn = asyncio.run(asyncio.wait_for(cancel_waiting_turn(), 5))
+
+    # Assert
+    assert held_after_cancel is True
+    assert held_by_next_turn is True
+    assert session.lock.locked() is False
+
+
+def test_alock_serializes_turns():
+    # Arrange
+    session = _session()
+    order = []
+
+    async def turn(name):
+        async with session.alock():
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    async def run_turns():
+        await asyncio.gather(turn("first"), turn("second"))
+
+    # Act
+    asyncio.run(run_turns())
+
+    # Assert
+    assert order == ["first start", "first end", "second start", "second end"]
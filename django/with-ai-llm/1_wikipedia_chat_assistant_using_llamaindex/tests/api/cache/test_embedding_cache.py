@@ -0,0 +1,77 @@
+import pytest
+
+from api.cache.embedding_cache import EmbeddingCache
+
+
+def test_get_many_returns_only_cached_texts(tmp_path):
+    # Arrange
+    cache = EmbeddingCache(path=tmp_path / "embeddings.sqlite3")
+    cache.set_many("model-a", {"Paris": [0.5, 0.25]})
+
+    # Act
+    result = cache.get_many("model-a", ["Paris", "France"])
+
+    # Assert
+    assert result == {"Paris": [0.5, 0.25]}
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "saved_calls": 1}
+
+
+def test_saved_calls_count_every_text_served_from_cache(tmp_path):
+    # Arrange
+    cache = EmbeddingCache(path=tmp_path / "embeddings.sqlite3")
+    cache.set_many("model-a", {"Paris": [0.5, 0.25]})
+
+    # Act
+    cache.get_many("model-a", ["Paris", "France", "Paris"])
+
+    # Assert
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "saved_calls": 2}
+
+
+def test_embeddings_are_keyed_by_model(tmp_path):
+    # Arrange
+    cache = EmbeddingCache(path=tmp_path / "embeddings.sqlite3")
+    cache.set_many("model-a", {"Paris": [0.5, 0.25]})
+
+    # Act
+    result = cache.get_many("model-b", ["Paris"])
+
+    # Assert
+    assert result == {}
+
+
+def test_embeddings_are_stored_as_float32(tmp_path):
+    # Arrange
+    cache = EmbeddingCache(path=tmp_path / "embeddings.sqlite3")
+    cache.set_many("model-a", {"Paris": [0.1, 0.2]})
+
+    # Act
+    result = cache.get_many("model-a", ["Paris"])
+
+    # Assert
+    assert result["Paris"] == pytest.approx([0.1, 0.2], rel=1e-6)
+
+
+def test_cache_persists_on_disk(tmp_path):
+    # Arrange
+    path = tmp_path / "embeddings.sqlite3"
+    EmbeddingCache(path=path).set_many("model-a", {"Paris": [1.0]})
+
+    # Act
+    result = EmbeddingCache(path=path).get_many("model-a", ["Paris"])
+
+    # Assert
+    assert result == {"Paris": [1.0]}
+
+
+def test_clear_resets_cache(tmp_path):
+    # Arrange
+    cache = EmbeddingCache(path=tmp_path / "embeddings.sqlite3")
+    cache.set_many("model-a", {"Paris": [1.0]})
+    cache.get_many("model-a", ["Paris"])
+
+    # Act
+    cache.clear()
+
+    # Assert
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0, "saved_calls": 0}
@@ -0,0 +1,132 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from api.cache.semantic_answer_cache import CachedAnswer, SemanticAnswerCache
+
+
+def test_get_returns_answer_of_similar_query():
+    # Arrange
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.set([1.0, 0.0, 0.0], CachedAnswer(query="capital of France?", answer="Paris.", titles=["France"], latency_seconds=4.0))
+
+    # Act
+    result = cache.get([0.95, 0.1, 0.0])
+
+    # Assert
+    assert result.answer == "Paris."
+    assert result.titles == ["France"]
+    assert result.similarity == pytest.approx(0.994, abs=1e-3)
+    assert cache.stats()["saved_seconds"] == 4.0
+
+
+def test_get_misses_below_threshold():
+    # Arrange
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.set([1.0, 0.0], CachedAnswer(query="capital of France?", answer="Paris."))
+
+    # Act
+    result = cache.get([0.5, 0.5])
+
+    # Assert
+    assert result is None
+    assert cache.stats() == {"hits": 0, "misses": 1, "size": 1, "hit_ratio": 0.0, "saved_seconds": 0.0}
+
+
+def test_get_misses_query_about_another_entity():
+    # Arrange
+    cache = SemanticAnswerCache(threshold=0.92)
+    cache.set([1.0, 0.0], CachedAnswer(query="What is the capital of Austria?", answer="Vienna."))
+
+    # Act
+    result = cache.get([0.99, 0.05], "What is the capital of Australia?")
+
+    # Assert
+    assert result is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_get_returns_answer_of_paraphrase_naming_same_entities():
+    # Arrange
+    cache = SemanticAnswerCache(threshold=0.92)
+    cache.set([0.0, 1.0], CachedAnswer(query="What is the capital of Australia?", answer="Canberra."))
+    cache.set([1.0, 0.0], CachedAnswer(query="What is the capital of Austria?", answer="Vienna."))
+
+    # Act
+    result = cache.get([0.99, 0.05], "Capital city of Austria?")
+
+    # Assert
+    assert result.answer == "Vienna."
+
+
+def test_entities_are_capitalized_words_and_numbers():
+    # Act
+    result = SemanticAnswerCache.entities("Who won the 1998 World Cup in France?")
+
+    # Assert
+    assert result == {"1998", "world", "cup", "france"}
+
+
+def test_same_entities_ignores_capitalization_of_first_word():
+    # Act & Assert
+    assert SemanticAnswerCache.same_entities("France capital?", "What is the capital of France?")
+    assert not SemanticAnswerCache.same_entities("Austria capital?", "What is the capital of Australia?")
+
+
+def test_get_misses_on_empty_cache():
+    # Arrange
+    cache = SemanticAnswerCache()
+
+    # Act & Assert
+    assert cache.get([1.0, 0.0]) is None
+
+
+def test_expired_answers_are_not_returned():
+    # Arrange
+    cache = SemanticAnswerCache(ttl_seconds=10)
+    cache.set([1.0, 0.0], CachedAnswer(query="capital of France?", answer="Paris."))
+
+    # Act
+    with patch("api.cache.semantic_answer_cache.time.time", return_value=time.time() + 11):
+        result = cache.get([1.0, 0.0])
+
+    # Assert
+    assert result is None
+
+
+def test_least_recently_used_answer_is_evicted():
+    # Arrange
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.set([1.0, 0.0, 0.0], CachedAnswer(query="a", answer="A"))
+    cache.set([0.0, 1.0, 0.0], CachedAnswer(query="b", answer="B"))
+    cache.get([1.0, 0.0, 0.0])
+
+    # Act
+    cache.set([0.0, 0.0, 1.0], CachedAnswer(query="c", answer="C"))
+
+    # Assert
+    assert cache.get([1.0, 0.0, 0.0]).answer == "A"
+    assert cache.get([0.0, 1.0, 0.0]) is None
+    assert cache.get([0.0, 0.0, 1.0]).answer == "C"
+
+
+def test_new_embedding_dimension_resets_the_cache():
+    # Arrange
+    cache = SemanticAnswerCache()
+    cache.set([1.0, 0.0], CachedAnswer(query="a", answer="A"))
+
+    # Act
+    cache.set([1.0, 0.0, 0.0], CachedAnswer(query="b", answer="B"))
+
+    # Assert
+    assert cache.get([1.0, 0.0]) is None
+    assert cache.stats()["size"] == 1
+
+
+def test_get_instance_returns_none_when_disabled(settings):
+    # Arrange
+    settings.SEMANTIC_ANSWER_CACHE = {**settings.SEMANTIC_ANSWER_CACHE, "ENABLED": False}
+
+    # Act & Assert
+    assert SemanticAnswerCache.get_instance() is None
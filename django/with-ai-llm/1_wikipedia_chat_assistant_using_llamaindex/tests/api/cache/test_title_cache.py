@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+from api.cache.title_cache import TitleCache
+
+
+def test_normalize_folds_case_whitespace_and_final_punctuation():
+    # Act
+    result = TitleCache.normalize("  What is   the CAPITAL of France?! ")
+
+    # Assert
+    assert result == "what is the capital of france"
+
+
+def test_normalize_keeps_symbols_within_the_query():
+    # Act
+    result = [TitleCache.normalize(q) for q in ("What is C++?", "What is C#?", "What is C?")]
+
+    # Assert
+    assert result == ["what is c++", "what is c#", "what is c"]
+
+
+def test_get_returns_titles_of_equivalent_query():
+    # Arrange
+    cache = TitleCache()
+    cache.set("What is the capital of France?", ["Paris", "France"])
+
+    # Act
+    result = cache.get("what is the capital of france")
+
+    # Assert
+    assert result == ["Paris", "France"]
+    assert cache.stats() == {"hits": 1, "misses": 0, "size": 1}
+
+
+def test_get_misses_expired_titles():
+    # Arrange
+    cache = TitleCache(ttl_seconds=10)
+    with patch("api.cache.title_cache.time.time", return_value=1000.0):
+        cache.set("capital of France", ["Paris"])
+
+    # Act
+    with patch("api.cache.title_cache.time.time", return_value=1011.0):
+        result = cache.get("capital of France")
+
+    # Assert
+    assert result is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_set_evicts_least_recently_used_query():
+    # Arrange
+    cache = TitleCache(max_entries=2)
+    cache.set("first", ["A"])
+    cache.set("second", ["B"])
+    cache.get("first")
+
+    # Act
+    cache.set("third", ["C"])
+
+    # Assert
+    assert cache.get("second") is None
+    assert cache.get("first") == ["A"]
+    assert cache.get("third") == ["C"]
+
+
+def test_get_reads_titles_shared_by_other_workers(settings):
+    # Arrange
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "titles": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "titles"},
+    }
+    TitleCache(django_cache="titles").set("Capital of France?", ["Paris"])
+    other_worker = TitleCache(django_cache="titles")
+
+    # Act
+    result = other_worker.get("capital of france")
+
+    # Assert
+    assert result == ["Paris"]
+    assert other_worker.stats() == {"hits": 1, "misses": 0, "size": 1}
+
+
+def test_get_instance_returns_none_when_disabled(settings):
+    # Arrange
+    settings.TITLE_CACHE = {**settings.TITLE_CACHE, "ENABLED": False}
+
+    # Act
+    result = TitleCache.get_instance()
+
+    # Assert
+    assert result is None
@@ -0,0 +1,116 @@
+import os
+
+import pytest
+from llama_index.core.schema import TextNode
+
+from api.cache.vector_shard_store import VectorShardStore
+
+
+def test_load_returns_none_for_missing_shard(tmp_path):
+    # Arrange
+    store = VectorShardStore(directory=tmp_path)
+
+    # Act
+    result = store.load("Paris", "rev1", "model-150-40")
+
+    # Assert
+    assert result is None
+    assert store.misses == 1
+
+
+def test_save_then_load_returns_nodes_with_embeddings(tmp_path):
+    # Arrange
+    store = VectorShardStore(directory=tmp_path)
+    nodes = [
+        TextNode(id_="n1", text="Paris is the capital of France.", metadata={"title": "Paris"}, embedding=[0.5, 0.25]),
+        TextNode(id_="n2", text="It is on the Seine.", metadata={"title": "Paris"}, embedding=[0.125, 1.0]),
+    ]
+
+    # Act
+    store.save("Paris", "rev1", "model-150-40", nodes)
+    result = store.load("Paris", "rev1", "model-150-40")
+
+    # Assert
+    assert [n.node_id for n in result] == ["n1", "n2"]
+    assert [n.text for n in result] == ["Paris is the capital of France.", "It is on the Seine."]
+    assert result[0].metadata == {"title": "Paris"}
+    assert result[0].embedding == pytest.approx([0.5, 0.25])
+    assert result[1].embedding == pytest.approx([0.125, 1.0])
+    assert store.hits == 1
+
+
+def test_shards_are_keyed_by_revision_and_namespace(tmp_path):
+    # Arrange
+    store = VectorShardStore(directory=tmp_path)
+    store.save("Paris", "rev1", "model-150-40", [TextNode(text="Paris", embedding=[1.0])])
+
+    # Act & Assert
+    assert store.load("Paris", "rev2", "model-150-40") is None
+    assert store.load("Paris", "rev1", "model-512-20") is None
+
+
+def test_revision_depends_on_content():
+    # Act & Assert
+    assert VectorShardStore.revision("Paris") == VectorShardStore.revision("Paris")
+    assert VectorShardStore.revision("Paris") != VectorShardStore.revision("Paris, France")
+
+
+def test_shard_saved_without_embeddings_loads_nodes_without_embeddings(tmp_path):
+    # Arrange
+    store = VectorShardStore(directory=tmp_path)
+    store.save("Paris", "rev1", "model-150-40", [TextNode(id_="n1", text="Paris")])
+
+    # Act
+    result = store.load("Paris", "rev1", "model-150-40")
+
+    # Assert
+    assert [n.node_id for n in result] == ["n1"]
+    assert result[0].embedding is None
+
+
+def test_save_removes_older_revisions(tmp_path):
+    # Arrange
+    store = VectorShardStore(directory=tmp_path)
+    store.save("Paris", "rev1", "model-150-40", [TextNode(text="Paris", embedding=[1.0])])
+
+    # Act
+    store.save("Paris", "rev2", "model-150-40", [TextNode(text="Paris, France", embedding=[1.0])])
+
+    # Assert
+    assert store.load("Paris", "rev1", "model-150-40") is None
+    assert [n.text for n in store.load("Paris", "rev2", "model-150-40")] == ["Paris, France"]
+    assert len(list(tmp_path.glob("*/*/*.npz"))) == 1
+
+
+def test_save_evicts_least_recently_used_shards(tmp_path):
+    # Arrange
+    store = VectorShardStore(directory=tmp_path, max_entries=2)
+    store.save("Paris", "rev1", "model-150-40", [TextNode(text="Paris", embedding=[1.0])])
+    store.save("Lyon", "rev1", "model-150-40", [TextNode(text="Lyon", embedding=[1.0])])
+    # Make Paris the most recently used shard
+    os.utime(store._path("Lyon", "rev1", "model-150-40"), (0, 0))
+    store.load("Paris", "rev1", "model-150-40")
+
+    # Act
+    store.save("Nice", "rev1", "model-150-40", [TextNode(text="Nice", embedding=[1.0])])
+
+    # Assert
+    assert store.load("Lyon", "rev1", "model-150-40") is None
+    assert store.load("Paris", "rev1", "model-150-40") is not None
+    assert store.load("Nice", "rev1", "model-150-40") is not None
+
+
+def test_pinned_shards_are_not_evicted(tmp_path):
+    # Arrange
+    store = VectorShardStore(directory=tmp_path, max_entries=1)
+    store.save("Paris", "rev1", "model-150-40", [TextNode(text="Paris", embedding=[1.0])], pinned=True)
+    os.utime(store._path("Paris", "rev1", "model-150-40"), (0, 0))
+
+    # Act
+    store.save("Lyon", "rev1", "model-150-40", [TextNode(text="Lyon", embedding=[1.0])])
+    store.save("Nice", "rev1", "model-150-40", [TextNode(text="Nice", embedding=[1.0])])
+
+    # Assert
+    assert store.load("Paris", "rev1", "model-150-40") is not None
+    assert store.load("Lyon", "rev1", "model-150-40") is None
+    assert store.load("Nice", "rev1", "model-150-40") is not None
@@ -0,0 +1,159 @@
+import time
+from unittest.mock import patch
+
+from llama_index.core.schema import Document
+
+from api.cache.wikipedia_page_cache import WikipediaPageCache
+
+
+def test_get_returns_none_on_miss(tmp_path):
+    # Arrange
+    cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3")
+
+    # Act
+    result = cache.get("Paris")
+
+    # Assert
+    assert result is None
+    assert cache.stats() == {"hits": 0, "misses": 1, "size": 0}
+
+
+def test_set_then_get_returns_document(tmp_path):
+    # Arrange
+    cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3")
+    document = Document(id_="22989", text="Paris is the capital of France.", metadata={"title": "Paris"})
+
+    # Act
+    cache.set("Paris", document)
+    result = cache.get("Paris")
+
+    # Assert
+    assert result.doc_id == "22989"
+    assert result.text == "Paris is the capital of France."
+    assert result.metadata == {"title": "Paris"}
+    assert cache.stats() == {"hits": 1, "misses": 0, "size": 1}
+
+
+def test_cache_persists_on_disk(tmp_path):
+    # Arrange
+    path = tmp_path / "pages.sqlite3"
+    WikipediaPageCache(path=path).set("Paris", Document(text="Paris"))
+
+    # Act
+    result = WikipediaPageCache(path=path).get("Paris")
+
+    # Assert
+    assert result.text == "Paris"
+
+
+def test_expired_pages_are_misses(tmp_path):
+    # Arrange
+    cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3", ttl_seconds=60)
+    with patch("api.cache.wikipedia_page_cache.time.time", return_value=1000.0):
+        cache.set("Paris", Document(text="Paris"))
+
+    # Act
+    with patch("api.cache.wikipedia_page_cache.time.time", return_value=1061.0):
+        result = cache.get("Paris")
+
+    # Assert
+    assert result is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_page_is_evicted(tmp_path):
+    # Arrange
+    cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3", max_entries=2)
+    cache.stats()  # Open the connection before freezing the clock
+    now = time.time()
+    with patch("api.cache.wikipedia_page_cache.time.time", side_effect=[now, now + 1, now + 2, now + 3]):
+        cache.set("Paris", Document(text="Paris"))
+        cache.set("France", Document(text="France"))
+        cache.get("Paris")  # Paris is now more recently used than France
+
+        # Act
+        cache.set("Lyon", Document(text="Lyon"))
+
+    # Assert
+    assert set(cache.get_many(["Paris", "France", "Lyon"])) == {"Paris", "Lyon"}
+
+
+def test_clear_resets_cache(tmp_path):
+    # Arrange
+    cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3")
+    cache.set("Paris", Document(text="Paris"))
+    cache.get("Paris")
+
+    # Act
+    cache.clear()
+
+    # Assert
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0}
+
+
+def test_get_instance_returns_none_when_disabled(settings):
+    # Arrange
+    settings.WIKIPEDIA_PAGE_CACHE = {**settings.WIKIPEDIA_PAGE_CACHE, "ENABLED": False}
+
+    # Act & Assert
+    assert WikipediaPageCache.get_instance() is None
+
+
+def test_pinned_pages_never_expire_nor_get_evicted(tmp_path):
+    # Arrange
+    cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3", max_entries=1, ttl_seconds=60)
+    cache.set("Paris", Document(text="Paris"), pinned=True)
+    cache.set("France", Document(text="France"))
+    cache.set("Lyon", Document(text="Lyon"))
+
+    # Act
+    with patch("api.cache.wikipedia_page_cache.time.time", return_value=time.time() + 3600):
+        result = cache.get_many(["Paris", "France", "Lyon"])
+
+    # Assert
+    assert set(result) == {"Paris"}
+
+
+def test_reads_do_not_write_until_flush(tmp_path):
+    # Arrange
+    cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3", flush_seconds=60)
+    cache.set("Paris", Document(text="Paris"))
+    changes = cache._connection.total_changes
+
+    # Act
+    cache.get("Paris")
+    cache.get_many(["Paris", "France"])
+
+    # Assert
+    assert cache._connection.total_changes == changes
+    assert cache.stats()["hits"] == 2
+
+
+def test_reads_flush_access_times_and_expired_pages_periodically(tmp_path):
+    # Arrange
+    cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3", ttl_seconds=60, flush_seconds=30)
+    now = time.time()
+    with patch("api.cache.wikipedia_page_cache.time.time", return_value=now):
+        cache.set("Paris", Document(text="Paris"))
+    with patch("api.cache.wikipedia_page_cache.time.time", return_value=now + 50):
+        cache.set("France", Document(text="France"))
+
+    # Act
+    with patch("api.cache.wikipedia_page_cache.time.time", return_value=now + 90):
+        cache.get("France")
+
+    # Assert
+    rows = cache._connection.execute("SELECT title, accessed_at FROM pages").fetchall()
+    assert rows == [("France", now + 90)]
+
+
+def test_resolve_returns_remembered_title(tmp_path):
+    # Arrange
+    cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3", ttl_seconds=60)
+    cache.set_alias("paris", "Paris")
+
+    # Act & Assert
+    assert cache.resolve("paris") == "Paris"
+    assert cache.resolve("lyon") is None
+    with patch("api.cache.wikipedia_page_cache.time.time", return_value=time.time() + 61):
+        assert cache.resolve("paris") is None
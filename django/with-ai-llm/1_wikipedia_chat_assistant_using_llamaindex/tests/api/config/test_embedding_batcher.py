@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from api.config.embedding_batcher import EmbeddingBatcher
+
+
+class _RecordingEmbed:
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        if self.error:
+            raise self.error
+        return [[float(len(t))] for t in texts]
+
+
+def test_embed_gathers_concurrent_callers_into_one_batch():
+    # Arrange
+    embed = _RecordingEmbed()
+    batcher = EmbeddingBatcher(embed, max_batch_size=10, window_seconds=0.2)
+    results = {}
+
+    def call(text):
+        results[text] = batcher.embed([text])
+
+    threads = [threading.Thread(target=call, args=(text,)) for text in ["a", "bb", "ccc"]]
+
+    # Act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert results == {"a": [[1.0]], "bb": [[2.0]], "ccc": [[3.0]]}
+    assert len(embed.batches) == 1
+    assert sorted(embed.batches[0]) == ["a", "bb", "ccc"]
+    batcher.close()
+
+
+def test_embed_sends_full_batch_without_waiting_for_window():
+    # Arrange
+    embed = _RecordingEmbed()
+    batcher = EmbeddingBatcher(embed, max_batch_size=2, window_seconds=10)
+    start = time.monotonic()
+
+    # Act
+    result = batcher.embed(["a", "bb"])
+
+    # Assert
+    assert result == [[1.0], [2.0]]
+    assert time.monotonic() - start < 5
+    batcher.close()
+
+
+def test_embed_splits_texts_over_batches_and_keeps_their_order():
+    # Arrange
+    embed = _RecordingEmbed()
+    batcher = EmbeddingBatcher(embed, max_batch_size=2, window_seconds=0.01)
+
+    # Act
+    result = batcher.embed(["a", "bb", "ccc"])
+
+    # Assert
+    assert result == [[1.0], [2.0], [3.0]]
+    assert [len(b) for b in embed.batches] == [2, 1]
+    batcher.close()
+
+
+def test_embed_sends_duplicate_texts_once():
+    # Arrange
+    embed = _RecordingEmbed()
+    batcher = EmbeddingBatcher(embed, max_batch_size=10, window_seconds=0.01)
+
+    # Act
+    result = batcher.embed(["query", "query"])
+
+    # Assert
+    assert result == [[5.0], [5.0]]
+    assert embed.batches == [["query"]]
+    assert batcher.stats() == {"batches": 1, "texts": 1, "deduplicated": 1}
+    batcher.close()
+
+
+def test_embed_raises_error_of_the_batch():
+    # Arrange
+    batcher = EmbeddingBatcher(_RecordingEmbed(error=ValueError("rate limited")), window_seconds=0.01)
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="rate limited"):
+        batcher.embed(["a"])
+    batcher.close()
+
+
+def test_aembed_awaits_embeddings_without_blocking_event_loop():
+    # Arrange
+    embed = _RecordingEmbed()
+    batcher = EmbeddingBatcher(embed, max_batch_size=10, window_seconds=0.05)
+
+    async def embed_concurrently():
+        return await asyncio.gather(batcher.aembed(["a"]), batcher.aembed(["bb"]))
+
+    # Act
+    result = asyncio.run(embed_concurrently())
+
+    # Assert
+    assert result == [[[1.0]], [[2.0]]]
+    assert len(embed.batches) == 1
+    batcher.close()
+
+
+def test_submit_rejects_texts_once_closed():
+    # Arrange
+    batcher = EmbeddingBatcher(_RecordingEmbed())
+    batcher.close()
+
+    # Act & Assert
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit(["a"])
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from api.config.http_clients import HTTPClientPool
+from api.stubs.wikipedia_stub_server import WikipediaStubServer
+
+PAGES = [{"id": "1", "title": "Paris", "text": "Paris is the capital of France."}]
+
+
+@pytest.fixture
+def server():
+    with WikipediaStubServer(pages=PAGES) as server:
+        yield server
+
+
+@pytest.fixture
+def pool():
+    pool = HTTPClientPool("wikipedia", max_connections=4)
+    yield pool
+    pool.close()
+
+
+def _params(title):
+    return {"action": "query", "format": "json", "list": "search", "srsearch": title}
+
+
+def test_client_reuses_its_connection(server, pool):
+    # Act
+    responses = [pool.client.get(server.api_url, params=_params("Paris")) for _ in range(5)]
+
+    # Assert
+    assert all(r.status_code == 200 for r in responses)
+    assert pool.stats() == {"requests": 5, "connections": 1}
+
+
+def test_async_client_is_shared_within_an_event_loop(server, pool):
+    # Arrange
+    async def fetch():
+        client = pool.async_client()
+        for _ in range(3):
+            await client.get(server.api_url, params=_params("Paris"))
+        return client
+
+    # Act
+    first_loop_client = asyncio.run(fetch())
+    second_loop_client = asyncio.run(fetch())
+
+    # Assert
+    assert first_loop_client is not second_loop_client
+    assert pool.stats() == {"requests": 6, "connections": 2}
+
+
+def test_connections_are_capped_by_pool_size(server, pool):
+    # Arrange
+    async def fetch():
+        client = pool.async_client()
+        await asyncio.gather(*(client.get(server.api_url, params=_params("Paris")) for _ in range(12)))
+
+    # Act
+    asyncio.run(fetch())
+
+    # Assert
+    assert pool.stats()["requests"] == 12
+    assert pool.stats()["connections"] <= 4
+
+
+def test_http2_needs_h2_package(monkeypatch):
+    # Arrange
+    monkeypatch.setattr("api.config.http_clients.importlib.util.find_spec", lambda name: None)
+
+    # Act
+    pool = HTTPClientPool("openai", http2=True)
+
+    # Assert
+    assert pool.http2 is False
+
+
+def test_get_instance_shares_one_pool_per_upstream(settings, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(HTTPClientPool, "_instances", {})
+    settings.HTTP_POOLS = {
+        "ENABLED": True,
+        "MAX_CONNECTIONS": 7,
+        "MAX_KEEPALIVE_CONNECTIONS": 3,
+        "KEEPALIVE_EXPIRY": 10.0,
+        "HTTP2": False,
+    }
+
+    # Act
+    openai_pool = HTTPClientPool.get_instance("openai")
+
+    # Assert
+    assert HTTPClientPool.get_instance("openai") is openai_pool
+    assert HTTPClientPool.get_instance("wikipedia") is not openai_pool
+    assert openai_pool.limits.max_connections == 7
+    assert openai_pool.limits.max_keepalive_connections == 3
+
+
+def test_get_instance_disabled(settings):
+    # Arrange
+    settings.HTTP_POOLS = {"ENABLED": False}
+
+    # Act & Assert
+    assert HTTPClientPool.get_instance("openai") is None
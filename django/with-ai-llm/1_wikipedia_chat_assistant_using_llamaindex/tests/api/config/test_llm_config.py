@@ -1,7 +1,17 @@
+import asyncio
+import subprocess
+import sys
+import threading
+import time
 import unittest
+from pathlib import Path
 from unittest.mock import patch, MagicMock, ANY
 
-from api.config.llm_config import LLMConfig
+from django.test import override_settings
+
+from api.config.http_clients import HTTPClientPool
+from api.config.llm_config import BatchingOpenAIEmbedding, DeadlineAwareOpenAI, LLMConfig
+from api.services.deadline import Deadline, DeadlineExceeded
 
 
 class TestLLMConfig(unittest.TestCase):
@@ -51,6 +61,87 @@ class TestLLMConfig(unittest.TestCase):
             LLMConfig._embedding_instance = original_embedding
             LLMConfig._is_llm_initialized = original_initialized
 
+    def test_initialize_with_api_base(self):
+        # Act
+        LLMConfig.initialize(api_base="http://127.0.0.1:8001/v1")
+
+        # Assert
+        self.assertEqual(LLMConfig._llm.api_base, "http://127.0.0.1:8001/v1")
+        self.assertEqual(LLMConfig._embedding_model.api_base, "http://127.0.0.1:8001/v1")
+
+    def test_initialize_requests_usage_of_streamed_completions(self):
+        # Act
+        LLMConfig.initialize()
+
+        # Assert
+        self.assertEqual(
+            LLMConfig._llm._get_model_kwargs(stream=True)["stream_options"], {"include_usage": True}
+        )
+        self.assertNotIn("stream_options", LLMConfig._llm._get_model_kwargs())
+
+    def test_initialize_batches_embeddings_when_window_is_set(self):
+        # Act
+        LLMConfig.initialize(embedding_batch_window_ms=5)
+
+        # Assert
+        self.assertIsInstance(LLMConfig._embedding_model, BatchingOpenAIEmbedding)
+        self.assertEqual(LLMConfig._embedding_model.batcher.window_seconds, 0.005)
+        self.assertEqual(LLMConfig._embedding_model.batcher.max_batch_size, 100)
+
+    def test_initialize_embeds_without_batcher_by_default(self):
+        # Act
+        LLMConfig.initialize()
+
+        # Assert
+        self.assertNotIsInstance(LLMConfig._embedding_model, BatchingOpenAIEmbedding)
+
+    def test_initialize_shares_http_pool_between_llm_and_embeddings(self):
+        # Arrange
+        http_pool = HTTPClientPool("openai")
+
+        # Act
+        LLMConfig.initialize(http_pool=http_pool)
+
+        # Assert
+        self.assertIs(LLMConfig._llm._get_client()._client, http_pool.client)
+        self.assertIs(LLMConfig._embedding_model._get_client()._client, http_pool.client)
+
+    def test_async_clients_are_created_per_event_loop(self):
+        # Arrange
+        http_pool = HTTPClientPool("openai")
+        LLMConfig.initialize(http_pool=http_pool)
+
+        async def get_aclients():
+            aclient = LLMConfig._llm._get_aclient()
+            self.assertIs(LLMConfig._llm._get_aclient(), aclient)
+            self.assertIs(aclient._client, http_pool.async_client())
+            self.assertIs(LLMConfig._embedding_model._get_aclient()._client, http_pool.async_client())
+            return aclient
+
+        # Act
+        first_loop_aclient = asyncio.run(get_aclients())
+        second_loop_aclient = asyncio.run(get_aclients())
+
+        # Assert
+        self.assertIsNot(first_loop_aclient, second_loop_aclient)
+        self.assertIsNot(first_loop_aclient._client, second_loop_aclient._client)
+
+    @patch('api.config.llm_config.OpenAIEmbedding._get_text_embeddings')
+    def test_batching_embedding_sends_texts_and_queries_through_batcher(self, mock_get_text_embeddings):
+        # Arrange
+        mock_get_text_embeddings.side_effect = lambda model, texts: [[float(len(t))] for t in texts]
+        embed_model = BatchingOpenAIEmbedding(model="text-embedding-3-small", api_key="sk-test")
+
+        # Act
+        embeddings = embed_model.get_text_embedding_batch(["a", "bb"])
+        query_embedding = embed_model.get_query_embedding("ccc")
+
+        # Assert
+        self.assertEqual(embeddings, [[1.0], [2.0]])
+        self.assertEqual(query_embedding, [3.0])
+        self.assertEqual(embed_model.batcher.stats()["batches"], 2)
+        embed_model.batcher.close()
+
     @patch('api.config.llm_config.LLMConfig.initialize')
     def test_get_llm_initializes_if_needed(self, mock_initialize):
         # Test when already initialized
@@ -88,3 +179,83 @@ class TestLLMConfig(unittest.TestCase):
 
         LLMConfig.get_embedding_model()
         mock_initialize.assert_called_once()
+
+    @override_settings(
+        OPENAI_API_BASE="http://127.0.0.1:8001/v1",
+        HTTP_POOLS={"ENABLED": False},
+    )
+    def test_first_use_initializes_from_django_settings(self):
+        # Act
+        llm = LLMConfig.get_llm()
+
+        # Assert
+        self.assertTrue(LLMConfig._is_llm_initialized)
+        self.assertEqual(llm.api_base, "http://127.0.0.1:8001/v1")
+        self.assertEqual(LLMConfig.get_embedding_model().api_base, "http://127.0.0.1:8001/v1")
+        self.assertNotIsInstance(LLMConfig.get_embedding_model(), BatchingOpenAIEmbedding)
+
+    @patch('api.config.llm_config.LLMConfig.initialize')
+    def test_concurrent_first_use_initializes_once(self, mock_initialize):
+        # Arrange
+        def slow_initialize(**kwargs):
+            time.sleep(0.05)
+            LLMConfig._llm = MagicMock()
+            LLMConfig._is_llm_initialized = True
+
+        mock_initialize.side_effect = slow_initialize
+        threads = [threading.Thread(target=LLMConfig.get_llm) for _ in range(8)]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        mock_initialize.assert_called_once()
+
+    def test_settings_do_not_import_llama_index(self):
+        # Act
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, django; django.setup(); print('llama_index.core' in sys.modules)",
+            ],
+            cwd=Path(__file__).resolve().parents[3],
+            env={"DJANGO_SETTINGS_MODULE": "config.settings", "PATH": ""},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        # Assert
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+class TestDeadlineAwareOpenAI(unittest.TestCase):
+    def setUp(self):
+        self.llm = DeadlineAwareOpenAI(model="gpt-4o", timeout=60, api_key="sk-test")
+
+    def test_model_kwargs_keep_default_timeout_without_deadline(self):
+        model_kwargs = self.llm._get_model_kwargs()
+
+        self.assertNotIn("timeout", model_kwargs)
+
+    def test_model_kwargs_cap_timeout_to_deadline(self):
+        with Deadline(budget_seconds=5).activate():
+            model_kwargs = self.llm._get_model_kwargs()
+
+        self.assertLessEqual(model_kwargs["timeout"], 5)
+        self.assertEqual(model_kwargs["model"], "gpt-4o")
+
+    def test_model_kwargs_raise_once_deadline_is_spent(self):
+        deadline = Deadline(budget_seconds=5)
+        deadline.expires_at = 0
+
+        with deadline.activate(), self.assertRaises(DeadlineExceeded):
+            self.llm._get_model_kwargs()
+
+    def test_client_leaves_retries_to_the_llm_wrapper(self):
+        self.assertEqual(self.llm._get_credential_kwargs()["max_retries"], 0)
+        self.assertEqual(self.llm.max_retries, 3)
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from api.config.warmup import warm_up
+
+
+def test_warm_up_builds_models_and_loads_tokenizer():
+    # Act
+    with patch("api.config.llm_config.LLMConfig.ensure_initialized") as mock_ensure_initialized, \
+            patch("llama_index.core.utils.get_tokenizer") as mock_get_tokenizer:
+        warm_up()
+
+    # Assert
+    mock_ensure_initialized.assert_called_once_with()
+    mock_get_tokenizer.assert_called_once_with()
+
+
+def test_loading_urlconf_does_not_import_llm_or_wikipedia_clients():
+    # Arrange
+    code = (
+        "import sys, django\n"
+        "django.setup()\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns\n"
+        "print([m for m in ('llama_index', 'openai', 'wikipedia', 'httpx') if m in sys.modules])\n"
+    )
+
+    # Act
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parents[3],
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "config.settings"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Assert
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,63 @@
+from llama_index.core.llms import ChatMessage, MockLLM
+
+from api.instrumentation.llm_call_counter import LLMCallCounter
+
+
+def test_track_counts_llm_calls_per_path():
+    # Arrange
+    counter = LLMCallCounter.get_instance()
+    counter.clear()
+    llm = MockLLM()
+
+    # Act
+    with counter.track("agent"):
+        llm.complete("first")
+        llm.complete("second")
+    with counter.track("single_hop"):
+        llm.complete("only")
+
+    # Assert
+    assert counter.stats() == {
+        "agent": {"queries": 1, "llm_calls": 2, "llm_calls_per_query": 2.0},
+        "single_hop": {"queries": 1, "llm_calls": 1, "llm_calls_per_query": 1.0},
+    }
+
+
+def test_track_counts_nested_llm_methods_once():
+    # Arrange
+    counter = LLMCallCounter.get_instance()
+    counter.clear()
+
+    # Act (MockLLM implements chat on top of complete)
+    with counter.track("agent") as tally:
+        MockLLM().chat([ChatMessage(content="question")])
+
+    # Assert
+    assert tally.calls == 1
+
+
+def test_track_ignores_calls_outside_tracked_queries():
+    # Arrange
+    counter = LLMCallCounter.get_instance()
+    counter.clear()
+
+    # Act
+    MockLLM().complete("untracked")
+    with counter.track("cache") as tally:
+        pass
+
+    # Assert
+    assert tally.calls == 0
+    assert counter.stats()["cache"]["llm_calls"] == 0
+
+
+def test_track_records_path_changed_during_query():
+    # Arrange
+    counter = LLMCallCounter()
+
+    # Act
+    with counter.track("agent") as tally:
+        tally.path = "cache"
+
+    # Assert
+    assert list(counter.stats()) == ["cache"]
@@ -0,0 +1,99 @@
+from unittest.mock import MagicMock, patch
+
+from api.cache.embedding_cache import EmbeddingCache
+from api.config.http_clients import HTTPClientPool
+from api.config.llm_config import BatchingOpenAIEmbedding
+from api.instrumentation.llm_call_counter import LLMCallCounter
+from api.instrumentation.prometheus_exporter import render_metrics
+from api.instrumentation.stage_timer import StageTimer
+from api.instrumentation.token_usage_counter import StageUsage, TokenUsageCounter
+
+
+def test_render_metrics_exports_histograms_and_counters(settings):
+    # Arrange
+    settings.TITLE_CACHE = {"ENABLED": False}
+    settings.WIKIPEDIA_PAGE_CACHE = {"ENABLED": False}
+    settings.EMBEDDING_CACHE = {"ENABLED": False}
+    settings.SEMANTIC_ANSWER_CACHE = {"ENABLED": False}
+    settings.CHAT_SESSIONS = {"ENABLED": False}
+    timer = StageTimer.get_instance()
+    timer.clear()
+    counter = LLMCallCounter.get_instance()
+    counter.clear()
+    with timer.track():
+        timer.observe("agent", 2.0)
+    with counter.track("agent") as tally:
+        tally.calls = 3
+    token_usage = TokenUsageCounter.get_instance()
+    token_usage.clear()
+    token_usage._record("agent", None, StageUsage(llm_calls=3, prompt_tokens=900, completion_tokens=60))
+
+    # Act
+    metrics = render_metrics()
+
+    # Assert
+    lines = metrics.splitlines()
+    assert "# TYPE wikipedia_rag_stage_duration_seconds histogram" in lines
+    assert 'wikipedia_rag_stage_duration_seconds_bucket{stage="agent",le="1.0"} 0' in lines
+    assert 'wikipedia_rag_stage_duration_seconds_bucket{stage="agent",le="2.5"} 1' in lines
+    assert 'wikipedia_rag_stage_duration_seconds_bucket{stage="agent",le="+Inf"} 1' in lines
+    assert 'wikipedia_rag_stage_duration_seconds_sum{stage="agent"} 2.0' in lines
+    assert "wikipedia_rag_request_duration_seconds_count 1" in lines
+    assert 'wikipedia_rag_llm_calls_total{path="agent"} 3' in lines
+    assert 'wikipedia_rag_stage_llm_calls_total{stage="agent"} 3' in lines
+    assert 'wikipedia_rag_tokens_total{stage="agent",kind="prompt"} 900' in lines
+    assert 'wikipedia_rag_tokens_total{stage="agent",kind="embedding"} 0' in lines
+    assert not any(line.startswith("wikipedia_rag_cache_hits_total{") for line in lines)
+    assert metrics.endswith("\n")
+
+
+def test_render_metrics_exports_embedding_batches():
+    # Arrange
+    embed_model = MagicMock(spec=BatchingOpenAIEmbedding)
+    embed_model.batcher.stats.return_value = {"batches": 4, "texts": 350, "deduplicated": 2}
+
+    # Act
+    with patch('api.instrumentation.prometheus_exporter.LLMConfig.get_embedding_model', return_value=embed_model):
+        metrics = render_metrics()
+
+    # Assert
+    lines = metrics.splitlines()
+    assert "wikipedia_rag_embedding_batches_total 4" in lines
+    assert "wikipedia_rag_embedding_batch_texts_total 350" in lines
+    assert "wikipedia_rag_embedding_deduplicated_texts_total 2" in lines
+
+
+def test_render_metrics_exports_http_pool_connections():
+    # Arrange
+    http_pool = MagicMock(spec=HTTPClientPool)
+    http_pool.stats.return_value = {"requests": 40, "connections": 3}
+
+    # Act
+    with patch(
+        'api.instrumentation.prometheus_exporter.HTTPClientPool.get_instance',
+        side_effect=lambda name: http_pool if name == "openai" else None,
+    ):
+        metrics = render_metrics()
+
+    # Assert
+    lines = metrics.splitlines()
+    assert 'wikipedia_rag_http_requests_total{upstream="openai"} 40' in lines
+    assert 'wikipedia_rag_http_connections_total{upstream="openai"} 3' in lines
+    assert not any('upstream="wikipedia"' in line for line in lines)
+
+
+def test_render_metrics_exports_embedding_calls_saved_by_cache(settings, tmp_path):
+    # Arrange
+    settings.EMBEDDING_CACHE = {"ENABLED": True, "PATH": tmp_path / "embeddings.sqlite3"}
+    cache = EmbeddingCache(path=tmp_path / "embeddings.sqlite3")
+    cache.set_many("model-a", {"Paris": [0.5, 0.25]})
+    cache.get_many("model-a", ["Paris", "Paris", "France"])
+
+    # Act
+    with patch.object(EmbeddingCache, "_instance", cache):
+        metrics = render_metrics()
+
+    # Assert
+    lines = metrics.splitlines()
+    assert 'wikipedia_rag_cache_hits_total{cache="embedding"} 1' in lines
+    assert "wikipedia_rag_embedding_cache_saved_calls_total 2" in lines
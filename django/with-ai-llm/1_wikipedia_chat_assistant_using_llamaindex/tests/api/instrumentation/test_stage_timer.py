@@ -0,0 +1,97 @@
+import pytest
+from llama_index.core.llms import ChatMessage, MockLLM
+
+from api.instrumentation.stage_timer import LLM_STAGE, DurationHistogram, StageTimer
+
+
+def test_histogram_counts_durations_up_to_each_bound():
+    # Arrange
+    histogram = DurationHistogram(buckets=(0.1, 1.0))
+
+    # Act
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(seconds)
+
+    # Assert
+    assert histogram.cumulative_counts() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(3.65)
+
+
+def test_stage_records_runs_in_histogram_and_tracked_request():
+    # Arrange
+    timer = StageTimer()
+
+    # Act
+    with timer.track() as timings:
+        with timer.stage("title_extraction"):
+            pass
+        with timer.stage("embedding"):
+            pass
+        with timer.stage("embedding"):
+            pass
+    with timer.stage("embedding"):
+        pass
+
+    # Assert
+    assert timings.counts == {"title_extraction": 1, "embedding": 2}
+    assert timer.stats()["embedding"]["count"] == 3
+    assert timer.histograms()[1].count == 1
+
+
+def test_stage_records_failed_runs():
+    # Arrange
+    timer = StageTimer()
+
+    # Act
+    with pytest.raises(ValueError):
+        with timer.stage("wikipedia_fetch"):
+            raise ValueError("Wikipedia is down")
+
+    # Assert
+    assert timer.stats()["wikipedia_fetch"]["count"] == 1
+
+
+def test_server_timing_lists_stages_and_total():
+    # Arrange
+    timer = StageTimer()
+
+    # Act
+    with timer.track() as timings:
+        timer.observe("wikipedia_fetch", 0.25, timings)
+        timer.observe(LLM_STAGE, 0.5, timings)
+        timer.observe(LLM_STAGE, 0.25, timings)
+
+    # Assert
+    header = timings.server_timing()
+    assert header.startswith('wikipedia_fetch;dur=250.0, llm;dur=750.0;desc="2 runs", total;dur=')
+
+
+def test_llm_calls_are_timed_once_per_outermost_call():
+    # Arrange
+    timer = StageTimer.get_instance()
+    timer.clear()
+
+    # Act (MockLLM implements chat on top of complete)
+    with timer.track() as timings:
+        MockLLM().chat([ChatMessage(content="question")])
+        MockLLM().complete("question")
+
+    # Assert
+    assert timings.counts[LLM_STAGE] == 2
+    assert timer.stats()[LLM_STAGE]["count"] == 2
+
+
+def test_streamed_llm_calls_are_timed_until_the_end_of_the_stream():
+    # Arrange
+    timer = StageTimer.get_instance()
+    timer.clear()
+
+    # Act
+    with timer.track() as timings:
+        stream = MockLLM().stream_complete("a streamed answer")
+        assert LLM_STAGE not in timings.counts
+        list(stream)
+
+    # Assert
+    assert timings.counts[LLM_STAGE] == 1
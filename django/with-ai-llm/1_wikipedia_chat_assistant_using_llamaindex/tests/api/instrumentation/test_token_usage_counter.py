@@ -0,0 +1,98 @@
+from llama_index.core import MockEmbedding
+from llama_index.core.base.llms.types import CompletionResponse
+from llama_index.core.llms import ChatMessage, MockLLM
+from llama_index.core.llms.callbacks import llm_completion_callback
+
+from api.instrumentation.stage_timer import NO_STAGE, StageTimer
+from api.instrumentation.token_usage_counter import TokenUsageCounter
+
+
+class _UsageReportingLLM(MockLLM):
+    """Mock LLM whose responses report their token usage like the OpenAI API"""
+
+    @llm_completion_callback()
+    def complete(self, prompt, formatted=False, **kwargs):
+        return CompletionResponse(text="answer", raw={"usage": {"prompt_tokens": 120, "completion_tokens": 8}})
+
+
+def test_track_counts_llm_calls_and_tokens_per_stage():
+    # Arrange
+    counter = TokenUsageCounter.get_instance()
+    counter.clear()
+    timer = StageTimer()
+
+    # Act (MockLLM implements chat on top of complete)
+    with counter.track() as usage:
+        with timer.stage("title_extraction"):
+            _UsageReportingLLM().chat([ChatMessage(content="Which pages answer the question?")])
+        with timer.stage("agent"):
+            _UsageReportingLLM().complete("first")
+            _UsageReportingLLM().complete("second")
+
+    # Assert
+    stages = usage.to_dict()["stages"]
+    assert stages["title_extraction"] == {
+        "llm_calls": 1, "prompt_tokens": 120, "completion_tokens": 8, "embedding_tokens": 0
+    }
+    assert stages["agent"]["llm_calls"] == 2
+    assert stages["agent"]["prompt_tokens"] == 240
+    assert usage.total().llm_calls == 3
+    assert counter.stats()["agent"]["completion_tokens"] == 16
+
+
+def test_track_estimates_tokens_missing_from_the_response():
+    # Arrange
+    counter = TokenUsageCounter.get_instance()
+
+    # Act
+    with counter.track() as usage:
+        MockLLM().complete("how many tokens are in this prompt")
+
+    # Assert
+    total = usage.total()
+    assert total.llm_calls == 1
+    assert total.prompt_tokens == 7
+    assert usage.to_dict()["stages"].keys() == {NO_STAGE}
+
+
+def test_track_counts_streamed_calls_in_the_stage_that_started_them():
+    # Arrange
+    counter = TokenUsageCounter.get_instance()
+    timer = StageTimer()
+
+    # Act
+    with counter.track() as usage:
+        with timer.stage("agent"):
+            stream = MockLLM().stream_complete("stream the answer")
+        list(stream)
+
+    # Assert
+    assert usage.to_dict()["stages"]["agent"]["llm_calls"] == 1
+
+
+def test_track_counts_embedding_tokens():
+    # Arrange
+    counter = TokenUsageCounter.get_instance()
+    timer = StageTimer()
+
+    # Act
+    with counter.track() as usage:
+        with timer.stage("embedding"):
+            MockEmbedding(embed_dim=8).get_text_embedding_batch(["one chunk", "another chunk of text"])
+
+    # Assert
+    stage_usage = usage.to_dict()["stages"]["embedding"]
+    assert stage_usage["llm_calls"] == 0
+    assert stage_usage["embedding_tokens"] == 6
+
+
+def test_calls_outside_tracked_requests_only_count_in_process_totals():
+    # Arrange
+    counter = TokenUsageCounter.get_instance()
+    counter.clear()
+
+    # Act
+    _UsageReportingLLM().complete("untracked")
+
+    # Assert
+    assert counter.stats()[NO_STAGE]["prompt_tokens"] == 120
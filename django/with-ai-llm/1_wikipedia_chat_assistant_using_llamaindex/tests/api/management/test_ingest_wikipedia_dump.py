@@ -0,0 +1,154 @@
+import bz2
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from api.cache.vector_shard_store import VectorShardStore
+from api.cache.wikipedia_page_cache import WikipediaPageCache
+from api.management.commands.ingest_wikipedia_dump import clean_wikitext
+
+XML_DUMP = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/">
+  <siteinfo><sitename>Wikipedia</sitename></siteinfo>
+  <page>
+    <title>Paris</title>
+    <ns>0</ns>
+    <id>1</id>
+    <revision><id>100</id><text>'''Paris''' is the capital of [[France]].{{Infobox city}}
+
+== History ==
+It was founded by the [[Parisii (Gaul)|Parisii]].&lt;ref&gt;Source&lt;/ref&gt;</text></revision>
+  </page>
+  <page>
+    <title>Paris, France</title>
+    <ns>0</ns>
+    <id>2</id>
+    <redirect title="Paris" />
+    <revision><id>200</id><text>#REDIRECT [[Paris]]</text></revision>
+  </page>
+  <page>
+    <title>Talk:Paris</title>
+    <ns>1</ns>
+    <id>3</id>
+    <revision><id>300</id><text>Discussion</text></revision>
+  </page>
+</mediawiki>
+"""
+
+
+@pytest.fixture
+def stores(settings, tmp_path, monkeypatch):
+    settings.WIKIPEDIA_PAGE_CACHE = {**settings.WIKIPEDIA_PAGE_CACHE, "ENABLED": True, "PATH": tmp_path / "pages.sqlite3"}
+    settings.EMBEDDING_CACHE = {**settings.EMBEDDING_CACHE, "ENABLED": False}
+    settings.VECTOR_SHARDS = {**settings.VECTOR_SHARDS, "ENABLED": True, "DIR": tmp_path / "shards"}
+    monkeypatch.setattr(WikipediaPageCache, "_instance", None)
+    monkeypatch.setattr(VectorShardStore, "_instance", None)
+
+    embed_model = MagicMock()
+    embed_model.model_name = "text-embedding-3-small"
+    embed_model.get_text_embedding_batch.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+    with patch(
+        "api.services.vector_indexing_service.LLMConfig.get_embedding_model",
+        return_value=embed_model,
+    ):
+        yield WikipediaPageCache.get_instance(), VectorShardStore.get_instance(), embed_model
+
+
+def _write_jsonl(path, count):
+    with open(path, "w") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": str(i), "title": f"Page {i}", "text": f"Content of page {i}."}) + "\n")
+
+
+def test_ingests_bz2_xml_dump_articles_only(stores, tmp_path):
+    # Arrange
+    page_cache, shard_store, _ = stores
+    dump = tmp_path / "dump.xml.bz2"
+    dump.write_bytes(bz2.compress(XML_DUMP.encode("utf-8")))
+
+    # Act
+    call_command("ingest_wikipedia_dump", str(dump), workers=1)
+
+    # Assert
+    document = page_cache.get("Paris")
+    assert document.doc_id == "1"
+    assert document.text == (
+        "Paris is the capital of France.\n\n== History ==\nIt was founded by the Parisii."
+    )
+    assert page_cache.get("Paris, France") is None
+    assert page_cache.get("Talk:Paris") is None
+
+    nodes = shard_store.load("Paris", shard_store.revision(document.text), "text-embedding-3-small-150-40")
+    assert nodes and all(n.embedding is None for n in nodes)
+
+
+def test_ingests_jsonl_dump_with_embeddings(stores, tmp_path):
+    # Arrange
+    page_cache, shard_store, embed_model = stores
+    dump = tmp_path / "dump.jsonl"
+    _write_jsonl(dump, 3)
+
+    # Act
+    call_command("ingest_wikipedia_dump", str(dump), workers=1, embed=True)
+
+    # Assert
+    document = page_cache.get("Page 2")
+    assert document.text == "Content of page 2."
+    nodes = shard_store.load("Page 2", shard_store.revision(document.text), "text-embedding-3-small-150-40")
+    assert nodes[0].embedding == pytest.approx([1.0, 0.0])
+    embed_model.get_text_embedding_batch.assert_called_once()
+
+
+def test_resumes_from_checkpoint(stores, tmp_path):
+    # Arrange
+    page_cache, _, _ = stores
+    dump = tmp_path / "dump.jsonl"
+    _write_jsonl(dump, 5)
+    call_command("ingest_wikipedia_dump", str(dump), workers=1, batch_size=2, limit=3)
+    page_cache.clear()
+
+    # Act
+    call_command("ingest_wikipedia_dump", str(dump), workers=1, batch_size=2)
+
+    # Assert
+    assert json.loads((tmp_path / "dump.jsonl.checkpoint").read_text()) == {"records": 5}
+    assert page_cache.get("Page 2") is None
+    assert page_cache.get("Page 3") is not None
+    assert page_cache.get("Page 4") is not None
+
+
+def test_parses_and_chunks_in_worker_processes(stores, tmp_path):
+    # Arrange
+    page_cache, _, _ = stores
+    dump = tmp_path / "dump.jsonl"
+    _write_jsonl(dump, 10)
+
+    # Act
+    call_command("ingest_wikipedia_dump", str(dump), workers=2, batch_size=4)
+
+    # Assert
+    assert page_cache.stats()["size"] == 10
+
+
+def test_rejects_unknown_format(stores, tmp_path):
+    # Arrange
+    dump = tmp_path / "dump.txt"
+    dump.write_text("")
+
+    # Act & Assert
+    with pytest.raises(CommandError):
+        call_command("ingest_wikipedia_dump", str(dump))
+
+
+def test_clean_wikitext_strips_markup():
+    # Act
+    text = clean_wikitext(
+        "{{Short description|City}}[[File:Paris.jpg|thumb|The [[Seine]]]]"
+        "'''Paris''' ([[French language|French]]) <!-- note -->is a city.<ref name=\"a\"/>"
+        "[[Category:Cities]]"
+    )
+
+    # Assert
+    assert text == "Paris (French) is a city."
@@ -0,0 +1,36 @@
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from api.management.commands.run_stub_servers import Command
+
+
+def test_prints_endpoints_and_stops_on_interrupt():
+    # Arrange
+    out = StringIO()
+
+    # Act
+    with patch.object(Command, "_wait", side_effect=KeyboardInterrupt):
+        call_command("run_stub_servers", openai_port=0, wikipedia_port=0, stdout=out)
+
+    # Assert
+    output = out.getvalue()
+    assert "Serving 8 pages" in output
+    assert "OPENAI_API_BASE=http://127.0.0.1:" in output
+    assert "/v1" in output
+    assert "/w/api.php" in output
+
+
+def test_missing_corpus(tmp_path):
+    # Act & Assert
+    with pytest.raises(CommandError, match="does not exist"):
+        call_command("run_stub_servers", corpus=tmp_path / "missing.jsonl")
+
+
+def test_invalid_error_rate():
+    # Act & Assert
+    with pytest.raises(CommandError, match="Error rate must be between 0 and 1"):
+        call_command("run_stub_servers", openai_port=0, wikipedia_port=0, openai_error_rate=2.0)
@@ -8,6 +8,34 @@ def test_chat_request_valid():
     req = ChatRequest(query="Test query")
     assert req.query == "Test query"
 
+
 def test_chat_request_invalid():
     with pytest.raises(ValidationError):
-        ChatRequest(query="")
\ No newline at end of file
+        ChatRequest(query="")
+
+
+def test_chat_request_stream_defaults_to_false():
+    assert ChatRequest(query="Test query").stream is False
+    assert ChatRequest(query="Test query", stream=True).stream is True
+
+
+def test_chat_request_budget_defaults_to_server_default():
+    assert ChatRequest(query="Test query").budget_seconds is None
+    assert ChatRequest(query="Test query", budget_seconds=2.5).budget_seconds == 2.5
+
+
+def test_chat_request_invalid_budget():
+    with pytest.raises(ValidationError):
+        ChatRequest(query="Test query", budget_seconds=-1)
+
+
+def test_chat_request_session_id_is_optional():
+    assert ChatRequest(query="Test query").session_id is None
+    assert ChatRequest(query="Test query", session_id="conversation-1").session_id == "conversation-1"
+    with pytest.raises(ValidationError):
+        ChatRequest(query="Test query", session_id="")
+
+
+def test_chat_request_include_usage_defaults_to_false():
+    assert ChatRequest(query="Test query").include_usage is False
+    assert ChatRequest(query="Test query", include_usage=True).include_usage is True
@@ -0,0 +1,61 @@
+from api.retrieval.bm25 import BM25Index, tokenize
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    # Act
+    result = tokenize("What is the Capital of France?")
+
+    # Assert
+    assert result == ["capital", "france"]
+
+
+def test_top_k_ranks_texts_matching_most_query_terms_first():
+    # Arrange
+    index = BM25Index([
+        "France is a country in Western Europe.",
+        "Paris is the capital and largest city of France.",
+        "Berlin is the capital of Germany.",
+    ])
+
+    # Act
+    result = index.top_k("What is the capital of France?", 3)
+
+    # Assert
+    assert result[0][0] == 1
+    assert len(result) == 3
+    assert result[0][1] > result[1][1] >= result[2][1] > 0
+
+
+def test_scores_leave_out_texts_without_query_terms():
+    # Arrange
+    index = BM25Index(["Paris is in France.", "Tokyo is in Japan."])
+
+    # Act
+    result = index.scores("Paris")
+
+    # Assert
+    assert list(result) == [0]
+
+
+def test_add_indexes_texts_after_existing_ones():
+    # Arrange
+    index = BM25Index(["Paris is in France."])
+
+    # Act
+    positions = index.add(["Tokyo is in Japan."])
+
+    # Assert
+    assert positions == [1]
+    assert len(index) == 2
+    assert index.top_k("Tokyo", 1)[0][0] == 1
+
+
+def test_scores_of_empty_index_are_empty():
+    # Arrange
+    index = BM25Index()
+
+    # Act
+    result = index.top_k("Paris", 5)
+
+    # Assert
+    assert result == []
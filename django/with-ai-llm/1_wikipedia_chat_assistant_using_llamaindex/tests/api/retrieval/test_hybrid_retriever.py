@@ -0,0 +1,79 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from llama_index.core import VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import NodeWithScore, TextNode
+
+from api.retrieval.hybrid_retriever import HybridRetriever, get_node_bm25_index
+
+
+def _index():
+    nodes = [
+        TextNode(id_="france", text="France is a country in Western Europe."),
+        TextNode(id_="paris", text="Paris is the capital of France."),
+        TextNode(id_="revolution", text="The French Revolution began in 1789."),
+    ]
+    return VectorStoreIndex(nodes, embed_model=MockEmbedding(embed_dim=4))
+
+
+def _vector_retriever(index, node_ids):
+    retriever = MagicMock()
+    retriever.retrieve.return_value = [
+        NodeWithScore(node=index.docstore.get_node(node_id), score=0.9) for node_id in node_ids
+    ]
+    return retriever
+
+
+def test_retrieve_fuses_dense_and_lexical_ranks():
+    # Arrange
+    index = _index()
+    retriever = HybridRetriever(_vector_retriever(index, ["france", "paris"]), index, similarity_top_k=3)
+
+    # Act
+    results = retriever.retrieve("When did the revolution begin in 1789?")
+
+    # Assert
+    assert [r.node.node_id for r in results] == ["france", "revolution", "paris"]
+    assert results[0].score == results[1].score == 1 / 61
+
+
+def test_retrieve_ranks_nodes_found_by_both_first():
+    # Arrange
+    index = _index()
+    retriever = HybridRetriever(_vector_retriever(index, ["revolution", "paris"]), index, similarity_top_k=1)
+
+    # Act
+    results = retriever.retrieve("capital of France")
+
+    # Assert
+    assert [r.node.node_id for r in results] == ["paris"]
+
+
+def test_aretrieve_fuses_async_dense_results():
+    # Arrange
+    index = _index()
+    vector_retriever = MagicMock()
+    vector_retriever.aretrieve.return_value = asyncio.sleep(0, result=[])
+    retriever = HybridRetriever(vector_retriever, index, similarity_top_k=2)
+
+    # Act
+    results = asyncio.run(retriever.aretrieve("1789"))
+
+    # Assert
+    assert [r.node.node_id for r in results] == ["revolution"]
+
+
+def test_node_bm25_index_indexes_nodes_inserted_later():
+    # Arrange
+    index = _index()
+    node_index = get_node_bm25_index(index)
+    node_index.top_k("Paris", 1)
+
+    # Act
+    index.insert_nodes([TextNode(id_="berlin", text="Berlin is the capital of Germany.")])
+    results = node_index.top_k("Berlin", 1)
+
+    # Assert
+    assert results[0][0] == "berlin"
+    assert get_node_bm25_index(index) is node_index
@@ -0,0 +1,10 @@
+from api.schemas.chat_event import ChatEvent
+
+
+def test_chat_event_to_sse():
+    event = ChatEvent(event="titles", data={"titles": ["Paris"]})
+    assert event.to_sse() == 'event: titles\ndata: {"titles": ["Paris"]}\n\n'
+
+
+def test_chat_event_data_defaults_to_empty():
+    assert ChatEvent(event="done").to_sse() == "event: done\ndata: {}\n\n"
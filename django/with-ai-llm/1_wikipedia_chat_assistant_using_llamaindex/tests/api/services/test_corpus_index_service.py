@@ -0,0 +1,131 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from llama_index.core import Document
+from llama_index.core.schema import TextNode
+
+from api.services.corpus_index_service import CorpusIndexService
+
+
+def _nodes(documents):
+    # One embedded node per document, without any link to it (like the nodes restored from a shard)
+    return [[TextNode(text=d.text, embedding=[float(len(d.text)), 1.0])] for d in documents]
+
+
+def _indexer():
+    indexer = MagicMock()
+    indexer.get_document_nodes.side_effect = _nodes
+    indexer.aget_document_nodes = AsyncMock(side_effect=_nodes)
+    return indexer
+
+
+def test_add_documents_only_indexes_new_pages():
+    # Arrange
+    indexer = _indexer()
+    service = CorpusIndexService(vector_indexer=indexer)
+    paris = Document(text="Paris", metadata={"title": "Paris"})
+    france = Document(text="France", metadata={"title": "France"})
+    service.add_documents([paris])
+
+    # Act
+    index = service.add_documents([paris, france])
+
+    # Assert
+    assert index is service.index
+    assert service.document_ids == {paris.doc_id, france.doc_id}
+    assert service.vector_store.size == 2
+    assert indexer.get_document_nodes.call_args_list[1].args[0] == [france]
+
+
+def test_add_documents_indexes_later_sections_of_an_indexed_page():
+    # Arrange
+    indexer = _indexer()
+    service = CorpusIndexService(vector_indexer=indexer)
+    lead = Document(id_="1#0", text="France is a country.", metadata={"title": "France", "section_index": 0})
+    history = Document(id_="1#1", text="The Revolution began in 1789.",
+                       metadata={"title": "France", "section": "History", "section_index": 1})
+    service.add_documents([lead])
+
+    # Act
+    service.add_documents([lead, history])
+
+    # Assert
+    assert service.document_ids == {"1#0", "1#1"}
+    assert service.vector_store.size == 2
+    assert indexer.get_document_nodes.call_args_list[1].args[0] == [history]
+
+
+def test_add_documents_handles_errors():
+    # Arrange
+    indexer = MagicMock()
+    indexer.get_document_nodes.side_effect = Exception("Embedding error")
+    service = CorpusIndexService(vector_indexer=indexer)
+
+    # Act
+    result = service.add_documents([Document(text="Paris", metadata={"title": "Paris"})])
+
+    # Assert
+    assert result is None
+    assert service.document_ids == set()
+
+
+def test_get_instance_returns_none_when_disabled(settings):
+    # Arrange
+    settings.SHARED_CORPUS_INDEX = {**settings.SHARED_CORPUS_INDEX, "ENABLED": False}
+
+    # Act & Assert
+    assert CorpusIndexService.get_instance(MagicMock()) is None
+
+
+def test_aadd_documents_only_indexes_new_pages():
+    # Arrange
+    indexer = _indexer()
+    service = CorpusIndexService(vector_indexer=indexer)
+    paris = Document(text="Paris", metadata={"title": "Paris"})
+    france = Document(text="France", metadata={"title": "France"})
+    asyncio.run(service.aadd_documents([paris]))
+
+    # Act
+    index = asyncio.run(service.aadd_documents([paris, france]))
+
+    # Assert
+    assert index is service.index
+    assert service.document_ids == {paris.doc_id, france.doc_id}
+    assert service.vector_store.size == 2
+    assert indexer.aget_document_nodes.await_args_list[1].args[0] == [france]
+
+
+def test_add_documents_embeds_without_holding_the_lock():
+    # Arrange
+    indexer = _indexer()
+    service = CorpusIndexService(vector_indexer=indexer)
+    locked_while_embedding = []
+
+    def get_document_nodes(documents):
+        locked_while_embedding.append(service._lock.locked())
+        return _nodes(documents)
+
+    indexer.get_document_nodes.side_effect = get_document_nodes
+
+    # Act
+    service.add_documents([Document(text="Paris", metadata={"title": "Paris"})])
+
+    # Assert
+    assert locked_while_embedding == [False]
+    assert service.vector_store.size == 1
+
+
+def test_aadd_documents_only_marks_documents_with_inserted_nodes():
+    # Arrange
+    indexer = _indexer()
+    indexer.aget_document_nodes = AsyncMock(side_effect=lambda documents: [_nodes(documents[:1])[0], []])
+    service = CorpusIndexService(vector_indexer=indexer)
+    paris = Document(text="Paris", metadata={"title": "Paris"})
+    empty = Document(text="", metadata={"title": "Empty"})
+
+    # Act
+    asyncio.run(service.aadd_documents([paris, empty]))
+
+    # Assert
+    assert service.document_ids == {paris.doc_id}
+    assert service.vector_store.size == 1
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+import pytest
+
+from api.services.deadline import Deadline, DeadlineExceeded
+
+
+def test_remaining_counts_down_to_zero():
+    # Arrange
+    with patch("api.services.deadline.time.monotonic", return_value=100.0):
+        deadline = Deadline(budget_seconds=10)
+
+    # Act
+    with patch("api.services.deadline.time.monotonic", return_value=104.0):
+        remaining = deadline.remaining()
+    with patch("api.services.deadline.time.monotonic", return_value=120.0):
+        remaining_after_deadline = deadline.remaining()
+
+    # Assert
+    assert remaining == 6.0
+    assert remaining_after_deadline == 0.0
+
+
+def test_cap_limits_timeout_to_time_left():
+    # Arrange
+    deadline = Deadline(budget_seconds=5)
+
+    # Act
+    timeout = deadline.cap(60)
+
+    # Assert
+    assert 0 < timeout <= 5
+
+
+def test_cap_raises_when_budget_is_spent():
+    # Arrange
+    deadline = Deadline(budget_seconds=5)
+    deadline.expires_at = 0
+
+    # Act & Assert
+    with pytest.raises(DeadlineExceeded, match="before the LLM call"):
+        deadline.cap(60)
+
+
+def test_activate_exposes_deadline_within_block():
+    # Arrange
+    deadline = Deadline(budget_seconds=5)
+
+    # Act
+    with deadline.activate():
+        active = Deadline.current()
+
+    # Assert
+    assert active is deadline
+    assert Deadline.current() is None
@@ -0,0 +1,59 @@
+import pytest
+
+from api.services.query_router_service import AGENT_ROUTE, SINGLE_HOP_ROUTE, QueryRouterService
+
+
+@pytest.mark.parametrize("query", [
+    "What is the capital of France?",
+    "Who wrote Hamlet?",
+    "When was the Eiffel Tower built?",
+])
+def test_route_sends_single_hop_questions_to_query_engine(query):
+    # Arrange
+    router = QueryRouterService()
+
+    # Act
+    result = router.route(query)
+
+    # Assert
+    assert result == SINGLE_HOP_ROUTE
+
+
+@pytest.mark.parametrize("query", [
+    "Compare the economies of France and Germany",
+    "Which is older, the Eiffel Tower or the Statue of Liberty?",
+    "What is the difference between a virus and a bacterium?",
+    "Who founded Rome? When did it fall?",
+    "Why did the Roman Empire fall?",
+])
+def test_route_sends_multi_step_questions_to_agent(query):
+    # Arrange
+    router = QueryRouterService()
+
+    # Act
+    result = router.route(query)
+
+    # Assert
+    assert result == AGENT_ROUTE
+
+
+def test_route_sends_long_questions_to_agent():
+    # Arrange
+    router = QueryRouterService(max_single_hop_words=5)
+
+    # Act
+    result = router.route("Tell me everything about the history of the city of Paris")
+
+    # Assert
+    assert result == AGENT_ROUTE
+
+
+def test_get_instance_returns_none_when_disabled(settings):
+    # Arrange
+    settings.QUERY_ROUTER = {**settings.QUERY_ROUTER, "ENABLED": False}
+
+    # Act
+    result = QueryRouterService.get_instance()
+
+    # Assert
+    assert result is None
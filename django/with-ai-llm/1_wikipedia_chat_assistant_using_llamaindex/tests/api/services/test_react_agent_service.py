@@ -1,16 +1,21 @@
-from unittest.mock import patch, MagicMock, ANY
+import asyncio
+from unittest.mock import AsyncMock, patch, MagicMock, ANY
 
+import numpy as np
 import pytest
-from llama_index.core import VectorStoreIndex
+from llama_index.core import StorageContext, VectorStoreIndex
+from llama_index.core.agent import ReActAgent
+from llama_index.core.llms import CompletionResponse, CustomLLM, LLMMetadata
+from llama_index.core.llms.callbacks import llm_completion_callback
 from llama_index.core.base.response.schema import Response
-from llama_index.core.tools import QueryEngineTool
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import TextNode
+from llama_index.core.tools import FunctionTool, QueryEngineTool
 
+from api.retrieval.hybrid_retriever import HybridRetriever
+from api.services.deadline import Deadline, DeadlineExceeded
 from api.services.react_agent_service import ReActAgentService
-
-
-@pytest.fixture
-def mock_vector_index():
-    return MagicMock(spec=VectorStoreIndex)
+from api.vector_stores.ivf_vector_store import IVFVectorStore
 
 
 @pytest.fixture
@@ -91,36 +96,116 @@ def test_query_empty_query(mock_tool):
     mock_agent.chat.assert_not_called()
 
 
-def test_create_wikipedia_tool_success(mock_vector_index):
+def test_create_wikipedia_tool_success():
     # Arrange
-    mock_query_engine = MagicMock()
-    mock_vector_index.as_query_engine.return_value = mock_query_engine
-
-    # Act
-    tool = ReActAgentService.create_wikipedia_tool(
-        index=mock_vector_index,
-        similarity_top_k=3,
-        response_mode="refine"
-    )
+    index = MagicMock()
+    with patch('api.services.react_agent_service.VectorIndexRetriever') as mock_retriever_cls, \
+            patch('api.services.react_agent_service.RetrieverQueryEngine') as mock_engine_cls:
+        # Act
+        tool = ReActAgentService.create_wikipedia_tool(
+            index=index,
+            similarity_top_k=3,
+            response_mode="refine"
+        )
 
     # Assert
     assert isinstance(tool, QueryEngineTool)
-    mock_vector_index.as_query_engine.assert_called_once_with(
-        response_mode="refine",
+    assert tool.query_engine is mock_engine_cls.from_args.return_value
+    mock_retriever_cls.assert_called_once_with(
+        index,
         similarity_top_k=3,
-        verbose=True
+        callback_manager=index._callback_manager,
+        object_map=index._object_map,
+        verbose=True,
+    )
+    mock_engine_cls.from_args.assert_called_once_with(
+        mock_retriever_cls.return_value,
+        llm=ANY,
+        response_mode="refine",
     )
     assert tool.metadata.name == "wikipedia_search"
     assert "Wikipedia" in tool.metadata.description
 
 
-def test_create_wikipedia_tool_error(mock_vector_index):
+def test_create_wikipedia_tool_error():
     # Arrange
-    mock_vector_index.as_query_engine.side_effect = Exception("Test error")
+    with patch('api.services.react_agent_service.VectorIndexRetriever', side_effect=Exception("Test error")):
+        # Act & Assert
+        with pytest.raises(RuntimeError, match="Error creating Wikipedia query engine tool: Test error"):
+            ReActAgentService.create_wikipedia_tool(MagicMock())
 
-    # Act & Assert
-    with pytest.raises(RuntimeError, match="Error creating Wikipedia query engine tool: Test error"):
-        ReActAgentService.create_wikipedia_tool(mock_vector_index)
+
+def test_create_wikipedia_tool_retrieves_nodes_inserted_later():
+    # Arrange
+    embed_model = MockEmbedding(embed_dim=4)
+    index = VectorStoreIndex([TextNode(text="Paris is the capital of France.")], embed_model=embed_model)
+    tool = ReActAgentService.create_wikipedia_tool(index, similarity_top_k=5)
+
+    # Act
+    index.insert_nodes([TextNode(text="Berlin is the capital of Germany.")])
+    nodes = tool.query_engine.retriever.retrieve("capital")
+
+    # Assert
+    assert sorted(n.node.get_content() for n in nodes) == [
+        "Berlin is the capital of Germany.",
+        "Paris is the capital of France.",
+    ]
+
+
+def test_create_wikipedia_tool_probes_only_nprobe_clusters_of_ivf_store():
+    # Arrange
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(16, 8))
+    nodes = [
+        TextNode(id_=f"n{i}", text=f"Node {i}", embedding=(centers[i % 16] + 0.05 * rng.normal(size=8)).tolist())
+        for i in range(512)
+    ]
+    store = IVFVectorStore(nlist=16, nprobe=2, min_train_size=256)
+    index = VectorStoreIndex(
+        nodes,
+        storage_context=StorageContext.from_defaults(vector_store=store),
+        embed_model=MockEmbedding(embed_dim=8),
+    )
+    tool = ReActAgentService.create_wikipedia_tool(index, similarity_top_k=5)
+    candidate_rows = []
+    candidate_rows_of = IVFVectorStore._candidate_rows
+
+    def record_candidate_rows(self, query, query_vector):
+        candidate_rows.append((query.node_ids, candidate_rows_of(self, query, query_vector)))
+        return candidate_rows[-1][1]
+
+    # Act
+    with patch.object(IVFVectorStore, "_candidate_rows", record_candidate_rows):
+        nodes = tool.query_engine.retriever.retrieve("capital")
+
+    # Assert
+    [(node_ids, rows)] = candidate_rows
+    assert node_ids is None
+    assert len(np.unique(store._assignments[rows])) == 2
+    assert len(rows) < store.size
+    assert len(nodes) == 5
+
+
+def test_create_wikipedia_tool_with_hybrid_retrieval_finds_exact_terms():
+    # Arrange
+    embed_model = MockEmbedding(embed_dim=4)
+    index = VectorStoreIndex(
+        [
+            TextNode(text="Paris is the capital of France."),
+            TextNode(text="Lyon is a city in France."),
+            TextNode(text="The Eiffel Tower was completed in 1889."),
+        ],
+        embed_model=embed_model,
+    )
+
+    # Act
+    tool = ReActAgentService.create_wikipedia_tool(index, similarity_top_k=2, hybrid=True)
+    nodes = tool.query_engine.retriever.retrieve("1889")
+
+    # Assert
+    # The mock embeddings are all the same, so only the BM25 results guarantee the node is retrieved
+    assert isinstance(tool.query_engine.retriever, HybridRetriever)
+    assert "The Eiffel Tower was completed in 1889." in [n.node.get_content() for n in nodes]
 
 
 def test_system_prompt_contains_key_elements():
@@ -158,4 +243,268 @@ def test_query_error(mock_tool):
 
     # Act & Assert
     with pytest.raises(RuntimeError, match="Error querying ReAct agent: Chat error"):
-        service.query("Test query")
\ No newline at end of file
+        service.query("Test query")
+
+
+def test_aquery_success():
+    # Arrange
+    service = ReActAgentService()
+    mock_agent = MagicMock()
+    mock_agent.achat = AsyncMock(return_value=Response(response="Test response"))
+    service.agent = mock_agent
+
+    # Act
+    result = asyncio.run(service.aquery("Test query"))
+
+    # Assert
+    assert result == "Test response"
+    mock_agent.achat.assert_awaited_once_with("Test query")
+    mock_agent.chat.assert_not_called()
+
+
+def test_aquery_error():
+    # Arrange
+    service = ReActAgentService()
+    service.agent = MagicMock(achat=AsyncMock(side_effect=Exception("Agent error")))
+
+    # Act & Assert
+    with pytest.raises(RuntimeError, match="Error querying ReAct agent: Agent error"):
+        asyncio.run(service.aquery("Test query"))
+
+
+class ScriptedLLM(CustomLLM):
+    """LLM streaming the given ReAct replies word by word"""
+
+    replies: list = []
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(is_chat_model=False)
+
+    @llm_completion_callback()
+    def complete(self, prompt, formatted=False, **kwargs):
+        return CompletionResponse(text=self.replies.pop(0))
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt, formatted=False, **kwargs):
+        text = ""
+        for word in self.replies.pop(0).split(" "):
+            text += word + " "
+            yield CompletionResponse(text=text, delta=word + " ")
+
+
+def test_stream_query_reports_tool_calls_then_streams_answer_tokens():
+    # Arrange
+    llm = ScriptedLLM(replies=[
+        'Thought: I need to search.\nAction: wikipedia_search\nAction Input: {"input": "Paris"}',
+        "Thought: I can answer.\nAnswer: Paris is the capital of France.",
+    ])
+    tool = FunctionTool.from_defaults(
+        fn=lambda input: "Paris is the capital of France.",
+        name="wikipedia_search",
+        description="Search Wikipedia",
+    )
+    service = ReActAgentService()
+    service.agent = ReActAgent.from_tools([tool], llm=llm)
+
+    # Act
+    events = list(service.stream_query("What is Paris?"))
+
+    # Assert
+    assert events[0].event == "tool_call"
+    assert events[0].data["tool"] == "wikipedia_search"
+    assert [e.event for e in events[1:]] == ["token"] * 6
+    assert "".join(e.data["text"] for e in events[1:]).strip() == "Paris is the capital of France."
+
+
+def test_stream_query_not_initialized():
+    # Arrange
+    service = ReActAgentService()
+
+    # Act & Assert
+    with pytest.raises(RuntimeError, match="ReAct agent is not initialized."):
+        list(service.stream_query("Test query"))
+
+
+def test_direct_query_uses_query_engine_without_agent_loop():
+    # Arrange
+    service = ReActAgentService()
+    tool = MagicMock()
+    tool.query_engine.query.return_value = "Paris."
+    service.tools = [tool]
+    service.agent = MagicMock()
+
+    # Act
+    result = service.direct_query("  What is the capital of France?  ")
+
+    # Assert
+    assert result == "Paris."
+    tool.query_engine.query.assert_called_once_with("What is the capital of France?")
+    service.agent.chat.assert_not_called()
+
+
+def test_direct_query_raises_when_not_initialized():
+    # Arrange
+    service = ReActAgentService()
+
+    # Act & Assert
+    with pytest.raises(RuntimeError, match="not initialized"):
+        service.direct_query("What is the capital of France?")
+
+
+def test_stream_direct_query_reports_tool_call_then_answer():
+    # Arrange
+    service = ReActAgentService()
+    tool = MagicMock()
+    tool.metadata.name = "wikipedia_search"
+    tool.query_engine.query.return_value = "Paris."
+    service.tools = [tool]
+
+    # Act
+    events = list(service.stream_direct_query("What is the capital of France?"))
+
+    # Assert
+    assert [e.event for e in events] == ["tool_call", "token"]
+    assert events[0].data["tool"] == "wikipedia_search"
+    assert events[1].data == {"text": "Paris."}
+
+
+def _scripted_agent_service(deadline=None):
+    llm = ScriptedLLM(replies=[
+        'Thought: I need to search.\nAction: wikipedia_search\nAction Input: {"input": "Paris"}',
+        "Thought: I can answer.\nAnswer: Paris is the capital of France.",
+    ])
+
+    def search(input: str) -> str:
+        # A slow tool call spends the whole budget
+        if deadline:
+            deadline.expires_at = 0
+        return "Paris is the capital and largest city of France."
+
+    tool = FunctionTool.from_defaults(fn=search, name="wikipedia_search", description="Search Wikipedia")
+    service = ReActAgentService()
+    service.agent = ReActAgent.from_tools([tool], llm=llm)
+    return service, llm
+
+
+def test_query_within_budget_returns_final_answer():
+    # Arrange
+    service, _ = _scripted_agent_service()
+    deadline = Deadline(budget_seconds=60)
+
+    # Act
+    result = service.query("What is Paris?", deadline)
+
+    # Assert
+    assert result == "Paris is the capital of France."
+    assert deadline.truncated is False
+
+
+def test_query_stops_agent_loop_when_budget_is_spent():
+    # Arrange
+    deadline = Deadline(budget_seconds=60)
+    service, llm = _scripted_agent_service(deadline)
+
+    # Act
+    result = service.query("What is Paris?", deadline)
+
+    # Assert
+    assert result == "Paris is the capital and largest city of France."
+    assert deadline.truncated is True
+    assert len(llm.replies) == 1
+
+
+def test_query_keeps_truncated_turn_in_chat_memory():
+    # Arrange
+    deadline = Deadline(budget_seconds=60)
+    service, _ = _scripted_agent_service(deadline)
+
+    # Act
+    service.query("What is Paris?", deadline)
+
+    # Assert
+    assert [(m.role.value, m.content) for m in service.agent.memory.get_all()] == [
+        ("user", "What is Paris?"),
+        ("assistant", "Paris is the capital and largest city of France."),
+    ]
+    assert service.agent.state.task_dict == {}
+
+
+def test_query_removes_finished_task_from_agent_state():
+    # Arrange
+    service, _ = _scripted_agent_service()
+
+    # Act
+    service.query("What is Paris?", Deadline(budget_seconds=60))
+
+    # Assert
+    assert service.agent.state.task_dict == {}
+    assert len(service.agent.memory.get_all()) == 2
+
+
+def test_query_raises_when_budget_is_spent_before_any_tool_call():
+    # Arrange
+    service, _ = _scripted_agent_service()
+    deadline = Deadline(budget_seconds=60)
+    deadline.expires_at = 0
+
+    # Act & Assert
+    with pytest.raises(DeadlineExceeded):
+        service.query("What is Paris?", deadline)
+    assert deadline.truncated is True
+
+
+def test_aquery_stops_agent_loop_when_budget_is_spent():
+    # Arrange
+    deadline = Deadline(budget_seconds=60)
+    service, _ = _scripted_agent_service(deadline)
+
+    # Act
+    result = asyncio.run(service.aquery("What is Paris?", deadline))
+
+    # Assert
+    assert result == "Paris is the capital and largest city of France."
+    assert deadline.truncated is True
+
+
+def test_aquery_keeps_truncated_turn_in_chat_memory():
+    # Arrange
+    deadline = Deadline(budget_seconds=60)
+    service, _ = _scripted_agent_service(deadline)
+
+    # Act
+    asyncio.run(service.aquery("What is Paris?", deadline))
+
+    # Assert
+    assert [m.content for m in service.agent.memory.get_all()] == [
+        "What is Paris?",
+        "Paris is the capital and largest city of France.",
+    ]
+    assert service.agent.state.task_dict == {}
+
+
+def test_stream_query_stops_agent_loop_when_budget_is_spent():
+    # Arrange
+    deadline = Deadline(budget_seconds=60)
+    service, _ = _scripted_agent_service(deadline)
+
+    # Act
+    events = list(service.stream_query("What is Paris?", deadline))
+
+    # Assert
+    assert [e.event for e in events] == ["tool_call", "token"]
+    assert events[1].data == {"text": "Paris is the capital and largest city of France."}
+    assert deadline.truncated is True
+
+
+def test_stream_query_removes_task_when_client_stops_reading():
+    # Arrange
+    service, _ = _scripted_agent_service()
+    events = service.stream_query("What is Paris?", Deadline(budget_seconds=60))
+
+    # Act
+    next(events)
+    events.close()
+
+    # Assert
+    assert service.agent.state.task_dict == {}
@@ -0,0 +1,89 @@
+from llama_index.core import Document
+
+from api.services.section_filter_service import SectionFilterService
+
+PAGE_TEXT = """France is a country in Western Europe.
+
+== History ==
+The French Revolution began in 1789.
+
+=== Fifth Republic ===
+The Fifth Republic was established in 1958.
+
+== Cuisine ==
+French cuisine is known for its cheeses and wines.
+
+== See also ==
+List of French dishes
+
+=== Related lists ===
+List of French wines
+
+== References ==
+Official website of France
+"""
+
+
+def test_split_sections_drops_reference_and_link_sections():
+    # Act
+    result = SectionFilterService.split_sections(PAGE_TEXT)
+
+    # Assert
+    assert result == [
+        ("", "France is a country in Western Europe."),
+        ("History", "The French Revolution began in 1789."),
+        ("Fifth Republic", "The Fifth Republic was established in 1958."),
+        ("Cuisine", "French cuisine is known for its cheeses and wines."),
+    ]
+
+
+def test_split_sections_keeps_page_without_headings():
+    # Act
+    result = SectionFilterService.split_sections("Paris is the capital of France.")
+
+    # Assert
+    assert result == [("", "Paris is the capital of France.")]
+
+
+def test_filter_documents_keeps_leads_and_best_matching_sections():
+    # Arrange
+    service = SectionFilterService(top_sections=1)
+    documents = [
+        Document(id_="1", text=PAGE_TEXT, metadata={"title": "France"}),
+        Document(id_="2", text="Paris is the capital of France.\n\n== Transport ==\nParis has a metro.",
+                 metadata={"title": "Paris"}),
+    ]
+
+    # Act
+    result = service.filter_documents("When did the French Revolution begin?", documents)
+
+    # Assert
+    assert [d.doc_id for d in result] == ["1#0", "1#1", "2#0"]
+    assert result[1].text == "The French Revolution began in 1789."
+    assert result[1].metadata == {"title": "France", "section": "History", "section_index": 1}
+    assert result[2].metadata == {"title": "Paris", "section_index": 0}
+    assert "section_index" in result[1].excluded_embed_metadata_keys
+
+
+def test_filter_documents_keeps_documents_on_error():
+    # Arrange
+    service = SectionFilterService(top_sections=1)
+    documents = [Document(text="Paris is the capital of France.")]
+    service.split_sections = None
+
+    # Act
+    result = service.filter_documents("Paris", documents)
+
+    # Assert
+    assert result is documents
+
+
+def test_get_instance_returns_none_when_disabled(settings):
+    # Arrange
+    settings.SECTION_FILTER = {**settings.SECTION_FILTER, "ENABLED": False}
+
+    # Act
+    result = SectionFilterService.get_instance()
+
+    # Assert
+    assert result is None
@@ -1,9 +1,27 @@
-from unittest.mock import patch, MagicMock
+import asyncio
+import threading
+from unittest.mock import AsyncMock, patch, MagicMock
+
+import pytest
 
 from llama_index.core import Document
 from llama_index.core.schema import TextNode
 
+from api.cache.embedding_cache import EmbeddingCache
+from api.cache.vector_shard_store import VectorShardStore
+from api.services.section_filter_service import SectionFilterService
 from api.services.vector_indexing_service import VectorIndexingService
+from api.vector_stores.numpy_vector_store import NumpyVectorStore
+
+
+@pytest.fixture
+def mock_embed_model():
+    embed_model = MagicMock()
+    embed_model.model_name = "test-embedding"
+    embed_model.get_text_embedding_batch.side_effect = lambda texts: [[float(len(t))] for t in texts]
+    embed_model.aget_text_embedding_batch = AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+    with patch('api.services.vector_indexing_service.LLMConfig.get_embedding_model', return_value=embed_model):
+        yield embed_model
 
 
 def test_create_index_from_documents_success():
@@ -122,4 +140,333 @@ def test_custom_initialization():
     # Assert
     assert service.chunk_size == 200
     assert service.chunk_overlap == 50
-    assert service.splitter is not None
\ No newline at end of file
+    assert service.splitter is not None
+
+
+def test_embed_nodes_only_embeds_cache_misses(tmp_path, mock_embed_model):
+    # Arrange
+    cache = EmbeddingCache(path=tmp_path / "embeddings.sqlite3")
+    cache.set_many("test-embedding", {"cached chunk": [42.0]})
+    nodes = [TextNode(text="cached chunk"), TextNode(text="new chunk")]
+    service = VectorIndexingService(embedding_cache=cache)
+
+    # Act
+    saved_calls = service.embed_nodes(nodes)
+
+    # Assert
+    assert saved_calls == 1
+    assert nodes[0].embedding == [42.0]
+    assert nodes[1].embedding == [9.0]
+    mock_embed_model.get_text_embedding_batch.assert_called_once_with(["new chunk"])
+    assert cache.get_many("test-embedding", ["new chunk"]) == {"new chunk": [9.0]}
+
+
+def test_embed_nodes_skips_embedding_model_on_full_cache_hit(tmp_path, mock_embed_model):
+    # Arrange
+    cache = EmbeddingCache(path=tmp_path / "embeddings.sqlite3")
+    cache.set_many("test-embedding", {"chunk 1": [1.0], "chunk 2": [2.0]})
+    nodes = [TextNode(text="chunk 1"), TextNode(text="chunk 2"), TextNode(text="chunk 1")]
+    service = VectorIndexingService(embedding_cache=cache)
+
+    # Act
+    saved_calls = service.embed_nodes(nodes)
+
+    # Assert
+    assert saved_calls == 3
+    assert [n.embedding for n in nodes] == [[1.0], [2.0], [1.0]]
+    mock_embed_model.get_text_embedding_batch.assert_not_called()
+
+
+def test_create_index_from_documents_uses_embedding_cache(tmp_path, mock_embed_model):
+    # Arrange
+    cache = EmbeddingCache(path=tmp_path / "embeddings.sqlite3")
+    service = VectorIndexingService(embedding_cache=cache)
+    documents = [Document(text="Paris is the capital of France.")]
+
+    # Act
+    service.create_index_from_documents(documents)
+    index = service.create_index_from_documents(documents)
+
+    # Assert
+    assert index is not None
+    mock_embed_model.get_text_embedding_batch.assert_called_once()
+    assert cache.stats()["hits"] == 1
+
+
+def test_create_index_from_documents_reuses_shards(tmp_path, mock_embed_model):
+    # Arrange
+    shard_store = VectorShardStore(directory=tmp_path)
+    service = VectorIndexingService(shard_store=shard_store)
+    documents = [
+        Document(text="Paris is the capital of France.", metadata={"title": "Paris"}),
+        Document(text="Lyon is a city in France.", metadata={"title": "Lyon"}),
+    ]
+    service.create_index_from_documents(documents)
+    mock_embed_model.get_text_embedding_batch.reset_mock()
+
+    # Act
+    index = service.create_index_from_documents(documents)
+
+    # Assert
+    assert index is not None
+    assert len(index.docstore.docs) == 2
+    mock_embed_model.get_text_embedding_batch.assert_not_called()
+    assert shard_store.hits == 2
+
+
+def test_create_index_from_documents_rebuilds_shard_of_changed_page(tmp_path, mock_embed_model):
+    # Arrange
+    shard_store = VectorShardStore(directory=tmp_path)
+    service = VectorIndexingService(shard_store=shard_store)
+    service.create_index_from_documents([Document(text="Old content.", metadata={"title": "Paris"})])
+    mock_embed_model.get_text_embedding_batch.reset_mock()
+
+    # Act
+    service.create_index_from_documents([Document(text="New content.", metadata={"title": "Paris"})])
+
+    # Assert
+    mock_embed_model.get_text_embedding_batch.assert_called_once()
+
+
+def test_create_index_from_documents_keeps_a_shard_per_section(tmp_path, mock_embed_model):
+    # Arrange
+    shard_store = VectorShardStore(directory=tmp_path)
+    service = VectorIndexingService(shard_store=shard_store)
+    page = Document(id_="1", text="France is a country.\n\n== History ==\nThe Revolution began in 1789.",
+                    metadata={"title": "France"})
+    sections = SectionFilterService(top_sections=1).filter_documents("When did the Revolution begin?", [page])
+    service.create_index_from_documents(sections)
+    mock_embed_model.get_text_embedding_batch.reset_mock()
+
+    # Act
+    index = service.create_index_from_documents(sections)
+
+    # Assert
+    assert len(sections) == 2
+    assert len(list(tmp_path.glob("*/*/*.npz"))) == 2
+    assert index is not None
+    mock_embed_model.get_text_embedding_batch.assert_not_called()
+    assert shard_store.hits == 2
+
+
+def test_create_index_from_documents_uses_numpy_vector_store(mock_embed_model):
+    # Arrange
+    service = VectorIndexingService(embedding_cache=MagicMock(get_many=MagicMock(return_value={})))
+
+    # Act
+    index = service.create_index_from_documents([Document(text="Paris is the capital of France.")])
+
+    # Assert
+    assert isinstance(index.vector_store, NumpyVectorStore)
+    assert index.vector_store.size == 1
+
+
+def test_acreate_index_from_documents_embeds_with_async_api(mock_embed_model):
+    # Arrange
+    service = VectorIndexingService()
+
+    # Act
+    index = asyncio.run(service.acreate_index_from_documents([Document(text="Paris is the capital of France.")]))
+
+    # Assert
+    assert index.vector_store.size == 1
+    mock_embed_model.aget_text_embedding_batch.assert_awaited_once()
+    mock_embed_model.get_text_embedding_batch.assert_not_called()
+
+
+def test_get_document_nodes_groups_embedded_nodes_by_document(tmp_path, mock_embed_model):
+    # Arrange
+    service = VectorIndexingService(shard_store=VectorShardStore(directory=tmp_path))
+    documents = [
+        Document(text="Paris is the capital of France.", metadata={"title": "Paris"}),
+        Document(text="Lyon is a city in France.", metadata={"title": "Lyon"}),
+    ]
+    service.get_document_nodes(documents)
+
+    # Act
+    document_nodes = service.get_document_nodes(documents)
+    async_document_nodes = asyncio.run(VectorIndexingService().aget_document_nodes(documents))
+
+    # Assert
+    for result in (document_nodes, async_document_nodes):
+        assert [[n.get_content() for n in nodes] for nodes in result] == [[d.text] for d in documents]
+        assert all(n.embedding is not None for nodes in result for n in nodes)
+
+
+def test_aget_nodes_reuses_shards_and_cache(tmp_path, mock_embed_model):
+    # Arrange
+    service = VectorIndexingService(
+        embedding_cache=EmbeddingCache(path=tmp_path / "embeddings.sqlite3"),
+        shard_store=VectorShardStore(directory=tmp_path / "shards"),
+    )
+    documents = [Document(text="Paris is the capital of France.", metadata={"title": "Paris"})]
+    asyncio.run(service.aget_nodes(documents))
+
+    # Act
+    nodes = asyncio.run(service.aget_nodes(documents))
+
+    # Assert
+    assert all(n.embedding is not None for n in nodes)
+    mock_embed_model.aget_text_embedding_batch.assert_awaited_once()
+
+
+def test_aget_nodes_reads_and_writes_disk_outside_event_loop(tmp_path, mock_embed_model):
+    # Arrange
+    embedding_cache = EmbeddingCache(path=tmp_path / "embeddings.sqlite3")
+    shard_store = VectorShardStore(directory=tmp_path / "shards")
+    service = VectorIndexingService(embedding_cache=embedding_cache, shard_store=shard_store)
+    documents = [Document(text="Paris is the capital of France.", metadata={"title": "Paris"})]
+    threads = []
+
+    def record_thread(method):
+        def wrapper(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return method(*args, **kwargs)
+        return wrapper
+
+    # Act
+    with patch.object(shard_store, "load", record_thread(shard_store.load)), \
+            patch.object(shard_store, "save", record_thread(shard_store.save)), \
+            patch.object(embedding_cache, "get_many", record_thread(embedding_cache.get_many)), \
+            patch.object(embedding_cache, "set_many", record_thread(embedding_cache.set_many)):
+        asyncio.run(service.aget_nodes(documents))
+
+    # Assert
+    assert len(threads) == 4
+    assert threading.main_thread() not in threads
+
+
+def test_insert_documents_only_embeds_new_documents(mock_embed_model):
+    # Arrange
+    service = VectorIndexingService(embedding_cache=MagicMock(get_many=MagicMock(return_value={})))
+    index = service.create_index_from_documents([Document(text="Paris is the capital of France.")])
+    mock_embed_model.get_text_embedding_batch.reset_mock()
+
+    # Act
+    inserted = service.insert_documents(index, [Document(text="Berlin is the capital of Germany.")])
+
+    # Assert
+    assert inserted == 1
+    assert index.vector_store.size == 2
+    assert len(index.docstore.docs) == 2
+    (texts,), _ = mock_embed_model.get_text_embedding_batch.call_args
+    assert texts == ["Berlin is the capital of Germany."]
+
+
+def test_insert_documents_empty_input():
+    # Arrange
+    service = VectorIndexingService()
+    index = MagicMock()
+
+    # Act
+    inserted = service.insert_documents(index, [])
+
+    # Assert
+    assert inserted == 0
+    index.insert_nodes.assert_not_called()
+
+
+def test_insert_documents_handles_exception(mock_embed_model):
+    # Arrange
+    service = VectorIndexingService()
+    index = MagicMock()
+    index.insert_nodes.side_effect = Exception("Test exception")
+
+    # Act
+    inserted = service.insert_documents(index, [Document(text="Berlin is the capital of Germany.")])
+
+    # Assert
+    assert inserted == 0
+
+
+def test_ainsert_documents_embeds_with_async_api(mock_embed_model):
+    # Arrange
+    service = VectorIndexingService()
+    index = asyncio.run(service.acreate_index_from_documents([Document(text="Paris is the capital of France.")]))
+
+    # Act
+    inserted = asyncio.run(service.ainsert_documents(index, [Document(text="Berlin is the capital of Germany.")]))
+
+    # Assert
+    assert inserted == 1
+    assert index.vector_store.size == 2
+    assert mock_embed_model.aget_text_embedding_batch.await_count == 2
+    mock_embed_model.get_text_embedding_batch.assert_not_called()
+
+
+def _long_page(title, sentences):
+    text = " ".join(f"Sentence {i} of the page about {title} has a few more words." for i in range(sentences))
+    return Document(text=text, metadata={"title": title})
+
+
+def test_chunk_sizes_grow_for_pages_over_their_budget():
+    # Arrange
+    service = VectorIndexingService(embedding_budget=20, max_chunk_size=1024)
+    documents = [_long_page("Short", 5), _long_page("Long", 100), _long_page("Huge", 5000)]
+
+    # Act
+    chunk_sizes = service.chunk_sizes(documents)
+
+    # Assert
+    assert chunk_sizes[0] == 150
+    assert 150 < chunk_sizes[1] < 1024
+    assert chunk_sizes[2] == 1024
+
+
+def test_chunk_sizes_keep_configured_size_without_budget():
+    # Arrange
+    service = VectorIndexingService()
+
+    # Act
+    chunk_sizes = service.chunk_sizes([_long_page("Long", 300)])
+
+    # Assert
+    assert chunk_sizes == [150]
+
+
+def test_get_nodes_with_budget_splits_long_pages_into_fewer_nodes():
+    # Arrange
+    documents = [_long_page("Long", 300)]
+    fixed_service = VectorIndexingService()
+    budget_service = VectorIndexingService(embedding_budget=20)
+
+    # Act
+    fixed_nodes = fixed_service.get_nodes(documents)
+    budget_nodes = budget_service.get_nodes(documents)
+
+    # Assert
+    assert len(budget_nodes) <= 20 < len(fixed_nodes)
+    assert budget_service._splitters[budget_service.chunk_sizes(documents)[0]].chunk_overlap == 40
+
+
+def test_get_nodes_with_budget_saves_shards_by_chunk_size(tmp_path, mock_embed_model):
+    # Arrange
+    shard_store = VectorShardStore(directory=tmp_path)
+    service = VectorIndexingService(shard_store=shard_store, embedding_budget=20)
+    document = _long_page("Long", 300)
+    revision = shard_store.revision(document.text)
+    chunk_size = service.chunk_sizes([document])[0]
+
+    # Act
+    nodes = service.get_nodes([document])
+
+    # Assert
+    assert shard_store.load("Long", revision, service.shard_namespace(chunk_size)) is not None
+    assert shard_store.load("Long", revision, service.shard_namespace()) is None
+    assert all(n.embedding is not None for n in nodes)
+
+
+def test_get_nodes_with_budget_reuses_embedded_shard_of_configured_size(tmp_path, mock_embed_model):
+    # Arrange
+    shard_store = VectorShardStore(directory=tmp_path)
+    document = _long_page("Long", 300)
+    VectorIndexingService(shard_store=shard_store).get_nodes([document])
+    mock_embed_model.get_text_embedding_batch.reset_mock()
+    service = VectorIndexingService(shard_store=shard_store, embedding_budget=20)
+
+    # Act
+    nodes = service.get_nodes([document])
+
+    # Assert
+    assert len(nodes) > 20
+    mock_embed_model.get_text_embedding_batch.assert_not_called()
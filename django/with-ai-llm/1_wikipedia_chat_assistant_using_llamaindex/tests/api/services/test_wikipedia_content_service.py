@@ -1,7 +1,13 @@
+import asyncio
+import threading
 from unittest.mock import patch, MagicMock
 
+import httpx
+import wikipedia
 from llama_index.core.schema import Document
 
+from api.cache.wikipedia_page_cache import WikipediaPageCache
+from api.services.deadline import Deadline
 from api.services.wikipedia_content_service import WikipediaContentService
 
 
@@ -16,74 +22,228 @@ def test_fetch_content_no_titles():
     assert result == []
 
 
-@patch("api.services.wikipedia_content_service.WikipediaReader")
-def test_fetch_content_success(mock_reader_cls):
-    # Arrange
-    mock_reader = MagicMock()
-    mock_doc1 = Document(text="Content 1", metadata={"title": "Python"})
-    mock_doc2 = Document(text="Content 2", metadata={"title": "Django"})
-    mock_reader.load_data.return_value = [mock_doc1, mock_doc2]
-    mock_reader_cls.return_value = mock_reader
+def _mock_wikipedia_api(monkeypatch, pages, failing=()):
+    """Serve the Wikipedia API search and extract queries from the given {title: text} pages, failing the queries
+    about the titles in failing"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        params = request.url.params
+        if params.get("srsearch", params.get("titles")) in failing:
+            return httpx.Response(503, json={"error": {"code": "unavailable", "info": "Unavailable"}})
+
+        if params.get("list") == "search":
+            query = params["srsearch"]
+            matches = [{"title": t} for t in pages if t.lower().startswith(query.lower())]
+            return httpx.Response(200, json={"query": {"search": matches[:1]}})
+
+        title = params["titles"]
+        if title not in pages:
+            return httpx.Response(200, json={"query": {"pages": {"-1": {"title": title, "missing": ""}}}})
+        page = {"pageid": list(pages).index(title) + 1, "title": title, "extract": pages[title]}
+        return httpx.Response(200, json={"query": {"pages": {str(page["pageid"]): page}}})
+
+    client, async_client = httpx.Client, httpx.AsyncClient
+    monkeypatch.setattr(
+        "api.services.wikipedia_content_service.httpx.Client",
+        lambda **kwargs: client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    monkeypatch.setattr(
+        "api.services.wikipedia_content_service.httpx.AsyncClient",
+        lambda **kwargs: async_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    return requests
+
+
+def _searches(requests):
+    return sorted(r.url.params["srsearch"] for r in requests if r.url.params.get("list") == "search")
+
 
+def test_fetch_content_success(monkeypatch):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Content 1", "Django": "Content 2"})
     service = WikipediaContentService()
-    service.reader = mock_reader
 
-    test_titles = ["Python", "Django"]
+    # Act
+    result = service.fetch_content(["Python", "Django"])
+
+    # Assert
+    assert len(result) == 2
+    assert isinstance(result[0], Document)
+    assert result[0].text == "Content 1"
+    assert result[1].text == "Content 2"
+    assert result[0].doc_id == "1"
+    assert len(requests) == 4
+
 
-    # Mock validate_titles to return the same titles
-    with patch.object(service, "validate_titles", return_value=test_titles):
-        # Act
-        result = service.fetch_content(test_titles)
+def test_fetch_content_keeps_order_and_skips_failed_pages(monkeypatch):
+    # Arrange
+    _mock_wikipedia_api(
+        monkeypatch, {"Python": "Python", "Django": "Django", "Flask": "Flask"}, failing={"Django"}
+    )
+    service = WikipediaContentService(max_workers=3)
 
-        # Assert
-        assert len(result) == 2
-        assert isinstance(result[0], Document)
-        assert result[0].text == "Content 1"
-        assert result[1].text == "Content 2"
-        mock_reader.load_data.assert_called_once_with(pages=test_titles, auto_suggest=False)
+    # Act
+    result = service.fetch_content(["Python", "Unknown", "Django", "Flask", "Python"])
 
+    # Assert
+    assert [d.text for d in result] == ["Python", "Flask"]
+    assert result[0].metadata == {"title": "Python"}
 
-@patch("api.services.wikipedia_content_service.WikipediaReader")
-def test_fetch_content_handles_exception(mock_reader_cls):
+
+def test_fetch_content_uses_page_cache(monkeypatch, tmp_path):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Fetched content", "Django": "Fetched content"})
+    page_cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3")
+    page_cache.set("Python", Document(text="Cached content", metadata={"title": "Python"}))
+    service = WikipediaContentService(page_cache=page_cache)
+
+    # Act
+    result = service.fetch_content(["Python", "Django"])
+
+    # Assert
+    assert [d.text for d in result] == ["Cached content", "Fetched content"]
+    assert _searches(requests) == ["Django"]
+    assert page_cache.get("Django").metadata == {"title": "Django"}
+
+
+def test_fetch_content_skips_network_on_full_cache_hit(monkeypatch, tmp_path):
     # Arrange
-    mock_reader = MagicMock()
-    mock_reader.load_data.side_effect = Exception("API Error")
-    mock_reader_cls.return_value = mock_reader
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Fetched content"})
+    page_cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3")
+    page_cache.set("Python", Document(text="Cached content"))
+    service = WikipediaContentService(page_cache=page_cache)
 
+    # Act
+    result = service.fetch_content(["Python"])
+
+    # Assert
+    assert [d.text for d in result] == ["Cached content"]
+    assert requests == []
+    assert page_cache.stats()["hits"] == 1
+
+
+def test_fetch_content_skips_network_on_repeat_fetch_of_inexact_title(monkeypatch, tmp_path):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {"Python (programming language)": "Python content"})
+    page_cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3")
+    service = WikipediaContentService(page_cache=page_cache)
+    service.fetch_content(["python"])
+    requests.clear()
+
+    # Act
+    result = service.fetch_content(["python"])
+
+    # Assert
+    assert [d.text for d in result] == ["Python content"]
+    assert result[0].metadata["title"] == "Python (programming language)"
+    assert requests == []
+
+
+def test_fetch_content_handles_exception(monkeypatch):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Python content"}, failing={"Python"})
     service = WikipediaContentService()
-    service.reader = mock_reader
 
     # Act
     result = service.fetch_content(["Python"])
 
     # Assert
     assert result == []
-    mock_reader.load_data.assert_called_once()
+    assert len(requests) == 1
+
+
+def test_fetch_content_shares_pooled_client_between_threads(monkeypatch):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Python content", "Django": "Django content"})
+    http_pool = MagicMock()
+    http_pool.client = httpx.Client()
+    service = WikipediaContentService(max_workers=2, http_pool=http_pool)
+
+    # Act
+    result = service.fetch_content(["Python", "Django"])
+
+    # Assert
+    assert [d.text for d in result] == ["Python content", "Django content"]
+    assert len(requests) == 4
+    assert not http_pool.client.is_closed
+
+
+def test_fetch_content_sends_queries_to_configured_api(settings, monkeypatch):
+    # Arrange
+    settings.WIKIPEDIA_API_URL = "http://127.0.0.1:8002/w/api.php"
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Python content"})
+    service = WikipediaContentService()
+
+    # Act
+    service.fetch_content(["Python"])
+
+    # Assert
+    assert {str(r.url.copy_with(query=None)) for r in requests} == {"http://127.0.0.1:8002/w/api.php"}
+
+
+def test_fetch_content_uses_wikipedia_api_by_default(settings, monkeypatch):
+    # Arrange
+    settings.WIKIPEDIA_API_URL = None
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Python content"})
+    service = WikipediaContentService()
+
+    # Act
+    service.fetch_content(["Python"])
+
+    # Assert
+    assert {str(r.url.copy_with(query=None)) for r in requests} == {wikipedia.wikipedia.API_URL}
+
+
+def test_fetch_content_threads_see_the_request_deadline(monkeypatch):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Python content", "Django": "Django content"})
+    service = WikipediaContentService(max_workers=2)
+    deadline = Deadline(10)
+
+    # Act
+    with deadline.activate():
+        result = service.fetch_content(["Python", "Django"])
+
+    # Assert
+    assert [d.text for d in result] == ["Python content", "Django content"]
+    assert all(0 < r.extensions["timeout"]["read"] <= 10 for r in requests)
+
+
+def test_fetch_content_skips_requests_once_the_deadline_has_passed(monkeypatch):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Python content", "Django": "Django content"})
+    service = WikipediaContentService(max_workers=2)
+    deadline = Deadline(0)
+
+    # Act
+    with deadline.activate():
+        result = service.fetch_content(["Python", "Django"])
+
+    # Assert
+    assert result == []
+    assert requests == []
 
 
-@patch("api.services.wikipedia_content_service.wikipedia.search")
-def test_validate_titles_success(mock_search):
+def test_validate_titles_success(monkeypatch):
     # Arrange
+    requests = _mock_wikipedia_api(
+        monkeypatch, {"Python (programming language)": "Python", "Django (web framework)": "Django"}
+    )
     service = WikipediaContentService()
-    test_titles = ["Python", "Django"]
-    mock_search.side_effect = [
-        ["Python (programming language)"],  # First call returns list with one result
-        ["Django (web framework)"]  # Second call returns list with one result
-    ]
 
     # Act
-    result = service.validate_titles(test_titles)
+    result = service.validate_titles(["Python", "Django"])
 
     # Assert
-    assert result == [["Python (programming language)"], ["Django (web framework)"]]
-    assert mock_search.call_count == 2
-    mock_search.assert_any_call("Python", results=1)
-    mock_search.assert_any_call("Django", results=1)
+    assert result == ["Python (programming language)", "Django (web framework)"]
+    assert _searches(requests) == ["Django", "Python"]
 
 
-@patch("api.services.wikipedia_content_service.wikipedia.search")
-def test_validate_titles_with_empty_input(mock_search):
+def test_validate_titles_with_empty_input(monkeypatch):
     # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {})
     service = WikipediaContentService()
 
     # Act
@@ -91,13 +251,24 @@ def test_validate_titles_with_empty_input(mock_search):
 
     # Assert
     assert result == []
-    mock_search.assert_not_called()
+    assert requests == []
 
 
-@patch("api.services.wikipedia_content_service.wikipedia.search")
-def test_validate_titles_handles_search_error(mock_search):
+def test_validate_titles_skips_titles_without_match(monkeypatch):
     # Arrange
-    mock_search.side_effect = Exception("Search failed")
+    _mock_wikipedia_api(monkeypatch, {"Python": "Python", "Django": "Django"})
+    service = WikipediaContentService()
+
+    # Act
+    result = service.validate_titles(["Python", "xyz123", "Django"])
+
+    # Assert
+    assert result == ["Python", "Django"]
+
+
+def test_validate_titles_handles_search_error(monkeypatch):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Python"}, failing={"Python"})
     service = WikipediaContentService()
 
     # Act
@@ -105,4 +276,101 @@ def test_validate_titles_handles_search_error(mock_search):
 
     # Assert
     assert result == []
-    mock_search.assert_called_once_with("Python", results=1)
\ No newline at end of file
+    assert _searches(requests) == ["Python"]
+
+
+def test_afetch_content_resolves_and_fetches_pages_concurrently(monkeypatch, tmp_path):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Python content", "Django": "Django content"})
+    page_cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3")
+    service = WikipediaContentService(page_cache=page_cache)
+
+    # Act
+    result = asyncio.run(service.afetch_content(["python", "Django", "Unknown"]))
+
+    # Assert
+    assert [d.text for d in result] == ["Python content", "Django content"]
+    assert result[0].doc_id == "1"
+    assert result[0].metadata == {"title": "Python"}
+    assert page_cache.get("Django").text == "Django content"
+    assert len(requests) == 5
+
+
+def test_afetch_content_serves_cached_pages_without_requests(monkeypatch, tmp_path):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {})
+    page_cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3")
+    page_cache.set("Python", Document(text="Cached content"))
+    service = WikipediaContentService(page_cache=page_cache)
+
+    # Act
+    result = asyncio.run(service.afetch_content(["Python"]))
+
+    # Assert
+    assert [d.text for d in result] == ["Cached content"]
+    assert requests == []
+
+
+def test_afetch_content_skips_title_search_on_repeat_fetch(monkeypatch, tmp_path):
+    # Arrange
+    requests = _mock_wikipedia_api(monkeypatch, {"Python": "Python content"})
+    page_cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3")
+    service = WikipediaContentService(page_cache=page_cache)
+    asyncio.run(service.afetch_content(["python"]))
+    requests.clear()
+
+    # Act
+    result = asyncio.run(service.afetch_content(["python"]))
+
+    # Assert
+    assert [d.text for d in result] == ["Python content"]
+    assert requests == []
+
+
+def test_afetch_content_uses_page_cache_outside_event_loop(monkeypatch, tmp_path):
+    # Arrange
+    _mock_wikipedia_api(monkeypatch, {"Python": "Python content"})
+    page_cache = WikipediaPageCache(path=tmp_path / "pages.sqlite3")
+    service = WikipediaContentService(page_cache=page_cache)
+    threads = []
+
+    def record_thread(method):
+        def wrapper(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return method(*args, **kwargs)
+        return wrapper
+
+    # Act
+    with patch.object(page_cache, "get", record_thread(page_cache.get)), \
+            patch.object(page_cache, "set", record_thread(page_cache.set)), \
+            patch.object(page_cache, "set_alias", record_thread(page_cache.set_alias)):
+        result = asyncio.run(service.afetch_content(["python"]))
+
+    # Assert
+    assert [d.text for d in result] == ["Python content"]
+    assert threads
+    assert threading.main_thread() not in threads
+
+
+def test_afetch_content_fetches_at_most_max_workers_pages_at_once(monkeypatch):
+    # Arrange
+    _mock_wikipedia_api(monkeypatch, {})
+    service = WikipediaContentService(max_workers=2)
+    running, peak = 0, 0
+
+    async def afetch_page(client, title):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return title, Document(text=title)
+
+    monkeypatch.setattr(service, "_afetch_page", afetch_page)
+
+    # Act
+    result = asyncio.run(service.afetch_content([f"Page {i}" for i in range(6)]))
+
+    # Assert
+    assert len(result) == 6
+    assert peak == 2
@@ -1,9 +1,17 @@
+import asyncio
+
 import pytest
-from unittest.mock import patch, MagicMock, ANY
+from unittest.mock import AsyncMock, patch, MagicMock, ANY
 from llama_index.core.schema import Document
 from llama_index.core import VectorStoreIndex
 
-from api.services.wikipedia_rag_service import WikipediaRagService
+from api.cache.chat_session_store import ChatSessionStore
+from api.cache.semantic_answer_cache import CachedAnswer, SemanticAnswerCache
+from api.instrumentation.llm_call_counter import LLMCallCounter
+from api.schemas.chat_event import ChatEvent
+from api.services.deadline import Deadline
+from api.services.query_router_service import QueryRouterService
+from api.services.wikipedia_rag_service import DEADLINE_EXCEEDED_RESPONSE, WikipediaRagService
 
 
 @pytest.fixture
@@ -11,7 +19,8 @@ def mock_services():
     with patch('api.services.wikipedia_rag_service.WikipediaTitleExtractorService') as mock_extractor, \
             patch('api.services.wikipedia_rag_service.WikipediaContentService') as mock_fetcher, \
             patch('api.services.wikipedia_rag_service.VectorIndexingService') as mock_indexer, \
-            patch('api.services.wikipedia_rag_service.ReActAgentService') as mock_agent_svc:
+            patch('api.services.wikipedia_rag_service.ReActAgentService') as mock_agent_svc, \
+            patch('api.services.wikipedia_rag_service.SemanticAnswerCache.get_instance', return_value=None):
         # Setup mock services
         mock_extractor.return_value.extract_titles.return_value = ["Python", "Django"]
 
@@ -37,15 +46,15 @@ def test_create_agent_success(mock_services):
     service = WikipediaRagService()
 
     # Act
-    service.create_agent("Test query")
+    agent_service = service.create_agent("Test query")
 
     # Assert
+    assert agent_service is mock_services['agent_svc'].return_value
     mock_services['extractor'].return_value.extract_titles.assert_called_once_with("Test query")
     mock_services['fetcher'].return_value.fetch_content.assert_called_once_with(["Python", "Django"])
     mock_services['indexer'].return_value.create_index_from_documents.assert_called_once()
     mock_services['agent_svc'].return_value.create_wikipedia_tool.assert_called_once()
     mock_services['agent_svc'].return_value.initialize_agent.assert_called_once()
-    assert service._is_agent_initialized is True
 
 
 def test_create_agent_no_titles(mock_services):
@@ -56,7 +65,7 @@ def test_create_agent_no_titles(mock_services):
     # Act & Assert
     with pytest.raises(RuntimeError, match="No relevant Wikipedia pages found"):
         service.create_agent("Test query")
-    assert service._is_agent_initialized is False
+    mock_services['agent_svc'].return_value.initialize_agent.assert_not_called()
 
 
 def test_create_agent_no_documents(mock_services):
@@ -89,21 +98,22 @@ def test_query_first_time(mock_services):
 
     # Assert
     assert result == "Test response"
-    mock_services['agent_svc'].return_value.query.assert_called_once_with("Test query")
+    mock_services['agent_svc'].return_value.query.assert_called_once_with("Test query", None)
 
 
-def test_query_subsequent_calls(mock_services):
+def test_query_builds_a_new_agent_per_query_on_shared_sub_services(mock_services):
     # Arrange
     mock_services['agent_svc'].return_value.query.return_value = "Test response"
     service = WikipediaRagService()
-    service._is_agent_initialized = True
 
     # Act
-    result = service.query("Another query")
+    service.query("Test query")
+    service.query("Another query")
 
     # Assert
-    assert result == "Test response"
-    mock_services['extractor'].return_value.extract_titles.assert_not_called()
+    assert mock_services['extractor'].call_count == 1
+    assert mock_services['agent_svc'].call_count == 2
+    assert mock_services['extractor'].return_value.extract_titles.call_count == 2
 
 
 def test_query_handles_runtime_error(mock_services):
@@ -122,7 +132,6 @@ def test_query_handles_unexpected_error(mock_services):
     # Arrange
     mock_services['agent_svc'].return_value.query.side_effect = Exception("Unexpected error")
     service = WikipediaRagService()
-    service._is_agent_initialized = True
 
     # Act
     result = service.query("Test query")
@@ -136,8 +145,612 @@ def test_initialization():
     service = WikipediaRagService()
 
     # Assert
-    assert service._is_agent_initialized is False
     assert hasattr(service, 'title_extractor')
     assert hasattr(service, 'content_fetcher')
     assert hasattr(service, 'vector_indexer')
-    assert hasattr(service, 'agent_service')
\ No newline at end of file
+
+
+def test_get_instance_returns_shared_service(mock_services, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(WikipediaRagService, '_instance', None)
+
+    # Act
+    first = WikipediaRagService.get_instance()
+    second = WikipediaRagService.get_instance()
+
+    # Assert
+    assert first is second
+    assert mock_services['extractor'].call_count == 1
+
+
+def test_create_agent_uses_shared_corpus_index(mock_services):
+    # Arrange
+    corpus_index = MagicMock()
+    corpus_index.add_documents.return_value = MagicMock(spec=VectorStoreIndex)
+    with patch('api.services.wikipedia_rag_service.CorpusIndexService.get_instance', return_value=corpus_index):
+        service = WikipediaRagService()
+
+    # Act
+    service.create_agent("Test query")
+
+    # Assert
+    corpus_index.add_documents.assert_called_once()
+    mock_services['indexer'].return_value.create_index_from_documents.assert_not_called()
+    mock_services['agent_svc'].return_value.create_wikipedia_tool.assert_called_once_with(
+        corpus_index.add_documents.return_value
+    )
+
+
+def test_aquery_uses_async_pipeline(mock_services):
+    # Arrange
+    mock_services['extractor'].return_value.aextract_titles = AsyncMock(return_value=["Python"])
+    mock_services['fetcher'].return_value.afetch_content = AsyncMock(return_value=[Document(text="Test content")])
+    mock_services['indexer'].return_value.acreate_index_from_documents = AsyncMock(
+        return_value=MagicMock(spec=VectorStoreIndex)
+    )
+    mock_services['agent_svc'].return_value.aquery = AsyncMock(return_value="Test response")
+    service = WikipediaRagService()
+
+    # Act
+    result = asyncio.run(service.aquery("Test query"))
+
+    # Assert
+    assert result == "Test response"
+    mock_services['fetcher'].return_value.afetch_content.assert_awaited_once_with(["Python"])
+    mock_services['indexer'].return_value.acreate_index_from_documents.assert_awaited_once()
+    mock_services['agent_svc'].return_value.aquery.assert_awaited_once_with("Test query", None)
+    mock_services['extractor'].return_value.extract_titles.assert_not_called()
+
+
+def test_aquery_handles_runtime_error(mock_services):
+    # Arrange
+    mock_services['extractor'].return_value.aextract_titles = AsyncMock(return_value=[])
+    service = WikipediaRagService()
+
+    # Act
+    result = asyncio.run(service.aquery("Invalid query"))
+
+    # Assert
+    assert "I'm sorry, I couldn't process your query" in result
+
+
+def test_stream_query_reports_progress_then_answer(mock_services):
+    # Arrange
+    mock_services['agent_svc'].return_value.stream_query.return_value = iter([
+        ChatEvent(event="tool_call", data={"tool": "wikipedia_search"}),
+        ChatEvent(event="token", data={"text": "Answer"}),
+    ])
+    service = WikipediaRagService()
+
+    # Act
+    events = list(service.stream_query("Test query"))
+
+    # Assert
+    assert [e.event for e in events] == ["route", "titles", "pages", "index", "tool_call", "token", "done"]
+    assert events[0].data == {"route": "agent"}
+    assert events[1].data == {"titles": ["Python", "Django"]}
+    assert events[-1].data == {"route": "agent", "llm_calls": 0, "truncated": False}
+    mock_services['agent_svc'].return_value.stream_query.assert_called_once_with("Test query", None)
+
+
+def test_stream_query_reports_errors(mock_services):
+    # Arrange
+    mock_services['fetcher'].return_value.fetch_content.return_value = []
+    service = WikipediaRagService()
+
+    # Act
+    events = list(service.stream_query("Test query"))
+
+    # Assert
+    assert [e.event for e in events] == ["route", "titles", "error"]
+    assert "I'm sorry, I couldn't process your query" in events[-1].data["message"]
+
+
+@pytest.fixture
+def answer_cache():
+    cache = SemanticAnswerCache(threshold=0.9)
+    embed_model = MagicMock()
+    # Paraphrases of the same question get close embeddings
+    embed_model.get_query_embedding.side_effect = lambda q: [1.0, 0.1] if "france" in q.lower() else [0.0, 1.0]
+    embed_model.aget_query_embedding = AsyncMock(side_effect=embed_model.get_query_embedding.side_effect)
+    with patch('api.services.wikipedia_rag_service.SemanticAnswerCache.get_instance', return_value=cache), \
+            patch('api.services.wikipedia_rag_service.LLMConfig.get_embedding_model', return_value=embed_model):
+        yield cache
+
+
+def test_query_reuses_answer_of_paraphrase(mock_services, answer_cache):
+    # Arrange
+    mock_services['agent_svc'].return_value.query.return_value = "Paris."
+    service = WikipediaRagService()
+    service.query("What is the capital of France?")
+
+    # Act
+    result = service.query("what's France's capital city")
+
+    # Assert
+    assert result == "Paris."
+    mock_services['extractor'].return_value.extract_titles.assert_called_once()
+    mock_services['agent_svc'].return_value.query.assert_called_once()
+    assert answer_cache.stats()["hits"] == 1
+    assert answer_cache.stats()["hit_ratio"] == 0.5
+
+
+def test_query_does_not_reuse_answer_of_unrelated_query(mock_services, answer_cache):
+    # Arrange
+    mock_services['agent_svc'].return_value.query.return_value = "Paris."
+    service = WikipediaRagService()
+    service.query("What is the capital of France?")
+
+    # Act
+    service.query("Who wrote Hamlet?")
+
+    # Assert
+    assert mock_services['agent_svc'].return_value.query.call_count == 2
+
+
+def test_query_does_not_cache_failures(mock_services, answer_cache):
+    # Arrange
+    mock_services['extractor'].return_value.extract_titles.return_value = []
+    service = WikipediaRagService()
+
+    # Act
+    service.query("What is the capital of France?")
+
+    # Assert
+    assert answer_cache.stats()["size"] == 0
+
+
+def test_stream_query_streams_cached_answer(mock_services, answer_cache):
+    # Arrange
+    mock_services['agent_svc'].return_value.stream_query.return_value = iter([
+        ChatEvent(event="token", data={"text": "Paris"}),
+        ChatEvent(event="token", data={"text": "."}),
+    ])
+    service = WikipediaRagService()
+    list(service.stream_query("What is the capital of France?"))
+
+    # Act
+    events = list(service.stream_query("France capital?"))
+
+    # Assert
+    assert [e.event for e in events] == ["cache", "token", "done"]
+    assert events[1].data["text"] == "Paris."
+
+
+def test_aquery_reuses_answer_of_paraphrase(mock_services, answer_cache):
+    # Arrange
+    answer_cache.set([1.0, 0.1], CachedAnswer(query="What is the capital of France?", answer="Paris."))
+    service = WikipediaRagService()
+
+    # Act
+    result = asyncio.run(service.aquery("what's France's capital city"))
+
+    # Assert
+    assert result == "Paris."
+    mock_services['extractor'].return_value.aextract_titles.assert_not_called()
+
+
+def test_query_answers_single_hop_question_without_agent_loop(mock_services):
+    # Arrange
+    mock_services['agent_svc'].return_value.direct_query.return_value = "Paris."
+    service = WikipediaRagService()
+    service.query_router = QueryRouterService()
+
+    # Act
+    result = service.query("What is the capital of France?")
+
+    # Assert
+    assert result == "Paris."
+    mock_services['agent_svc'].return_value.direct_query.assert_called_once_with("What is the capital of France?")
+    mock_services['agent_svc'].return_value.query.assert_not_called()
+
+
+def test_query_keeps_agent_for_multi_step_question(mock_services):
+    # Arrange
+    mock_services['agent_svc'].return_value.query.return_value = "Paris is older."
+    service = WikipediaRagService()
+    service.query_router = QueryRouterService()
+
+    # Act
+    result = service.query("Which is older, Paris or London?")
+
+    # Assert
+    assert result == "Paris is older."
+    mock_services['agent_svc'].return_value.direct_query.assert_not_called()
+
+
+def test_query_records_llm_calls_per_path(mock_services):
+    # Arrange
+    mock_services['agent_svc'].return_value.direct_query.return_value = "Paris."
+    service = WikipediaRagService()
+    service.query_router = QueryRouterService()
+    service.llm_calls = LLMCallCounter()
+
+    # Act
+    service.query("What is the capital of France?")
+    service.query("Compare Paris and London")
+
+    # Assert
+    stats = service.llm_calls.stats()
+    assert stats["single_hop"]["queries"] == 1
+    assert stats["agent"]["queries"] == 1
+
+
+def test_stream_query_streams_single_hop_answer(mock_services):
+    # Arrange
+    mock_services['agent_svc'].return_value.stream_direct_query.return_value = iter([
+        ChatEvent(event="token", data={"text": "Paris."}),
+    ])
+    service = WikipediaRagService()
+    service.query_router = QueryRouterService()
+
+    # Act
+    events = list(service.stream_query("What is the capital of France?"))
+
+    # Assert
+    assert events[0].data == {"route": "single_hop"}
+    assert [e.event for e in events][-2:] == ["token", "done"]
+    mock_services['agent_svc'].return_value.stream_query.assert_not_called()
+
+
+def test_aquery_answers_single_hop_question_without_agent_loop(mock_services):
+    # Arrange
+    mock_services['extractor'].return_value.aextract_titles = AsyncMock(return_value=["France"])
+    mock_services['fetcher'].return_value.afetch_content = AsyncMock(return_value=[Document(text="Paris")])
+    mock_services['indexer'].return_value.acreate_index_from_documents = AsyncMock(return_value=MagicMock())
+    mock_services['agent_svc'].return_value.adirect_query = AsyncMock(return_value="Paris.")
+    service = WikipediaRagService()
+    service.query_router = QueryRouterService()
+
+    # Act
+    result = asyncio.run(service.aquery("What is the capital of France?"))
+
+    # Assert
+    assert result == "Paris."
+    mock_services['agent_svc'].return_value.adirect_query.assert_awaited_once()
+
+
+def test_create_agent_indexes_only_filtered_sections(mock_services):
+    # Arrange
+    section = Document(text="Section", metadata={"title": "Python"})
+    service = WikipediaRagService()
+    service.section_filter = MagicMock()
+    service.section_filter.filter_documents.return_value = [section, section]
+
+    # Act
+    service.create_agent("Test query")
+
+    # Assert
+    documents = mock_services['fetcher'].return_value.fetch_content.return_value
+    service.section_filter.filter_documents.assert_called_once_with("Test query", documents)
+    mock_services['indexer'].return_value.create_index_from_documents.assert_called_once_with([section, section])
+
+
+def test_create_agent_indexes_whole_pages_into_shared_corpus(mock_services):
+    # Arrange
+    service = WikipediaRagService()
+    service.section_filter = MagicMock()
+    service.corpus_index = MagicMock()
+
+    # Act
+    service.create_agent("Test query")
+
+    # Assert
+    service.section_filter.filter_documents.assert_not_called()
+    documents = mock_services['fetcher'].return_value.fetch_content.return_value
+    service.corpus_index.add_documents.assert_called_once_with(documents)
+
+
+def test_create_agent_uses_hybrid_retrieval_when_enabled(mock_services, settings):
+    # Arrange
+    settings.HYBRID_RETRIEVAL = {"ENABLED": True, "SIMILARITY_TOP_K": 3, "RRF_K": 60}
+    service = WikipediaRagService()
+
+    # Act
+    service.create_agent("Test query")
+
+    # Assert
+    mock_services['agent_svc'].return_value.create_wikipedia_tool.assert_called_once_with(
+        mock_services['indexer'].return_value.create_index_from_documents.return_value,
+        similarity_top_k=3,
+        hybrid=True,
+        rrf_k=60,
+    )
+
+
+def test_query_passes_deadline_to_agent(mock_services):
+    # Arrange
+    mock_services['agent_svc'].return_value.query.return_value = "Answer"
+    service = WikipediaRagService()
+    deadline = Deadline(budget_seconds=30)
+
+    # Act
+    result = service.query("Test query", deadline)
+
+    # Assert
+    assert result == "Answer"
+    assert deadline.truncated is False
+    mock_services['agent_svc'].return_value.query.assert_called_once_with("Test query", deadline)
+
+
+def test_query_stops_between_stages_when_budget_is_spent(mock_services):
+    # Arrange
+    deadline = Deadline(budget_seconds=30)
+
+    def extract_titles(user_query):
+        # A slow title extraction spends the whole budget
+        deadline.expires_at = 0
+        return ["Python"]
+
+    mock_services['extractor'].return_value.extract_titles.side_effect = extract_titles
+    service = WikipediaRagService()
+
+    # Act
+    result = service.query("Test query", deadline)
+
+    # Assert
+    assert result == DEADLINE_EXCEEDED_RESPONSE
+    assert deadline.truncated is True
+    mock_services['fetcher'].return_value.fetch_content.assert_not_called()
+
+
+def test_query_does_not_cache_truncated_answers(mock_services, answer_cache):
+    # Arrange
+    deadline = Deadline(budget_seconds=30)
+
+    def query(user_query, agent_deadline):
+        agent_deadline.truncated = True
+        return "Partial answer"
+
+    mock_services['agent_svc'].return_value.query.side_effect = query
+    service = WikipediaRagService()
+
+    # Act
+    result = service.query("What is the capital of France?", deadline)
+
+    # Assert
+    assert result == "Partial answer"
+    assert answer_cache.stats()["size"] == 0
+
+
+def test_stream_query_reports_truncated_answer(mock_services):
+    # Arrange
+    deadline = Deadline(budget_seconds=30)
+
+    def stream_query(user_query, agent_deadline):
+        agent_deadline.truncated = True
+        yield ChatEvent(event="token", data={"text": "Partial answer"})
+
+    mock_services['agent_svc'].return_value.stream_query.side_effect = stream_query
+    service = WikipediaRagService()
+
+    # Act
+    events = list(service.stream_query("Test query", deadline))
+
+    # Assert
+    assert events[-1].event == "done"
+    assert events[-1].data["truncated"] is True
+
+
+@pytest.fixture
+def session_store():
+    store = ChatSessionStore()
+    with patch('api.services.wikipedia_rag_service.ChatSessionStore.get_instance', return_value=store), \
+            patch('api.services.wikipedia_rag_service.ChatSessionStore.estimate_bytes', return_value=1000):
+        yield store
+
+
+def _pages(*titles):
+    return [Document(text=f"{title} content", metadata={"title": title}) for title in titles]
+
+
+def test_query_session_follow_up_only_queries_agent(mock_services, session_store):
+    # Arrange
+    mock_services['extractor'].return_value.extract_titles.return_value = ["France"]
+    mock_services['fetcher'].return_value.fetch_content.return_value = _pages("France")
+    mock_services['agent_svc'].return_value.query.side_effect = ["Paris.", "About 2 million."]
+    service = WikipediaRagService()
+    service.query("What is the capital of France?", session_id="conversation-1")
+
+    # Act
+    result = service.query("How many people live there?", session_id="conversation-1")
+
+    # Assert
+    assert result == "About 2 million."
+    assert mock_services['extractor'].return_value.extract_titles.call_count == 2
+    mock_services['fetcher'].return_value.fetch_content.assert_called_once()
+    mock_services['indexer'].return_value.insert_documents.assert_not_called()
+    mock_services['indexer'].return_value.create_index_from_documents.assert_called_once()
+    assert mock_services['agent_svc'].call_count == 1
+    assert session_store.stats() == {"hits": 1, "misses": 1, "evictions": 0, "sessions": 1, "bytes": 1000}
+
+
+def test_query_sessions_are_kept_apart(mock_services, session_store):
+    # Arrange
+    mock_services['agent_svc'].return_value.query.return_value = "Answer"
+    service = WikipediaRagService()
+    service.query("What is the capital of France?", session_id="conversation-1")
+
+    # Act
+    service.query("What is the capital of France?", session_id="conversation-2")
+
+    # Assert
+    assert mock_services['extractor'].return_value.extract_titles.call_count == 2
+    assert session_store.stats()["sessions"] == 2
+
+
+def test_query_session_does_not_use_answer_cache(mock_services, answer_cache, session_store):
+    # Arrange
+    mock_services['agent_svc'].return_value.query.return_value = "Paris."
+    service = WikipediaRagService()
+    service.query("What is the capital of France?")
+
+    # Act
+    service.query("What is the capital of France?", session_id="conversation-1")
+
+    # Assert
+    assert mock_services['agent_svc'].return_value.query.call_count == 2
+
+
+def test_stream_query_session_follow_up_skips_pipeline(mock_services, session_store):
+    # Arrange
+    mock_services['fetcher'].return_value.fetch_content.return_value = _pages("Python", "Django")
+    mock_services['agent_svc'].return_value.stream_query.side_effect = lambda q, d: iter([
+        ChatEvent(event="token", data={"text": "Answer"}),
+    ])
+    service = WikipediaRagService()
+    list(service.stream_query("What is the capital of France?", session_id="conversation-1"))
+
+    # Act
+    events = list(service.stream_query("How many people live there?", session_id="conversation-1"))
+
+    # Assert
+    assert [e.event for e in events] == ["session", "token", "done"]
+    assert events[0].data == {"session_id": "conversation-1", "resumed": True}
+    assert events[-1].data["route"] == "session"
+
+
+def test_aquery_session_follow_up_only_queries_agent(mock_services, session_store):
+    # Arrange
+    mock_services['extractor'].return_value.aextract_titles = AsyncMock(return_value=["France"])
+    mock_services['fetcher'].return_value.afetch_content = AsyncMock(return_value=_pages("France"))
+    mock_services['indexer'].return_value.acreate_index_from_documents = AsyncMock(return_value=MagicMock())
+    mock_services['agent_svc'].return_value.aquery = AsyncMock(side_effect=["Paris.", "About 2 million."])
+    service = WikipediaRagService()
+    asyncio.run(service.aquery("What is the capital of France?", session_id="conversation-1"))
+
+    # Act
+    result = asyncio.run(service.aquery("How many people live there?", session_id="conversation-1"))
+
+    # Assert
+    assert result == "About 2 million."
+    assert mock_services['extractor'].return_value.aextract_titles.await_count == 2
+    mock_services['fetcher'].return_value.afetch_content.assert_awaited_once()
+
+
+def test_query_session_follow_up_indexes_only_new_topics(mock_services, session_store):
+    # Arrange
+    mock_services['extractor'].return_value.extract_titles.side_effect = [["France"], ["France", "Germany"]]
+    mock_services['fetcher'].return_value.fetch_content.side_effect = [_pages("France"), _pages("Germany")]
+    mock_services['indexer'].return_value.insert_documents.return_value = 3
+    mock_services['agent_svc'].return_value.query.side_effect = ["Paris.", "Berlin."]
+    service = WikipediaRagService()
+    service.query("What is the capital of France?", session_id="conversation-1")
+    index = mock_services['indexer'].return_value.create_index_from_documents.return_value
+
+    # Act
+    result = service.query("And the capital of Germany?", session_id="conversation-1")
+
+    # Assert
+    assert result == "Berlin."
+    mock_services['fetcher'].return_value.fetch_content.assert_called_with(["Germany"])
+    inserted_index, inserted_documents = mock_services['indexer'].return_value.insert_documents.call_args.args
+    assert inserted_index is index
+    assert [d.metadata["title"] for d in inserted_documents] == ["Germany"]
+    mock_services['indexer'].return_value.create_index_from_documents.assert_called_once()
+    assert mock_services['agent_svc'].call_count == 1
+    assert session_store.get("conversation-1").titles == ["France", "Germany"]
+
+
+def test_query_session_follow_up_skips_pages_already_indexed(mock_services, session_store):
+    # Arrange
+    mock_services['extractor'].return_value.extract_titles.side_effect = [["France"], ["French Republic"]]
+    mock_services['fetcher'].return_value.fetch_content.side_effect = [_pages("France"), _pages("France")]
+    service = WikipediaRagService()
+    service.query("What is the capital of France?", session_id="conversation-1")
+
+    # Act
+    service.query("What is the French Republic?", session_id="conversation-1")
+    service.query("Tell me more about the French Republic", session_id="conversation-1")
+
+    # Assert
+    assert mock_services['fetcher'].return_value.fetch_content.call_count == 2
+    mock_services['indexer'].return_value.insert_documents.assert_not_called()
+
+
+def test_query_session_follow_up_accounts_for_grown_index(mock_services, session_store):
+    # Arrange
+    mock_services['extractor'].return_value.extract_titles.side_effect = [["France"], ["Germany"]]
+    mock_services['fetcher'].return_value.fetch_content.side_effect = [_pages("France"), _pages("Germany")]
+    mock_services['indexer'].return_value.insert_documents.return_value = 3
+    service = WikipediaRagService()
+    service.query("What is the capital of France?", session_id="conversation-1")
+
+    # Act
+    with patch('api.services.wikipedia_rag_service.ChatSessionStore.estimate_bytes', return_value=2500):
+        service.query("And the capital of Germany?", session_id="conversation-1")
+
+    # Assert
+    assert session_store.stats()["bytes"] == 2500
+
+
+def test_query_session_follow_up_answers_when_new_pages_fail(mock_services, session_store):
+    # Arrange
+    mock_services['extractor'].return_value.extract_titles.side_effect = [["France"], ["Germany"]]
+    mock_services['fetcher'].return_value.fetch_content.side_effect = [_pages("France"), Exception("Network error")]
+    mock_services['agent_svc'].return_value.query.side_effect = ["Paris.", "Berlin."]
+    service = WikipediaRagService()
+    service.query("What is the capital of France?", session_id="conversation-1")
+
+    # Act
+    result = service.query("And the capital of Germany?", session_id="conversation-1")
+
+    # Assert
+    assert result == "Berlin."
+    assert session_store.get("conversation-1").titles == ["France"]
+
+
+def test_stream_query_session_follow_up_reports_new_pages(mock_services, session_store):
+    # Arrange
+    mock_services['extractor'].return_value.extract_titles.side_effect = [["France"], ["Germany"]]
+    mock_services['fetcher'].return_value.fetch_content.side_effect = [_pages("France"), _pages("Germany")]
+    mock_services['indexer'].return_value.insert_documents.return_value = 3
+    mock_services['agent_svc'].return_value.stream_query.side_effect = lambda q, d: iter([
+        ChatEvent(event="token", data={"text": "Answer"}),
+    ])
+    service = WikipediaRagService()
+    list(service.stream_query("What is the capital of France?", session_id="conversation-1"))
+
+    # Act
+    events = list(service.stream_query("And the capital of Germany?", session_id="conversation-1"))
+
+    # Assert
+    assert [e.event for e in events] == ["session", "titles", "pages", "index", "token", "done"]
+    assert events[1].data == {"titles": ["Germany"]}
+    assert events[2].data == {"titles": ["Germany"]}
+
+
+def test_aquery_session_follow_up_indexes_only_new_topics(mock_services, session_store):
+    # Arrange
+    mock_services['extractor'].return_value.aextract_titles = AsyncMock(side_effect=[["France"], ["Germany"]])
+    mock_services['fetcher'].return_value.afetch_content = AsyncMock(side_effect=[_pages("France"), _pages("Germany")])
+    mock_services['indexer'].return_value.acreate_index_from_documents = AsyncMock(return_value=MagicMock())
+    mock_services['indexer'].return_value.ainsert_documents = AsyncMock(return_value=3)
+    mock_services['agent_svc'].return_value.aquery = AsyncMock(side_effect=["Paris.", "Berlin."])
+    service = WikipediaRagService()
+    asyncio.run(service.aquery("What is the capital of France?", session_id="conversation-1"))
+
+    # Act
+    result = asyncio.run(service.aquery("And the capital of Germany?", session_id="conversation-1"))
+
+    # Assert
+    assert result == "Berlin."
+    mock_services['fetcher'].return_value.afetch_content.assert_awaited_with(["Germany"])
+    mock_services['indexer'].return_value.ainsert_documents.assert_awaited_once()
+    assert session_store.get("conversation-1").titles == ["France", "Germany"]
+
+
+def test_query_session_growth_can_be_disabled(mock_services, session_store, settings):
+    # Arrange
+    settings.CHAT_SESSIONS = {**settings.CHAT_SESSIONS, "GROW_INDEX": False}
+    mock_services['extractor'].return_value.extract_titles.side_effect = [["France"], ["Germany"]]
+    mock_services['fetcher'].return_value.fetch_content.return_value = _pages("France")
+    service = WikipediaRagService()
+    service.query("What is the capital of France?", session_id="conversation-1")
+
+    # Act
+    service.query("And the capital of Germany?", session_id="conversation-1")
+
+    # Assert
+    mock_services['extractor'].return_value.extract_titles.assert_called_once()
+    mock_services['indexer'].return_value.insert_documents.assert_not_called()
@@ -1,5 +1,7 @@
-from unittest.mock import patch, MagicMock
+import asyncio
+from unittest.mock import AsyncMock, patch, MagicMock
 
+from api.cache.title_cache import TitleCache
 from api.services.wikipedia_title_extractor_service import WikipediaTitleExtractorService
 
 
@@ -55,3 +57,71 @@ def test_extract_titles_handles_validation_error(mock_program_cls, mock_wte):
     # Should return an empty list on validation error
     assert result == []
     mock_program.assert_called_once_with(query="test query")
+
+
+@patch("api.services.wikipedia_title_extractor_service.FunctionCallingProgram")
+def test_aextract_titles_returns_titles(mock_program_cls):
+    # Arrange
+    mock_program = MagicMock()
+    mock_program.acall = AsyncMock(return_value={"titles": ["A", "B"]})
+    mock_program_cls.from_defaults.return_value = mock_program
+    service = WikipediaTitleExtractorService()
+
+    # Act
+    result = asyncio.run(service.aextract_titles("test query"))
+
+    # Assert
+    assert result == ["A", "B"]
+    mock_program.acall.assert_awaited_once_with(query="test query")
+    mock_program.assert_not_called()
+
+
+@patch("api.services.wikipedia_title_extractor_service.FunctionCallingProgram")
+def test_extract_titles_reuses_titles_of_normalized_query(mock_program_cls):
+    # Arrange
+    mock_program = MagicMock()
+    mock_program.return_value = {"titles": ["Paris", "France"]}
+    mock_program_cls.from_defaults.return_value = mock_program
+    service = WikipediaTitleExtractorService(title_cache=TitleCache())
+    service.extract_titles("What is the capital of France?")
+
+    # Act
+    result = service.extract_titles("what is the capital of  France")
+
+    # Assert
+    assert result == ["Paris", "France"]
+    mock_program.assert_called_once()
+
+
+@patch("api.services.wikipedia_title_extractor_service.FunctionCallingProgram")
+def test_extract_titles_does_not_cache_empty_result(mock_program_cls):
+    # Arrange
+    mock_program = MagicMock()
+    mock_program.side_effect = [{"titles": []}, {"titles": ["Paris"]}]
+    mock_program_cls.from_defaults.return_value = mock_program
+    service = WikipediaTitleExtractorService(title_cache=TitleCache())
+    service.extract_titles("capital of France")
+
+    # Act
+    result = service.extract_titles("capital of France")
+
+    # Assert
+    assert result == ["Paris"]
+    assert mock_program.call_count == 2
+
+
+@patch("api.services.wikipedia_title_extractor_service.FunctionCallingProgram")
+def test_aextract_titles_reuses_cached_titles(mock_program_cls):
+    # Arrange
+    mock_program = MagicMock()
+    mock_program_cls.from_defaults.return_value = mock_program
+    title_cache = TitleCache()
+    title_cache.set("capital of France", ["Paris"])
+    service = WikipediaTitleExtractorService(title_cache=title_cache)
+
+    # Act
+    result = asyncio.run(service.aextract_titles("Capital of France?"))
+
+    # Assert
+    assert result == ["Paris"]
+    mock_program.acall.assert_not_called()
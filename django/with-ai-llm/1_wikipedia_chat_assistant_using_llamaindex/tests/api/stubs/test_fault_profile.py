@@ -0,0 +1,79 @@
+import pytest
+
+from api.stubs.fault_profile import FaultProfile
+
+
+def test_latency_is_constant_by_default():
+    # Arrange
+    profile = FaultProfile(latency_ms=250)
+
+    # Act
+    delays = [profile.latency() for _ in range(5)]
+
+    # Assert
+    assert delays == [0.25] * 5
+
+
+def test_latency_replays_with_same_seed():
+    # Arrange
+    first = FaultProfile(latency_ms=100, jitter_ms=50, distribution="lognormal", seed=7)
+    second = FaultProfile(latency_ms=100, jitter_ms=50, distribution="lognormal", seed=7)
+
+    # Act
+    first_delays = [first.latency() for _ in range(10)]
+    second_delays = [second.latency() for _ in range(10)]
+
+    # Assert
+    assert first_delays == second_delays
+    assert len(set(first_delays)) > 1
+
+
+def test_uniform_latency_stays_within_jitter():
+    # Arrange
+    profile = FaultProfile(latency_ms=100, jitter_ms=20, distribution="uniform", seed=0)
+
+    # Act
+    delays = [profile.latency() for _ in range(100)]
+
+    # Assert
+    assert all(0.08 <= d <= 0.12 for d in delays)
+
+
+def test_latency_is_never_negative():
+    # Arrange
+    profile = FaultProfile(latency_ms=0, jitter_ms=100, distribution="normal", seed=0)
+
+    # Act
+    delays = [profile.latency() for _ in range(100)]
+
+    # Assert
+    assert min(delays) == 0.0
+
+
+def test_error_rate_and_statuses():
+    # Arrange
+    profile = FaultProfile(error_rate=0.5, error_statuses=[429, 503], seed=0)
+
+    # Act
+    errors = [profile.error() for _ in range(1000)]
+
+    # Assert
+    failures = [e for e in errors if e is not None]
+    assert 400 < len(failures) < 600
+    assert set(failures) == {429, 503}
+
+
+def test_no_errors_by_default():
+    # Arrange
+    profile = FaultProfile()
+
+    # Act & Assert
+    assert all(profile.error() is None for _ in range(100))
+
+
+def test_invalid_profile_is_rejected():
+    # Act & Assert
+    with pytest.raises(ValueError, match="Unknown latency distribution"):
+        FaultProfile(distribution="pareto")
+    with pytest.raises(ValueError, match="Error rate must be between 0 and 1"):
+        FaultProfile(error_rate=1.5)
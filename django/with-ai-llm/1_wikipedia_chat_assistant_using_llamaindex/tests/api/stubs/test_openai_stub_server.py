@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import httpx
+import numpy as np
+import pytest
+from llama_index.core.llms import ChatMessage
+from llama_index.embeddings.openai import OpenAIEmbedding
+from llama_index.llms.openai import OpenAI
+from llama_index.core.program import FunctionCallingProgram
+
+from api.schemas.wikipedia_title_extraction import WikipediaTitleExtraction
+from api.stubs.fault_profile import FaultProfile
+from api.stubs.openai_stub_server import OpenAIStubServer
+
+
+@pytest.fixture
+def server():
+    with OpenAIStubServer(titles=["Paris", "France", "Python (programming language)"]) as server:
+        yield server
+
+
+def _llm(server):
+    return OpenAI(model="gpt-4o", api_key="sk-stub", api_base=server.api_base, max_retries=0)
+
+
+def test_function_call_returns_known_titles(server):
+    # Arrange
+    program = FunctionCallingProgram.from_defaults(
+        output_cls=WikipediaTitleExtraction,
+        prompt_template_str="USER QUERY: {query}",
+        llm=_llm(server),
+    )
+
+    # Act
+    result = program(query="Is Python popular in France?")
+
+    # Assert
+    assert result.titles == ["Python (programming language)", "France"]
+
+
+def test_function_call_falls_back_on_capitalized_phrases():
+    # Arrange
+    with OpenAIStubServer() as server:
+        program = FunctionCallingProgram.from_defaults(
+            output_cls=WikipediaTitleExtraction,
+            prompt_template_str="USER QUERY: {query}",
+            llm=_llm(server),
+        )
+
+        # Act
+        result = program(query="Who founded the Roman Empire?")
+
+    # Assert
+    assert result.titles == ["Roman Empire"]
+
+
+def test_react_prompt_calls_tool_then_answers(server):
+    # Arrange
+    llm = _llm(server)
+    system = ChatMessage(role="system", content="You have access to:\n> Tool Name: wikipedia_search\n")
+
+    # Act
+    action = llm.chat([system, ChatMessage(role="user", content="What is the capital of France?")])
+    answer = llm.chat([
+        system,
+        ChatMessage(role="user", content="What is the capital of France?"),
+        ChatMessage(role="assistant", content=action.message.content),
+        ChatMessage(role="user", content="Observation: Paris is the capital of France."),
+    ])
+
+    # Assert
+    assert "Action: wikipedia_search" in action.message.content
+    assert 'Action Input: {"input": "What is the capital of France?"}' in action.message.content
+    assert answer.message.content.endswith("Answer: Paris is the capital of France.")
+
+
+def test_synthesis_answers_with_best_matching_sentence(server):
+    # Arrange
+    prompt = (
+        "Context information is below.\n---------------------\ntitle: Paris\n\n"
+        "Paris is in France. The city has about 2.1 million residents.\n---------------------\n"
+        "Query: How many residents does the city have?\nAnswer: "
+    )
+
+    # Act
+    response = _llm(server).complete(prompt)
+
+    # Assert
+    assert response.text == "The city has about 2.1 million residents."
+
+
+def test_stream_sends_words_and_usage(server):
+    # Act
+    chunks = list(_llm(server).stream_complete("Hello there"))
+
+    # Assert
+    assert len(chunks) > 1
+    assert chunks[-1].text == "Stub response to: Hello there"
+
+
+def test_stream_waits_between_chunks():
+    # Arrange
+    with OpenAIStubServer(token_latency_ms=20) as server:
+        started_at = time.perf_counter()
+
+        # Act
+        list(_llm(server).stream_complete("one two three"))
+
+    # Assert
+    assert time.perf_counter() - started_at >= 0.1
+
+
+def test_embeddings_are_deterministic_and_share_words(server):
+    # Arrange
+    embed_model = OpenAIEmbedding(api_key="sk-stub", api_base=server.api_base, max_retries=0)
+
+    # Act
+    paris, paris_again, capital, python = embed_model.get_text_embedding_batch(
+        ["Paris is the capital of France", "Paris is the capital of France", "capital of France", "Python"]
+    )
+
+    # Assert
+    assert len(paris) == 1536
+    assert paris == paris_again
+    assert np.dot(paris, capital) > np.dot(paris, python)
+    assert np.linalg.norm(paris) == pytest.approx(1.0, abs=1e-5)
+
+
+def test_async_embeddings_honor_dimensions(server):
+    # Arrange
+    embed_model = OpenAIEmbedding(api_key="sk-stub", api_base=server.api_base, dimensions=64, max_retries=0)
+
+    # Act
+    embedding = asyncio.run(embed_model.aget_query_embedding("Paris"))
+
+    # Assert
+    assert len(embedding) == 64
+
+
+def test_injected_errors_are_openai_errors():
+    # Arrange
+    with OpenAIStubServer(fault_profile=FaultProfile(error_rate=1.0, error_statuses=[429])) as server:
+        # Act
+        response = httpx.post(server.api_base + "/chat/completions", json={"messages": []})
+
+    # Assert
+    assert response.status_code == 429
+    assert response.json()["error"]["code"] == "rate_limit_exceeded"
+
+
+def test_latency_is_injected():
+    # Arrange
+    with OpenAIStubServer(fault_profile=FaultProfile(latency_ms=100)) as server:
+        started_at = time.perf_counter()
+
+        # Act
+        httpx.get(server.api_base + "/models")
+
+    # Assert
+    assert time.perf_counter() - started_at >= 0.1
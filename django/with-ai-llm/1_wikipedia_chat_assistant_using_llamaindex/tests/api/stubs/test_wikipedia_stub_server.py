@@ -0,0 +1,133 @@
+import asyncio
+
+import httpx
+import pytest
+import wikipedia
+
+from api.config.http_clients import HTTPClientPool
+from api.services.wikipedia_content_service import WikipediaContentService
+from api.stubs.fault_profile import FaultProfile
+from api.stubs.wikipedia_stub_server import WikipediaStubServer
+
+PAGES = [
+    {"id": "1", "title": "Paris", "text": "Paris is the capital of France."},
+    {"id": "2", "title": "France", "text": "France is a country in Western Europe."},
+    {"id": "3", "title": "Python (programming language)", "text": "Python is a programming language."},
+]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with WikipediaStubServer(pages=PAGES) as server:
+        monkeypatch.setattr(wikipedia.wikipedia, "API_URL", server.api_url)
+        yield server
+
+
+def test_search_ranks_title_matches_first(server):
+    # Act
+    results = wikipedia.search("France", results=2)
+
+    # Assert
+    assert results == ["France", "Paris"]
+
+
+def test_search_without_match_is_empty(server):
+    # Act
+    results = wikipedia.search("Photosynthesis")
+
+    # Assert
+    assert results == []
+
+
+def test_page_serves_content_and_revision(server):
+    # Act
+    page = wikipedia.page("Python (programming language)", auto_suggest=False)
+
+    # Assert
+    assert page.pageid == "3"
+    assert page.content == "Python is a programming language."
+    assert page.revision_id == page.parent_id + 1
+    assert page.url.endswith("/wiki/Python_(programming_language)")
+
+
+def test_page_missing(server):
+    # Act & Assert
+    with pytest.raises(wikipedia.PageError):
+        wikipedia.page("Berlin", auto_suggest=False)
+
+
+def test_fetch_content_runs_against_stub(server):
+    # Arrange
+    service = WikipediaContentService(max_workers=2)
+
+    # Act
+    documents = service.fetch_content(["Paris", "France"])
+
+    # Assert
+    assert [d.metadata["title"] for d in documents] == ["Paris", "France"]
+    assert documents[0].text == "Paris is the capital of France."
+
+
+def test_afetch_content_runs_against_stub(server):
+    # Arrange
+    service = WikipediaContentService()
+
+    # Act
+    documents = asyncio.run(service.afetch_content(["Paris", "Python"]))
+
+    # Assert
+    assert [d.metadata["title"] for d in documents] == ["Paris", "Python (programming language)"]
+    assert documents[1].doc_id == "3"
+
+
+def test_afetch_content_reuses_pooled_connections(server):
+    # Arrange
+    http_pool = HTTPClientPool("wikipedia")
+    service = WikipediaContentService(http_pool=http_pool)
+
+    async def fetch_twice():
+        await service.afetch_content(["Paris"])
+        return await service.afetch_content(["France"])
+
+    # Act
+    documents = asyncio.run(fetch_twice())
+    http_pool.close()
+
+    # Assert
+    assert [d.metadata["title"] for d in documents] == ["France"]
+    assert http_pool.stats() == {"requests": 4, "connections": 1}
+
+
+def test_fetch_content_reuses_pooled_client(server):
+    # Arrange
+    http_pool = HTTPClientPool("wikipedia")
+    service = WikipediaContentService(max_workers=1, http_pool=http_pool)
+
+    # Act
+    documents = service.fetch_content(["Paris", "France"])
+    stats = http_pool.stats()
+    http_pool.close()
+
+    # Assert
+    assert [d.metadata["title"] for d in documents] == ["Paris", "France"]
+    assert stats == {"requests": 4, "connections": 1}
+
+
+def test_injected_errors_are_mediawiki_errors():
+    # Arrange
+    with WikipediaStubServer(pages=PAGES, fault_profile=FaultProfile(error_rate=1.0, error_statuses=[503])) as server:
+        # Act
+        response = httpx.get(server.api_url, params={"action": "query", "list": "search", "srsearch": "Paris"})
+
+    # Assert
+    assert response.status_code == 503
+    assert "info" in response.json()["error"]
+    assert server.request_counts() == {"/w/api.php": 1}
+
+
+def test_default_corpus_is_loaded():
+    # Act
+    server = WikipediaStubServer()
+
+    # Assert
+    assert "France" in server.titles
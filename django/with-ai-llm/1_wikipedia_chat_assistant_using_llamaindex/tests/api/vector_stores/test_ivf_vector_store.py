@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from api.vector_stores.ivf_vector_store import IVFVectorStore
+from api.vector_stores.numpy_vector_store import NumpyVectorStore
+
+
+def _clustered_nodes(count, dimension=32, clusters=20, seed=0, prefix="n"):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    embeddings = centers[rng.integers(clusters, size=count)] + 0.1 * rng.normal(size=(count, dimension))
+    return [TextNode(id_=f"{prefix}{i}", text="", embedding=e.tolist()) for i, e in enumerate(embeddings)]
+
+
+def test_queries_are_exact_before_training():
+    # Arrange
+    store = IVFVectorStore(min_train_size=1000)
+    exact_store = NumpyVectorStore()
+    nodes = _clustered_nodes(100)
+    store.add(nodes)
+    exact_store.add(nodes)
+    query = VectorStoreQuery(query_embedding=nodes[0].embedding, similarity_top_k=5)
+
+    # Act & Assert
+    assert not store.is_trained
+    assert store.query(query).ids == exact_store.query(query).ids
+
+
+def test_query_on_empty_store_returns_no_nodes():
+    # Arrange
+    store = IVFVectorStore()
+
+    # Act
+    result = store.query(VectorStoreQuery(query_embedding=[1.0, 0.0], similarity_top_k=2))
+
+    # Assert
+    assert result.ids == []
+
+
+def test_training_keeps_high_recall():
+    # Arrange
+    store = IVFVectorStore(min_train_size=500, nlist=40, nprobe=4)
+    exact_store = NumpyVectorStore()
+    nodes = _clustered_nodes(2000)
+    store.add(nodes)
+    exact_store.add(nodes)
+    rng = np.random.default_rng(1)
+    queries = [
+        VectorStoreQuery(query_embedding=(np.asarray(n.embedding) + 0.05 * rng.normal(size=32)).tolist(), similarity_top_k=10)
+        for n in nodes[:50]
+    ]
+
+    # Act
+    recall = np.mean([
+        len(set(store.query(q).ids) & set(exact_store.query(q).ids)) / 10 for q in queries
+    ])
+
+    # Assert
+    assert store.is_trained
+    assert recall >= 0.9
+
+
+def test_incremental_inserts_are_searchable():
+    # Arrange
+    store = IVFVectorStore(min_train_size=500, retrain_growth=100)
+    store.add(_clustered_nodes(1000))
+    new_node = _clustered_nodes(1, seed=1, prefix="new")[0]
+
+    # Act
+    store.add([new_node])
+    result = store.query(VectorStoreQuery(query_embedding=new_node.embedding, similarity_top_k=1))
+
+    # Assert
+    assert result.ids == ["new0"]
+
+
+def test_delete_keeps_assignments_aligned():
+    # Arrange
+    store = IVFVectorStore(min_train_size=500)
+    nodes = _clustered_nodes(1000)
+    store.add(nodes)
+
+    # Act
+    store.delete_nodes(node_ids=[n.node_id for n in nodes[:500]])
+    result = store.query(VectorStoreQuery(query_embedding=nodes[700].embedding, similarity_top_k=1))
+
+    # Assert
+    assert store.size == 500
+    assert result.ids == ["n700"]
+    assert result.similarities[0] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_clear_resets_training():
+    # Arrange
+    store = IVFVectorStore(min_train_size=500)
+    store.add(_clustered_nodes(1000))
+
+    # Act
+    store.clear()
+
+    # Assert
+    assert not store.is_trained
+    assert store.size == 0
@@ -0,0 +1,162 @@
+import numpy as np
+import pytest
+from llama_index.core.schema import TextNode, NodeRelationship, RelatedNodeInfo
+from llama_index.core.vector_stores import SimpleVectorStore
+from llama_index.core.vector_stores.types import (
+    MetadataFilter,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+)
+
+from api.vector_stores.numpy_vector_store import NumpyVectorStore
+
+
+def _node(node_id, embedding, title="Paris", ref_doc_id="doc-1"):
+    return TextNode(
+        id_=node_id,
+        text=node_id,
+        embedding=embedding,
+        metadata={"title": title},
+        relationships={NodeRelationship.SOURCE: RelatedNodeInfo(node_id=ref_doc_id)},
+    )
+
+
+@pytest.fixture
+def nodes():
+    return [
+        _node("a", [1.0, 0.0, 0.0]),
+        _node("b", [0.0, 1.0, 0.0], title="France"),
+        _node("c", [0.7, 0.7, 0.0], ref_doc_id="doc-2"),
+        _node("d", [0.0, 0.0, 2.0], title="France", ref_doc_id="doc-2"),
+    ]
+
+
+def test_query_returns_top_k_by_cosine_similarity(nodes):
+    # Arrange
+    store = NumpyVectorStore(initial_capacity=1)
+    store.add(nodes)
+
+    # Act
+    result = store.query(VectorStoreQuery(query_embedding=[2.0, 0.2, 0.0], similarity_top_k=2))
+
+    # Assert
+    assert result.ids == ["a", "c"]
+    assert result.similarities[0] == pytest.approx(0.995, abs=1e-3)
+
+
+def test_query_on_empty_store_returns_no_nodes():
+    # Arrange
+    store = NumpyVectorStore()
+
+    # Act
+    result = store.query(VectorStoreQuery(query_embedding=[1.0, 0.0, 0.0], similarity_top_k=2))
+
+    # Assert
+    assert result.ids == []
+    assert result.similarities == []
+
+
+def test_query_matches_simple_vector_store():
+    # Arrange
+    rng = np.random.default_rng(0)
+    nodes = [_node(f"n{i}", rng.normal(size=16).tolist()) for i in range(200)]
+    query_embedding = rng.normal(size=16).tolist()
+    numpy_store = NumpyVectorStore()
+    numpy_store.add(nodes)
+    simple_store = SimpleVectorStore()
+    simple_store.add(nodes)
+    query = VectorStoreQuery(query_embedding=query_embedding, similarity_top_k=5)
+
+    # Act
+    numpy_result = numpy_store.query(query)
+    simple_result = simple_store.query(query)
+
+    # Assert
+    assert numpy_result.ids == simple_result.ids
+    assert numpy_result.similarities == pytest.approx(simple_result.similarities, abs=1e-5)
+
+
+def test_query_applies_node_ids_and_metadata_filters(nodes):
+    # Arrange
+    store = NumpyVectorStore()
+    store.add(nodes)
+    filters = MetadataFilters(filters=[MetadataFilter(key="title", value="France")])
+
+    # Act
+    by_metadata = store.query(VectorStoreQuery(query_embedding=[1.0, 0.0, 0.0], similarity_top_k=5, filters=filters))
+    by_ids = store.query(VectorStoreQuery(query_embedding=[1.0, 0.0, 0.0], similarity_top_k=5, node_ids=["b", "d"]))
+
+    # Assert
+    assert sorted(by_metadata.ids) == ["b", "d"]
+    assert sorted(by_ids.ids) == ["b", "d"]
+
+
+def test_query_rejects_unsupported_mode(nodes):
+    # Arrange
+    store = NumpyVectorStore()
+    store.add(nodes)
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="Invalid query mode"):
+        store.query(VectorStoreQuery(query_embedding=[1.0, 0.0, 0.0], mode=VectorStoreQueryMode.MMR))
+
+
+def test_get_returns_original_embedding(nodes):
+    # Arrange
+    store = NumpyVectorStore()
+    store.add(nodes)
+
+    # Act & Assert
+    assert store.get("d") == pytest.approx([0.0, 0.0, 2.0])
+
+
+def test_delete_removes_document_nodes(nodes):
+    # Arrange
+    store = NumpyVectorStore()
+    store.add(nodes)
+
+    # Act
+    store.delete("doc-2")
+    result = store.query(VectorStoreQuery(query_embedding=[1.0, 1.0, 1.0], similarity_top_k=10))
+
+    # Assert
+    assert store.size == 2
+    assert sorted(result.ids) == ["a", "b"]
+    assert store.get("b") == pytest.approx([0.0, 1.0, 0.0])
+
+
+def test_add_replaces_existing_node(nodes):
+    # Arrange
+    store = NumpyVectorStore()
+    store.add(nodes)
+
+    # Act
+    store.add([_node("a", [0.0, 0.0, 1.0])])
+
+    # Assert
+    assert store.size == 4
+    assert store.get("a") == pytest.approx([0.0, 0.0, 1.0])
+
+
+def test_add_rejects_mismatched_dimension(nodes):
+    # Arrange
+    store = NumpyVectorStore()
+    store.add(nodes)
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="dimension"):
+        store.add([_node("e", [1.0, 0.0])])
+
+
+def test_clear_removes_every_node(nodes):
+    # Arrange
+    store = NumpyVectorStore()
+    store.add(nodes)
+
+    # Act
+    store.clear()
+
+    # Assert
+    assert store.size == 0
+    assert store.query(VectorStoreQuery(query_embedding=[1.0, 0.0, 0.0])).ids == []
@@ -4,12 +4,23 @@ Tests for the ChatView API endpoint.
 This module contains test cases for the ChatView, which handles chat requests
 and returns responses using the WikipediaRagService.
 """
-from typing import Dict
-from unittest.mock import patch, MagicMock
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from unittest.mock import ANY, AsyncMock, patch, MagicMock
 
-from django.test import TestCase
+from django.core.asgi import get_asgi_application
+from django.test import AsyncClient, TestCase, override_settings
+from llama_index.core.llms import MockLLM
 from rest_framework import status
 
+from api.instrumentation.stage_timer import StageTimer
+from api.schemas.chat_event import ChatEvent
+from api.services.deadline import Deadline
+from api.views.chat.index import iterate_in_thread
+
 
 class TestChatView(TestCase):
     """Test cases for the ChatView API endpoint."""
@@ -45,13 +56,13 @@ class TestChatView(TestCase):
         # The actual error message from Pydantic might be different, so we'll just check for the field name
         self.assertTrue(any("query" in msg.lower() for msg in data["details"]))
 
-    @patch('api.views.chat.index.WikipediaRagService')
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
     def test_post_success(self, mock_rag_service: MagicMock) -> None:
         """Test that a valid request returns a successful response."""
         # Arrange
         mock_response = "Python is a high-level programming language..."
-        mock_service = mock_rag_service.return_value
-        mock_service.query.return_value = mock_response
+        mock_service = mock_rag_service.get_instance.return_value
+        mock_service.aquery = AsyncMock(return_value=mock_response)
 
         # Create a valid payload that matches the expected format
         query = "What is Python?"
@@ -69,15 +80,16 @@ class TestChatView(TestCase):
                          f"Expected status 200 but got {response.status_code}. Response: {response.content}")
         data = response.json()
         self.assertEqual(data["response"], mock_response)
-        mock_service.query.assert_called_once_with(query)
+        self.assertFalse(data["truncated"])
+        mock_service.aquery.assert_awaited_once_with(query, ANY, None)
 
-    @patch('api.views.chat.index.WikipediaRagService')
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
     def test_service_error_handling(self, mock_rag_service: MagicMock) -> None:
         """Test that service errors are properly handled."""
         # Arrange
-        mock_service = mock_rag_service.return_value
+        mock_service = mock_rag_service.get_instance.return_value
         # We need to mock the service to raise the exception after validation passes
-        mock_service.query.side_effect = Exception("Service error")
+        mock_service.aquery = AsyncMock(side_effect=Exception("Service error"))
 
         # Create a valid payload that will pass validation
         valid_payload = {"query": "test query"}
@@ -95,6 +107,260 @@ class TestChatView(TestCase):
         data = response.json()
         self.assertEqual(data["error"], "Unexpected error")
 
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    async def test_post_stream_sends_server_sent_events(self, mock_rag_service: MagicMock) -> None:
+        """Test that a streaming request returns the service events as Server-Sent Events."""
+        # Arrange
+        mock_service = mock_rag_service.get_instance.return_value
+        mock_service.stream_query.return_value = iter([
+            ChatEvent(event="titles", data={"titles": ["Python"]}),
+            ChatEvent(event="token", data={"text": "Python"}),
+            ChatEvent(event="done"),
+        ])
+
+        # Act
+        response = await self._apost_payload({"query": "What is Python?", "stream": True})
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(
+            (await self._read_stream(response)).decode(),
+            'event: titles\ndata: {"titles": ["Python"]}\n\n'
+            'event: token\ndata: {"text": "Python"}\n\n'
+            'event: done\ndata: {}\n\n',
+        )
+        mock_service.stream_query.assert_called_once_with("What is Python?", ANY, None)
+        mock_service.aquery.assert_not_called()
+
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    def test_post_flags_truncated_answer(self, mock_rag_service: MagicMock) -> None:
+        """Test that an answer cut short by the latency budget is flagged as truncated."""
+        # Arrange
+        async def aquery(user_query: str, deadline: Deadline, session_id: Optional[str]) -> str:
+            deadline.truncated = True
+            return "Partial answer"
+
+        mock_service = mock_rag_service.get_instance.return_value
+        mock_service.aquery = AsyncMock(side_effect=aquery)
+
+        # Act
+        response = self._post_payload({"query": "What is Python?", "budget_seconds": 5})
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"response": "Partial answer", "truncated": True})
+        deadline = mock_service.aquery.call_args.args[1]
+        self.assertEqual(deadline.budget_seconds, 5)
+
+    @override_settings(CHAT_LATENCY_BUDGET={"DEFAULT_SECONDS": 30, "MAX_SECONDS": 60})
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    def test_post_caps_requested_budget(self, mock_rag_service: MagicMock) -> None:
+        """Test that the requested latency budget cannot exceed the server maximum."""
+        # Arrange
+        mock_service = mock_rag_service.get_instance.return_value
+        mock_service.aquery = AsyncMock(return_value="Python is a high-level programming language...")
+
+        # Act
+        self._post_payload({"query": "What is Python?", "budget_seconds": 600})
+
+        # Assert
+        self.assertEqual(mock_service.aquery.call_args.args[1].budget_seconds, 60)
+
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    def test_post_has_no_budget_by_default(self, mock_rag_service: MagicMock) -> None:
+        """Test that a request without a budget is not cut short unless a default budget is configured."""
+        # Arrange
+        mock_service = mock_rag_service.get_instance.return_value
+        mock_service.aquery = AsyncMock(return_value="Python is a high-level programming language...")
+
+        # Act
+        response = self._post_payload({"query": "What is Python?"})
+
+        # Assert
+        self.assertEqual(response.json()["truncated"], False)
+        mock_service.aquery.assert_awaited_once_with("What is Python?", None, None)
+
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    def test_post_passes_session_id(self, mock_rag_service: MagicMock) -> None:
+        """Test that the session id of a follow-up turn is passed to the service."""
+        # Arrange
+        mock_service = mock_rag_service.get_instance.return_value
+        mock_service.aquery = AsyncMock(return_value="It has about 2 million inhabitants.")
+
+        # Act
+        response = self._post_payload({"query": "How many people live there?", "session_id": "conversation-1"})
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_service.aquery.assert_awaited_once_with("How many people live there?", ANY, "conversation-1")
+
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    def test_post_reports_stage_timings(self, mock_rag_service: MagicMock) -> None:
+        """Test that the time spent in each stage of the query is sent as a Server-Timing header."""
+        # Arrange
+        async def aquery(*args):
+            with StageTimer.get_instance().stage("title_extraction"):
+                return "Python is a high-level programming language..."
+
+        mock_rag_service.get_instance.return_value.aquery = aquery
+
+        # Act
+        response = self._post_payload({"query": "What is Python?"})
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(response["Server-Timing"], r"^title_extraction;dur=[\d.]+, total;dur=[\d.]+$")
+
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    def test_post_reports_token_usage_when_requested(self, mock_rag_service: MagicMock) -> None:
+        """Test that the LLM calls and tokens of each stage are returned when the request asks for them."""
+        # Arrange
+        async def aquery(*args):
+            with StageTimer.get_instance().stage("agent"):
+                return MockLLM().complete("What is Python?").text
+
+        mock_rag_service.get_instance.return_value.aquery = aquery
+
+        # Act
+        response = self._post_payload({"query": "What is Python?", "include_usage": True})
+        default_response = self._post_payload({"query": "What is Python?"})
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        usage = response.json()["usage"]
+        self.assertEqual(usage["llm_calls"], 1)
+        self.assertGreater(usage["prompt_tokens"], 0)
+        self.assertEqual(usage["stages"]["agent"]["llm_calls"], 1)
+        self.assertNotIn("usage", default_response.json())
+
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    async def test_post_stream_reports_token_usage_in_done_event(self, mock_rag_service: MagicMock) -> None:
+        """Test that a streaming request asking for the token usage gets it in the done event."""
+        # Arrange
+        def stream_query(*args):
+            MockLLM().complete("What is Python?")
+            yield ChatEvent(event="done", data={"route": "agent"})
+
+        mock_rag_service.get_instance.return_value.stream_query.side_effect = stream_query
+
+        # Act
+        response = await self._apost_payload({"query": "What is Python?", "stream": True, "include_usage": True})
+
+        # Assert
+        content = (await self._read_stream(response)).decode()
+        self.assertIn('"route": "agent", "usage": {"llm_calls": 1, ', content)
+
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    async def test_post_stream_sends_first_event_through_asgi_before_answer_is_finished(
+        self, mock_rag_service: MagicMock
+    ) -> None:
+        """Test that, served through ASGI, the first event reaches the client while the answer is still produced."""
+        # Arrange
+        answer_started = threading.Event()
+        answer_finished = []
+
+        def stream_query(*args):
+            yield ChatEvent(event="route", data={"route": "agent"})
+            answer_started.wait(2)
+            answer_finished.append(True)
+            yield ChatEvent(event="done")
+
+        mock_rag_service.get_instance.return_value.stream_query.side_effect = stream_query
+        body = json.dumps({"query": "What is Python?", "stream": True}).encode()
+        request_messages = [{"type": "http.request", "body": body, "more_body": False}]
+        disconnected = asyncio.Event()
+        sent = asyncio.Queue()
+
+        async def receive():
+            if request_messages:
+                return request_messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": self.url,
+            "raw_path": self.url.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"testserver"), (b"content-type", b"application/json")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        handler = asyncio.create_task(get_asgi_application()(scope, receive, sent.put))
+
+        # Act
+        start = await asyncio.wait_for(sent.get(), 5)
+        first_event = await asyncio.wait_for(sent.get(), 5)
+        finished_before_first_event = bool(answer_finished)
+        answer_started.set()
+        await asyncio.wait_for(handler, 5)
+
+        # Assert
+        self.assertEqual(start["status"], status.HTTP_200_OK)
+        self.assertEqual(first_event["body"], b'event: route\ndata: {"route": "agent"}\n\n')
+        self.assertTrue(first_event["more_body"])
+        self.assertFalse(finished_before_first_event)
+
+    def test_post_rejects_non_positive_budget(self) -> None:
+        """Test that a request with a non-positive latency budget returns a 400 status code."""
+        # Act
+        response = self._post_payload({"query": "What is Python?", "budget_seconds": 0})
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_stream_iterator_is_closed_when_client_stops_reading(self) -> None:
+        """Test that the event generator of a stream is closed, releasing what it holds, once the client is gone."""
+        # Arrange
+        closed = threading.Event()
+
+        def stream():
+            try:
+                while True:
+                    yield "event"
+            finally:
+                closed.set()
+
+        events = iterate_in_thread(stream())
+
+        # Act
+        first_event = await events.__anext__()
+        await events.aclose()
+
+        # Assert
+        self.assertEqual(first_event, "event")
+        self.assertTrue(await asyncio.to_thread(closed.wait, 5))
+
+    async def test_streams_wait_for_a_thread_of_the_bounded_pool(self) -> None:
+        """Test that the streams share a bounded thread pool, a stream starting once a thread is free."""
+        # Arrange
+        def endless():
+            while True:
+                yield "first"
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        with patch("api.views.chat.index._stream_executor", executor):
+            first_stream = iterate_in_thread(endless())
+            await first_stream.__anext__()
+            second_item = asyncio.ensure_future(iterate_in_thread(iter(["second"])).__anext__())
+            await asyncio.sleep(0.05)
+            started_before_first_closed = second_item.done()
+
+            # Act
+            await first_stream.aclose()
+            item = await asyncio.wait_for(second_item, 5)
+
+        # Assert
+        self.assertFalse(started_before_first_closed)
+        self.assertEqual(item, "second")
+        executor.shutdown()
+
     def _post_payload(self, valid_payload):
         return self.client.post(
             self.url,
@@ -102,3 +368,92 @@ class TestChatView(TestCase):
             content_type='application/json',
             format='json'
         )
+
+    async def _apost_payload(self, valid_payload):
+        return await AsyncClient().post(self.url, data=valid_payload, content_type='application/json')
+
+    @staticmethod
+    async def _read_stream(response) -> bytes:
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+
+class TestAsyncChatView(TestCase):
+    """Test cases for the async ChatView, called from an async client."""
+
+    def setUp(self) -> None:
+        """Set up test fixtures."""
+        self.url = "/api/chat/"
+        # API clients do not send CSRF tokens
+        self.async_client = AsyncClient(enforce_csrf_checks=True)
+
+    async def test_post_missing_query(self) -> None:
+        """Test that a request with a missing query returns a 400 status code."""
+        # Act
+        response = await self.async_client.post(self.url, data={}, content_type='application/json')
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        data = response.json()
+        self.assertEqual(data["error"], "Validation error")
+        self.assertTrue(any("Field 'query' is required" in msg for msg in data["details"]))
+
+    async def test_post_invalid_json(self) -> None:
+        """Test that a request with a malformed body returns a 400 status code."""
+        # Act
+        response = await self.async_client.post(self.url, data="not json", content_type='application/json')
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["error"], "Validation error")
+
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    async def test_post_success(self, mock_rag_service: MagicMock) -> None:
+        """Test that a valid request is answered by the async RAG pipeline."""
+        # Arrange
+        mock_service = mock_rag_service.get_instance.return_value
+        mock_service.aquery = AsyncMock(return_value="Python is a high-level programming language...")
+
+        # Act
+        response = await self.async_client.post(
+            self.url, data={"query": "What is Python?"}, content_type='application/json'
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["response"], "Python is a high-level programming language...")
+        self.assertFalse(response.json()["truncated"])
+        mock_service.aquery.assert_awaited_once_with("What is Python?", ANY, None)
+
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    async def test_post_reports_stage_timings(self, mock_rag_service: MagicMock) -> None:
+        """Test that the time spent in each stage of the query is sent as a Server-Timing header."""
+        # Arrange
+        async def aquery(*args):
+            with StageTimer.get_instance().stage("wikipedia_fetch"):
+                return "Python is a high-level programming language..."
+
+        mock_rag_service.get_instance.return_value.aquery = aquery
+
+        # Act
+        response = await self.async_client.post(
+            self.url, data={"query": "What is Python?"}, content_type='application/json'
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(response["Server-Timing"], r"^wikipedia_fetch;dur=[\d.]+, total;dur=[\d.]+$")
+
+    @patch('api.services.wikipedia_rag_service.WikipediaRagService')
+    async def test_service_error_handling(self, mock_rag_service: MagicMock) -> None:
+        """Test that service errors are properly handled."""
+        # Arrange
+        mock_rag_service.get_instance.return_value.aquery = AsyncMock(side_effect=Exception("Service error"))
+
+        # Act
+        response = await self.async_client.post(
+            self.url, data={"query": "test query"}, content_type='application/json'
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(response.json()["error"], "Unexpected error")
@@ -0,0 +1,52 @@
+"""
+Tests for the MetricsView API endpoint.
+
+This module contains test cases for the MetricsView, which exposes the RAG pipeline
+metrics in the Prometheus text exposition format.
+"""
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from api.instrumentation.stage_timer import StageTimer
+
+
+class TestMetricsView(TestCase):
+    """Test cases for the MetricsView API endpoint."""
+
+    def setUp(self) -> None:
+        """Set up test fixtures."""
+        self.url = "/api/metrics/"
+        self.timer = StageTimer.get_instance()
+        self.timer.clear()
+
+    @override_settings(
+        TITLE_CACHE={"ENABLED": False},
+        WIKIPEDIA_PAGE_CACHE={"ENABLED": False},
+        EMBEDDING_CACHE={"ENABLED": False},
+        SEMANTIC_ANSWER_CACHE={"ENABLED": False},
+        CHAT_SESSIONS={"ENABLED": False},
+    )
+    def test_get_exports_stage_histograms(self) -> None:
+        """Test that the stage timings are exported as Prometheus histograms."""
+        # Arrange
+        self.timer.observe("wikipedia_fetch", 0.3)
+
+        # Act
+        response = self.client.get(self.url)
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn("# TYPE wikipedia_rag_stage_duration_seconds histogram", body)
+        self.assertIn('wikipedia_rag_stage_duration_seconds_bucket{stage="wikipedia_fetch",le="0.25"} 0', body)
+        self.assertIn('wikipedia_rag_stage_duration_seconds_bucket{stage="wikipedia_fetch",le="0.5"} 1', body)
+        self.assertIn('wikipedia_rag_stage_duration_seconds_count{stage="wikipedia_fetch"} 1', body)
+
+    def test_post_not_allowed(self) -> None:
+        """Test that the metrics can only be read."""
+        # Act
+        response = self.client.post(self.url)
+
+        # Assert
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)